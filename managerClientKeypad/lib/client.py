@@ -18,15 +18,28 @@ import os
 import base64
 import random
 import json
+import struct
+import collections
 from localObjects import SensorDataType
 BUFSIZE = 4096
 
+# Header of a length-prefixed message (length) and of a message if
+# pipelined transactions are used (length, kind, message id) and the maximum
+# size of a message that is accepted.
+FRAMEHEADERFORMAT = "!I"
+PIPELINEDHEADERFORMAT = "!IBI"
+MAXMESSAGESIZE = 16777216
+
+# Kinds of messages if pipelined transactions are used.
+MSGKIND_REQUEST = 0
+MSGKIND_RESPONSE = 1
+
 
 # simple class of an ssl tcp client
 class Client:
 
 	def __init__(self, host, port, serverCAFile, clientCertFile,
-		clientKeyFile):
+		clientKeyFile, sslContext=None, sslSession=None):
 		self.host = host
 		self.port = port
 		self.serverCAFile = serverCAFile
@@ -35,32 +48,209 @@ class Client:
 		self.socket = None
 		self.sslSocket = None
 
+		# SSL context of the connection (created on connect if it is not
+		# shared with a previous connection) and the TLS/SSL session of
+		# a previous connection that is resumed.
+		self.sslContext = sslContext
+		self.sslSession = sslSession
+
+		# Flag that indicates if length-prefixed message framing is used
+		# (is negotiated during the authentication).
+		self.useFraming = False
+
+		# Flag that indicates if pipelined transactions are used instead
+		# of RTS/CTS (is negotiated during the authentication and
+		# needs message framing).
+		self.usePipelining = False
+
+		# Buffer of received data that does not belong to a returned
+		# message yet.
+		self.recvBuffer = bytearray()
+
+		# Id of the last request sent.
+		self.lastMessageId = 0
+
+		# Received requests that were not returned yet because a
+		# response was awaited (tuples of the form (messageId, message)).
+		self.receivedRequests = collections.deque()
+
+		# State of the transaction the current thread is in.
+		self.threadState = threading.local()
+
 
 	def connect(self):
 		self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 
-		# check if a client certificate is required
-		if (self.clientCertFile is None
-			or self.clientKeyFile is None):
-			self.sslSocket = ssl.wrap_socket(self.socket,
-				ca_certs=self.serverCAFile, cert_reqs=ssl.CERT_REQUIRED)
+		# Create the SSL context if it is not shared with
+		# a previous connection.
+		if self.sslContext is None:
+			self.sslContext = ssl.SSLContext(ssl.PROTOCOL_SSLv23)
+			self.sslContext.verify_mode = ssl.CERT_REQUIRED
+			self.sslContext.load_verify_locations(cafile=self.serverCAFile)
+
+			# check if a client certificate is required
+			if (self.clientCertFile is not None
+				and self.clientKeyFile is not None):
+				self.sslContext.load_cert_chain(
+					certfile=self.clientCertFile,
+					keyfile=self.clientKeyFile)
+
+		# Resume the TLS/SSL session of the previous connection
+		# (only given if the ssl module supports it).
+		if self.sslSession is None:
+			self.sslSocket = self.sslContext.wrap_socket(self.socket)
 		else:
-			self.sslSocket = ssl.wrap_socket(self.socket,
-				ca_certs=self.serverCAFile, cert_reqs=ssl.CERT_REQUIRED,
-				certfile=self.clientCertFile, keyfile=self.clientKeyFile)
+			self.sslSocket = self.sslContext.wrap_socket(self.socket,
+				session=self.sslSession)
 
 		self.sslSocket.connect((self.host, self.port))
 
 
+	# Returns the TLS/SSL session of the connection (None if the ssl
+	# module does not support resuming sessions).
+	def getSslSession(self):
+		return getattr(self.sslSocket, "session", None)
+
+
+	# Returns if the TLS/SSL session of a previous connection was resumed.
+	def isSslSessionResumed(self):
+		return getattr(self.sslSocket, "session_reused", False)
+
+
+	# Internal function that returns the next complete message
+	# from the receive buffer (or None if it is incomplete) as a tuple
+	# of the form (kind, messageId, message).
+	def _getBufferedMessage(self):
+
+		if self.usePipelining:
+			headerFormat = PIPELINEDHEADERFORMAT
+		else:
+			headerFormat = FRAMEHEADERFORMAT
+		headerSize = struct.calcsize(headerFormat)
+
+		if len(self.recvBuffer) < headerSize:
+			return None
+
+		header = struct.unpack_from(headerFormat, self.recvBuffer)
+		messageSize = header[0]
+		if messageSize > MAXMESSAGESIZE:
+			raise ValueError("Message size %d too large." % messageSize)
+
+		if len(self.recvBuffer) < headerSize + messageSize:
+			return None
+
+		message = str(self.recvBuffer[headerSize:headerSize + messageSize])
+		del self.recvBuffer[:headerSize + messageSize]
+
+		if self.usePipelining:
+			return (header[1], header[2], message)
+		return (None, None, message)
+
+
+	# Internal function that receives one complete message from
+	# the server (or None if the connection was closed).
+	def _recvMessage(self, buffsize):
+
+		while True:
+			message = self._getBufferedMessage()
+			if message is not None:
+				return message
+
+			# NOTE: received data stays in the buffer if the
+			# receiving is interrupted (i.e. by a timeout).
+			chunk = self.sslSocket.recv(max(buffsize, BUFSIZE))
+			if not chunk:
+				return None
+			self.recvBuffer.extend(chunk)
+
+
+	# Internal function that receives the response with the given id
+	# or (if no id is given) the next request. Requests received while
+	# waiting for a response are kept for the next receive.
+	def _recvPipelined(self, buffsize, messageId):
+
+		if messageId is None and len(self.receivedRequests) != 0:
+			return (MSGKIND_REQUEST,) + self.receivedRequests.popleft()
+
+		while True:
+			message = self._recvMessage(buffsize)
+			if message is None:
+				return (None, None, "")
+
+			kind, receivedId, data = message
+			if messageId is None or kind != MSGKIND_REQUEST:
+				return message
+
+			self.receivedRequests.append((receivedId, data))
+
+
+	# Sends data to the server. If pipelined transactions are used,
+	# the data is sent as response if the current thread handles a
+	# received request and otherwise as request whose response is
+	# returned by the next receive of the current thread.
 	def send(self, data):
-		count = self.sslSocket.send(data)
 
+		if not self.useFraming:
+			self.sslSocket.sendall(data)
+
+		elif not self.usePipelining:
+			self.sslSocket.sendall(struct.pack(FRAMEHEADERFORMAT,
+				len(data)) + data)
+
+		else:
+			replyId = getattr(self.threadState, "replyId", None)
+			if replyId is not None:
+				self.threadState.replyId = None
+				kind = MSGKIND_RESPONSE
+				messageId = replyId
+
+			else:
+				self.lastMessageId = (self.lastMessageId + 1) & 0xffffffff
+				kind = MSGKIND_REQUEST
+				messageId = self.lastMessageId
+				self.threadState.awaitedId = messageId
 
+			self.sslSocket.sendall(struct.pack(PIPELINEDHEADERFORMAT,
+				len(data), kind, messageId) + data)
+
+
+	# Receives data from the server. If message framing is used,
+	# one complete message is returned (independent of the buffer size).
 	def recv(self, buffsize, timeout=20.0):
 		data = None
 		self.sslSocket.settimeout(timeout)
-		data = self.sslSocket.recv(buffsize)
-		self.sslSocket.settimeout(None)
+
+		try:
+			if not self.useFraming:
+				data = self.sslSocket.recv(buffsize)
+
+			elif not self.usePipelining:
+				message = self._recvMessage(buffsize)
+				if message is None:
+					data = ""
+				else:
+					data = message[2]
+
+			else:
+				awaitedId = getattr(self.threadState, "awaitedId", None)
+				self.threadState.awaitedId = None
+				self.threadState.replyId = None
+
+				kind, messageId, data = self._recvPipelined(buffsize,
+					awaitedId)
+
+				if kind == MSGKIND_REQUEST:
+					self.threadState.replyId = messageId
+
+				# A response to another request than the awaited one
+				# means that the server does not stick to the protocol.
+				elif (kind == MSGKIND_RESPONSE
+					and messageId != awaitedId):
+					raise ValueError("Unexpected response %d." % messageId)
+
+		finally:
+			self.sslSocket.settimeout(None)
+
 		return data
 
 
@@ -85,6 +275,15 @@ class ServerCommunication:
 		# instance of the used client class
 		self.client = None
 
+		# SSL context and TLS/SSL session that are kept to resume
+		# the session when reconnecting to the server.
+		self.sslContext = None
+		self.sslSession = None
+
+		# Number of resumed and full TLS/SSL handshakes with the server.
+		self.sslResumedHandshakes = 0
+		self.sslFullHandshakes = 0
+
 		# get global configured data
 		self.globalData = globalData
 		self.version = self.globalData.version
@@ -113,6 +312,11 @@ class ServerCommunication:
 		# transaction with the server
 		self.transactionInitiation = False
 
+		# Payload and version of the last status update that was received
+		# (needed to apply delta status updates).
+		self.statusPayload = None
+		self.statusVersion = None
+
 
 	# internal function that acquires the lock
 	def _acquireLock(self):
@@ -1458,6 +1662,13 @@ class ServerCommunication:
 	def _initiateTransaction(self, messageType, messageSize,
 		acquireLock=False):
 
+		# Pipelined transactions are identified by the message ids
+		# and do not need an RTS/CTS handshake.
+		if self.client.usePipelining:
+			if acquireLock:
+				self._acquireLock()
+			return True
+
 		# try to get the exclusive state to be allowed to initiate a
 		# transaction with the server
 		while True:
@@ -1607,7 +1818,10 @@ class ServerCommunication:
 			"version": self.version,
 			"rev": self.rev,
 			"username": self.username,
-			"password": self.password}
+			"password": self.password,
+			"framing": "length",
+			"transactions": "pipelined",
+			"statusUpdates": "delta"}
 		utcTimestamp = int(time.time())
 		message = {"clientTime": utcTimestamp,
 			"size": regMessageSize,
@@ -1726,6 +1940,22 @@ class ServerCommunication:
 					% (self.fileName, message["payload"]["result"]))
 				return False
 
+			# Use length-prefixed message framing if the server supports
+			# it (older servers do not send this option).
+			if ("framing" in message["payload"].keys()
+				and str(message["payload"]["framing"]).upper() == "LENGTH"):
+				logging.debug("[%s]: Using message framing." % self.fileName)
+				self.client.useFraming = True
+
+				# Use pipelined transactions if the server supports them
+				# (only possible together with message framing).
+				if ("transactions" in message["payload"].keys()
+					and str(message["payload"]["transactions"]).upper()
+					== "PIPELINED"):
+					logging.debug("[%s]: Using pipelined transactions."
+						% self.fileName)
+					self.client.usePipelining = True
+
 		except Exception as e:
 			logging.exception("[%s]: Receiving authentication response failed."
 				% self.fileName)
@@ -1851,9 +2081,88 @@ class ServerCommunication:
 		return True
 
 
+	# Internal function that applies a received delta status update to
+	# the last received status update. Returns the resulting status
+	# message or None if the delta status update does not fit to the
+	# last received status update (a full status update is needed).
+	def _applyStatusDelta(self, incomingMessage):
+
+		if (self.statusPayload is None
+			or incomingMessage["payload"]["baseVersion"]
+			!= self.statusVersion):
+			return None
+
+		payload = {"type": "request",
+			"version": incomingMessage["payload"]["version"],
+			"alertLevels": self.statusPayload["alertLevels"]}
+
+		for kind, key in [("options", "type"),
+			("nodes", "nodeId"),
+			("sensors", "sensorId"),
+			("managers", "managerId"),
+			("alerts", "alertId")]:
+
+			entities = collections.OrderedDict()
+			for entity in self.statusPayload[kind]:
+				entities[entity[key]] = entity
+
+			for entity in incomingMessage["payload"][kind]:
+				entities[entity[key]] = entity
+
+			for entityKey in incomingMessage["payload"][
+				"removed" + kind[0].upper() + kind[1:]]:
+				entities.pop(entityKey, None)
+
+			payload[kind] = entities.values()
+
+		message = {"serverTime": incomingMessage["serverTime"],
+			"message": incomingMessage["message"],
+			"payload": payload}
+		return message
+
+
 	# internal function that handles received status updates
+	# (full or delta status updates)
 	def _statusUpdateHandler(self, incomingMessage):
 
+		# Merge a delta status update into the last received status update.
+		if str(incomingMessage["message"]).upper() == "STATUSDELTA":
+			try:
+				statusMessage = self._applyStatusDelta(incomingMessage)
+
+			except Exception as e:
+				logging.exception("[%s]: Received delta status "
+					% self.fileName
+					+ "invalid.")
+				statusMessage = None
+
+			# Request a full status update if the delta status update
+			# can not be applied.
+			if statusMessage is None:
+				logging.warning("[%s]: Not able to apply delta " % self.fileName
+					+ "status update. Requesting full status update.")
+
+				self.statusPayload = None
+				self.statusVersion = None
+
+				try:
+					payload = {"type": "response", "result": "resync"}
+					utcTimestamp = int(time.time())
+					message = {"clientTime": utcTimestamp,
+						"message": incomingMessage["message"],
+						"payload": payload}
+					self.client.send(json.dumps(message))
+
+				except Exception as e:
+					logging.exception("[%s]: Sending status " % self.fileName
+						+ "response failed.")
+
+					return False
+
+				return True
+
+			incomingMessage = statusMessage
+
 		options = list()
 		nodes = list()
 		sensors = list()
@@ -2210,14 +2519,21 @@ class ServerCommunication:
 
 			return False
 
+		# Keep the status update to apply following delta status updates
+		# (older servers do not send a version).
+		self.statusPayload = incomingMessage["payload"]
+		self.statusVersion = incomingMessage["payload"].get("version")
+
 		# sending sensor alert response
 		logging.debug("[%s]: Sending status " % self.fileName
 			+ "response message.")
 		try:
 			payload = {"type": "response", "result": "ok"}
+			if self.statusVersion is not None:
+				payload["version"] = self.statusVersion
 			utcTimestamp = int(time.time())
 			message = {"clientTime": utcTimestamp,
-				"message": "status", "payload": payload}
+				"message": incomingMessage["message"], "payload": payload}
 			self.client.send(json.dumps(message))
 
 		except Exception as e:
@@ -2512,7 +2828,8 @@ class ServerCommunication:
 
 		# create client instance and connect to the server
 		self.client = Client(self.host, self.port, self.serverCAFile,
-			self.clientCertFile, self.clientKeyFile)
+			self.clientCertFile, self.clientKeyFile, self.sslContext,
+			self.sslSession)
 		try:
 			self.client.connect()
 		except Exception as e:
@@ -2523,10 +2840,22 @@ class ServerCommunication:
 			except:
 				pass
 
+			# Do not try to resume the session again.
+			self.sslSession = None
+
 			self._releaseLock()
 
 			return False
 
+		self.sslContext = self.client.sslContext
+		if self.client.isSslSessionResumed():
+			self.sslResumedHandshakes += 1
+		else:
+			self.sslFullHandshakes += 1
+		logging.debug("[%s]: SSL handshakes resumed: %d, full: %d."
+			% (self.fileName, self.sslResumedHandshakes,
+			self.sslFullHandshakes))
+
 		# Build registration message.
 		regMessage = self._buildRegistrationMessage()
 
@@ -2550,6 +2879,10 @@ class ServerCommunication:
 
 			return False
 
+		# Keep the TLS/SSL session (after the first messages because
+		# the server can send session tickets after the handshake).
+		self.sslSession = self.client.getSslSession()
+
 		# get the initial status update from the server
 		try:
 			logging.debug("[%s]: Receiving initial status update."
@@ -2605,10 +2938,10 @@ class ServerCommunication:
 						self._releaseLock()
 						return False
 
-			# if no RTS was received
+			# if no RTS was received and no pipelined transactions are used
 			# => server does not stick to protocol
 			# => terminate session
-			else:
+			elif not self.client.usePipelining:
 
 				logging.error("[%s]: Did not receive " % self.fileName
 					+ "RTS. Server sent: '%s'." % data)
@@ -2776,10 +3109,10 @@ class ServerCommunication:
 							self._releaseLock()
 							return
 
-				# if no RTS was received
+				# if no RTS was received and no pipelined transactions are used
 				# => server does not stick to protocol
 				# => terminate session
-				else:
+				elif not self.client.usePipelining:
 
 					logging.error("[%s]: Did not receive " % self.fileName
 						+ "RTS. Server sent: '%s'." % data)
@@ -2884,9 +3217,9 @@ class ServerCommunication:
 						self._releaseLock()
 						return
 
-			# check if STATUS was received
+			# check if STATUS or STATUSDELTA was received
 			# => get status update
-			elif (command == "STATUS"):
+			elif (command == "STATUS" or command == "STATUSDELTA"):
 
 					# get status update
 					if not self._statusUpdateHandler(message):
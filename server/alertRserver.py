@@ -11,7 +11,8 @@ import sys
 import os
 from lib import ConnectionWatchdog, ConfigWatchdog
 from lib import ServerSession, ThreadedTCPServer
-from lib import Sqlite, Mysql
+from lib import EventLoopServerSession, EventLoopTCPServer
+from lib import Sqlite, Mysql, Memory, CachedStorage, TimedStorage
 from lib import SensorDataType, AlertLevel
 from lib import SensorTimeoutSensor, NodeTimeoutSensor, \
 	AlertSystemActiveSensor, VersionInformerSensor
@@ -19,16 +20,19 @@ from lib import SensorAlertExecuter
 from lib import RuleStart, RuleElement, RuleBoolean, RuleSensor, RuleWeekday, \
 	RuleMonthday, RuleHour, RuleMinute, RuleSecond
 from lib import CSVBackend
-from lib import ManagerUpdateExecuter
+from lib import ManagerUpdateExecuter, ManagerStatusSnapshot
 from lib import GlobalData
 from lib import SurveyExecuter
+from lib import SensorHistory
 from lib import VersionInformer
+from lib import MetricsServer
 import socket
 import ssl
 import logging
 import time
 import threading
 import random
+import signal
 import xml.etree.ElementTree
 
 
@@ -44,6 +48,12 @@ def makePath(inputLocation):
 	return os.path.dirname(os.path.abspath(__file__)) + "/" + inputLocation
 
 
+# Function that terminates the server when it receives SIGTERM
+# (the server is shut down the same way as with Ctrl-C).
+def sigtermHandler(signum, frame):
+	sys.exit(0)
+
+
 # function is used to parse a rule of an alert level recursively
 def parseRuleRecursively(currentRoot, currentRule):
 
@@ -820,6 +830,18 @@ if __name__ == '__main__':
 		# configure user credentials backend
 		globalData.logger.debug("[%s]: Parsing user backend configuration."
 			% fileName)
+		# The verification settings are optional (configs of older
+		# versions do not contain them).
+		globalData.userBackendVerifyWorkers = int(configRoot.find(
+			"storage").find("userBackend").attrib.get("verifyWorkers",
+			globalData.userBackendVerifyWorkers))
+		globalData.userBackendCacheTime = int(configRoot.find(
+			"storage").find("userBackend").attrib.get("cacheTime",
+			globalData.userBackendCacheTime))
+		if (globalData.userBackendVerifyWorkers < 1
+			or globalData.userBackendCacheTime < 0):
+			raise ValueError("No valid value for 'verifyWorkers' or "
+				+ "'cacheTime' attribute in userBackend tag.")
 		userBackendMethod = str(
 			configRoot.find("storage").find("userBackend").attrib[
 			"method"]).upper()
@@ -833,6 +855,22 @@ if __name__ == '__main__':
 		# configure storage backend (check which backend is configured)
 		globalData.logger.debug("[%s]: Parsing storage backend configuration."
 			% fileName)
+		# The group commit settings are optional (configs of older
+		# versions do not contain them).
+		globalData.storageGroupCommit = (str(configRoot.find(
+			"storage").find("storageBackend").attrib.get(
+			"groupCommit", globalData.storageGroupCommit)).upper() == "TRUE")
+		globalData.storageGroupCommitWindow = int(configRoot.find(
+			"storage").find("storageBackend").attrib.get(
+			"groupCommitWindow", globalData.storageGroupCommitWindow))
+		globalData.storageGroupCommitMaxBatch = int(configRoot.find(
+			"storage").find("storageBackend").attrib.get(
+			"groupCommitMaxBatch", globalData.storageGroupCommitMaxBatch))
+		if (globalData.storageGroupCommitWindow < 0
+			or globalData.storageGroupCommitMaxBatch < 1):
+			raise ValueError("No valid value for 'groupCommitWindow' or "
+				+ "'groupCommitMaxBatch' attribute in storageBackend tag.")
+
 		userBackendMethod = str(
 			configRoot.find("storage").find("storageBackend").attrib[
 			"method"]).upper()
@@ -857,9 +895,73 @@ if __name__ == '__main__':
 				backendDatabase, backendUsername, backendPassword,
 				globalData)
 
+		elif userBackendMethod == "MEMORY":
+
+			# The journal sync settings are optional (configs of older
+			# versions do not contain them).
+			globalData.storageBackendMemoryJournalSync = str(configRoot.find(
+				"storage").find("storageBackend").attrib.get("journalSync",
+				globalData.storageBackendMemoryJournalSync)).lower()
+			globalData.storageBackendMemoryJournalSyncInterval = int(
+				configRoot.find("storage").find("storageBackend").attrib.get(
+				"journalSyncInterval",
+				globalData.storageBackendMemoryJournalSyncInterval))
+			if (globalData.storageBackendMemoryJournalSync
+				not in ["commit", "batch", "interval"]
+				or globalData.storageBackendMemoryJournalSyncInterval < 1):
+				raise ValueError("No valid value for 'journalSync' or "
+					+ "'journalSyncInterval' attribute in storageBackend "
+					+ "tag.")
+
+			globalData.storage = Memory(globalData.storageBackendMemoryFile,
+				globalData)
+
 		else:
 			raise ValueError("No valid storage backend method in config file.")
 
+		# The sensor alert journal is optional (configs of older versions
+		# do not contain it).
+		globalData.sensorAlertJournal = (str(configRoot.find(
+			"storage").find("storageBackend").attrib.get(
+			"sensorAlertJournal", globalData.sensorAlertJournal)).upper()
+			== "TRUE")
+
+		# Parse the settings of the history of the sensor data (the
+		# history is not activated if configs of older versions do not
+		# contain them).
+		sensorHistoryItem = configRoot.find("storage").find("sensorHistory")
+		sensorHistoryActivated = False
+		if sensorHistoryItem is not None:
+			sensorHistoryActivated = (str(sensorHistoryItem.attrib[
+				"activated"]).upper() == "TRUE")
+		if sensorHistoryActivated:
+			globalData.sensorHistoryDirectory = makePath(str(
+				sensorHistoryItem.attrib["directory"]))
+			globalData.sensorHistoryRawRetention = int(
+				sensorHistoryItem.attrib.get("rawRetention",
+				globalData.sensorHistoryRawRetention))
+			globalData.sensorHistoryMinuteRetention = int(
+				sensorHistoryItem.attrib.get("minuteRetention",
+				globalData.sensorHistoryMinuteRetention))
+			globalData.sensorHistoryHourRetention = int(
+				sensorHistoryItem.attrib.get("hourRetention",
+				globalData.sensorHistoryHourRetention))
+			globalData.sensorHistoryDayRetention = int(
+				sensorHistoryItem.attrib.get("dayRetention",
+				globalData.sensorHistoryDayRetention))
+			if (globalData.sensorHistoryRawRetention < 0
+				or globalData.sensorHistoryMinuteRetention < 0
+				or globalData.sensorHistoryHourRetention < 0
+				or globalData.sensorHistoryDayRetention < 0):
+				raise ValueError("No valid value for retention attribute "
+					+ "in sensorHistory tag.")
+
+		# Serve reads of the rarely changing data (nodes, sensors, alerts,
+		# managers, options) from memory (the calls that reach the storage
+		# backend are timed for the metrics).
+		globalData.storage = CachedStorage(TimedStorage(globalData.storage,
+			globalData.metrics), globalData)
+
 		# Add server as node to the database.
 		serverUsername = globalData.storage.getUniqueID()
 		if not globalData.storage.addNode(serverUsername,
@@ -883,6 +985,22 @@ if __name__ == '__main__':
 			configRoot.find("general").find("survey").attrib[
 			"participate"]).upper() == "TRUE")
 
+		# Get metrics configurations.
+		globalData.logger.debug("[%s]: Parsing metrics configuration."
+			% fileName)
+		# The metrics are not activated if configs of older versions do
+		# not contain their settings.
+		metricsItem = configRoot.find("general").find("metrics")
+		metricsActivated = False
+		if metricsItem is not None:
+			metricsActivated = (str(metricsItem.attrib[
+				"activated"]).upper() == "TRUE")
+		if metricsActivated:
+			globalData.metricsPort = int(metricsItem.attrib.get("port",
+				globalData.metricsPort))
+			if globalData.metricsPort < 1 or globalData.metricsPort > 65535:
+				raise ValueError("No valid port for metrics in config file.")
+
 		# get server configurations
 		globalData.logger.debug("[%s]: Parsing server configuration."
 			% fileName)
@@ -891,6 +1009,20 @@ if __name__ == '__main__':
 		globalData.serverKeyFile = makePath(str(configRoot.find(
 			"general").find("server").attrib["keyFile"]))
 		port = int(configRoot.find("general").find("server").attrib["port"])
+		# The engine and the workers are optional (configs of older
+		# versions do not contain them).
+		globalData.serverEngine = str(configRoot.find(
+			"general").find("server").attrib.get("engine",
+			globalData.serverEngine)).lower()
+		if (globalData.serverEngine != "threaded"
+			and globalData.serverEngine != "eventloop"):
+			raise ValueError("No valid server engine in config file.")
+		globalData.serverWorkers = int(configRoot.find(
+			"general").find("server").attrib.get("workers",
+			globalData.serverWorkers))
+		if globalData.serverWorkers < 1:
+			raise ValueError("Number of server workers has to be "
+				+ "at least 1.")
 
 		if (os.path.exists(globalData.serverCertFile) is False
 			or os.path.exists(globalData.serverKeyFile) is False):
@@ -1538,6 +1670,19 @@ if __name__ == '__main__':
 	globalData.sensorAlertExecuter.daemon = True
 	globalData.sensorAlertExecuter.start()
 
+	# Start the thread that stores the history of the sensor data.
+	if sensorHistoryActivated:
+		globalData.logger.info("[%s] Starting sensor history thread."
+			% fileName)
+		globalData.sensorHistory = SensorHistory(globalData)
+		# set thread to daemon
+		# => threads terminates when main thread terminates
+		globalData.sensorHistory.daemon = True
+		globalData.sensorHistory.start()
+
+	# Create the status snapshot that is shared by all manager clients.
+	globalData.managerStatusSnapshot = ManagerStatusSnapshot(globalData)
+
 	globalData.logger.info("[%s] Starting manager client manage thread."
 		% fileName)
 	# start the thread that handles the manager updates
@@ -1550,8 +1695,12 @@ if __name__ == '__main__':
 	# start server process
 	while 1:
 		try:
-			server = ThreadedTCPServer(globalData, ('0.0.0.0', port),
-				ServerSession)
+			if globalData.serverEngine == "eventloop":
+				server = EventLoopTCPServer(globalData, ('0.0.0.0', port),
+					EventLoopServerSession)
+			else:
+				server = ThreadedTCPServer(globalData, ('0.0.0.0', port),
+					ServerSession)
 			break
 		except Exception as e:
 			globalData.logger.exception("[%s]: Starting server failed. "
@@ -1559,12 +1708,15 @@ if __name__ == '__main__':
 				+ "Try again in 5 seconds.")
 			time.sleep(5)
 
-	globalData.logger.info("[%s] Starting server thread." % fileName)
-	serverThread = threading.Thread(target=server.serve_forever)
-	# set thread to daemon
-	# => threads terminates when main thread terminates
-	serverThread.daemon =True
-	serverThread.start()
+	# The event loop engine runs its event loop in the main thread
+	# (it is the only thread that accepts the client connections).
+	if globalData.serverEngine != "eventloop":
+		globalData.logger.info("[%s] Starting server thread." % fileName)
+		serverThread = threading.Thread(target=server.serve_forever)
+		# set thread to daemon
+		# => threads terminates when main thread terminates
+		serverThread.daemon =True
+		serverThread.start()
 
 	# start a watchdog thread that controls all server sessions
 	globalData.logger.info("[%s] Starting connection watchdog thread."
@@ -1608,12 +1760,41 @@ if __name__ == '__main__':
 		surveyExecuter.daemon = True
 		surveyExecuter.start()
 
+	# Only start the metrics endpoint if it is activated.
+	if metricsActivated:
+		globalData.logger.info("[%s] Starting metrics server thread."
+			% fileName)
+		try:
+			globalData.metricsServer = MetricsServer(globalData)
+			# set thread to daemon
+			# => threads terminates when main thread terminates
+			globalData.metricsServer.daemon = True
+			globalData.metricsServer.start()
+		except Exception as e:
+			globalData.logger.exception("[%s]: Starting metrics server "
+				% fileName
+				+ "failed.")
+
 	globalData.logger.info("[%s] Server started." % fileName)
 
 	# Wait until the connection watchdog is initialized.
 	while not globalData.connectionWatchdog.isInitialized():
 		time.sleep(0.5)
 
+	signal.signal(signal.SIGTERM, sigtermHandler)
+
 	# handle requests in an infinity loop
-	while True:
-		server.handle_request()
\ No newline at end of file
+	try:
+		if globalData.serverEngine == "eventloop":
+			server.serve_forever()
+
+		while True:
+			server.handle_request()
+
+	finally:
+		globalData.logger.info("[%s] Shutting down server." % fileName)
+
+		# Write the queued history of the sensor data before exiting.
+		if globalData.sensorHistory is not None:
+			globalData.sensorHistory.exit()
+			globalData.sensorHistory.join(10)
\ No newline at end of file
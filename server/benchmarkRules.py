@@ -0,0 +1,353 @@
+#!/usr/bin/python2
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: http://blog.h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+from lib import SensorAlertExecuter
+from lib import GlobalData
+from lib import AlertLevel, Sensor, SensorDataType
+from lib import RuleStart, RuleBoolean
+from alertRserver import parseRuleRecursively
+import xml.etree.ElementTree
+import logging
+import optparse
+import cProfile
+import pstats
+import random
+import time
+import sys
+import gc
+
+
+# Storage that holds the sensors of the benchmark in memory and implements
+# only the functions the sensor alert executer uses.
+class BenchmarkStorage:
+
+	def __init__(self, sensorCount):
+
+		self.nodeId = 1
+		self.username = "benchmark"
+		self.sensors = dict()
+		for i in range(sensorCount):
+			sensor = Sensor()
+			sensor.sensorId = i + 1
+			sensor.nodeId = self.nodeId
+			sensor.remoteSensorId = i
+			sensor.description = "benchmark sensor %d" % i
+			sensor.state = 0
+			sensor.alertLevels = list()
+			sensor.alertDelay = 0
+			sensor.dataType = SensorDataType.NONE
+			sensor.data = None
+			self.sensors[sensor.sensorId] = sensor
+
+
+	def getNodeId(self, username, logger=None):
+		if username == self.username:
+			return self.nodeId
+		return None
+
+
+	def getSensorId(self, nodeId, remoteSensorId, logger=None):
+		if nodeId == self.nodeId and (remoteSensorId + 1) in self.sensors:
+			return remoteSensorId + 1
+		return None
+
+
+	def getSensorById(self, sensorId, logger=None):
+		return self.sensors.get(sensorId)
+
+
+	def getSensorData(self, sensorId, logger=None):
+		return None
+
+
+	def getSensorAlerts(self, logger=None):
+		return list()
+
+
+	def deleteSensorAlert(self, sensorAlertId, logger=None):
+		return True
+
+
+	def isAlertSystemActive(self, logger=None):
+		return True
+
+
+# Sensor alert executer that measures the time of each evaluation of the
+# rules of an alert level.
+class BenchmarkSensorAlertExecuter(SensorAlertExecuter):
+
+	def __init__(self, globalData):
+		SensorAlertExecuter.__init__(self, globalData)
+		self.evaluationTimes = list()
+
+
+	def _updateRule(self, sensorAlertList, alertLevel):
+		start = time.time()
+		result = SensorAlertExecuter._updateRule(self, sensorAlertList,
+			alertLevel)
+		self.evaluationTimes.append(time.time() - start)
+		return result
+
+
+# Function that creates a random sensor rule element as xml string.
+def createSensorXml(sensorCount):
+	return ("<sensor username=\"benchmark\" remoteSensorId=\"%d\" "
+		% random.randint(0, sensorCount - 1)
+		+ "timeTriggeredFor=\"%d\" />" % random.randint(1, 30))
+
+
+# Function that creates a random rule element as xml string.
+def createRuleXml(depth, width, sensorCount):
+
+	if depth == 0 or random.random() < 0.2:
+		elementType = random.random()
+
+		# sensor element
+		if elementType < 0.7:
+			return createSensorXml(sensorCount)
+
+		# time based elements
+		elif elementType < 0.8:
+			return "<hour time=\"local\" start=\"0\" end=\"23\" />"
+		elif elementType < 0.9:
+			start = random.randint(0, 59)
+			return "<minute start=\"%d\" end=\"%d\" />" \
+				% (start, random.randint(start, 59))
+		else:
+			return "<weekday time=\"utc\" weekday=\"%d\" />" \
+				% random.randint(0, 6)
+
+	booleanType = random.choice(["and", "or", "not"])
+	if booleanType == "not":
+		children = [createRuleXml(depth - 1, width, sensorCount)]
+	else:
+		children = [createRuleXml(depth - 1, width, sensorCount)
+			for i in range(random.randint(1, width))]
+
+	return "<%s>%s</%s>" % (booleanType, "".join(children), booleanType)
+
+
+# Function that creates an alert level with a rule chain of the given
+# number of rules (parsed the same way as the rules in the config file).
+def createAlertLevel(level, ruleCount, depth, width, sensorCount):
+
+	alertLevel = AlertLevel()
+	alertLevel.level = level
+	alertLevel.name = "benchmark %d" % level
+	alertLevel.triggerAlways = True
+	alertLevel.triggerAlertTriggered = True
+	alertLevel.triggerAlertNormal = True
+	alertLevel.rulesActivated = True
+	alertLevel.rules = list()
+
+	for order in range(ruleCount):
+
+		booleanType = random.choice(["and", "or"])
+		children = [createRuleXml(depth - 1, width, sensorCount)
+			for i in range(random.randint(1, width))]
+
+		# each rule has at least one sensor that is not negated
+		children.append(createSensorXml(sensorCount))
+
+		ruleRoot = xml.etree.ElementTree.fromstring("<%s>%s</%s>"
+			% (booleanType, "".join(children), booleanType))
+
+		ruleElement = RuleStart()
+		ruleElement.order = order
+		ruleElement.minTimeAfterPrev = 0.0
+		ruleElement.maxTimeAfterPrev = 60.0
+		ruleElement.counterActivated = (random.random() < 0.3)
+		ruleElement.counterLimit = 5
+		ruleElement.counterWaitTime = 60
+
+		ruleStart = RuleBoolean()
+		ruleStart.type = booleanType
+		ruleElement.type = "boolean"
+		ruleElement.element = ruleStart
+		parseRuleRecursively(ruleRoot, ruleStart)
+
+		alertLevel.rules.append(ruleElement)
+
+	return alertLevel
+
+
+# Function that replays the given sensor alerts through the sensor alert
+# executer the same way its thread processes them and returns
+# the time in seconds each sensor alert needed.
+def replaySensorAlerts(executer, sensorAlerts):
+
+	sensorAlertsToHandleWithRules = dict()
+	alertTimes = list()
+
+	for sensorId, state in sensorAlerts:
+		start = time.time()
+
+		executer.addSensorAlert(1, sensorId, state, "", True, False,
+			SensorDataType.NONE, None)
+		sensorAlertList = executer._getQueuedSensorAlerts()
+		executer._handleSensorAlerts(sensorAlertList,
+			sensorAlertsToHandleWithRules)
+
+		alertTimes.append(time.time() - start)
+
+	return alertTimes
+
+
+# Function that returns the given percentile of the sorted list
+# in milliseconds.
+def percentile(sortedTimes, value):
+	if not sortedTimes:
+		return 0.0
+	idx = min(len(sortedTimes) - 1, int(len(sortedTimes) * value))
+	return sortedTimes[idx] * 1000.0
+
+
+if __name__ == '__main__':
+
+	# Parsing command line options.
+	parser = optparse.OptionParser()
+
+	parser.add_option("-l",
+		"--levels",
+		dest="levels",
+		action="store",
+		type="int",
+		help="Number of alert levels with rules. (Optional)",
+		default=100)
+	parser.add_option("-r",
+		"--rules",
+		dest="rules",
+		action="store",
+		type="int",
+		help="Number of rules in the rule chain of each alert level. "
+			+ "(Optional)",
+		default=2)
+	parser.add_option("-d",
+		"--depth",
+		dest="depth",
+		action="store",
+		type="int",
+		help="Maximum depth of the rules. (Optional)",
+		default=5)
+	parser.add_option("-w",
+		"--width",
+		dest="width",
+		action="store",
+		type="int",
+		help="Maximum number of elements in an and/or element. (Optional)",
+		default=4)
+	parser.add_option("-s",
+		"--sensors",
+		dest="sensors",
+		action="store",
+		type="int",
+		help="Number of sensors. (Optional)",
+		default=200)
+	parser.add_option("-a",
+		"--alerts",
+		dest="alerts",
+		action="store",
+		type="int",
+		help="Number of sensor alerts to replay. (Optional)",
+		default=10000)
+	parser.add_option("-p",
+		"--profile",
+		dest="profile",
+		action="store_true",
+		help="Profile the replay and print the most expensive functions. "
+			+ "(Optional)",
+		default=False)
+	parser.add_option("",
+		"--seed",
+		dest="seed",
+		action="store",
+		type="int",
+		help="Seed for the random rules and sensor alerts. (Optional)",
+		default=0)
+
+	(options, args) = parser.parse_args()
+
+	if (options.levels < 1 or options.rules < 1 or options.depth < 1
+		or options.width < 1 or options.sensors < 1 or options.alerts < 1):
+		print("All values have to be at least 1.")
+		sys.exit(1)
+
+	random.seed(options.seed)
+
+	# Generate object of the global needed data.
+	globalData = GlobalData()
+	logging.basicConfig(level=logging.WARNING)
+	globalData.logger = logging.getLogger("benchmark")
+	globalData.storage = BenchmarkStorage(options.sensors)
+
+	for level in range(options.levels):
+		globalData.alertLevels.append(createAlertLevel(level, options.rules,
+			options.depth, options.width, options.sensors))
+
+	# The executer compiles the rules of all alert levels.
+	executer = BenchmarkSensorAlertExecuter(globalData)
+	executer._resolveRuleSensorIds()
+
+	# Each sensor triggers the alert levels whose rules contain it.
+	elementCount = 0
+	for alertLevel in globalData.alertLevels:
+		for ruleStart in alertLevel.rules:
+			elementCount += len(ruleStart.compiledElements)
+			for ruleElement in ruleStart.sensorElements:
+				sensor = globalData.storage.getSensorById(
+					ruleElement.element.sensorId)
+				if alertLevel.level not in sensor.alertLevels:
+					sensor.alertLevels.append(alertLevel.level)
+
+	sensorAlerts = [(random.randint(1, options.sensors), random.randint(0, 1))
+		for i in range(options.alerts)]
+
+	# Count the objects that are still alive after the replay
+	# (the garbage collector is disabled during the replay).
+	gc.collect()
+	gc.disable()
+	objectsBefore = len(gc.get_objects())
+
+	start = time.time()
+	if options.profile:
+		profiler = cProfile.Profile()
+		alertTimes = profiler.runcall(replaySensorAlerts, executer,
+			sensorAlerts)
+	else:
+		alertTimes = replaySensorAlerts(executer, sensorAlerts)
+	duration = time.time() - start
+
+	objectsAfter = len(gc.get_objects())
+	gc.enable()
+
+	evaluationTimes = sorted(executer.evaluationTimes)
+	alertTimes = sorted(alertTimes)
+
+	print("%-32s %12d" % ("alert levels", options.levels))
+	print("%-32s %12d" % ("rule elements", elementCount))
+	print("%-32s %12d" % ("sensor alerts", options.alerts))
+	print("%-32s %12d" % ("rule evaluations", len(evaluationTimes)))
+	print("%-32s %12.0f" % ("rule evaluations/sec",
+		len(evaluationTimes) / duration))
+	print("%-32s %12.0f" % ("sensor alerts/sec", options.alerts / duration))
+	print("%-32s %12.3f" % ("rule evaluation p50 (ms)",
+		percentile(evaluationTimes, 0.5)))
+	print("%-32s %12.3f" % ("rule evaluation p99 (ms)",
+		percentile(evaluationTimes, 0.99)))
+	print("%-32s %12.3f" % ("sensor alert p50 (ms)",
+		percentile(alertTimes, 0.5)))
+	print("%-32s %12.3f" % ("sensor alert p99 (ms)",
+		percentile(alertTimes, 0.99)))
+	print("%-32s %12d" % ("objects alive after replay",
+		objectsAfter - objectsBefore))
+
+	if options.profile:
+		print("")
+		stats = pstats.Stats(profiler)
+		stats.sort_stats("cumulative").print_stats(20)
@@ -0,0 +1,137 @@
+#!/usr/bin/python2
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: http://blog.h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+from lib import Sqlite
+from lib import GlobalData
+from lib import SensorDataType
+import logging
+import optparse
+import tempfile
+import shutil
+import time
+import sys
+import os
+
+
+# Function that creates a temporary database with one node and the
+# given number of sensors.
+def createStorage(globalData, directory, sensorCount):
+
+	storage = Sqlite(directory + "/database_%d.db" % sensorCount, globalData)
+
+	username = "benchmark"
+	if not storage.addNode(username, "benchmark", "sensor", "benchmark",
+		globalData.version, globalData.rev, 1):
+		raise ValueError("Not able to add node.")
+
+	sensors = list()
+	for i in range(sensorCount):
+
+		# Use all data types to measure the loading of the sensor data.
+		dataType = i % 3
+		if dataType == SensorDataType.NONE:
+			data = None
+		elif dataType == SensorDataType.INT:
+			data = i
+		else:
+			data = float(i)
+
+		sensors.append({"clientSensorId": i,
+			"description": "benchmark sensor %d" % i,
+			"state": 0,
+			"alertDelay": 0,
+			"alertLevels": [0, 1],
+			"dataType": dataType,
+			"data": data})
+
+	if not storage.addSensors(username, sensors):
+		raise ValueError("Not able to add sensors.")
+
+	return storage
+
+
+# Function that loads the sensors one by one (the way the alert system
+# information was loaded before it was loaded set-based) for comparison.
+def getSensorsById(storage):
+
+	storage._acquireLock()
+
+	storage.cursor.execute("SELECT id FROM sensors")
+	results = storage.cursor.fetchall()
+	sensorList = list()
+	for resultTuple in results:
+		sensorList.append(storage._getSensorById(resultTuple[0]))
+
+	storage._releaseLock()
+
+	return sensorList
+
+
+# Function that returns the average time in milliseconds of the
+# given function.
+def measure(function, repetitions):
+
+	start = time.time()
+	for i in range(repetitions):
+		if function() is None:
+			raise ValueError("Function failed.")
+	return ((time.time() - start) / repetitions) * 1000.0
+
+
+if __name__ == '__main__':
+
+	# Parsing command line options.
+	parser = optparse.OptionParser()
+
+	parser.add_option("-s",
+		"--sensors",
+		dest="sensors",
+		action="store",
+		help="Comma separated list of sensor counts to measure. (Optional)",
+		default="100,500,1000,3000")
+	parser.add_option("-r",
+		"--repetitions",
+		dest="repetitions",
+		action="store",
+		type="int",
+		help="Number of repetitions of each measurement. (Optional)",
+		default=5)
+
+	(options, args) = parser.parse_args()
+
+	try:
+		sensorCounts = map(int, options.sensors.split(","))
+	except Exception as e:
+		print("Sensor counts are not valid.")
+		sys.exit(1)
+
+	# Generate object of the global needed data.
+	globalData = GlobalData()
+	logging.basicConfig(level=logging.WARNING)
+	globalData.logger = logging.getLogger("benchmark")
+
+	directory = tempfile.mkdtemp()
+	try:
+		print("%8s %22s %22s" % ("sensors", "status (ms)",
+			"sensors by id (ms)"))
+
+		for sensorCount in sensorCounts:
+			storage = createStorage(globalData, directory, sensorCount)
+
+			statusTime = measure(storage.getAlertSystemInformation,
+				options.repetitions)
+			byIdTime = measure(lambda: getSensorsById(storage),
+				options.repetitions)
+
+			print("%8d %22.2f %22.2f" % (sensorCount, statusTime, byIdTime))
+
+			storage.close()
+
+	finally:
+		shutil.rmtree(directory)
@@ -9,8 +9,9 @@
 
 from connectionWatchdog import ConnectionWatchdog
 from configWatchdog import ConfigWatchdog
-from server import ServerSession, ThreadedTCPServer, AsynchronousSender
-from storage import Sqlite, Mysql
+from server import ServerSession, ThreadedTCPServer, ClientSender, \
+	EventLoopServerSession, EventLoopTCPServer
+from storage import Sqlite, Mysql, Memory, CachedStorage, TimedStorage
 from alert import SensorAlertExecuter
 from localObjects import SensorDataType, Sensor, AlertLevel
 from internalSensors import SensorTimeoutSensor, NodeTimeoutSensor, \
@@ -18,8 +19,10 @@ from internalSensors import SensorTimeoutSensor, NodeTimeoutSensor, \
 from ruleObjects import RuleStart, RuleElement, RuleBoolean, RuleSensor, \
 	RuleWeekday, RuleMonthday, RuleHour, RuleMinute, RuleSecond
 from userBackend import CSVBackend
-from manager import ManagerUpdateExecuter
+from manager import ManagerUpdateExecuter, ManagerStatusSnapshot
 from update import Updater
 from globalData import GlobalData
 from survey import SurveyExecuter
-from versionInformer import VersionInformer
\ No newline at end of file
+from sensorHistory import SensorHistory
+from versionInformer import VersionInformer
+from metrics import MetricsServer
\ No newline at end of file
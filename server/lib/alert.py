@@ -12,7 +12,9 @@ import os
 import time
 import logging
 import json
-from server import AsynchronousSender
+import collections
+import heapq
+import itertools
 from localObjects import SensorAlert, SensorDataType
 
 
@@ -30,6 +32,7 @@ class SensorAlertExecuter(threading.Thread):
 		self.storage = self.globalData.storage
 		self.alertLevels = self.globalData.alertLevels
 		self.serverSessions = self.globalData.serverSessions
+		self.metrics = self.globalData.metrics
 
 		# file nme of this file (used for logging)
 		self.fileName = os.path.basename(__file__)
@@ -39,919 +42,459 @@ class SensorAlertExecuter(threading.Thread):
 		self.sensorAlertEvent = threading.Event()
 		self.sensorAlertEvent.clear()
 
+		# Queue of received sensor alerts that were not processed yet
+		# (sensor alerts are handed over in memory, the database is only
+		# used as a journal if configured).
+		self.sensorAlertQueue = collections.deque()
+		self.sensorAlertQueueLock = threading.Lock()
+		self.sensorAlertJournal = self.globalData.sensorAlertJournal
+
+		# Min-heap of deadlines at which delayed sensor alerts and rules
+		# have to be processed again.
+		# Structure: [ (deadline, counter, kind, item) ]
+		# (kind "alert": item is a sensor alert to handle,
+		# kind "rule": item is the level of an alert level with rules)
+		self.deadlineHeap = list()
+		self.deadlineCounter = itertools.count()
+
+		# Currently scheduled deadline for each alert level with rules
+		# (entries in the heap with another deadline are outdated).
+		self.ruleDeadlines = dict()
+
+		# Compile the rules of all alert levels once. The sensor ids of
+		# the sensor rule elements are resolved by the thread itself.
+		# Structure of index: { sensorId: set(alertLevel.level) }
+		for alertLevel in self.alertLevels:
+			if alertLevel.rulesActivated:
+				for ruleStart in alertLevel.rules:
+					self._compileRule(ruleStart)
+		self.ruleLevelsBySensorId = dict()
+		self.ruleSensorIdsOutdated = True
+
 		# set exit flag as false
 		self.exitFlag = False
 
 
-	# this internal function recursively updates all values of
-	# the rule elements it processes received sensor alerts,
-	# updates the timeWhenTriggered values and sets the rule elements
-	# to triggered or not triggered respectively
-	def _updateRuleValuesRecursively(self, sensorAlertList,
-		currentRuleElement):
-
-		# check if rule element is of type "sensor"
-		# => update values of rule
-		if currentRuleElement.type == "sensor":
-
-			# get node id of sensor client
-			ruleNodeId = self.storage.getNodeId(
-				currentRuleElement.element.username)
-			if ruleNodeId is None:
-				self.logger.error("[%s]: Not able to get " % self.fileName
-					+ "node id for sensor to update rule.")
-				return False
+	# Adds a received sensor alert to the queue of the sensor alert executer
+	# and wakes it up. If the journal is activated, the sensor alert is
+	# also stored in the database to survive a restart of the server
+	# (unless it was already stored and its sensorAlertId is given).
+	#
+	# return True or False
+	def addSensorAlert(self, nodeId, sensorId, state, dataJson, changeState,
+		hasLatestData, dataType, sensorData, sensorAlertId=None,
+		logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		sensor = self.storage.getSensorById(sensorId, logger)
+		if sensor is None:
+			logger.error("[%s]: Not able to get sensor with id '%d' "
+				% (self.fileName, sensorId)
+				+ "for sensor alert.")
+			return False
 
-			# get sensor id of sensor
-			ruleSensorId = self.storage.getSensorId(ruleNodeId,
-				currentRuleElement.element.remoteSensorId)
-			if ruleSensorId is None:
-				self.logger.error("[%s]: Not able to get " % self.fileName
-					+ "sensor id for sensor to update rule.")
+		sensorAlert = SensorAlert()
+		sensorAlert.nodeId = nodeId
+		sensorAlert.sensorId = sensorId
+		sensorAlert.timeIngested = time.time()
+		sensorAlert.timeReceived = int(sensorAlert.timeIngested)
+		sensorAlert.alertDelay = sensor.alertDelay
+		sensorAlert.state = state
+		sensorAlert.description = sensor.description
+		sensorAlert.changeState = changeState
+		sensorAlert.alertLevels = list(sensor.alertLevels)
+		sensorAlert.rulesActivated = False
+		sensorAlert.hasLatestData = hasLatestData
+		sensorAlert.dataType = dataType
+		sensorAlert.sensorData = sensorData
+
+		# Set optional data for sensor alert.
+		sensorAlert.hasOptionalData = False
+		sensorAlert.optionalData = None
+		if dataJson != "":
+			try:
+				sensorAlert.optionalData = json.loads(dataJson)
+				sensorAlert.hasOptionalData = True
+			except Exception as e:
+				logger.exception("[%s]: Optional data of sensor alert "
+					% self.fileName
+					+ "not a valid json string. Ignoring data.")
+
+		# Store sensor alert in the journal before it is handed over.
+		sensorAlert.sensorAlertId = sensorAlertId
+		if self.sensorAlertJournal and sensorAlertId is None:
+			sensorAlert.sensorAlertId = self.storage.addSensorAlert(nodeId,
+				sensorId, state, dataJson, changeState, hasLatestData,
+				dataType, sensorData, logger)
+			if sensorAlert.sensorAlertId is None:
+				logger.error("[%s]: Not able to add sensor alert "
+					% self.fileName
+					+ "to journal.")
 				return False
 
-			# update sensor rule element (set as not triggered)
-			# if sensor does not count as triggered
-			# => unset triggered flag
-			utcTimestamp = int(time.time())
-			if (((currentRuleElement.timeWhenTriggered
-				+ currentRuleElement.timeTriggeredFor) < utcTimestamp)
-				and currentRuleElement.triggered):
-
-				self.logger.debug("[%s]: Sensor " % self.fileName
-					+ "with id '%d' does not count as triggered anymore."
-					% ruleSensorId)
-
-				currentRuleElement.triggered = False
-
-			# update sensor rule values with current sensor alerts
-			for sensorAlert in sensorAlertList:
-				sensorAlertNodeId = sensorAlert[2]
-				sensorAlertSensorId = sensorAlert[1]
-				sensorAlertTimeReceived = sensorAlert[3]
-				sensorAlertAlertDelay = sensorAlert[4]
-
-				# check if received sensor alert is triggered by
-				# the sensor of the rule
-				if (sensorAlertNodeId == ruleNodeId
-					and sensorAlertSensorId == ruleSensorId):
-
-					self.logger.debug("[%s]: Found match " % self.fileName
-						+ "for sensor with id '%d' and sensor in rule."
-						% ruleSensorId)
-
-					# checked if the received sensor alert
-					# is newer than the stored time when triggered
-					# => update time when triggered
-					if ((sensorAlertTimeReceived + sensorAlertAlertDelay)
-						> currentRuleElement.timeWhenTriggered):
-
-						# check if an alert delay has to be considered
-						utcTimestamp = int(time.time())
-						if not ((utcTimestamp - sensorAlertTimeReceived)
-							> sensorAlertAlertDelay):
-
-							self.logger.debug("[%s]: Sensor alert "
-								% self.fileName
-								+ "for sensor with id '%d' still delayed for "
-								% ruleSensorId
-								+ "'%d' seconds."
-								% (sensorAlertAlertDelay
-								- (utcTimestamp - sensorAlertTimeReceived)))
-
-							continue
-
-						self.logger.debug("[%s]: New sensor "
-							% self.fileName
-							+ "alert for sensor with id '%d' received."
-							% ruleSensorId)
-
-						currentRuleElement.timeWhenTriggered = \
-							sensorAlertTimeReceived + sensorAlertAlertDelay
+		with self.sensorAlertQueueLock:
+			self.sensorAlertQueue.append(sensorAlert)
 
-						# check if sensor still counts as triggered
-						# => set triggered flag
-						if ((currentRuleElement.timeWhenTriggered
-							+ currentRuleElement.timeTriggeredFor)
-							> utcTimestamp):
+		# wake up sensor alert executer
+		self.sensorAlertEvent.set()
 
-							self.logger.debug("[%s]: Sensor "
-								% self.fileName
-								+ "with id '%d' counts as triggered."
-								% ruleSensorId)
+		self.metrics.increaseCounter("alertr_sensor_alerts_received_total")
 
-							currentRuleElement.triggered = True
+		return True
 
-						# if sensor does not count as triggered
-						# => unset triggered flag
-						else:
 
-							self.logger.debug("[%s]: Sensor "
-								% self.fileName
-							+ "with id '%d' does not count as triggered."
-							% ruleSensorId)
+	# Returns the number of sensor alerts that were received but not
+	# sent yet (queued or waiting for their delay).
+	def getPendingSensorAlertCount(self):
 
-							currentRuleElement.triggered = False
+		with self.sensorAlertQueueLock:
+			count = len(self.sensorAlertQueue)
 
-		# check if rule element is of type "weekday"
-		# => update values of rule according to the date
-		elif currentRuleElement.type == "weekday":
+		for deadlineEntry in list(self.deadlineHeap):
+			if deadlineEntry[2] == "alert":
+				count += 1
 
-			weekdayElement = currentRuleElement.element
+		return count
 
-			if weekdayElement.time == "local":
 
-				# check if week day matches
-				# => set rule element as triggered if it is not yet triggered
-				if weekdayElement.weekday == time.localtime().tm_wday:
+	# Internal function that removes all queued sensor alerts
+	# and returns them.
+	def _getQueuedSensorAlerts(self):
 
-					# check if rule element is not triggered
-					# => set as triggered
-					if not currentRuleElement.triggered:
+		with self.sensorAlertQueueLock:
+			sensorAlertList = list(self.sensorAlertQueue)
+			self.sensorAlertQueue.clear()
 
-						self.logger.debug("[%s]: Week day "
-							% self.fileName
-							+ "with value '%d' for '%s' counts as triggered."
-							% (weekdayElement.weekday, weekdayElement.time))
+		return sensorAlertList
 
-						utcTimestamp = int(time.time())
-						currentRuleElement.timeWhenTriggered = utcTimestamp
-						currentRuleElement.triggered = True
 
-				# check if rule element is triggered
-				# => set rule element as not triggered
-				elif currentRuleElement.triggered:
+	# Internal function that schedules a sensor alert to handle
+	# for the given deadline.
+	def _scheduleSensorAlert(self, deadline, sensorAlertToHandle):
+		heapq.heappush(self.deadlineHeap, (deadline,
+			next(self.deadlineCounter), "alert", sensorAlertToHandle))
 
-					self.logger.debug("[%s]: Week day "
-						% self.fileName
-						+ "with value '%d' for '%s' no longer "
-						% (weekdayElement.weekday, weekdayElement.time)
-						+ "counts as triggered.")
 
-					currentRuleElement.triggered = False
+	# Internal function that schedules the evaluation of the rules of
+	# an alert level for the given deadline (replaces an already
+	# scheduled deadline of the alert level).
+	def _scheduleRule(self, deadline, alertLevel):
+		self.ruleDeadlines[alertLevel.level] = deadline
+		heapq.heappush(self.deadlineHeap, (deadline,
+			next(self.deadlineCounter), "rule", alertLevel.level))
 
-			elif weekdayElement.time == "utc":
 
-				# check if week day matches
-				# => set rule element as triggered if it is not yet triggered
-				if weekdayElement.weekday == time.gmtime().tm_wday:
+	# Internal function that removes all deadlines that have passed from the
+	# heap. The due sensor alerts to handle are appended to
+	# "sensorAlertsToHandle" and the levels of the due alert levels with
+	# rules are added to "alertLevelsToEvaluate".
+	def _popDueDeadlines(self, sensorAlertsToHandle, alertLevelsToEvaluate):
 
-					# check if rule element is not triggered
-					# => set as triggered
-					if not currentRuleElement.triggered:
+		now = time.time()
+		while self.deadlineHeap and self.deadlineHeap[0][0] <= now:
+			deadline, _, kind, item = heapq.heappop(self.deadlineHeap)
 
-						self.logger.debug("[%s]: Week day "
-							% self.fileName
-							+ "with value '%d' for '%s' counts as triggered."
-							% (weekdayElement.weekday, weekdayElement.time))
+			if kind == "alert":
+				sensorAlertsToHandle.append(item)
 
-						utcTimestamp = int(time.time())
-						currentRuleElement.timeWhenTriggered = utcTimestamp
-						currentRuleElement.triggered = True
+			# Ignore outdated deadlines of alert levels.
+			elif self.ruleDeadlines.get(item) == deadline:
+				del self.ruleDeadlines[item]
+				alertLevelsToEvaluate.add(item)
 
-				# check if rule element is triggered
-				# => set rule element as not triggered
-				elif currentRuleElement.triggered:
 
-					self.logger.debug("[%s]: Week day " % self.fileName
-						+ "with value '%d' for '%s' no longer "
-						% (weekdayElement.weekday, weekdayElement.time)
-						+ "counts as triggered.")
-
-					currentRuleElement.triggered = False
+	# Internal function that returns the seconds until the next deadline
+	# or None if nothing is scheduled.
+	def _getTimeUntilNextDeadline(self):
 
+		# Remove outdated deadlines of alert levels.
+		while self.deadlineHeap:
+			deadline, _, kind, item = self.deadlineHeap[0]
+			if kind == "rule" and self.ruleDeadlines.get(item) != deadline:
+				heapq.heappop(self.deadlineHeap)
+				continue
+			return max(0.0, deadline - time.time())
+
+		return None
+
+
+	# Internal function that compiles the rule tree of the given rule start
+	# into a flat list of its rule elements in post-order (all children
+	# are placed before their boolean rule element). Processing the list
+	# from the beginning to the end evaluates the whole rule
+	# without recursion.
+	def _compileRule(self, ruleStart):
+
+		compiledElements = list()
+		stack = [(ruleStart, False)]
+		while stack:
+			ruleElement, childrenAdded = stack.pop()
+			if ruleElement.type == "boolean" and not childrenAdded:
+				stack.append((ruleElement, True))
+				for childElement in reversed(ruleElement.element.elements):
+					stack.append((childElement, False))
 			else:
-				self.logger.error("[%s]: No valid value for " % self.fileName
-					+ "'time' attribute in weekday tag.")
-				return False
-
-		# check if rule element is of type "monthday"
-		# => update values of rule according to the date
-		elif currentRuleElement.type == "monthday":
-
-			monthdayElement = currentRuleElement.element
-
-			if monthdayElement.time == "local":
-
-				# check if month day matches
-				# => set rule element as triggered if it is not yet triggered
-				if monthdayElement.monthday == time.localtime().tm_mday:
-
-					# check if rule element is not triggered
-					# => set as triggered
-					if not currentRuleElement.triggered:
-
-						self.logger.debug("[%s]: Month day " % self.fileName
-							+ "with value '%d' for '%s' counts as triggered."
-							% (monthdayElement.monthday, monthdayElement.time))
-
-						utcTimestamp = int(time.time())
-						currentRuleElement.timeWhenTriggered = utcTimestamp
-						currentRuleElement.triggered = True
-
-				# check if rule element is triggered
-				# => set rule element as not triggered
-				elif currentRuleElement.triggered:
-
-					self.logger.debug("[%s]: Month day " % self.fileName
-						+ "with value '%d' for '%s' no longer "
-						% (monthdayElement.monthday, monthdayElement.time)
-						+ "counts as triggered.")
-
-					currentRuleElement.triggered = False
-
-			elif monthdayElement.time == "utc":
-
-				# check if month day matches
-				# => set rule element as triggered if it is not yet triggered
-				if monthdayElement.monthday == time.gmtime().tm_mday:
-
-					# check if rule element is not triggered
-					# => set as triggered
-					if not currentRuleElement.triggered:
+				compiledElements.append(ruleElement)
 
-						self.logger.debug("[%s]: Month day " % self.fileName
-							+ "with value '%d' for '%s' counts as triggered."
-							% (monthdayElement.monthday, monthdayElement.time))
+		ruleStart.compiledElements = compiledElements
+		ruleStart.leafElements = filter(lambda x: x.type != "boolean",
+			compiledElements)
+		ruleStart.sensorElements = filter(lambda x: x.type == "sensor",
+			compiledElements)
 
-						utcTimestamp = int(time.time())
-						currentRuleElement.timeWhenTriggered = utcTimestamp
-						currentRuleElement.triggered = True
 
-				# check if rule element is triggered
-				# => set rule element as not triggered
-				elif currentRuleElement.triggered:
+	# Internal function that resolves the sensor ids of all sensor rule
+	# elements and builds the index of the alert levels with rules
+	# a sensor can influence.
+	def _resolveRuleSensorIds(self):
 
-					self.logger.debug("[%s]: Month day " % self.fileName
-						+ "with value '%d' for '%s' no longer "
-						% (monthdayElement.monthday, monthdayElement.time)
-						+ "counts as triggered.")
+		# Reset flag first to not miss a change during the resolving.
+		self.ruleSensorIdsOutdated = False
 
-					currentRuleElement.triggered = False
-
-			else:
-				self.logger.error("[%s]: No valid value for " % self.fileName
-					+ "'time' attribute in monthday tag.")
-				return False
-
-		# check if rule element is of type "hour"
-		# => update values of rule according to the date
-		elif currentRuleElement.type == "hour":
-
-			hourElement = currentRuleElement.element
+		ruleLevelsBySensorId = dict()
+		for alertLevel in self.alertLevels:
+			if not alertLevel.rulesActivated:
+				continue
 
-			if hourElement.time == "local":
+			for ruleStart in alertLevel.rules:
+				for ruleElement in ruleStart.sensorElements:
+					sensorElement = ruleElement.element
+					sensorElement.sensorId = None
 
-				# check if the current hour lies between the start/end
-				# of the hour rule element
-				# => set rule element as triggered if it is not yet triggered
-				if (hourElement.start <= time.localtime().tm_hour
-					and time.localtime().tm_hour <= hourElement.end):
+					ruleNodeId = self.storage.getNodeId(
+						sensorElement.username)
+					if ruleNodeId is not None:
+						sensorElement.sensorId = self.storage.getSensorId(
+							ruleNodeId, sensorElement.remoteSensorId)
 
-					# check if rule element is not triggered
-					# => set as triggered
-					if not currentRuleElement.triggered:
+					if sensorElement.sensorId is None:
+						self.logger.warning("[%s]: Not able to get "
+							% self.fileName
+							+ "sensor id for sensor with remote id '%d' "
+							% sensorElement.remoteSensorId
+							+ "and username '%s' in rule of alert level '%d'."
+							% (sensorElement.username, alertLevel.level))
+						continue
 
-						self.logger.debug("[%s]: Hour " % self.fileName
-							+ "from '%d' to '%d' for '%s' counts as triggered."
-							% (hourElement.start, hourElement.end,
-							hourElement.time))
+					if sensorElement.sensorId not in ruleLevelsBySensorId:
+						ruleLevelsBySensorId[sensorElement.sensorId] = set()
+					ruleLevelsBySensorId[sensorElement.sensorId].add(
+						alertLevel.level)
 
-						utcTimestamp = int(time.time())
-						currentRuleElement.timeWhenTriggered = utcTimestamp
-						currentRuleElement.triggered = True
+		self.ruleLevelsBySensorId = ruleLevelsBySensorId
 
-				# check if rule element is triggered
-				# => set rule element as not triggered
-				elif currentRuleElement.triggered:
 
-					self.logger.debug("[%s]: Hour " % self.fileName
-						+ "from '%d' to '%d' for '%s' no longer "
-						% (hourElement.start, hourElement.end,
-						hourElement.time)
-						+ "counts as triggered.")
+	# Marks the resolved sensor ids of the rules as outdated
+	# (has to be called when sensors are added or removed).
+	def invalidateRuleSensorIds(self):
+		self.ruleSensorIdsOutdated = True
 
-					currentRuleElement.triggered = False
 
-			elif hourElement.time == "utc":
+	# this internal function updates the values of a sensor rule element
+	# with the received sensor alerts and sets it to triggered
+	# or not triggered respectively
+	def _updateSensorRuleElement(self, sensorAlertList, currentRuleElement):
 
-				# check if the current hour lies between the start/end
-				# of the hour rule element
-				# => set rule element as triggered if it is not yet triggered
-				if (hourElement.start <= time.gmtime().tm_hour
-					and time.gmtime().tm_hour <= hourElement.end):
+		ruleSensorId = currentRuleElement.element.sensorId
 
-					# check if rule element is not triggered
-					# => set as triggered
-					if not currentRuleElement.triggered:
+		# update sensor rule element (set as not triggered)
+		# if sensor does not count as triggered
+		# => unset triggered flag
+		utcTimestamp = int(time.time())
+		if (((currentRuleElement.timeWhenTriggered
+			+ currentRuleElement.timeTriggeredFor) < utcTimestamp)
+			and currentRuleElement.triggered):
 
-						self.logger.debug("[%s]: Hour " % self.fileName
-							+ "from '%d' to '%d' for '%s' counts as triggered."
-							% (hourElement.start, hourElement.end,
-							hourElement.time))
+			self.logger.debug("[%s]: Sensor " % self.fileName
+				+ "with remote id '%d' and username '%s' "
+				% (currentRuleElement.element.remoteSensorId,
+				currentRuleElement.element.username)
+				+ "does not count as triggered anymore.")
 
-						utcTimestamp = int(time.time())
-						currentRuleElement.timeWhenTriggered = utcTimestamp
-						currentRuleElement.triggered = True
+			currentRuleElement.triggered = False
 
-				# check if rule element is triggered
-				# => set rule element as not triggered
-				elif currentRuleElement.triggered:
+		# update sensor rule values with current sensor alerts
+		for sensorAlert in sensorAlertList:
 
-					self.logger.debug("[%s]: Hour " % self.fileName
-						+ "from '%d' to '%d' for '%s' no longer "
-						% (hourElement.start, hourElement.end,
-						hourElement.time)
-						+ "counts as triggered.")
+			# check if received sensor alert is triggered by
+			# the sensor of the rule
+			if sensorAlert[1] != ruleSensorId:
+				continue
 
-					currentRuleElement.triggered = False
+			sensorAlertTimeReceived = sensorAlert[3]
+			sensorAlertAlertDelay = sensorAlert[4]
 
-			else:
-				self.logger.error("[%s]: No valid value for " % self.fileName
-					+ "'time' attribute in hour tag.")
-				return False
+			self.logger.debug("[%s]: Found match " % self.fileName
+				+ "for sensor with id '%d' and sensor in rule."
+				% ruleSensorId)
+
+			# checked if the received sensor alert
+			# is newer than the stored time when triggered
+			# => update time when triggered
+			if ((sensorAlertTimeReceived + sensorAlertAlertDelay)
+				> currentRuleElement.timeWhenTriggered):
+
+				# check if an alert delay has to be considered
+				utcTimestamp = int(time.time())
+				if (sensorAlertAlertDelay != 0
+					and not ((utcTimestamp - sensorAlertTimeReceived)
+					> sensorAlertAlertDelay)):
+
+					self.logger.debug("[%s]: Sensor alert " % self.fileName
+						+ "for sensor with id '%d' still delayed for "
+						% ruleSensorId
+						+ "'%d' seconds."
+						% (sensorAlertAlertDelay
+						- (utcTimestamp - sensorAlertTimeReceived)))
 
-		# check if rule element is of type "minute"
-		# => update values of rule according to the date
-		elif currentRuleElement.type == "minute":
+					continue
 
-			minuteElement = currentRuleElement.element
+				self.logger.debug("[%s]: New sensor " % self.fileName
+					+ "alert for sensor with id '%d' received."
+					% ruleSensorId)
 
-			# check if the current minute lies between the start/end
-			# of the minute rule element
-			# => set rule element as triggered if it is not yet triggered
-			if (minuteElement.start <= time.localtime().tm_min
-				and time.localtime().tm_min <= minuteElement.end):
+				currentRuleElement.timeWhenTriggered = \
+					sensorAlertTimeReceived + sensorAlertAlertDelay
 
-				# check if rule element is not triggered
-				# => set as triggered
-				if not currentRuleElement.triggered:
+				# check if sensor still counts as triggered
+				# => set triggered flag
+				if ((currentRuleElement.timeWhenTriggered
+					+ currentRuleElement.timeTriggeredFor)
+					> utcTimestamp):
 
-					self.logger.debug("[%s]: Minute " % self.fileName
-						+ "from '%d' to '%d' counts as triggered."
-						% (minuteElement.start, minuteElement.end))
+					self.logger.debug("[%s]: Sensor " % self.fileName
+						+ "with id '%d' counts as triggered."
+						% ruleSensorId)
 
-					utcTimestamp = int(time.time())
-					currentRuleElement.timeWhenTriggered = utcTimestamp
 					currentRuleElement.triggered = True
 
-			# check if rule element is triggered
-			# => set rule element as not triggered
-			elif currentRuleElement.triggered:
-
-				self.logger.debug("[%s]: Minute " % self.fileName
-					+ "from '%d' to '%d' no longer "
-					% (minuteElement.start, minuteElement.end)
-					+ "counts as triggered.")
-
-				currentRuleElement.triggered = False
-
-		# check if rule element is of type "second"
-		# => update values of rule according to the date
-		elif currentRuleElement.type == "second":
+				# if sensor does not count as triggered
+				# => unset triggered flag
+				else:
 
-			secondElement = currentRuleElement.element
+					self.logger.debug("[%s]: Sensor " % self.fileName
+						+ "with id '%d' does not count as triggered."
+						% ruleSensorId)
 
-			# check if the current second lies between the start/end
-			# of the second rule element
-			# => set rule element as triggered if it is not yet triggered
-			if (secondElement.start <= time.localtime().tm_sec
-				and time.localtime().tm_sec <= secondElement.end):
+					currentRuleElement.triggered = False
 
-				# check if rule element is not triggered
-				# => set as triggered
-				if not currentRuleElement.triggered:
 
-					self.logger.debug("[%s]: Second " % self.fileName
-						+ "from '%d' to '%d' counts as triggered."
-						% (secondElement.start, secondElement.end))
+	# this internal function updates the values of a time based rule element
+	# (weekday, monthday, hour, minute, second) according to the current
+	# time and sets it to triggered or not triggered respectively
+	# (the value of the time based rule element is only calculated again
+	# after it has crossed its next transition)
+	def _updateTimeRuleElement(self, currentRuleElement):
 
-					utcTimestamp = int(time.time())
-					currentRuleElement.timeWhenTriggered = utcTimestamp
-					currentRuleElement.triggered = True
+		isTriggered = currentRuleElement.element.isTriggered(time.time())
 
-			# check if rule element is triggered
-			# => set rule element as not triggered
-			elif currentRuleElement.triggered:
+		# check if rule element is not triggered
+		# => set as triggered
+		if isTriggered:
+			if not currentRuleElement.triggered:
 
-				self.logger.debug("[%s]: Second " % self.fileName
-					+ "from '%d' to '%d' no longer "
-					% (secondElement.start, secondElement.end)
-					+ "counts as triggered.")
+				self.logger.debug("[%s]: Rule element " % self.fileName
+					+ "of type '%s' counts as triggered."
+					% currentRuleElement.type)
 
-				currentRuleElement.triggered = False
+				utcTimestamp = int(time.time())
+				currentRuleElement.timeWhenTriggered = utcTimestamp
+				currentRuleElement.triggered = True
 
-		# check if rule element is of type "boolean"
-		# => traverse rule recursively
-		elif currentRuleElement.type == "boolean":
+		# check if rule element is triggered
+		# => set rule element as not triggered
+		elif currentRuleElement.triggered:
 
-			# update values of all rule elements in current rule element
-			for ruleElement in currentRuleElement.element.elements:
-				self._updateRuleValuesRecursively(sensorAlertList,
-					ruleElement)
+			self.logger.debug("[%s]: Rule element " % self.fileName
+				+ "of type '%s' no longer counts as triggered."
+				% currentRuleElement.type)
 
-		else:
-			self.logger.error("[%s]: Rule element " % self.fileName
-				+ "has an invalid type.")
-			return False
+			currentRuleElement.triggered = False
 
 		return True
 
 
-	# this internal function evaluates rule elements from type
-	# "boolean" recursively
+	# this internal function evaluates a rule element of type "boolean"
 	# (means AND, OR and NOT are evaluated as triggered/not triggered)
-	def _evaluateRuleElementsRecursively(self, currentRuleElement):
-
-		# only evaluate rule elements of type "boolean"
-		if currentRuleElement.type == "boolean":
-
-			# evaluate "and" rule element
-			if currentRuleElement.element.type == "and":
-
-				andElement = currentRuleElement.element
-
-				# check if all elements of the "and" rule element are triggered
-				for element in andElement.elements:
-
-					# check if sensor element is not triggered
-					# => if it is, set current rule element also as
-					# not triggered (if it was triggered) and return
-					if element.type == "sensor":
-						if not element.triggered:
-
-							if currentRuleElement.triggered:
-								self.logger.debug("[%s]: Sensor rule element "
-									% self.fileName
-									+ "with remote id '%d' and username '%s' "
-									% (element.element.remoteSensorId,
-									element.element.username)
-									+ "not triggered. Set 'and' rule "
-									+ "also to not triggered.")
-
-								currentRuleElement.triggered = False
-
-							return True
-
-					# check if weekday element is not triggered
-					# => if it is, set current rule element also as
-					# not triggered (if it was triggered) and return
-					elif element.type == "weekday":
-
-						if not element.triggered:
-
-							if currentRuleElement.triggered:
-								self.logger.debug("[%s]: Week day rule "
-									% self.fileName
-									+ "element with value '%d' for '%s' not "
-									% (element.element.weekday,
-									element.element.time)
-									+ "triggered. Set 'and' rule "
-									+ "also to not triggered.")
-
-								currentRuleElement.triggered = False
-
-							return True
-
-					# check if monthday element is not triggered
-					# => if it is, set current rule element also as
-					# not triggered (if it was triggered) and return
-					elif element.type == "monthday":
-
-						if not element.triggered:
-
-							if currentRuleElement.triggered:
-								self.logger.debug("[%s]: Month day rule "
-									% self.fileName
-									+ "element with value '%d' for '%s' not "
-									% (element.element.monthday,
-									element.element.time)
-									+ "triggered. Set 'and' rule "
-									+ "also to not triggered.")
-
-								currentRuleElement.triggered = False
-
-							return True
-
-					# check if hour element is not triggered
-					# => if it is, set current rule element also as
-					# not triggered (if it was triggered) and return
-					elif element.type == "hour":
-
-						if not element.triggered:
-
-							if currentRuleElement.triggered:
-								self.logger.debug("[%s]: Hour rule element "
-									% self.fileName
-									+ "from '%d' to '%d' for '%s' not "
-									% (element.element.start,
-									element.element.end,
-									element.element.time)
-									+ "triggered. Set 'and' rule "
-									+ "also to not triggered.")
-
-								currentRuleElement.triggered = False
-
-							return True
-
-					# check if minute element is not triggered
-					# => if it is, set current rule element also as
-					# not triggered (if it was triggered) and return
-					elif element.type == "minute":
-
-						if not element.triggered:
-
-							if currentRuleElement.triggered:
-								self.logger.debug("[%s]: Minute rule element "
-									% self.fileName
-									+ "from '%d' to '%d' not "
-									% (element.element.start,
-									element.element.end)
-									+ "triggered. Set 'and' rule "
-									+ "also to not triggered.")
-
-								currentRuleElement.triggered = False
-
-							return True
-
-					# check if second element is not triggered
-					# => if it is, set current rule element also as
-					# not triggered (if it was triggered) and return
-					elif element.type == "second":
-
-						if not element.triggered:
-
-							if currentRuleElement.triggered:
-								self.logger.debug("[%s]: Second rule element "
-									% self.fileName
-									+ "from '%d' to '%d' not "
-									% (element.element.start,
-									element.element.end)
-									+ "triggered. Set 'and' rule "
-									+ "also to not triggered.")
-
-								currentRuleElement.triggered = False
-
-							return True
-
-					elif element.type == "boolean":
-						if not self._evaluateRuleElementsRecursively(element):
-							return False
-
-						# check if rule element was set to not triggered
-						# => if it was, set current rule element
-						# also as not triggered (when it was triggered)
-						# and return
-						if not element.triggered:
-
-							if currentRuleElement.triggered:
-								self.logger.debug("[%s]: Rule element "
-									% self.fileName
-									+ "evaluates to not triggered. Set 'and' "
-									+ "rule also to not triggered.")
-
-								currentRuleElement.triggered = False
-
-							return True
-
-					else:
-						self.logger.error("[%s]: Type of " % self.fileName
-							+ "rule element not valid.")
-						return False
-
-				# when this point is reached, every element of the "and"
-				# rule is triggered
-				# => set current element as triggered (when not triggered)
-				# and return
-				if not currentRuleElement.triggered:
-
-					self.logger.debug("[%s]: Each rule element evaluates "
-						% self.fileName
-						+ "to triggered. Set 'and' rule "
-						+ "also to triggered.")
-
-					currentRuleElement.triggered = True
-					utcTimestamp = int(time.time())
-					currentRuleElement.timeWhenTriggered = utcTimestamp
-
-				return True
-
-			# evaluate "or" rule element
-			elif currentRuleElement.element.type == "or":
-
-				orElement = currentRuleElement.element
-
-				# first check all elements if there exist a "not rule" element
-				# that is triggered
-				# => if it does, set current rule element
-				# also as triggered (if it was not triggered) and return
-				# (done for optimization)
-				for element in orElement.elements:
-
-					if (element.type == "sensor"
-						and element.triggered == True):
-
-						if not currentRuleElement.triggered:
-							self.logger.debug("[%s]: Sensor rule element with "
-								% self.fileName
-								+ "remote id '%d' and username '%s' "
-								% (element.element.remoteSensorId,
-								element.element.username)
-								+ "triggered. Set 'or' rule "
-								+ "also to triggered.")
-
-							currentRuleElement.triggered = True
-							utcTimestamp = int(time.time())
-							currentRuleElement.timeWhenTriggered = utcTimestamp
-
-						return True
-
-					elif (element.type == "weekday"
-						and element.triggered == True):
-
-						if not currentRuleElement.triggered:
-							self.logger.debug("[%s]: Week day rule element "
-								% self.fileName
-								+ "with value '%d' for '%s' "
-								% (element.element.weekday,
-								element.element.time)
-								+ "triggered. Set 'or' rule "
-								+ "also to triggered.")
-
-							currentRuleElement.triggered = True
-							utcTimestamp = int(time.time())
-							currentRuleElement.timeWhenTriggered = utcTimestamp
-
-						return True
-
-					elif (element.type == "monthday"
-						and element.triggered == True):
-
-						if not currentRuleElement.triggered:
-							self.logger.debug("[%s]: Month day rule element "
-								% self.fileName
-								+ "with value '%d' for '%s' "
-								% (element.element.monthday,
-								element.element.time)
-								+ "triggered. Set 'or' rule "
-								+ "also to triggered.")
-
-							currentRuleElement.triggered = True
-							utcTimestamp = int(time.time())
-							currentRuleElement.timeWhenTriggered = utcTimestamp
-
-						return True
-
-					elif (element.type == "hour"
-						and element.triggered == True):
-
-						if not currentRuleElement.triggered:
-							self.logger.debug("[%s]: Hour rule element from "
-								% self.fileName
-								+ "'%d' to '%d' for '%s' "
-								% (element.element.start,
-								element.element.end,
-								element.element.time)
-								+ "triggered. Set 'or' rule "
-								+ "also to triggered.")
-
-							currentRuleElement.triggered = True
-							utcTimestamp = int(time.time())
-							currentRuleElement.timeWhenTriggered = utcTimestamp
-
-						return True
-
-					elif (element.type == "minute"
-						and element.triggered == True):
-
-						if not currentRuleElement.triggered:
-							self.logger.debug("[%s]: Minute rule element from "
-								% self.fileName
-								+ "'%d' to '%d' "
-								% (element.element.start,
-								element.element.end)
-								+ "triggered. Set 'or' rule "
-								+ "also to triggered.")
-
-							currentRuleElement.triggered = True
-							utcTimestamp = int(time.time())
-							currentRuleElement.timeWhenTriggered = utcTimestamp
-
-						return True
-
-					elif (element.type == "second"
-						and element.triggered == True):
-
-						if not currentRuleElement.triggered:
-							self.logger.debug("[%s]: Second rule element from "
-								% self.fileName
-								+ "'%d' to '%d' "
-								% (element.element.start,
-								element.element.end)
-								+ "triggered. Set 'or' rule "
-								+ "also to triggered.")
-
-							currentRuleElement.triggered = True
-							utcTimestamp = int(time.time())
-							currentRuleElement.timeWhenTriggered = utcTimestamp
-
-						return True
-
-				# if there exists no element that is already triggered
-				# => update rule elements and evaluate them
-				for element in orElement.elements:
-
-					# only update rule elements
-					if element.type == "boolean":
-						if not self._evaluateRuleElementsRecursively(element):
-							return False
-
-						# check if rule element was set to triggered
-						# => if it was, set current rule element
-						# also as triggered (if it was not triggered)
-						# and return
-						if element.triggered:
-
-							if not currentRuleElement.triggered:
-								self.logger.debug("[%s]: Rule element "
-									% self.fileName
-									+ "evaluates to triggered. Set 'or' rule "
-									+ "also to triggered.")
-
-								currentRuleElement.triggered = True
-								utcTimestamp = int(time.time())
-								currentRuleElement.timeWhenTriggered = \
-									utcTimestamp
-
-							return True
-
-				# when this point is reached, every element of the "or"
-				# rule is not triggered
-				# => set current element as not triggered (if it was triggered)
-				# and return
-				if currentRuleElement.triggered:
-					self.logger.debug("[%s]: Each rule element evaluates "
-						% self.fileName
-						+ "to not triggered. Set 'or' rule "
-						+ "also to not triggered.")
-
-					currentRuleElement.triggered = False
+	# NOTE: all elements of the boolean rule element have to be
+	# evaluated before
+	def _evaluateBooleanRuleElement(self, currentRuleElement):
 
-				return True
+		booleanElement = currentRuleElement.element
 
-			# evaluate "not" rule element
-			elif currentRuleElement.element.type == "not":
+		if booleanElement.type == "and":
+			isTriggered = all(element.triggered
+				for element in booleanElement.elements)
 
-				notElement = currentRuleElement.element
+		elif booleanElement.type == "or":
+			isTriggered = any(element.triggered
+				for element in booleanElement.elements)
 
-				element = notElement.elements[0]
+		# a "not" rule element only toggles its triggered value
+		# (time when triggered is not changed)
+		elif booleanElement.type == "not":
+			isTriggered = not booleanElement.elements[0].triggered
 
-				# check if sensor rule element and current not rule element
-				# have the same triggered value
-				# => toggle current not element triggered value
-				if element.type == "sensor":
-					if element.triggered == currentRuleElement.triggered:
-
-						self.logger.debug("[%s]: Sensor rule element with "
-							% self.fileName
-							+ "remote id '%d' and username '%s' has same "
-							% (element.element.remoteSensorId,
-							element.element.username)
-							+ "triggered value as 'not' rule. "
-							+ "Toggle triggered value of 'not' rule.")
-
-						# toggle current rule element triggered value
-						currentRuleElement.triggered = not element.triggered
-
-					return True
-
-				# check if week day rule element and current not rule element
-				# have the same triggered value
-				# => toggle current not element triggered value
-				elif element.type == "weekday":
-					if element.triggered == currentRuleElement.triggered:
-
-						self.logger.debug("[%s]: Week day rule element with "
-							% self.fileName
-							+ "value '%d' for '%s' has same "
-							% (element.element.weekday,
-							element.element.time)
-							+ "triggered value as 'not' rule. "
-							+ "Toggle triggered value of 'not' rule.")
-
-						# toggle current rule element triggered value
-						currentRuleElement.triggered = not element.triggered
-
-					return True
-
-				# check if month day rule element and current not rule element
-				# have the same triggered value
-				# => toggle current not element triggered value
-				elif element.type == "monthday":
-					if element.triggered == currentRuleElement.triggered:
-
-						self.logger.debug("[%s]: Month day rule element with "
-							% self.fileName
-							+ "value '%d' for '%s' has same "
-							% (element.element.monthday,
-							element.element.time)
-							+ "triggered value as 'not' rule. "
-							+ "Toggle triggered value of 'not' rule.")
-
-						# toggle current rule element triggered value
-						currentRuleElement.triggered = not element.triggered
-
-					return True
-
-				# check if hour rule element and current not rule element
-				# have the same triggered value
-				# => toggle current not element triggered value
-				elif element.type == "hour":
-					if element.triggered == currentRuleElement.triggered:
-
-						self.logger.debug("[%s]: Hour rule element from "
-							% self.fileName
-							+ "'%d' to '%d' for '%s' has same "
-							% (element.element.start,
-							element.element.end,
-							element.element.time)
-							+ "triggered value as 'not' rule. "
-							+ "Toggle triggered value of 'not' rule.")
+			if isTriggered != currentRuleElement.triggered:
+				self.logger.debug("[%s]: Rule element has same "
+					% self.fileName
+					+ "triggered value as 'not' rule. "
+					+ "Toggle triggered value of 'not' rule.")
 
-						# toggle current rule element triggered value
-						currentRuleElement.triggered = not element.triggered
+				currentRuleElement.triggered = isTriggered
 
-					return True
+			return True
 
-				# check if minute rule element and current not rule element
-				# have the same triggered value
-				# => toggle current not element triggered value
-				elif element.type == "minute":
-					if element.triggered == currentRuleElement.triggered:
+		else:
+			self.logger.error("[%s]: Type of " % self.fileName
+				+ "rule element not valid.")
+			return False
 
-						self.logger.debug("[%s]: Minute rule element from "
-							% self.fileName
-							+ "'%d' to '%d' has same "
-							% (element.element.start,
-							element.element.end)
-							+ "triggered value as 'not' rule. "
-							+ "Toggle triggered value of 'not' rule.")
+		if isTriggered:
+			if not currentRuleElement.triggered:
 
-						# toggle current rule element triggered value
-						currentRuleElement.triggered = not element.triggered
+				self.logger.debug("[%s]: Rule elements evaluate "
+					% self.fileName
+					+ "to triggered. Set '%s' rule also to triggered."
+					% booleanElement.type)
 
-					return True
+				currentRuleElement.triggered = True
+				utcTimestamp = int(time.time())
+				currentRuleElement.timeWhenTriggered = utcTimestamp
 
-				# check if second rule element and current not rule element
-				# have the same triggered value
-				# => toggle current not element triggered value
-				elif element.type == "second":
-					if element.triggered == currentRuleElement.triggered:
+		elif currentRuleElement.triggered:
 
-						self.logger.debug("[%s]: Second rule element from "
-							% self.fileName
-							+ "'%d' to '%d' has same "
-							% (element.element.start,
-							element.element.end)
-							+ "triggered value as 'not' rule. "
-							+ "Toggle triggered value of 'not' rule.")
+			self.logger.debug("[%s]: Rule elements evaluate "
+				% self.fileName
+				+ "to not triggered. Set '%s' rule also to not triggered."
+				% booleanElement.type)
 
-						# toggle current rule element triggered value
-						currentRuleElement.triggered = not element.triggered
+			currentRuleElement.triggered = False
 
-					return True
-
-				# check if rule element evaluates to the same triggered value
-				# as the current not rule element
-				# => toggle current not element triggered value
-				elif element.type == "boolean":
-					if not self._evaluateRuleElementsRecursively(element):
-						return False
+		return True
 
-					# check if rule element was evaluated to the same
-					# triggered value as the not rule element
-					# => toggle current not element triggered value
-					if element.triggered == currentRuleElement.triggered:
 
-						self.logger.debug("[%s]: Rule element evaluates "
-							% self.fileName
-							+ "to the same triggered value as 'not' rule. "
-							+ "Toggle triggered value of 'not' rule.")
+	# this internal function updates and evaluates all rule elements of
+	# the compiled rule (sets new values for the sensor and time based
+	# rule elements and evaluates the boolean rule elements)
+	def _updateCompiledRule(self, sensorAlertList, ruleStart):
 
-						# toggle current rule element triggered value
-						currentRuleElement.triggered = not element.triggered
+		for ruleElement in ruleStart.compiledElements:
 
-					return True
+			if ruleElement.type == "sensor":
+				self._updateSensorRuleElement(sensorAlertList, ruleElement)
 
-				else:
-					self.logger.error("[%s]: Type of " % self.fileName
-						+ "rule element not valid.")
+			elif ruleElement.type == "boolean":
+				if not self._evaluateBooleanRuleElement(ruleElement):
 					return False
 
-		# if current rule element is not of type "boolean"
-		# => just return
-		else:
-			return True
+			elif not self._updateTimeRuleElement(ruleElement):
+				return False
+
+		return True
 
 
 	# this internal function updates all rules and their rule elements
@@ -965,9 +508,8 @@ class SensorAlertExecuter(threading.Thread):
 		for ruleStart in alertLevel.rules:
 
 			# update all rule values (sets also the sensors as triggered
-			# or not triggered)
-			if not self._updateRuleValuesRecursively(sensorAlertList,
-				ruleStart):
+			# or not triggered) and evaluate all and/or/not rule elements
+			if not self._updateCompiledRule(sensorAlertList, ruleStart):
 				self.logger.error("[%s]: Not able to update " % self.fileName
 					+ "values for rule with order '%d' "
 					% ruleStart.order
@@ -975,13 +517,6 @@ class SensorAlertExecuter(threading.Thread):
 					% alertLevel.level)
 				return False
 
-			# evaluate all and/or/not rule elements
-			if not self._evaluateRuleElementsRecursively(ruleStart):
-				self.logger.error("[%s]: Not able to evaluate " % self.fileName
-					+ "rule with order '%d' for alert level '%d'."
-					% (ruleStart.order, alertLevel.level))
-				return False
-
 
 		# if more than one rule exists
 		# => check if they had triggered in the correct time frame
@@ -1130,67 +665,6 @@ class SensorAlertExecuter(threading.Thread):
 			return False
 
 
-	# this internal function checks recusrively if a rule element is triggered
-	# and therefore the rule is likely to trigger during the next evaluation
-	def _checkRulesCanTriggerRecursively(self, currentRuleElement):
-
-		# check if rule element is of type "sensor"
-		# => return if it is triggered
-		if currentRuleElement.type == "sensor":
-
-			return currentRuleElement.triggered
-
-		# check if rule element is of type "weekday"
-		# => return if it is triggered
-		elif currentRuleElement.type == "weekday":
-
-			return currentRuleElement.triggered
-
-		# check if rule element is of type "monthday"
-		# => return if it is triggered
-		elif currentRuleElement.type == "monthday":
-
-			return currentRuleElement.triggered
-
-		# check if rule element is of type "hour"
-		# => return if it is triggered
-		elif currentRuleElement.type == "hour":
-
-			return currentRuleElement.triggered
-
-		# check if rule element is of type "minute"
-		# => return if it is triggered
-		elif currentRuleElement.type == "minute":
-
-			return currentRuleElement.triggered
-
-		# check if rule element is of type "second"
-		# => return if it is triggered
-		elif currentRuleElement.type == "second":
-
-			return currentRuleElement.triggered
-
-		# check if rule element is of type "boolean"
-		# => traverse rule recursively
-		elif currentRuleElement.type == "boolean":
-
-			# check all rule elements of the current rule element
-			# if one rule element is triggered => rule can still trigger
-			for ruleElement in currentRuleElement.element.elements:
-
-				if self._checkRulesCanTriggerRecursively(ruleElement):
-					return True
-
-			# when this point is reached, no rule element of the current one
-			# is triggered
-			return False
-
-		else:
-			self.logger.error("[%s]: Rule element " % self.fileName
-				+ "has an invalid type while checking.")
-			return False
-
-
 	# this internal function checks if a rule is likely to trigger
 	# during the next check (means an element of it counts still as triggered)
 	def _checkRulesCanTrigger(self, sensorAlertList, alertLevel):
@@ -1203,19 +677,21 @@ class SensorAlertExecuter(threading.Thread):
 		if sensorAlertList:
 			return True
 
-		# check all rules if they can still trigger
+		# check all rules if they can still trigger (a rule can still
+		# trigger if one of its sensor or time based elements is triggered)
 		# if one of the rules chain can => complete rules chain can trigger
-		for ruleElement in alertLevel.rules:
-			if self._checkRulesCanTriggerRecursively(ruleElement):
-				return True
+		for ruleStart in alertLevel.rules:
+			for ruleElement in ruleStart.leafElements:
+				if ruleElement.triggered:
+					return True
 
 		# when this point is reached, no rule of the rules chain can trigger
 		# at the moment
 		return False
 
 
-	# Internal function that pre-processes sensor alerts from the database.
-	# All triggered sensor alerts from the database are filtered and separated
+	# Internal function that pre-processes received sensor alerts.
+	# All received sensor alerts are filtered and separated
 	# into "sensorAlertsToHandle" and "sensorAlertsToHandleWithRules".
 	# NOTE: this function updates the argument "sensorAlertsToHandle"
 	# and "sensorAlertsToHandleWithRules".
@@ -1225,12 +701,13 @@ class SensorAlertExecuter(threading.Thread):
 		# get the flag if the system is active or not
 		isAlertSystemActive = self.storage.isAlertSystemActive()
 
-		# check if sensor alerts from the database
-		# have to be handled
+		# check if received sensor alerts have to be handled
 		for sensorAlert in sensorAlertList:
 
-			# delete sensor alert from the database
-			if not self.storage.deleteSensorAlert(sensorAlert.sensorAlertId):
+			# delete sensor alert from the journal in the database
+			if (sensorAlert.sensorAlertId is not None
+				and not self.storage.deleteSensorAlert(
+				sensorAlert.sensorAlertId)):
 				self.logger.error("[%s]: Not able to delete "
 					% self.fileName
 					+ "sensor alert with id '%d' from database."
@@ -1271,29 +748,30 @@ class SensorAlertExecuter(threading.Thread):
 							# into a separate list)
 							if configuredAlertLevel.rulesActivated:
 
+								# skip alert level if its rules do not
+								# contain the sensor of the sensor alert
+								if (configuredAlertLevel.level not in
+									self.ruleLevelsBySensorId.get(
+									sensorAlert.sensorId, ())):
+									continue
+
 								# check if an alert level with a rule
 								# is already triggered
 								# => add current sensor alert to it
-								found = False
-								for alertWithRule in \
-									sensorAlertsToHandleWithRules:
-
-									if (configuredAlertLevel ==
-										alertWithRule[1]):
-
-										alertWithRule[0].append(
-											sensorAlert)
-
-										found = True
-										break
+								alertWithRule = \
+									sensorAlertsToHandleWithRules.get(
+									configuredAlertLevel.level)
+								if alertWithRule is not None:
+									alertWithRule[0].append(sensorAlert)
 
 								# if no alert level with a rule was found
 								# => create a new sensor alert with rule
 								# to handle for it
-								if not found:
-									sensorAlertsToHandleWithRules.append(
+								else:
+									sensorAlertsToHandleWithRules[
+										configuredAlertLevel.level] = \
 										[ [sensorAlert],
-										configuredAlertLevel] )
+										configuredAlertLevel]
 
 							# create a list of sensor alerts to handle
 							# without rules activated
@@ -1381,8 +859,10 @@ class SensorAlertExecuter(threading.Thread):
 				sensorAlertToHandle[1] = triggeredAlertLevels
 
 			# check if sensor alert has triggered
+			# (sensor alerts without a delay trigger immediately)
 			utcTimestamp = int(time.time())
-			if ((utcTimestamp - sensorAlert.timeReceived)
+			if (sensorAlert.alertDelay == 0
+				or (utcTimestamp - sensorAlert.timeReceived)
 				> sensorAlert.alertDelay):
 
 				# generate integer list of alert levels that have triggered
@@ -1414,33 +894,88 @@ class SensorAlertExecuter(threading.Thread):
 						continue
 
 					# sending sensor alert to manager/alert node
-					# via a thread to not block the sensor alert executer
-					sensorAlertProcess = AsynchronousSender(
-						self.globalData, serverSession.clientComm)
-					# set thread to daemon
-					# => threads terminates when main thread terminates
-					sensorAlertProcess.daemon = True
-					sensorAlertProcess.sendSensorAlert = True
-					sensorAlertProcess.sensorAlert = sensorAlert
-
+					# via its sender to not block the sensor alert executer
 					self.logger.debug("[%s]: Sending sensor " % self.fileName
 						+ "alert to manager/alert (%s:%d)."
 						% (serverSession.clientComm.clientAddress,
 						serverSession.clientComm.clientPort))
-					sensorAlertProcess.start()
+					serverSession.clientComm.clientSender.queueSensorAlert(
+						sensorAlert)
+
+				self.metrics.increaseCounter(
+					"alertr_sensor_alerts_triggered_total",
+					(("kind", "sensor"),))
+				if sensorAlert.timeIngested is not None:
+					self.metrics.observe(
+						"alertr_sensor_alert_dispatch_seconds",
+						time.time() - sensorAlert.timeIngested
+						- sensorAlert.alertDelay)
 
 				# after sensor alert was triggered
 				# => remove sensor alert to handle
 				sensorAlertsToHandle.remove(sensorAlertToHandle)
 
 
+	# Internal function that returns the time at which the rules of the
+	# given alert level have to be evaluated again
+	# (or None if only a new sensor alert can change them).
+	def _getRuleDeadline(self, sensorAlertList, alertLevel):
+
+		now = time.time()
+		deadlines = list()
+
+		# sensor alerts with a delay count as triggered after
+		# their delay and are removed 5 seconds after that
+		for sensorAlert in sensorAlertList:
+			sensorAlertTimeReceived = sensorAlert[3]
+			sensorAlertAlertDelay = sensorAlert[4]
+			if (now - sensorAlertTimeReceived) <= sensorAlertAlertDelay:
+				deadlines.append(sensorAlertTimeReceived
+					+ sensorAlertAlertDelay + 1)
+			else:
+				deadlines.append(sensorAlertTimeReceived
+					+ sensorAlertAlertDelay + 6)
+
+		for ruleStart in alertLevel.rules:
+			for ruleElement in ruleStart.leafElements:
+
+				# a triggered sensor does not count as triggered anymore
+				# after the time it counts as triggered has passed
+				if ruleElement.type == "sensor":
+					if ruleElement.triggered:
+						deadlines.append(ruleElement.timeWhenTriggered
+							+ ruleElement.timeTriggeredFor + 1)
+
+				# time based rule elements are checked again
+				# when they cross their next transition
+				else:
+					deadline = ruleElement.element.getNextTransition(now)
+					if deadline is not None:
+						deadlines.append(deadline)
+
+			# entries of the counter expire after the wait time
+			if ruleStart.counterActivated:
+				for counterTimeWhenTriggered in ruleStart.counterList:
+					deadlines.append(counterTimeWhenTriggered
+						+ ruleStart.counterWaitTime + 1)
+
+		if not deadlines:
+			return None
+		return min(deadlines)
+
+
 	# Internal function that processes sensor alerts that affect rules.
+	# Only the alert levels given by "alertLevelsToEvaluate" are evaluated.
 	# NOTE: this function updates the argument "sensorAlertsToHandleWithRules".
-	def _processSensorAlertsRules(self, sensorAlertsToHandleWithRules):
+	def _processSensorAlertsRules(self, sensorAlertsToHandleWithRules,
+		alertLevelsToEvaluate):
 
 		# check all sensor alerts to handle with alert levels that have
 		# rules if they have to be triggered
-		for sensorAlertToHandle in list(sensorAlertsToHandleWithRules):
+		for level in alertLevelsToEvaluate:
+			sensorAlertToHandle = sensorAlertsToHandleWithRules.get(level)
+			if sensorAlertToHandle is None:
+				continue
 
 			# Convert sensor alerts back to tuple list because
 			# the rule engine works on a tuple list
@@ -1457,8 +992,16 @@ class SensorAlertExecuter(threading.Thread):
 
 			# update the rule chain of the alert level with
 			# the received sensor alerts
+			receivedTupleList = list(sensorAlertTupleList)
 			self._updateRule(sensorAlertTupleList, alertLevel)
 
+			# Only keep the sensor alerts that were not removed
+			# by the rule engine.
+			remainingTuples = set(map(id, sensorAlertTupleList))
+			sensorAlertToHandle[0] = [sensorAlert for sensorAlert, temp
+				in zip(sensorAlertToHandle[0], receivedTupleList)
+				if id(temp) in remainingTuples]
+
 			# check if the rule chain evaluates to triggered
 			# => trigger sensor alert for the alert level
 			if self._evaluateRules(alertLevel):
@@ -1503,24 +1046,22 @@ class SensorAlertExecuter(threading.Thread):
 						continue
 
 					# sending sensor alert to manager/alert node
-					# via a thread to not block the sensor alert executer
-					sensorAlertProcess = AsynchronousSender(
-						self.globalData, serverSession.clientComm)
-					# set thread to daemon
-					# => threads terminates when main thread terminates
-					sensorAlertProcess.daemon = True
-					sensorAlertProcess.sendSensorAlert = True
-					sensorAlertProcess.sensorAlert = ruleSensorAlert
-
+					# via its sender to not block the sensor alert executer
 					self.logger.debug("[%s]: Sending sensor " % self.fileName
 						+ "alert to manager/alert (%s:%d)."
 						% (serverSession.clientComm.clientAddress,
 						serverSession.clientComm.clientPort))
-					sensorAlertProcess.start()
+					serverSession.clientComm.clientSender.queueSensorAlert(
+						ruleSensorAlert)
+
+				self.metrics.increaseCounter(
+					"alertr_sensor_alerts_triggered_total",
+					(("kind", "rule"),))
 
 				# remove sensor alert to handle from list
 				# after it has triggered
-				sensorAlertsToHandleWithRules.remove(sensorAlertToHandle)
+				del sensorAlertsToHandleWithRules[level]
+				self.ruleDeadlines.pop(level, None)
 
 			# if rule chain did not evaluate to triggered
 			# => check if it is likely that it can trigger during the
@@ -1535,21 +1076,101 @@ class SensorAlertExecuter(threading.Thread):
 
 					# remove sensor alert to handle from list
 					# when it can not trigger at the current state
-					sensorAlertsToHandleWithRules.remove(
-						sensorAlertToHandle)
+					del sensorAlertsToHandleWithRules[level]
+					self.ruleDeadlines.pop(level, None)
+
+				# schedule the next evaluation of the rules
+				# for the time they can change
+				else:
+					deadline = self._getRuleDeadline(sensorAlertTupleList,
+						alertLevel)
+					if deadline is not None:
+						self._scheduleRule(deadline, alertLevel)
+					else:
+						self.ruleDeadlines.pop(level, None)
 
 
-	# this function starts the endless loop of the alert executer thread
-	def run(self):
+	# Internal function that processes the given received sensor alerts
+	# and all sensor alerts and rules whose deadline has passed
+	# (one iteration of the loop of the thread).
+	# NOTE: argument "sensorAlertsToHandleWithRules" is updated
+	# by this function
+	def _handleSensorAlerts(self, sensorAlertList,
+		sensorAlertsToHandleWithRules):
 
 		# Create an empty list for sensor alerts that have to be handled.
 		# Structure: [ list(sensorAlert, list(triggered alertLevels) ) ]
 		sensorAlertsToHandle = list()
 
-		# Create an empty list for sensor alerts
+		# Filter and separate received sensor alerts.
+		# NOTE: argument "sensorAlertsToHandle"
+		# and "sensorAlertsToHandleWithRules" is updated by this function.
+		self._preprocessSensorAlerts(sensorAlertsToHandle,
+			sensorAlertsToHandleWithRules, sensorAlertList)
+
+		# wake up manager update executer
+		# => state change will be transmitted
+		# (because it is in the queue)
+		if not self.managerUpdateExecuter is None:
+			self.managerUpdateExecuter.managerUpdateEvent.set()
+
+		# Schedule sensor alerts with a delay for the time
+		# their delay has passed.
+		for sensorAlertToHandle in list(sensorAlertsToHandle):
+			sensorAlert = sensorAlertToHandle[0]
+			if sensorAlert.alertDelay != 0:
+				self._scheduleSensorAlert(sensorAlert.timeReceived
+					+ sensorAlert.alertDelay + 1, sensorAlertToHandle)
+				sensorAlertsToHandle.remove(sensorAlertToHandle)
+
+		# Evaluate the rules of all alert levels
+		# that received a sensor alert.
+		alertLevelsToEvaluate = set()
+		for sensorAlert in sensorAlertList:
+			for ruleLevel in self.ruleLevelsBySensorId.get(
+				sensorAlert.sensorId, ()):
+				if ruleLevel in sensorAlertsToHandleWithRules:
+					alertLevelsToEvaluate.add(ruleLevel)
+
+		# Add all sensor alerts and rules whose deadline has passed.
+		self._popDueDeadlines(sensorAlertsToHandle, alertLevelsToEvaluate)
+
+		# Process sensor alerts that we have to handle.
+		# NOTE: argument "sensorAlertsToHandle" is updated by this function
+		self._processSensorAlerts(sensorAlertsToHandle)
+
+		# Sensor alerts that have not triggered yet are checked again
+		# with the next second.
+		for sensorAlertToHandle in sensorAlertsToHandle:
+			self._scheduleSensorAlert(int(time.time()) + 1,
+				sensorAlertToHandle)
+
+		# Process sensor alerts that affect rules.
+		# NOTE: argument "sensorAlertsToHandleWithRules" is updated
+		# by this function
+		self._processSensorAlertsRules(sensorAlertsToHandleWithRules,
+			alertLevelsToEvaluate)
+
+
+	# this function starts the endless loop of the alert executer thread
+	def run(self):
+
+		# Create an empty dict for sensor alerts
 		# that have to be handled and which alert levels have rules.
-		# Structure: [ list(sensorAlerts), possible triggered alertLevel ]
-		sensorAlertsToHandleWithRules = list()
+		# Structure: { alertLevel.level:
+		# [ list(sensorAlerts), possible triggered alertLevel ] }
+		sensorAlertsToHandleWithRules = dict()
+
+		# Sensor alerts that are still stored in the database
+		# (for example from before a restart) are processed first.
+		sensorAlertList = self.storage.getSensorAlerts()
+		if sensorAlertList is None:
+			self.logger.error("[%s]: Not able to get sensor alerts "
+				% self.fileName
+				+ "from database.")
+			sensorAlertList = list()
+		with self.sensorAlertQueueLock:
+			self.sensorAlertQueue.extendleft(reversed(sensorAlertList))
 
 		while 1:
 
@@ -1563,45 +1184,31 @@ class SensorAlertExecuter(threading.Thread):
 				self.managerUpdateExecuter = \
 					self.globalData.managerUpdateExecuter
 
-			# Get a list of all sensor alert objects.
-			sensorAlertList = self.storage.getSensorAlerts()
-
-			# check if no sensor alerts are to handle and exist in database
-			if (not sensorAlertsToHandle
-				and not sensorAlertsToHandleWithRules
-				and not sensorAlertList):
+			# Clear the event before the queue is emptied to not miss
+			# a wake up for a sensor alert that is added afterwards.
+			self.sensorAlertEvent.clear()
 
-				self.sensorAlertEvent.wait()
-				self.sensorAlertEvent.clear()
-				continue
+			# Get a list of all received sensor alert objects.
+			sensorAlertList = self._getQueuedSensorAlerts()
 
-			# Filter and separate sensor alerts from the database.
-			# NOTE: argument "sensorAlertsToHandle"
-			# and "sensorAlertsToHandleWithRules" is updated by this function.
-			self._preprocessSensorAlerts(sensorAlertsToHandle,
-				sensorAlertsToHandleWithRules, sensorAlertList)
-
-			# wake up manager update executer
-			# => state change will be transmitted
-			# (because it is in the queue)
-			if not self.managerUpdateExecuter is None:
-				self.managerUpdateExecuter.managerUpdateEvent.set()
-
-			# when no sensor alerts exist to handle => restart loop
-			if (not sensorAlertsToHandle
-				and not sensorAlertsToHandleWithRules):
-				continue
+			# Resolve sensor ids of the rules again if sensors have changed.
+			if self.ruleSensorIdsOutdated:
+				self._resolveRuleSensorIds()
 
-			# Process sensor alerts that we have to handle.
-			# NOTE: argument "sensorAlertsToHandle" is updated by this function
-			self._processSensorAlerts(sensorAlertsToHandle)
-
-			# Process sensor alerts that affect rules.
-			# NOTE: argument "sensorAlertsToHandleWithRules" is updated
-			# by this function
-			self._processSensorAlertsRules(sensorAlertsToHandleWithRules)
+			# if no sensor alerts were received
+			# => sleep until the next deadline or a new sensor alert
+			if not sensorAlertList:
+				timeout = self._getTimeUntilNextDeadline()
+				if timeout is None:
+					self.sensorAlertEvent.wait()
+					continue
+				elif timeout > 0.0:
+					self.sensorAlertEvent.wait(timeout)
+					continue
 
-			time.sleep(0.5)
+			# Process the received sensor alerts and all due deadlines.
+			self._handleSensorAlerts(sensorAlertList,
+				sensorAlertsToHandleWithRules)
 
 
 	# sets the exit flag to shut down the thread
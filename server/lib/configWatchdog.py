@@ -27,6 +27,7 @@ class ConfigWatchdog(threading.Thread):
 		self.logger = self.globalData.logger
 		self.userBackend = self.globalData.userBackend
 		self.managerUpdateExecuter = self.globalData.managerUpdateExecuter
+		self.sensorAlertExecuter = self.globalData.sensorAlertExecuter
 		self.storage = self.globalData.storage
 		self.serverSessions = self.globalData.serverSessions
 
@@ -124,6 +125,11 @@ class ConfigWatchdog(threading.Thread):
 						+ "'%d'."
 						% nodeId)
 
+				# Sensor ids of the rules have to be resolved again
+				# because sensors of the node were removed.
+				else:
+					self.sensorAlertExecuter.invalidateRuleSensorIds()
+
 
 	def run(self):
 
@@ -166,6 +172,9 @@ class ConfigWatchdog(threading.Thread):
 						self.CSVUsersHash = newHash
 						self.userBackend.readUserdata()
 
+						# Reload the cached data of the storage backend.
+						self.storage.invalidateCache(self.logger)
+
 						# Close connections to clients which usernames
 						# are no longer valid.
 						self._syncUsernamesAndConnections()
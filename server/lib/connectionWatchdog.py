@@ -12,6 +12,8 @@ import time
 import logging
 import os
 import json
+import heapq
+import itertools
 from localObjects import SensorDataType
 from internalSensors import SensorTimeoutSensor, NodeTimeoutSensor
 
@@ -30,6 +32,7 @@ class ConnectionWatchdog(threading.Thread):
 		self.sensorAlertExecuter = self.globalData.sensorAlertExecuter
 		self.internalSensors = self.globalData.internalSensors
 		self.serverSessions = self.globalData.serverSessions
+		self.metrics = self.globalData.metrics
 
 		# file name of this file (used for logging)
 		self.fileName = os.path.basename(__file__)
@@ -52,14 +55,50 @@ class ConnectionWatchdog(threading.Thread):
 		self.sensorTimeoutSensor = None
 		self.lastSensorTimeoutReminder = 0.0
 
-		# Set up needed data structures for node timeouts.
+		# Time in seconds after which a sensor that did not send any data
+		# times out.
+		self.sensorTimeout = int(1.5 * self.globalData.gracePeriodTimeout)
+
+		# Set up needed data structures for node timeouts
+		# (pre-timeout nodes: key is node id, value is time of pre-timeout).
 		self._timeoutNodeIds = set()
-		self._preTimeoutNodeIds = set()
+		self._preTimeoutNodeIds = dict()
 		self.nodeTimeoutSensor = None
 		self._lastNodeTimeoutReminder = 0.0
 		self.gracePeriodTimeout = self.globalData.gracePeriodTimeout
 		self._nodeTimeoutLock = threading.Lock()
 
+		# Min-heap of deadlines at which sessions, sensors and nodes in the
+		# pre-timeout set time out.
+		# Structure: [ (deadline, counter, kind, item) ]
+		# (kind "session": item is a server session,
+		# kind "sensor": item is a sensor id,
+		# kind "node": item is the id of a node in the pre-timeout set)
+		# The deadlines of sessions and sensors are not moved on each
+		# received message. When a deadline has passed, the time of the
+		# last received data is checked and the deadline is scheduled again
+		# if data was received in the meantime.
+		self.deadlineHeap = list()
+		self.deadlineCounter = itertools.count()
+		self.deadlineLock = threading.Lock()
+
+		# Event that wakes the watchdog up when an earlier deadline
+		# is scheduled.
+		self.deadlineEvent = threading.Event()
+		self.deadlineEvent.clear()
+
+		# Server sessions and sensor ids that have a deadline in the heap.
+		self.timeoutSessions = set()
+		self.sensorDeadlineIds = set()
+
+		# Flag that indicates that sensors were added or removed and
+		# the deadlines of the sensors have to be scheduled.
+		self.sensorTimeoutsOutdated = True
+
+		# Interval in seconds of the checks that are not driven by
+		# deadlines (connected nodes in the database and reminders).
+		self.checkInterval = 5.0
+
 		# Get activated internal sensors.
 		for internalSensor in self.internalSensors:
 			if isinstance(internalSensor, SensorTimeoutSensor):
@@ -86,19 +125,91 @@ class ConnectionWatchdog(threading.Thread):
 		self._nodeTimeoutLock.release()
 
 
+	# Internal function that schedules a deadline (the watchdog is woken
+	# up if it is the next deadline).
+	def _scheduleDeadline(self, deadline, kind, item):
+
+		with self.deadlineLock:
+			counter = next(self.deadlineCounter)
+			heapq.heappush(self.deadlineHeap, (deadline, counter, kind, item))
+			isNext = (self.deadlineHeap[0][1] == counter)
+
+		if isNext:
+			self.deadlineEvent.set()
+
+
+	# Internal function that removes all deadlines that have passed from the
+	# heap.
+	#
+	# returns a list of tuples (deadline, kind, item)
+	def _popDueDeadlines(self):
+
+		dueDeadlines = list()
+		now = time.time()
+		with self.deadlineLock:
+			while self.deadlineHeap and self.deadlineHeap[0][0] <= now:
+				deadline, _, kind, item = heapq.heappop(self.deadlineHeap)
+				dueDeadlines.append((deadline, kind, item))
+
+		return dueDeadlines
+
+
+	# Internal function that returns the seconds until the next deadline
+	# or None if nothing is scheduled.
+	def _getTimeUntilNextDeadline(self):
+
+		with self.deadlineLock:
+			if not self.deadlineHeap:
+				return None
+			return max(0.0, self.deadlineHeap[0][0] - time.time())
+
+
+	# Internal function that schedules the deadline of a sensor.
+	def _scheduleSensorDeadline(self, sensorObj):
+		self.sensorDeadlineIds.add(sensorObj.sensorId)
+		self._scheduleDeadline(
+			sensorObj.lastStateUpdated + self.sensorTimeout + 1,
+			"sensor", sensorObj.sensorId)
+
+
+	# Internal function that schedules the deadlines of all sensors
+	# that do not have one yet (and are not timed out).
+	def _scheduleSensorDeadlines(self):
+
+		# Reset flag first to not miss a change during the scheduling.
+		self.sensorTimeoutsOutdated = False
+
+		alertSystemInformation = self.storage.getAlertSystemInformation()
+		if alertSystemInformation is None:
+			self.logger.error("[%s]: Could not get sensors " % self.fileName
+				+ "from database.")
+			self.sensorTimeoutsOutdated = True
+			return
+
+		for sensorObj in alertSystemInformation[2]:
+			if (sensorObj.sensorId in self.sensorDeadlineIds
+				or sensorObj.sensorId in self.timeoutSensorIds):
+				continue
+			self._scheduleSensorDeadline(sensorObj)
+
+
 	# Internal function that processes new occurred node timeouts
-	# and raises alarm.
-	def _processNewNodeTimeouts(self):
+	# (nodes in the pre-timeout set and sessions which deadline
+	# has passed) and raises alarm.
+	def _processNewNodeTimeouts(self, dueDeadlines):
 
 		# Get all nodes that are longer in the pre-timeout set
-		# then the allowed grace period.
+		# then the allowed grace period (deadlines of nodes that
+		# were removed or added again in the meantime are ignored).
 		newTimeouts = set()
-		currentTime = int(time.time())
 		self._acquireNodeTimeoutLock()
-		for preTuple in set(self._preTimeoutNodeIds):
-			if (currentTime - preTuple[1]) > self.gracePeriodTimeout:
-				newTimeouts.add(preTuple[0])
-				self._preTimeoutNodeIds.remove(preTuple)
+		for deadline, kind, nodeId in dueDeadlines:
+			if (kind == "node"
+				and nodeId in self._preTimeoutNodeIds
+				and (self._preTimeoutNodeIds[nodeId]
+				+ self.gracePeriodTimeout + 1) == deadline):
+				newTimeouts.add(nodeId)
+				del self._preTimeoutNodeIds[nodeId]
 		self._releaseNodeTimeoutLock()
 
 		# Add all nodes to the timeout list that are longer timed-out
@@ -106,51 +217,75 @@ class ConnectionWatchdog(threading.Thread):
 		for nodeId in newTimeouts:
 			self.addNodeTimeout(nodeId)
 
-		# Check all server sessions if the connection timed out.
-		for serverSession in self.serverSessions:
+		# Check all server sessions which deadline has passed if the
+		# connection timed out.
+		for deadline, kind, serverSession in dueDeadlines:
 
-			# Check if client communication object exists.
-			if serverSession.clientComm is None:
+			if kind != "session":
 				continue
 
+			with self.deadlineLock:
+				if serverSession not in self.timeoutSessions:
+					continue
+
 			# Check if the time of the data last received lies
 			# too far in the past => kill connection.
+			# Otherwise wait until the connection can time out.
 			utcTimestamp = int(time.time())
-			if ((utcTimestamp - serverSession.clientComm.lastRecv)
-				>= self.connectionTimeout):
+			lastRecv = serverSession.clientComm.lastRecv
+			if (utcTimestamp - lastRecv) < self.connectionTimeout:
+				self._scheduleDeadline(lastRecv + self.connectionTimeout,
+					"session", serverSession)
+				continue
 
-				self.logger.error("[%s]: Connection to " % self.fileName
-					+ "client timed out. Closing connection (%s:%d)."
-					% (serverSession.clientAddress,
-					serverSession.clientPort))
+			with self.deadlineLock:
+				self.timeoutSessions.discard(serverSession)
 
-				serverSession.closeConnection()
+			self.logger.error("[%s]: Connection to " % self.fileName
+				+ "client timed out. Closing connection (%s:%d)."
+				% (serverSession.clientAddress,
+				serverSession.clientPort))
 
-				nodeId = serverSession.clientComm.nodeId
-				if (nodeId is None
-					or nodeId in self._timeoutNodeIds):
-					continue
+			serverSession.closeConnection()
+			self.metrics.increaseCounter("alertr_connection_timeouts_total")
+
+			nodeId = serverSession.clientComm.nodeId
+			if (nodeId is None
+				or nodeId in self._timeoutNodeIds):
+				continue
 
-				self.addNodeTimeout(nodeId)
+			self.addNodeTimeout(nodeId)
 
 
-	# Internal function that processes old occurred node timeouts
-	# and raises alarm when they are no longer timed out.
-	def _processOldNodeTimeouts(self):
+	# Internal function that gets the sensors which deadline has passed
+	# and that did not send any data since then (the deadlines of the
+	# other sensors are scheduled again).
+	#
+	# return list of sensor objects
+	def _getTimedOutSensors(self, dueDeadlines):
 
-		# Check all server sessions if a timed out connection reconnected.
-		for serverSession in self.serverSessions:
+		sensorsTimeoutList = list()
+		utcTimestamp = int(time.time())
+		for deadline, kind, sensorId in dueDeadlines:
 
-			# Check if client communication object exists.
-			if serverSession.clientComm is None:
+			if kind != "sensor":
 				continue
 
-			nodeId = serverSession.clientComm.nodeId
-			if (nodeId is None
-				or not nodeId in self._timeoutNodeIds):
+			self.sensorDeadlineIds.discard(sensorId)
+
+			# Ignore sensors that were removed or are already timed out.
+			if sensorId in self.timeoutSensorIds:
 				continue
+			sensorObj = self.storage.getSensorById(sensorId)
+			if sensorObj is None:
+				continue
+
+			if sensorObj.lastStateUpdated < (utcTimestamp - self.sensorTimeout):
+				sensorsTimeoutList.append(sensorObj)
+			else:
+				self._scheduleSensorDeadline(sensorObj)
 
-			self.removeNodeTimeout(nodeId)
+		return sensorsTimeoutList
 
 
 	# Internal function that processes new occurred sensor timeouts
@@ -170,6 +305,7 @@ class ConnectionWatchdog(threading.Thread):
 		for sensorObj in sensorsTimeoutList:
 			sensorId = sensorObj.sensorId
 			nodeId = sensorObj.nodeId
+			self.metrics.increaseCounter("alertr_sensor_timeouts_total")
 			nodeObj = self.storage.getNodeById(nodeId)
 			# Since a user can be deleted during runtime, check if the
 			# node still existed in the database.
@@ -234,8 +370,8 @@ class ConnectionWatchdog(threading.Thread):
 											"instance": instance,
 											"nodeType": nodeType})
 
-					# Add sensor alert to database for processing.
-					if self.storage.addSensorAlert(
+					# Add sensor alert for processing.
+					if self.sensorAlertExecuter.addSensorAlert(
 						self.sensorTimeoutSensor.nodeId, # nodeId
 						self.sensorTimeoutSensor.sensorId, # sensorId
 						1, # state
@@ -267,35 +403,33 @@ class ConnectionWatchdog(threading.Thread):
 
 	# Internal function that processes old occurred sensor timeouts
 	# and raises alarm when they are no longer timed out.
-	def _processOldSensorTimeouts(self, sensorsTimeoutList):
+	def _processOldSensorTimeouts(self):
 
 		processSensorAlerts = False
 
 		# check if a timed out sensor has reconnected and
 		# updated its state and generate a notification
+		utcTimestamp = int(time.time())
 		for sensorId in set(self.timeoutSensorIds):
 
-			# Skip if an old timed out sensor is still timed out.
-			found = False
-			for sensorObj in sensorsTimeoutList:
-				if sensorId == sensorObj.sensorId:
-					found = True
-					break
-			if found:
-				continue
-
-			# Sensor is no longer timed out.
-			self.timeoutSensorIds.remove(sensorId)
-
 			sensorObj = self.storage.getSensorById(sensorId)
 
 			# Check if the sensor could be found in the database.
 			if sensorObj is None:
+				self.timeoutSensorIds.remove(sensorId)
 				self.logger.error("[%s]: Could not get " % self.fileName
 					+ "sensor with id %d from database."
 					% sensorId)
 				continue
 
+			# Skip if an old timed out sensor is still timed out.
+			if sensorObj.lastStateUpdated < (utcTimestamp - self.sensorTimeout):
+				continue
+
+			# Sensor is no longer timed out.
+			self.timeoutSensorIds.remove(sensorId)
+			self._scheduleSensorDeadline(sensorObj)
+
 			nodeId = sensorObj.nodeId
 			nodeObj = self.storage.getNodeById(nodeId)
 			# Since a user can be deleted during runtime, check if the
@@ -356,7 +490,7 @@ class ConnectionWatchdog(threading.Thread):
 										"instance": instance,
 										"nodeType": nodeType})
 
-				if self.storage.addSensorAlert(
+				if self.sensorAlertExecuter.addSensorAlert(
 					self.sensorTimeoutSensor.nodeId, # nodeId
 					self.sensorTimeoutSensor.sensorId, # sensorId
 					0, # state
@@ -479,8 +613,8 @@ class ConnectionWatchdog(threading.Thread):
 					dataJson = json.dumps({"message": message,
 											"sensors": sensorsField})
 
-					# Add sensor alert to database for processing.
-					if self.storage.addSensorAlert(
+					# Add sensor alert for processing.
+					if self.sensorAlertExecuter.addSensorAlert(
 						self.sensorTimeoutSensor.nodeId, # nodeId
 						self.sensorTimeoutSensor.sensorId, # sensorId
 						1, # state
@@ -558,8 +692,8 @@ class ConnectionWatchdog(threading.Thread):
 					dataJson = json.dumps({"message": message,
 											"nodes": nodesField})
 
-					# Add sensor alert to database for processing.
-					if self.storage.addSensorAlert(
+					# Add sensor alert for processing.
+					if self.sensorAlertExecuter.addSensorAlert(
 						self.nodeTimeoutSensor.nodeId, # nodeId
 						self.nodeTimeoutSensor.sensorId, # sensorId
 						1, # state
@@ -669,10 +803,7 @@ class ConnectionWatchdog(threading.Thread):
 
 		# Remove node id from the pre-timeout set if it exists
 		# because it is now an official timeout.
-		for preTuple in set(self._preTimeoutNodeIds):
-			if nodeId == preTuple[0]:
-				self._preTimeoutNodeIds.remove(preTuple)
-				break
+		self._preTimeoutNodeIds.pop(nodeId, None)
 
 		processSensorAlerts = False
 
@@ -685,6 +816,8 @@ class ConnectionWatchdog(threading.Thread):
 		# Only process node timeout if we do not already know about it.
 		if not nodeId in self._timeoutNodeIds:
 
+			self.metrics.increaseCounter("alertr_node_timeouts_total")
+
 			nodeObj = self.storage.getNodeById(nodeId)
 			# Since a user can be deleted during runtime, check if
 			# the node still existed in the database.
@@ -750,8 +883,8 @@ class ConnectionWatchdog(threading.Thread):
 										"instance": instance,
 										"nodeType": nodeType})
 
-				# Add sensor alert to database for processing.
-				if self.storage.addSensorAlert(
+				# Add sensor alert for processing.
+				if self.sensorAlertExecuter.addSensorAlert(
 					self.nodeTimeoutSensor.nodeId, # nodeId
 					self.nodeTimeoutSensor.sensorId, # sensorId
 					1, # state
@@ -796,12 +929,7 @@ class ConnectionWatchdog(threading.Thread):
 			return
 
 		# Check if node already in pre-timeout set => ignore it.
-		found = False
-		for preTuple in self._preTimeoutNodeIds:
-			if nodeId == preTuple[0]:
-				found = True
-				break
-		if found:
+		if nodeId in self._preTimeoutNodeIds:
 			self._releaseNodeTimeoutLock()
 			return
 
@@ -834,9 +962,12 @@ class ConnectionWatchdog(threading.Thread):
 			+ "on host '%s' to pre-timeout set."
 			% hostname)
 
-		# Add node id with time that timeout occurred into pre-timeout set.
+		# Add node id with time that timeout occurred into pre-timeout set
+		# and let it time out after the grace period.
 		utcTimestamp = int(time.time())
-		self._preTimeoutNodeIds.add( (nodeId, utcTimestamp) )
+		self._preTimeoutNodeIds[nodeId] = utcTimestamp
+		self._scheduleDeadline(utcTimestamp + self.gracePeriodTimeout + 1,
+			"node", nodeId)
 
 		self._releaseNodeTimeoutLock()
 
@@ -846,6 +977,34 @@ class ConnectionWatchdog(threading.Thread):
 		return self._isInitialized
 
 
+	# Public function that lets the connection of a server session time
+	# out if no data is received (has to be called when the client
+	# communication of the session is created).
+	def addSessionTimeout(self, serverSession):
+
+		with self.deadlineLock:
+			self.timeoutSessions.add(serverSession)
+
+		self._scheduleDeadline(
+			serverSession.clientComm.lastRecv + self.connectionTimeout,
+			"session", serverSession)
+
+
+	# Public function that removes a server session from the
+	# connection timeouts (has to be called when the session ends).
+	def removeSessionTimeout(self, serverSession):
+
+		with self.deadlineLock:
+			self.timeoutSessions.discard(serverSession)
+
+
+	# Marks the deadlines of the sensors as outdated
+	# (has to be called when sensors are added or removed).
+	def invalidateSensorTimeouts(self):
+		self.sensorTimeoutsOutdated = True
+		self.deadlineEvent.set()
+
+
 	# Public function that clears a node from "timed out" by its id.
 	# It also removes the node from the pre-timeout set.
 	def removeNodeTimeout(self, nodeId):
@@ -854,17 +1013,16 @@ class ConnectionWatchdog(threading.Thread):
 
 		# Remove node id from the pre-timeout set if it exists.
 		# If it exists it is also not in the timeout set.
-		for preTuple in set(self._preTimeoutNodeIds):
-			if nodeId == preTuple[0]:
+		if nodeId in self._preTimeoutNodeIds:
 
-				self.logger.debug("[%s]: Removing node with id %d "
-					% (self.fileName, nodeId)
-					+ "from pre-timeout set.")
+			self.logger.debug("[%s]: Removing node with id %d "
+				% (self.fileName, nodeId)
+				+ "from pre-timeout set.")
 
-				self._preTimeoutNodeIds.remove(preTuple)
+			del self._preTimeoutNodeIds[nodeId]
 
-				self._releaseNodeTimeoutLock()
-				return
+			self._releaseNodeTimeoutLock()
+			return
 
 		processSensorAlerts = False
 
@@ -931,8 +1089,8 @@ class ConnectionWatchdog(threading.Thread):
 										"instance": instance,
 										"nodeType": nodeType})
 
-				# Add sensor alert to database for processing.
-				if self.storage.addSensorAlert(
+				# Add sensor alert for processing.
+				if self.sensorAlertExecuter.addSensorAlert(
 					self.nodeTimeoutSensor.nodeId, # nodeId
 					self.nodeTimeoutSensor.sensorId, # sensorId
 					0, # state
@@ -986,50 +1144,75 @@ class ConnectionWatchdog(threading.Thread):
 		# start and accept connections.
 		self._isInitialized = True
 
+		# Schedule the deadlines of all sensors.
+		self._scheduleSensorDeadlines()
+
+		nextCheck = time.time() + self.checkInterval
 		while True:
-			# wait 5 seconds before checking time of last received data
-			for i in range(5):
-				if self.exitFlag:
-					self.logger.info("[%s]: Exiting ConnectionWatchdog."
-						% self.fileName)
-					return
-				time.sleep(1)
 
-			# Synchronize view on connected nodes (actual connected nodes
-			# and database)
-			self._syncDbAndConnections()
+			# check if thread should terminate
+			if self.exitFlag:
+				self.logger.info("[%s]: Exiting ConnectionWatchdog."
+					% self.fileName)
+				return
 
-			# Check all server sessions if the connection timed out.
-			self._processNewNodeTimeouts()
+			# Clear the event before the deadlines are processed to not
+			# miss a wake up for a deadline that is scheduled afterwards.
+			self.deadlineEvent.clear()
 
-			# Process nodes that timed out but reconnected.
-			self._processOldNodeTimeouts()
+			# Schedule the deadlines of added sensors.
+			if self.sensorTimeoutsOutdated:
+				self._scheduleSensorDeadlines()
 
-			# Get list of sensor objects that have timed out.
-			utcTimestamp = int(time.time())
-			sensorsTimeoutList = self.storage.getSensorsUpdatedOlderThan(
-				utcTimestamp - int(1.5 * self.gracePeriodTimeout))
+			# Process the sessions, nodes and sensors which deadline
+			# has passed.
+			dueDeadlines = self._popDueDeadlines()
+			if dueDeadlines:
 
-			# Process occurred sensor time outs (and if they newly occurred).
-			self._processNewSensorTimeouts(sensorsTimeoutList)
+				# Check all server sessions if the connection timed out
+				# and nodes in the pre-timeout set.
+				self._processNewNodeTimeouts(dueDeadlines)
 
-			# Process sensors that timed out but reconnected.
-			self._processOldSensorTimeouts(sensorsTimeoutList)
+				# Process occurred sensor time outs.
+				sensorsTimeoutList = self._getTimedOutSensors(dueDeadlines)
+				if sensorsTimeoutList:
+					self._processNewSensorTimeouts(sensorsTimeoutList)
 
-			# Process reminder of timeouts.
-			self._processTimeoutReminder()
+			if time.time() >= nextCheck:
+				nextCheck = time.time() + self.checkInterval
 
-			# Update time of all internal sensors in order to avoid
-			# timeouts of these sensors.
-			for internalSensor in self.internalSensors:
-				if not self.storage.updateSensorTime(internalSensor.sensorId):
-					self.logger.error("[%s]: Not able to update sensor time "
-						% self.fileName
-						+ "for internal sensor with sensor id %d sensors."
-						% internalSensor.sensorId)
+				# Synchronize view on connected nodes (actual connected nodes
+				# and database)
+				self._syncDbAndConnections()
+
+				# Process sensors that timed out but reconnected.
+				self._processOldSensorTimeouts()
+
+				# Process reminder of timeouts.
+				self._processTimeoutReminder()
+
+				# Update time of all internal sensors in order to avoid
+				# timeouts of these sensors.
+				for internalSensor in self.internalSensors:
+					if not self.storage.updateSensorTime(
+						internalSensor.sensorId):
+						self.logger.error("[%s]: Not able to update sensor "
+							% self.fileName
+							+ "time for internal sensor with sensor id %d "
+							% internalSensor.sensorId
+							+ "sensors.")
+
+			# sleep until the next deadline or the next check
+			timeout = max(0.0, nextCheck - time.time())
+			timeUntilNextDeadline = self._getTimeUntilNextDeadline()
+			if timeUntilNextDeadline is not None:
+				timeout = min(timeout, timeUntilNextDeadline)
+			if timeout > 0.0:
+				self.deadlineEvent.wait(timeout)
 
 
 	# sets the exit flag to shut down the thread
 	def exit(self):
 		self.exitFlag = True
+		self.deadlineEvent.set()
 		return
\ No newline at end of file
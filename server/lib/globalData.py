@@ -10,6 +10,7 @@
 import os
 import threading
 import ssl
+from metrics import Metrics
 
 
 # Class implements an iterator that iterates over a copy of the
@@ -71,15 +72,70 @@ class GlobalData:
 		# instance of the storage backend
 		self.storage = None
 
+		# Flag that indicates if received sensor alerts are also stored
+		# in the database as a journal (sensor alerts are handed over to
+		# the sensor alert executer in memory and the journal is only used
+		# to process them after a restart of the server).
+		self.sensorAlertJournal = False
+
+		# Flag that indicates if the writes of all threads are committed
+		# together in one transaction by one thread (group commit,
+		# only used by the sqlite storage backend).
+		self.storageGroupCommit = False
+
+		# Time in milliseconds the group commit waits for further writes
+		# before it commits them.
+		self.storageGroupCommitWindow = 5
+
+		# Maximum number of writes the group commit commits together
+		# (it commits immediately if the batch is full).
+		self.storageGroupCommitMaxBatch = 64
+
 		# instance of the user credential backend
 		self.userBackend = None
 
+		# Fingerprints of the last successful registration of each node
+		# (key: username, value: tuple of (fingerprint, nodeId)).
+		# A node that registers with the same fingerprint again
+		# skips the update of the database.
+		self.registrationFingerprints = dict()
+
+		# Maximum number of bcrypt verifications of user credentials
+		# that run at the same time.
+		self.userBackendVerifyWorkers = 4
+
+		# Time in seconds a successful verification of user credentials
+		# is cached (0 deactivates the cache).
+		self.userBackendCacheTime = 0
+
 		# instance of the thread that handles sensor alerts
 		self.sensorAlertExecuter = None
 
 		# instance of the thread that handles manager updates
 		self.managerUpdateExecuter = None
 
+		# Instance of the thread that stores the history of the sensor
+		# data (None if the history is not activated).
+		self.sensorHistory = None
+
+		# Directory of the history of the sensor data and the number of
+		# days the received data and its 1 minute, 1 hour and 1 day
+		# rollups are kept (0 means forever).
+		self.sensorHistoryDirectory = None
+		self.sensorHistoryRawRetention = 7
+		self.sensorHistoryMinuteRetention = 60
+		self.sensorHistoryHourRetention = 730
+		self.sensorHistoryDayRetention = 0
+
+		# Instance of the status snapshot that is shared by all
+		# manager clients.
+		self.managerStatusSnapshot = None
+
+		# Number of status snapshots that are kept to send delta status
+		# updates to manager clients (a manager client that acknowledged
+		# an older version gets a full status update).
+		self.managerStatusHistorySize = 10
+
 		# this is the time in seconds when the client times out
 		self.connectionTimeout = 90
 
@@ -111,10 +167,38 @@ class GlobalData:
 		self.storageBackendSqliteFile = os.path.dirname(os.path.abspath(
 			__file__)) + "/../config/database.db"
 
+		# path to the snapshot file of the memory storage backend (the journal
+		# is stored next to it with the suffix ".journal")
+		self.storageBackendMemoryFile = os.path.dirname(os.path.abspath(
+			__file__)) + "/../config/database.json"
+
+		# Number of transactions in the journal of the memory storage
+		# backend after which the journal is compacted into a new snapshot.
+		self.storageBackendMemoryCompactLimit = 10000
+
+		# When the journal of the memory storage backend is synced to the
+		# disk ("commit", "batch" or "interval") and the interval in
+		# milliseconds if it is synced after an interval.
+		self.storageBackendMemoryJournalSync = "commit"
+		self.storageBackendMemoryJournalSyncInterval = 100
+
+		# Maximum number of read only connections to the sqlite database
+		# the alertR server uses at the same time (connections are kept
+		# in a pool).
+		self.storageBackendSqliteReadPoolSize = 5
+
 		# How often the alertR server should try to connect to the
 		# MySQL server when the connection establishment fails.
 		self.storageBackendMysqlRetries = 5
 
+		# Maximum number of connections to the MySQL server the alertR
+		# server uses at the same time (connections are kept in a pool).
+		self.storageBackendMysqlPoolSize = 5
+
+		# Time in seconds after which an idle connection of the pool is
+		# checked before it is used again.
+		self.storageBackendMysqlPingInterval = 10
+
 		# location of the certifiacte file
 		self.serverCertFile = None
 
@@ -127,6 +211,11 @@ class GlobalData:
 		# path to CA that is used to authenticate clients
 		self.clientCAFile = None
 
+		# SSL context that is shared by all server sessions (holds the
+		# cache of the TLS/SSL sessions that clients can resume).
+		self.serverSslContext = None
+		self.serverSslContextLock = threading.Lock()
+
 		# Get TLS/SSL setting.
 		try:
 			self.sslProtocol = ssl.PROTOCOL_TLS
@@ -142,6 +231,27 @@ class GlobalData:
 		# time the server is waiting on receives until a time out occurs
 		self.serverReceiveTimeout = 50.0
 
+		# Engine that handles the client connections ("threaded" uses one
+		# thread per client, "eventloop" watches all connections in one
+		# thread and handles them with a pool of worker threads).
+		self.serverEngine = "threaded"
+
+		# Number of worker threads used by the event loop engine.
+		self.serverWorkers = 4
+
+		# Number of threads the event loop engine uses to set up new client
+		# connections (TLS/SSL handshake and registration) and the time in
+		# seconds a client has for it (new clients do not block the
+		# workers that handle the messages of the connected clients).
+		self.serverSetupWorkers = 16
+		self.serverSetupTimeout = 10.0
+
+		# Maximum number of messages that are queued for sending to a
+		# client. If the queue is full, queued state changes are replaced
+		# by a status update and after that the oldest sensor alert
+		# is dropped.
+		self.clientSendQueueSize = 1000
+
 		# list and lock of/for the asynchronous option executer
 		self.asyncOptionExecutersLock = threading.BoundedSemaphore(1)
 		self.asyncOptionExecuters = list()
@@ -168,4 +278,13 @@ class GlobalData:
 		self.uniqueID = None
 
 		# List of all sessions that are handled by the server.
-		self.serverSessions = ServerSessions()
\ No newline at end of file
+		self.serverSessions = ServerSessions()
+
+		# Counters, gauges and latency histograms of the server.
+		self.metrics = Metrics(self)
+
+		# Instance of the thread that serves the metrics on localhost
+		# (None if the metrics endpoint is not activated) and the port
+		# it listens on.
+		self.metricsServer = None
+		self.metricsPort = 9465
\ No newline at end of file
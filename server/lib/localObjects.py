@@ -126,6 +126,10 @@ class SensorAlert:
 		# Time this sensor alert was received.
 		self.timeReceived = None
 
+		# Exact time this sensor alert was received (only set if it was
+		# received during the runtime of the server, used for the metrics).
+		self.timeIngested = None
+
 		# The delay this sensor alert has before it can be triggered.
 		self.alertDelay = None
 
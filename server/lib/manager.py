@@ -12,7 +12,259 @@ import os
 import time
 import logging
 import collections
-from server import AsynchronousSender
+import json
+
+
+# This class holds the serialized payload of the status message for the
+# manager clients. It is only rebuilt if the alert system information in
+# the database has changed and is shared by all manager sessions.
+class ManagerStatusSnapshot:
+
+	# Entities of the status message that can be sent as delta and the
+	# key that identifies an entity.
+	DELTAENTITIES = [("options", "type"),
+		("nodes", "nodeId"),
+		("sensors", "sensorId"),
+		("managers", "managerId"),
+		("alerts", "alertId")]
+
+	def __init__(self, globalData):
+
+		# get global configured data
+		self.globalData = globalData
+		self.logger = self.globalData.logger
+		self.storage = self.globalData.storage
+		self.alertLevels = self.globalData.alertLevels
+
+		# file nme of this file (used for logging)
+		self.fileName = os.path.basename(__file__)
+
+		# Lock that ensures that the snapshot is only built once
+		# if it is requested by multiple sessions at the same time.
+		self.snapshotLock = threading.Lock()
+
+		# Version of the alert system information the snapshot was
+		# built from and the serialized payload of the status message.
+		self.version = None
+		self.payload = None
+
+		# Entities of the snapshot (key: entity kind, value: dict of
+		# entities by their key) and of the last snapshots as tuples
+		# of the form (version, entities) to build delta status messages.
+		self.entities = None
+		self.history = collections.deque(
+			maxlen=self.globalData.managerStatusHistorySize)
+
+		# Serialized payloads of the delta status messages from a
+		# previous version to the version of the snapshot
+		# (key: previous version).
+		self.deltaPayloads = dict()
+
+
+	# Internal function that builds the payload of the status message
+	# (or returns None if it fails).
+	def _buildPayload(self, logger):
+
+		# Get a list from database of
+		# list[0] = list(option objects)
+		# list[1] = list(node objects)
+		# list[2] = list(sensor objects)
+		# list[3] = list(manager objects)
+		# list[4] = list(alert objects)
+		# or None
+		alertSystemInformation = self.storage.getAlertSystemInformation(
+			logger=logger)
+		if alertSystemInformation is None:
+			return None
+		optionList = alertSystemInformation[0]
+		nodesList = alertSystemInformation[1]
+		sensorList = alertSystemInformation[2]
+		managerList = alertSystemInformation[3]
+		alertList = alertSystemInformation[4]
+
+		# Generating options list.
+		options = list()
+		for optionObj in optionList:
+			tempDict = {"type": optionObj.type,
+				"value": optionObj.value}
+			options.append(tempDict)
+
+		# Generating nodes list.
+		nodes = list()
+		for nodeObj in nodesList:
+			tempDict = {"nodeId": nodeObj.id,
+				"hostname": nodeObj.hostname,
+				"username": nodeObj.username,
+				"nodeType": nodeObj.nodeType,
+				"instance": nodeObj.instance,
+				"version": nodeObj.version,
+				"rev": nodeObj.rev}
+			if nodeObj.connected:
+				tempDict["connected"] = 1
+			else:
+				tempDict["connected"] = 0
+			if nodeObj.persistent:
+				tempDict["persistent"] = 1
+			else:
+				tempDict["persistent"] = 0
+			nodes.append(tempDict)
+
+		# Generating sensors list.
+		sensors = list()
+		for sensorObj in sensorList:
+			tempDict = {"sensorId": sensorObj.sensorId,
+				"nodeId": sensorObj.nodeId,
+				"remoteSensorId": sensorObj.remoteSensorId,
+				"description": sensorObj.description,
+				"state": sensorObj.state,
+				"lastStateUpdated": sensorObj.lastStateUpdated,
+				"alertDelay": sensorObj.alertDelay,
+				"alertLevels": sensorObj.alertLevels,
+				"dataType": sensorObj.dataType,
+				"data": sensorObj.data}
+
+			sensors.append(tempDict)
+
+		# Generating managers list.
+		managers = list()
+		for managerObj in managerList:
+			tempDict = {"managerId": managerObj.managerId,
+				"nodeId": managerObj.nodeId,
+				"description": managerObj.description}
+			managers.append(tempDict)
+
+		# Generating alerts list.
+		alerts = list()
+		for alertObj in alertList:
+			tempDict = {"alertId": alertObj.alertId,
+				"nodeId": alertObj.nodeId,
+				"remoteAlertId": alertObj.remoteAlertId,
+				"description": alertObj.description,
+				"alertLevels": alertObj.alertLevels}
+			alerts.append(tempDict)
+
+		# Generating alertLevels list.
+		alertLevels = list()
+		for i in range(len(self.alertLevels)):
+			tempDict = {"alertLevel": self.alertLevels[i].level,
+				"name": self.alertLevels[i].name,
+				"triggerAlways": (1 if self.alertLevels[i].triggerAlways
+				else 0),
+				"rulesActivated": self.alertLevels[i].rulesActivated}
+			alertLevels.append(tempDict)
+
+		payload = {"type": "request",
+			"options": options,
+			"nodes": nodes,
+			"sensors": sensors,
+			"managers": managers,
+			"alerts": alerts,
+			"alertLevels": alertLevels}
+
+		return payload
+
+
+	# Internal function that builds the serialized payload of the delta
+	# status message from the given version to the version of the
+	# snapshot (or returns None if the given version is unknown).
+	def _buildDeltaPayload(self, baseVersion):
+
+		if baseVersion in self.deltaPayloads:
+			return self.deltaPayloads[baseVersion]
+
+		baseEntities = None
+		for version, entities in self.history:
+			if version == baseVersion:
+				baseEntities = entities
+				break
+		if baseEntities is None:
+			return None
+
+		payload = {"type": "request",
+			"baseVersion": baseVersion,
+			"version": self.version}
+
+		# Add all entities that are new or have changed and the keys
+		# of all entities that were removed.
+		for kind, _ in self.DELTAENTITIES:
+			currentEntities = self.entities[kind]
+			previousEntities = baseEntities[kind]
+
+			changed = list()
+			for key in sorted(currentEntities.keys()):
+				if previousEntities.get(key) != currentEntities[key]:
+					changed.append(currentEntities[key])
+			payload[kind] = changed
+
+			removed = list()
+			for key in sorted(previousEntities.keys()):
+				if key not in currentEntities:
+					removed.append(key)
+			payload["removed" + kind[0].upper() + kind[1:]] = removed
+
+		deltaPayload = json.dumps(payload)
+		self.deltaPayloads[baseVersion] = deltaPayload
+
+		return deltaPayload
+
+
+	# Returns a tuple of the form (message type, version, message) with
+	# the serialized status message for the manager clients (or a tuple of
+	# None if it could not be built). If a base version is given and still
+	# known, a delta status message to this version is returned instead
+	# of the full status message. The snapshot is rebuilt only if the
+	# alert system information has changed since the last call.
+	def getStatusMessage(self, baseVersion=None, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.snapshotLock:
+
+			# NOTE: the version is fetched before the information. A change
+			# in between leads to a newer snapshot being marked with the
+			# older version and therefore being rebuilt on the next call.
+			version = self.storage.getStatusVersion(logger=logger)
+			if self.payload is None or self.version != version:
+
+				logger.debug("[%s]: Building status snapshot for version %d."
+					% (self.fileName, version))
+
+				payload = self._buildPayload(logger)
+				if payload is None:
+					logger.error("[%s]: Building status snapshot failed."
+						% self.fileName)
+					return None, None, None
+
+				entities = dict()
+				for kind, key in self.DELTAENTITIES:
+					entities[kind] = dict()
+					for entity in payload[kind]:
+						entities[kind][entity[key]] = entity
+
+				payload["version"] = version
+				self.payload = json.dumps(payload)
+				self.version = version
+				self.entities = entities
+				self.history.append((version, entities))
+				self.deltaPayloads = dict()
+
+			messageType = "status"
+			payload = self.payload
+			if baseVersion is not None:
+				deltaPayload = self._buildDeltaPayload(baseVersion)
+				if deltaPayload is not None:
+					messageType = "statusdelta"
+					payload = deltaPayload
+
+		# Only the server time differs between the status messages that
+		# are built from the same snapshot.
+		utcTimestamp = int(time.time())
+		message = "{\"serverTime\": %d, \"message\": \"%s\", " \
+			% (utcTimestamp, messageType) + "\"payload\": %s}" % payload
+
+		return messageType, version, message
 
 
 # this class is woken up if a sensor alert or state change is received
@@ -28,6 +280,7 @@ class ManagerUpdateExecuter(threading.Thread):
 		self.managerUpdateInterval = self.globalData.managerUpdateInterval
 		self.storage = self.globalData.storage
 		self.serverSessions = self.globalData.serverSessions
+		self.metrics = self.globalData.metrics
 
 		# file nme of this file (used for logging)
 		self.fileName = os.path.basename(__file__)
@@ -99,15 +352,12 @@ class ManagerUpdateExecuter(threading.Thread):
 					if not serverSession.clientComm.clientInitialized:
 						continue
 
-					# sending status update to manager via a thread
+					# sending status update to manager via its sender
 					# to not block the manager update executer
-					statusUpdateProcess = AsynchronousSender(self.globalData,
-						serverSession.clientComm)
-					# set thread to daemon
-					# => threads terminates when main thread terminates
-					statusUpdateProcess.daemon = True
-					statusUpdateProcess.sendManagerUpdate = True
-					statusUpdateProcess.start()
+					serverSession.clientComm.clientSender.queueManagerUpdate()
+					self.metrics.increaseCounter(
+						"alertr_manager_updates_queued_total",
+						(("kind", "status"),))
 
 				# if status update was sent to manager clients
 				# => ignore state changes (because they are also covered
@@ -132,23 +382,14 @@ class ManagerUpdateExecuter(threading.Thread):
 					if not serverSession.clientComm.clientInitialized:
 						continue
 
-					# sending status update to manager via a thread
+					# sending state change to manager via its sender
 					# to not block the manager update executer
-					stateChangeProcess = AsynchronousSender(self.globalData,
-						serverSession.clientComm)
-					# set thread to daemon
-					# => threads terminates when main thread terminates
-					stateChangeProcess.daemon = True
-					stateChangeProcess.sendManagerStateChange = True
-					stateChangeProcess.sendManagerStateChangeSensorId \
-						= sensorId
-					stateChangeProcess.sendManagerStateChangeState \
-						= state
-					stateChangeProcess.sendManagerStateChangeDataType \
-						= sensorDataObj.dataType
-					stateChangeProcess.sendManagerStateChangeData \
-						= sensorDataObj.data
-					stateChangeProcess.start()
+					serverSession.clientComm.clientSender \
+						.queueManagerStateChange(sensorId, state,
+						sensorDataObj.dataType, sensorDataObj.data)
+					self.metrics.increaseCounter(
+						"alertr_manager_updates_queued_total",
+						(("kind", "statechange"),))
 
 
 	# sets the exit flag to shut down the thread
@@ -0,0 +1,320 @@
+#!/usr/bin/python2
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: http://blog.h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import threading
+import BaseHTTPServer
+import SocketServer
+import bisect
+import os
+
+
+# Upper bounds in seconds of the buckets of all latency histograms.
+LATENCYBUCKETS = [0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+	0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
+
+# This class holds the counters, gauges and latency histograms of the
+# server and renders them in the Prometheus text format. The gauges
+# are computed from the current state of the server when the metrics
+# are requested.
+class Metrics:
+
+	def __init__(self, globalData):
+
+		# file nme of this file (used for logging)
+		self.fileName = os.path.basename(__file__)
+
+		# get global configured data
+		self.globalData = globalData
+
+		# Lock that protects the values of the metrics.
+		self.metricsLock = threading.Lock()
+
+		# Type and help text of all metrics in the order they are exported
+		# (key: name of the metric, value: tuple of (type, help)).
+		self.descriptions = dict()
+		self.names = list()
+
+		# Values of the counters and gauges
+		# (key: tuple of (name, labels), value: number) and of the
+		# histograms (key: tuple of (name, labels),
+		# value: list of [bucket counts, sum, count]).
+		# Labels are tuples of (label name, label value) tuples.
+		self.values = dict()
+		self.histograms = dict()
+
+		self._addMetric("alertr_messages_received_total", "counter",
+			"Messages received from the clients by message type.")
+		self._addMetric("alertr_sensor_alerts_received_total", "counter",
+			"Sensor alerts received from the clients.")
+		self._addMetric("alertr_sensor_alerts_triggered_total", "counter",
+			"Sensor alerts sent to the alert and manager clients "
+			+ "by kind (sensor or rule).")
+		self._addMetric("alertr_state_changes_received_total", "counter",
+			"State changes received from the sensor clients.")
+		self._addMetric("alertr_manager_updates_queued_total", "counter",
+			"Status updates and state changes queued for the manager "
+			+ "clients by kind.")
+		self._addMetric("alertr_node_reconnects_total", "counter",
+			"Registrations of nodes that already registered successfully "
+			+ "since the server was started.")
+		self._addMetric("alertr_connection_timeouts_total", "counter",
+			"Connections closed because the client timed out.")
+		self._addMetric("alertr_node_timeouts_total", "counter",
+			"Nodes that timed out.")
+		self._addMetric("alertr_sensor_timeouts_total", "counter",
+			"Sensors that timed out.")
+		self._addMetric("alertr_sessions", "gauge",
+			"Sessions of initialized clients by node type.")
+		self._addMetric("alertr_sensor_alerts_pending", "gauge",
+			"Sensor alerts that were received but not sent yet.")
+		self._addMetric("alertr_sender_queue_messages", "gauge",
+			"Messages queued for sending to the clients by node type.")
+		self._addMetric("alertr_threads", "gauge",
+			"Number of running threads.")
+		self._addMetric("alertr_ssl_handshakes_total", "counter",
+			"TLS/SSL handshakes of the server by kind (resumed or full).")
+		self._addMetric("alertr_sensor_alert_dispatch_seconds", "histogram",
+			"Time from receiving a sensor alert to sending it to the "
+			+ "clients (without the configured alert delay).")
+		self._addMetric("alertr_storage_group_commits_total", "counter",
+			"Group commits of the sqlite storage backend.")
+		self._addMetric("alertr_storage_group_commit_callers_total",
+			"counter",
+			"Callers whose changes were committed by the group commits "
+			+ "of the sqlite storage backend.")
+		self._addMetric("alertr_storage_call_seconds", "histogram",
+			"Time of the calls to the storage backend by method.")
+		self._addMetric("alertr_transaction_rtt_seconds", "histogram",
+			"Round trip time of the transactions the server initiates "
+			+ "by message type.")
+
+
+	# Internal function that adds the description of a metric.
+	def _addMetric(self, name, metricType, helpText):
+		self.descriptions[name] = (metricType, helpText)
+		self.names.append(name)
+
+
+	# Internal function that renders the labels of a metric.
+	def _formatLabels(self, labels):
+		if not labels:
+			return ""
+		labelStrings = list()
+		for labelName, labelValue in labels:
+			labelValue = str(labelValue).replace("\\", "\\\\")
+			labelValue = labelValue.replace("\"", "\\\"")
+			labelValue = labelValue.replace("\n", "\\n")
+			labelStrings.append("%s=\"%s\"" % (labelName, labelValue))
+		return "{" + ",".join(labelStrings) + "}"
+
+
+	# Internal function that renders a number.
+	def _formatValue(self, value):
+		if isinstance(value, float):
+			return repr(value)
+		return str(value)
+
+
+	# Internal function that sets the gauges that are computed from the
+	# current state of the server and the counters of the TLS/SSL
+	# handshakes (they are counted by the shared SSL context).
+	def _updateGauges(self):
+
+		sessions = dict()
+		queuedMessages = dict()
+		for serverSession in self.globalData.serverSessions:
+			clientComm = serverSession.clientComm
+			if clientComm is None or not clientComm.clientInitialized:
+				continue
+			nodeType = str(clientComm.nodeType)
+			sessions[nodeType] = sessions.get(nodeType, 0) + 1
+			if clientComm.clientSender is not None:
+				queuedMessages[nodeType] = (queuedMessages.get(nodeType, 0)
+					+ clientComm.clientSender.getQueueSize())
+
+		pendingSensorAlerts = 0
+		sensorAlertExecuter = self.globalData.sensorAlertExecuter
+		if sensorAlertExecuter is not None:
+			pendingSensorAlerts = \
+				sensorAlertExecuter.getPendingSensorAlertCount()
+
+		# The SSL context is created with the first session,
+		# no handshake was done before.
+		sslHandshakes = (0, 0)
+		sslContext = self.globalData.serverSslContext
+		if sslContext is not None:
+			stats = sslContext.session_stats()
+			sslHandshakes = (stats["hits"],
+				stats["accept_good"] - stats["hits"])
+
+		with self.metricsLock:
+			for key in list(self.values.keys()):
+				if key[0] in ["alertr_sessions",
+					"alertr_sender_queue_messages"]:
+					del self.values[key]
+			for nodeType in ["alert", "manager", "sensor"]:
+				self.values[("alertr_sessions", (("nodeType", nodeType),))] \
+					= sessions.get(nodeType, 0)
+				self.values[("alertr_sender_queue_messages",
+					(("nodeType", nodeType),))] \
+					= queuedMessages.get(nodeType, 0)
+			self.values[("alertr_sensor_alerts_pending", ())] \
+				= pendingSensorAlerts
+			self.values[("alertr_threads", ())] = threading.active_count()
+			self.values[("alertr_ssl_handshakes_total",
+				(("kind", "resumed"),))] = sslHandshakes[0]
+			self.values[("alertr_ssl_handshakes_total",
+				(("kind", "full"),))] = sslHandshakes[1]
+
+
+	# Increases the given counter.
+	def increaseCounter(self, name, labels=(), value=1):
+		with self.metricsLock:
+			self.values[(name, labels)] = \
+				self.values.get((name, labels), 0) + value
+
+
+	# Sets the given gauge.
+	def setGauge(self, name, value, labels=()):
+		with self.metricsLock:
+			self.values[(name, labels)] = value
+
+
+	# Adds an observed latency in seconds to the given histogram.
+	def observe(self, name, seconds, labels=()):
+		seconds = max(0.0, seconds)
+		bucket = bisect.bisect_left(LATENCYBUCKETS, seconds)
+		with self.metricsLock:
+			histogram = self.histograms.get((name, labels))
+			if histogram is None:
+				histogram = [[0] * (len(LATENCYBUCKETS) + 1), 0.0, 0]
+				self.histograms[(name, labels)] = histogram
+			histogram[0][bucket] += 1
+			histogram[1] += seconds
+			histogram[2] += 1
+
+
+	# Returns all metrics in the Prometheus text format.
+	def getText(self):
+
+		self._updateGauges()
+
+		lines = list()
+		with self.metricsLock:
+			for name in self.names:
+				metricType, helpText = self.descriptions[name]
+				lines.append("# HELP %s %s" % (name, helpText))
+				lines.append("# TYPE %s %s" % (name, metricType))
+
+				if metricType != "histogram":
+					for key in sorted(self.values.keys()):
+						if key[0] != name:
+							continue
+						lines.append("%s%s %s"
+							% (name, self._formatLabels(key[1]),
+							self._formatValue(self.values[key])))
+					continue
+
+				for key in sorted(self.histograms.keys()):
+					if key[0] != name:
+						continue
+					bucketCounts, total, count = self.histograms[key]
+					cumulativeCount = 0
+					for i in range(len(LATENCYBUCKETS)):
+						cumulativeCount += bucketCounts[i]
+						lines.append("%s_bucket%s %d"
+							% (name, self._formatLabels(key[1]
+							+ (("le", repr(LATENCYBUCKETS[i])),)),
+							cumulativeCount))
+					lines.append("%s_bucket%s %d"
+						% (name, self._formatLabels(key[1]
+						+ (("le", "+Inf"),)), count))
+					lines.append("%s_sum%s %s"
+						% (name, self._formatLabels(key[1]), repr(total)))
+					lines.append("%s_count%s %d"
+						% (name, self._formatLabels(key[1]), count))
+
+		return "\n".join(lines) + "\n"
+
+
+# This class handles the requests to the metrics endpoint.
+class MetricsRequestHandler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+	def do_GET(self):
+
+		if self.path.split("?")[0] != "/metrics":
+			self.send_error(404)
+			return
+
+		try:
+			text = self.server.globalData.metrics.getText()
+		except Exception as e:
+			self.server.globalData.logger.exception("[%s]: Not able to "
+				% self.server.fileName
+				+ "render metrics.")
+			self.send_error(500)
+			return
+
+		self.send_response(200)
+		self.send_header("Content-Type", "text/plain; version=0.0.4")
+		self.send_header("Content-Length", str(len(text)))
+		self.end_headers()
+		self.wfile.write(text)
+
+
+	# Requests are not logged to stderr.
+	def log_message(self, format, *args):
+		pass
+
+
+# This class is the http server of the metrics endpoint.
+class _MetricsHTTPServer(SocketServer.ThreadingMixIn,
+	BaseHTTPServer.HTTPServer):
+
+	daemon_threads = True
+
+	def __init__(self, globalData, serverAddress):
+		self.globalData = globalData
+		self.fileName = os.path.basename(__file__)
+		BaseHTTPServer.HTTPServer.__init__(self, serverAddress,
+			MetricsRequestHandler)
+
+
+# This class serves the metrics in the Prometheus text format over
+# http on localhost (the endpoint is "/metrics").
+class MetricsServer(threading.Thread):
+
+	def __init__(self, globalData):
+		threading.Thread.__init__(self)
+
+		# get global configured data
+		self.globalData = globalData
+		self.logger = self.globalData.logger
+		self.port = self.globalData.metricsPort
+
+		# file nme of this file (used for logging)
+		self.fileName = os.path.basename(__file__)
+
+		self.httpServer = _MetricsHTTPServer(self.globalData,
+			("127.0.0.1", self.port))
+
+
+	def run(self):
+
+		self.logger.info("[%s]: Serving metrics on 127.0.0.1:%d."
+			% (self.fileName, self.port))
+
+		self.httpServer.serve_forever()
+
+
+	# Shuts down the http server of the metrics endpoint.
+	def exit(self):
+		self.httpServer.shutdown()
+		self.httpServer.server_close()
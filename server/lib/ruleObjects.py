@@ -7,100 +7,260 @@
 #
 # Licensed under the GNU Affero General Public License, version 3.
 
+import time
+import math
+import calendar
+
+
+# this class is the base of all time based rules and caches the value of
+# the rule until the next time the value changes (the transition)
+# (subclasses implement _matches() and _getNextTransition())
+class RuleTime:
+
+	def __init__(self):
+
+		# the used timezone for the calculation
+		# (possible values: local or utc)
+		self.time = "local"
+
+		# cached value of the rule and the time span in which it is valid
+		# (it is valid until the next transition of the rule)
+		self.value = False
+		self.validFrom = 0.0
+		self.validUntil = 0.0
+
+
+	# internal function that returns the given time as struct_time
+	# in the used timezone
+	def _getTimeStruct(self, timestamp):
+		if self.time == "utc":
+			return time.gmtime(timestamp)
+		return time.localtime(timestamp)
+
+
+	# internal function that returns the timestamp of the given time in the
+	# used timezone (overflowing days and hours are normalized;
+	# only used for hour and day boundaries)
+	def _getTimestamp(self, year, month, day, hour, minute, second):
+		if self.time == "utc":
+			return calendar.timegm((year, month, day, hour, minute, second,
+				0, 0, 0))
+		return time.mktime((year, month, day, hour, minute, second,
+			0, 0, -1))
+
+
+	# internal function that returns the timestamp of the start of the
+	# minute of the given time (calculated on the timestamp itself because
+	# rebuilding it with mktime() is ambiguous when the clock is set back
+	# at the end of the daylight saving time)
+	def _getMinuteStart(self, timestamp, timeStruct):
+		return math.floor(timestamp) - timeStruct.tm_sec
+
+
+	# returns if the rule matches the given time (the value is only
+	# calculated again if a transition of the rule was crossed)
+	def isTriggered(self, timestamp):
+
+		if timestamp >= self.validUntil or timestamp < self.validFrom:
+			timeStruct = self._getTimeStruct(timestamp)
+			self.value = self._matches(timeStruct)
+			self.validFrom = timestamp
+
+			nextTransition = self._getNextTransition(timestamp, timeStruct)
+			if nextTransition is None:
+				self.validUntil = float("inf")
+			else:
+				self.validUntil = nextTransition
+
+		return self.value
+
+
+	# returns the timestamp of the next transition after the given time
+	# or None if the value of the rule never changes
+	def getNextTransition(self, timestamp):
+
+		self.isTriggered(timestamp)
+		if self.validUntil == float("inf"):
+			return None
+		return self.validUntil
+
 
 # this class represents a rule that triggeres when the current second
 # lies between the start and end
-class RuleSecond:
+# (the local time is always used)
+class RuleSecond(RuleTime):
 
 	def __init__(self):
+		RuleTime.__init__(self)
+
+		# start second of rule
+		# (values: 0 - 59)
+		self.start = None
+
+		# end second of rule
+		# (values: 0 - 59)
+		self.end = None
+
+		# important: "end >= start"
+
 
-		def __init__(self):
+	def _matches(self, timeStruct):
+		return (self.start <= timeStruct.tm_sec
+			and timeStruct.tm_sec <= self.end)
 
-			# start second of rule
-			# (values: 0 - 59)
-			self.start = None
 
-			# end second of rule
-			# (values: 0 - 59)
-			self.end = None
+	def _getNextTransition(self, timestamp, timeStruct):
 
-			# important: "end >= start"
+		if self.start == 0 and self.end == 59:
+			return None
+
+		if self._matches(timeStruct):
+			second = self.end + 1
+		elif timeStruct.tm_sec < self.start:
+			second = self.start
+		else:
+			second = 60 + self.start
+
+		return self._getMinuteStart(timestamp, timeStruct) + second
 
 
 # this class represents a rule that triggeres when the current minute
 # lies between the start and end
-class RuleMinute:
+# (the local time is always used)
+class RuleMinute(RuleTime):
 
 	def __init__(self):
+		RuleTime.__init__(self)
+
+		# start minute of rule
+		# (values: 0 - 59)
+		self.start = None
+
+		# end minute of rule
+		# (values: 0 - 59)
+		self.end = None
+
+		# important: "end >= start"
+
+
+	def _matches(self, timeStruct):
+		return (self.start <= timeStruct.tm_min
+			and timeStruct.tm_min <= self.end)
 
-		def __init__(self):
 
-			# start minute of rule
-			# (values: 0 - 59)
-			self.start = None
+	def _getNextTransition(self, timestamp, timeStruct):
 
-			# end minute of rule
-			# (values: 0 - 59)
-			self.end = None
+		if self.start == 0 and self.end == 59:
+			return None
 
-			# important: "end >= start"
+		if self._matches(timeStruct):
+			minute = self.end + 1
+		elif timeStruct.tm_min < self.start:
+			minute = self.start
+		else:
+			minute = 60 + self.start
+
+		return (self._getMinuteStart(timestamp, timeStruct)
+			+ (minute - timeStruct.tm_min) * 60)
 
 
 # this class represents a rule that triggeres when the current hour
 # lies between the start and end
-class RuleHour:
+class RuleHour(RuleTime):
 
 	def __init__(self):
+		RuleTime.__init__(self)
+
+		# start hour of rule
+		# (values: 0 - 23)
+		self.start = None
+
+		# end hour of rule
+		# (values: 0 - 23)
+		self.end = None
+
+		# important: "end >= start"
+
+
+	def _matches(self, timeStruct):
+		return (self.start <= timeStruct.tm_hour
+			and timeStruct.tm_hour <= self.end)
 
-		def __init__(self):
 
-			# the used timezone for the calculation
-			# (possible values: local or utc)
-			self.time = None
+	def _getNextTransition(self, timestamp, timeStruct):
 
-			# start hour of rule
-			# (values: 0 - 23)
-			self.start = None
+		if self.start == 0 and self.end == 23:
+			return None
 
-			# end hour of rule
-			# (values: 0 - 23)
-			self.end = None
+		if self._matches(timeStruct):
+			hour = self.end + 1
+		elif timeStruct.tm_hour < self.start:
+			hour = self.start
+		else:
+			hour = 24 + self.start
 
-			# important: "end >= start"
+		return self._getTimestamp(timeStruct.tm_year, timeStruct.tm_mon,
+			timeStruct.tm_mday, hour, 0, 0)
 
 
 # this class represents a rule that triggeres when the current day of the month
 # matches with the configured one
-class RuleMonthday:
+class RuleMonthday(RuleTime):
 
 	def __init__(self):
+		RuleTime.__init__(self)
 
-		def __init__(self):
+		# the day of the month
+		# (values: 1 - 31)
+		self.monthday = None
 
-			# the used timezone for the calculation
-			# (possible values: local or utc)
-			self.time = None
 
-			# the day of the month
-			# (values: 1 - 31)
-			self.monthday = None
+	def _matches(self, timeStruct):
+		return self.monthday == timeStruct.tm_mday
+
+
+	def _getNextTransition(self, timestamp, timeStruct):
+
+		if self._matches(timeStruct):
+			return self._getTimestamp(timeStruct.tm_year, timeStruct.tm_mon,
+				timeStruct.tm_mday + 1, 0, 0, 0)
+
+		# search the next day with the day of the month
+		# (not every month has every day)
+		for days in range(1, 63):
+			timestamp = self._getTimestamp(timeStruct.tm_year,
+				timeStruct.tm_mon, timeStruct.tm_mday + days, 0, 0, 0)
+			if self._matches(self._getTimeStruct(timestamp)):
+				return timestamp
+
+		return None
 
 
 # this class represents a rule that triggeres when the current day of the week
 # matches with the configured one
-class RuleWeekday:
+class RuleWeekday(RuleTime):
 
 	def __init__(self):
+		RuleTime.__init__(self)
+
+		# the day of the week
+		# (values: 0 - 6 (0: Monday, ..., 6: Sunday))
+		self.weekday = None
 
-		def __init__(self):
 
-			# the used timezone for the calculation
-			# (possible values: local or utc)
-			self.time = None
+	def _matches(self, timeStruct):
+		return self.weekday == timeStruct.tm_wday
 
-			# the day of the week
-			# (values: 0 - 6 (0: Monday, ..., 6: Sunday))
-			self.weekday = None
+
+	def _getNextTransition(self, timestamp, timeStruct):
+
+		if self._matches(timeStruct):
+			days = 1
+		else:
+			days = (self.weekday - timeStruct.tm_wday) % 7
+
+		return self._getTimestamp(timeStruct.tm_year, timeStruct.tm_mon,
+			timeStruct.tm_mday + days, 0, 0, 0)
 
 
 # this class represents a rule that triggeres when the triggered sensor
@@ -109,13 +269,15 @@ class RuleSensor:
 
 	def __init__(self):
 
-		def __init__(self):
+		# username of the node that handles the sensor
+		self.username = None
 
-			# username of the node that handles the sensor
-			self.username = None
+		# the id that is configured for the sensor on the client side
+		self.remoteSensorId = None
 
-			# the id that is configured for the sensor on the client side
-			self.remoteSensorId = None
+		# the id of the sensor in the database
+		# (resolved by the sensor alert executer)
+		self.sensorId = None
 
 
 # this class represents a boolean operator for the rule engine
@@ -192,4 +354,15 @@ class RuleStart(RuleElement):
 		# the time that has to be passed before a timeWhenTriggered is removed
 		# from the counter
 		# (only processed if counterActivated is set)
-		self.counterWaitTime = 0
\ No newline at end of file
+		self.counterWaitTime = 0
+
+		# all rule elements of the rule in post-order (children before
+		# their boolean rule element) as compiled by the sensor alert
+		# executer
+		self.compiledElements = list()
+
+		# all sensor and time based rule elements of the compiled rule
+		self.leafElements = list()
+
+		# all sensor rule elements of the compiled rule
+		self.sensorElements = list()
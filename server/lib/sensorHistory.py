@@ -0,0 +1,460 @@
+#!/usr/bin/python2
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: http://blog.h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+import threading
+import collections
+import struct
+import time
+import os
+from localObjects import SensorDataType
+
+
+# This class stores the numeric data of the sensors as time series in
+# append-only segment files (one directory per sensor) and rolls the data
+# up into 1 minute, 1 hour and 1 day intervals. The data is handed over
+# in memory and written by this thread (the client handlers do not wait
+# for the disk).
+class SensorHistory(threading.Thread):
+
+	# Resolutions in seconds (0 is the received data) and the time span in
+	# seconds one segment file of the resolution covers.
+	resolutions = [0, 60, 3600, 86400]
+	segmentSpans = {0: 86400, 60: 86400, 3600: 2592000, 86400: 31536000}
+
+	# Record of the received data (timestamp, value) and record of the
+	# rolled up data (start of interval, min, max, sum, count).
+	rawRecord = struct.Struct("<Id")
+	rollupRecord = struct.Struct("<IdddI")
+
+	# Time in seconds after the end of an interval until it is written
+	# (even if no data for a newer interval was received).
+	closeDelay = 5
+
+	def __init__(self, globalData):
+		threading.Thread.__init__(self)
+
+		# get global configured data
+		self.globalData = globalData
+		self.logger = self.globalData.logger
+		self.directory = self.globalData.sensorHistoryDirectory
+
+		# Time in seconds the data of each resolution is kept
+		# (0 means forever).
+		self.retentions = {
+			0: self.globalData.sensorHistoryRawRetention * 86400,
+			60: self.globalData.sensorHistoryMinuteRetention * 86400,
+			3600: self.globalData.sensorHistoryHourRetention * 86400,
+			86400: self.globalData.sensorHistoryDayRetention * 86400}
+
+		# file nme of this file (used for logging)
+		self.fileName = os.path.basename(__file__)
+
+		# Queue of received data as tuples (sensorId, timestamp, value)
+		# that is not written yet.
+		self.queue = collections.deque()
+
+		# create an event that is used to wake this thread up
+		# when data was received
+		self.historyEvent = threading.Event()
+		self.historyEvent.clear()
+
+		# Lock for the segment files and the open intervals.
+		self.historyLock = threading.Lock()
+
+		# Intervals that are currently rolled up as lists of
+		# [start, min, max, sum, count] (key is (sensorId, resolution)).
+		self.openIntervals = dict()
+
+		# Time the old segment files were removed the last time.
+		self.lastRetentionCheck = 0
+
+		# set exit flag as false
+		self.exitFlag = False
+
+
+	# Internal function that returns the path of the segment file of the
+	# given sensor and resolution which contains the given time.
+	def _getSegmentPath(self, sensorId, resolution, timestamp):
+		span = self.segmentSpans[resolution]
+		return os.path.join(self.directory, str(sensorId),
+			"%d-%d.seg" % (resolution, timestamp - (timestamp % span)))
+
+
+	# Internal function that returns the start of the last interval of the
+	# given resolution that was written for the sensor (or None).
+	def _getLastWrittenStart(self, sensorId, resolution):
+
+		directory = os.path.join(self.directory, str(sensorId))
+		starts = list()
+		for segmentFile in os.listdir(directory):
+			try:
+				segmentResolution, start = map(int,
+					segmentFile[:-len(".seg")].split("-"))
+			except Exception as e:
+				continue
+			if segmentResolution == resolution:
+				starts.append(start)
+
+		for start in sorted(starts, reverse=True):
+			path = self._getSegmentPath(sensorId, resolution, start)
+
+			# Ignore a partly written record at the end.
+			count = os.path.getsize(path) // self.rollupRecord.size
+			if count == 0:
+				continue
+			with open(path, "rb") as fp:
+				fp.seek((count - 1) * self.rollupRecord.size)
+				return self.rollupRecord.unpack(
+					fp.read(self.rollupRecord.size))[0]
+
+		return None
+
+
+	# Internal function that reads the received data of the sensor since
+	# the given time (None for all received data).
+	#
+	# return a sorted list of tuples (timestamp, value)
+	def _readRawData(self, sensorId, startTime):
+
+		span = self.segmentSpans[0]
+		directory = os.path.join(self.directory, str(sensorId))
+		dataList = list()
+		for segmentFile in os.listdir(directory):
+			try:
+				resolution, start = map(int,
+					segmentFile[:-len(".seg")].split("-"))
+			except Exception as e:
+				continue
+			if (resolution != 0
+				or (startTime is not None and start + span <= startTime)):
+				continue
+
+			with open(os.path.join(directory, segmentFile), "rb") as fp:
+				segmentData = fp.read()
+
+			# Ignore a partly written record at the end.
+			for i in range(0, len(segmentData) - self.rawRecord.size + 1,
+				self.rawRecord.size):
+				values = self.rawRecord.unpack_from(segmentData, i)
+				if startTime is None or values[0] >= startTime:
+					dataList.append(values)
+
+		dataList.sort()
+		return dataList
+
+
+	# Internal function that rolls up the received data of the sensor
+	# that is not written to the segment files of the given resolutions
+	# yet (the history lock has to be held and the queued data has to
+	# be written before).
+	#
+	# return a dict with a sorted list of intervals as
+	# [start, min, max, sum, count] for each resolution
+	def _getUnwrittenIntervals(self, sensorId, resolutions):
+
+		startTimes = dict()
+		for resolution in resolutions:
+			lastStart = self._getLastWrittenStart(sensorId, resolution)
+			if lastStart is None:
+				startTimes[resolution] = None
+			else:
+				startTimes[resolution] = lastStart + resolution
+
+		if None in startTimes.values():
+			rawData = self._readRawData(sensorId, None)
+		else:
+			rawData = self._readRawData(sensorId, min(startTimes.values()))
+
+		unwrittenIntervals = dict()
+		for resolution in resolutions:
+			intervals = list()
+			for timestamp, value in rawData:
+				if (startTimes[resolution] is not None
+					and timestamp < startTimes[resolution]):
+					continue
+
+				start = timestamp - (timestamp % resolution)
+				if intervals and intervals[-1][0] == start:
+					interval = intervals[-1]
+					interval[1] = min(interval[1], value)
+					interval[2] = max(interval[2], value)
+					interval[3] += value
+					interval[4] += 1
+				else:
+					intervals.append([start, value, value, value, 1])
+
+			unwrittenIntervals[resolution] = intervals
+
+		return unwrittenIntervals
+
+
+	# Internal function that rebuilds the intervals that were rolled up
+	# when the server stopped from the received data (intervals that
+	# ended in the meantime are written).
+	def _loadOpenIntervals(self):
+
+		records = collections.defaultdict(list)
+
+		try:
+			sensorDirectories = os.listdir(self.directory)
+		except Exception as e:
+			return
+
+		for sensorDirectory in sensorDirectories:
+			try:
+				sensorId = int(sensorDirectory)
+				unwrittenIntervals = self._getUnwrittenIntervals(sensorId,
+					self.resolutions[1:])
+			except Exception as e:
+				self.logger.exception("[%s]: Not able to rebuild sensor "
+					% self.fileName
+					+ "history intervals of '%s'." % sensorDirectory)
+				continue
+
+			for resolution, intervals in unwrittenIntervals.iteritems():
+				if not intervals:
+					continue
+				for interval in intervals[:-1]:
+					records[self._getSegmentPath(sensorId, resolution,
+						interval[0])].append(
+						self.rollupRecord.pack(*interval))
+				self.openIntervals[(sensorId, resolution)] = intervals[-1]
+
+		self._closeEndedIntervals(records)
+		self._writeRecords(records)
+
+
+	# Internal function that adds the records of the intervals that ended
+	# to the records to write (also if no newer data was received).
+	def _closeEndedIntervals(self, records):
+
+		utcTimestamp = int(time.time())
+		for key, interval in self.openIntervals.items():
+			sensorId, resolution = key
+			if interval[0] + resolution + self.closeDelay <= utcTimestamp:
+				records[self._getSegmentPath(sensorId, resolution,
+					interval[0])].append(self.rollupRecord.pack(*interval))
+				del self.openIntervals[key]
+
+
+	# Internal function that appends the given records to the segment
+	# files (key: path of the segment file, value: list of records).
+	def _writeRecords(self, records):
+
+		for path, pathRecords in records.iteritems():
+			try:
+				directory = os.path.dirname(path)
+				if not os.path.isdir(directory):
+					os.makedirs(directory)
+				with open(path, "ab") as fp:
+					fp.write("".join(pathRecords))
+
+			except Exception as e:
+				self.logger.exception("[%s]: Not able to write sensor "
+					% self.fileName
+					+ "history segment '%s'." % path)
+
+
+	# Internal function that writes all queued data and the intervals
+	# that ended to the segment files (has to be called with the
+	# history lock held).
+	def _writeQueuedData(self):
+
+		# Collect the records of all segment files first to write each
+		# file only once.
+		records = collections.defaultdict(list)
+
+		while self.queue:
+			sensorId, timestamp, value = self.queue.popleft()
+
+			records[self._getSegmentPath(sensorId, 0, timestamp)].append(
+				self.rawRecord.pack(timestamp, value))
+
+			for resolution in self.resolutions[1:]:
+				start = timestamp - (timestamp % resolution)
+				key = (sensorId, resolution)
+				interval = self.openIntervals.get(key)
+
+				# Write the interval as soon as data for a newer interval
+				# is received.
+				if interval is not None and start > interval[0]:
+					records[self._getSegmentPath(sensorId, resolution,
+						interval[0])].append(
+						self.rollupRecord.pack(*interval))
+					interval = None
+
+				if interval is None:
+					self.openIntervals[key] = [start, value, value, value, 1]
+				else:
+					interval[1] = min(interval[1], value)
+					interval[2] = max(interval[2], value)
+					interval[3] += value
+					interval[4] += 1
+
+		self._closeEndedIntervals(records)
+		self._writeRecords(records)
+
+
+	# Internal function that removes all segment files that are older
+	# than the retention time of their resolution.
+	def _removeOldSegments(self):
+
+		utcTimestamp = int(time.time())
+
+		try:
+			sensorDirectories = os.listdir(self.directory)
+		except Exception as e:
+			return
+
+		for sensorDirectory in sensorDirectories:
+			path = os.path.join(self.directory, sensorDirectory)
+			if not os.path.isdir(path):
+				continue
+
+			for segmentFile in os.listdir(path):
+				try:
+					resolution, start = map(int,
+						segmentFile[:-len(".seg")].split("-"))
+					retention = self.retentions[resolution]
+				except Exception as e:
+					continue
+
+				if (retention != 0
+					and (start + self.segmentSpans[resolution])
+					< (utcTimestamp - retention)):
+
+					self.logger.debug("[%s]: Removing sensor history "
+						% self.fileName
+						+ "segment '%s'." % segmentFile)
+
+					try:
+						os.remove(os.path.join(path, segmentFile))
+					except Exception as e:
+						self.logger.exception("[%s]: Not able to remove "
+							% self.fileName
+							+ "sensor history segment '%s'." % segmentFile)
+
+
+	# Adds the received data of a sensor to the history (only data of
+	# type integer or float is stored).
+	#
+	# no return value
+	def addSensorData(self, sensorId, dataType, data):
+
+		if (dataType != SensorDataType.INT
+			and dataType != SensorDataType.FLOAT):
+			return
+
+		self.queue.append((sensorId, int(time.time()), float(data)))
+		self.historyEvent.set()
+
+
+	# Gets the history of a sensor in the given time range with the given
+	# resolution (0 for the received data, 60, 3600 or 86400 seconds).
+	#
+	# return a list of tuples (timestamp, min, max, average) or None
+	def getSensorData(self, sensorId, startTime, endTime, resolution,
+		logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		if resolution not in self.segmentSpans:
+			logger.error("[%s]: Resolution %d of sensor history not valid."
+				% (self.fileName, resolution))
+			return None
+
+		if resolution == 0:
+			record = self.rawRecord
+		else:
+			record = self.rollupRecord
+		span = self.segmentSpans[resolution]
+
+		dataList = list()
+		with self.historyLock:
+
+			# Write all queued data to read the current history.
+			self._writeQueuedData()
+
+			try:
+				segmentStart = startTime - (startTime % span)
+				while segmentStart <= endTime:
+					path = self._getSegmentPath(sensorId, resolution,
+						segmentStart)
+					segmentStart += span
+					if not os.path.exists(path):
+						continue
+
+					with open(path, "rb") as fp:
+						segmentData = fp.read()
+
+					# Ignore a partly written record at the end.
+					for i in range(0, len(segmentData) - record.size + 1,
+						record.size):
+						values = record.unpack_from(segmentData, i)
+						if startTime <= values[0] <= endTime:
+							dataList.append(values)
+
+				# Add the intervals that are not written yet (rolled up
+				# from the received data to also get them if the
+				# history is read by another process).
+				if resolution != 0 and os.path.isdir(os.path.join(
+					self.directory, str(sensorId))):
+					for interval in self._getUnwrittenIntervals(sensorId,
+						[resolution])[resolution]:
+						if startTime <= interval[0] <= endTime:
+							dataList.append(tuple(interval))
+
+			except Exception as e:
+				logger.exception("[%s]: Not able to read sensor history."
+					% self.fileName)
+				return None
+
+		dataList.sort()
+
+		if resolution == 0:
+			return [(values[0], values[1], values[1], values[1])
+				for values in dataList]
+		return [(values[0], values[1], values[2], values[3] / values[4])
+			for values in dataList]
+
+
+	def run(self):
+
+		with self.historyLock:
+			self._loadOpenIntervals()
+
+		while True:
+
+			# wait until data was received or it is time to check
+			# the retention of the segment files
+			if not self.queue:
+				self.historyEvent.wait(60)
+			self.historyEvent.clear()
+
+			with self.historyLock:
+				self._writeQueuedData()
+
+				# check if thread should terminate
+				if self.exitFlag:
+					return
+
+				# Remove old segment files once an hour.
+				utcTimestamp = int(time.time())
+				if (utcTimestamp - self.lastRetentionCheck) >= 3600:
+					self._removeOldSegments()
+					self.lastRetentionCheck = utcTimestamp
+
+
+	# sets the exit flag to shut down the thread (the queued data is
+	# written before the thread terminates)
+	def exit(self):
+		self.exitFlag = True
+		self.historyEvent.set()
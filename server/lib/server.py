@@ -9,25 +9,343 @@
 
 import ssl
 import socket
+import select
+import errno
+import fcntl
 import threading
 import SocketServer
+import Queue
 import time
 import logging
 import os
 import base64
 import random
 import json
+import collections
+import struct
+import hashlib
 from localObjects import SensorDataType, Sensor, SensorData
 from internalSensors import AlertSystemActiveSensor
 
 BUFSIZE = 4096
 
+# Header of a length-prefixed message (length) and of a message if
+# pipelined transactions are used (length, kind, message id) and the maximum
+# size of a message that is accepted.
+FRAMEHEADERFORMAT = "!I"
+PIPELINEDHEADERFORMAT = "!IBI"
+MAXMESSAGESIZE = 16777216
+
+# Kinds of messages if pipelined transactions are used.
+MSGKIND_REQUEST = 0
+MSGKIND_RESPONSE = 1
+
+
+# this class wraps the ssl socket of a client connection and handles the
+# message framing (if negotiated, each message is prefixed with its length
+# and received completely regardless of its size) and the pipelined
+# transactions (if negotiated, each message carries an id in its header
+# and several requests can be outstanding in both directions)
+class MessageSocket:
+
+	def __init__(self, sslSocket):
+		self.sslSocket = sslSocket
+
+		# Flag that indicates if length-prefixed message framing is used
+		# (is negotiated during the authentication).
+		self.useFraming = False
+
+		# Flag that indicates if pipelined transactions are used instead
+		# of RTS/CTS (is negotiated during the authentication and
+		# needs message framing).
+		self.usePipelining = False
+
+		# Buffer of received data that does not belong to a returned
+		# message yet.
+		self.recvBuffer = bytearray()
+
+		# Lock that makes sending a message atomic.
+		self.sendLock = threading.Lock()
+
+		# Id of the last request sent.
+		self.lastMessageId = 0
+
+		# Condition that is used to let only one thread receive
+		# from the connection at a time.
+		self.recvCondition = threading.Condition()
+		self.isReceiving = False
+
+		# Received messages that are not awaited by a thread
+		# (tuples of the form (kind, messageId, message)).
+		self.receivedMessages = collections.deque()
+
+		# Responses that are awaited by a thread (key: message id,
+		# value: None as long as the response was not received).
+		self.awaitedResponses = dict()
+
+		# Context of requests that were sent without waiting for the
+		# response (key: message id).
+		self.pendingRequests = dict()
+
+		# State of the transaction the current thread is in.
+		self.threadState = threading.local()
+
+
+	# Internal function that returns the next complete message
+	# from the receive buffer (or None if it is incomplete) as a tuple
+	# of the form (kind, messageId, message).
+	def _getBufferedMessage(self):
+
+		if self.usePipelining:
+			headerFormat = PIPELINEDHEADERFORMAT
+		else:
+			headerFormat = FRAMEHEADERFORMAT
+		headerSize = struct.calcsize(headerFormat)
+
+		if len(self.recvBuffer) < headerSize:
+			return None
+
+		header = struct.unpack_from(headerFormat, self.recvBuffer)
+		messageSize = header[0]
+		if messageSize > MAXMESSAGESIZE:
+			raise ValueError("Message size %d too large." % messageSize)
+
+		if len(self.recvBuffer) < headerSize + messageSize:
+			return None
+
+		message = str(self.recvBuffer[headerSize:headerSize + messageSize])
+		del self.recvBuffer[:headerSize + messageSize]
+
+		if self.usePipelining:
+			return (header[1], header[2], message)
+		return (None, None, message)
+
+
+	# Internal function that receives one complete message from
+	# the connection (or None if the connection was closed).
+	def _recvMessage(self, buffsize):
+
+		while True:
+			message = self._getBufferedMessage()
+			if message is not None:
+				return message
+
+			# NOTE: received data stays in the buffer if the
+			# receiving is interrupted (i.e. by a timeout).
+			data = self.sslSocket.recv(max(buffsize, BUFSIZE))
+			if not data:
+				return None
+			self.recvBuffer.extend(data)
+
+
+	# Internal function that receives the response with the given id
+	# or (if no id is given) the next message that is not awaited by
+	# another thread. Only one thread receives from the connection at
+	# a time, received messages for other threads are handed over.
+	def _recvPipelined(self, buffsize, messageId):
+
+		timeout = self.sslSocket.gettimeout()
+		if timeout is not None:
+			deadline = time.time() + timeout
+
+		while True:
+
+			with self.recvCondition:
+
+				if messageId is None:
+					if len(self.receivedMessages) != 0:
+						return self.receivedMessages.popleft()
+
+				elif self.awaitedResponses[messageId] is not None:
+					return (MSGKIND_RESPONSE, messageId,
+						self.awaitedResponses.pop(messageId))
+
+				# Wait for the thread that currently receives.
+				if self.isReceiving:
+					if timeout is None:
+						self.recvCondition.wait()
+						continue
+
+					remaining = deadline - time.time()
+					if timeout == 0.0:
+						raise ssl.SSLError(ssl.SSL_ERROR_WANT_READ,
+							"The operation did not complete (read)")
+					if remaining <= 0.0:
+						raise ssl.SSLError("The read operation timed out")
+					self.recvCondition.wait(remaining)
+					continue
+
+				self.isReceiving = True
+
+			try:
+				message = self._recvMessage(buffsize)
+
+			finally:
+				with self.recvCondition:
+					self.isReceiving = False
+					self.recvCondition.notifyAll()
+
+			if message is None:
+				return (None, None, "")
+
+			kind, receivedId, data = message
+			with self.recvCondition:
+				if (kind == MSGKIND_RESPONSE
+					and receivedId in self.awaitedResponses):
+					self.awaitedResponses[receivedId] = data
+				else:
+					self.receivedMessages.append(message)
+				self.recvCondition.notifyAll()
+
+
+	# Internal function that sends a message with the given header.
+	def _sendMessage(self, kind, messageId, data):
+		with self.sendLock:
+			if self.usePipelining:
+				header = struct.pack(PIPELINEDHEADERFORMAT, len(data), kind,
+					messageId)
+			else:
+				header = struct.pack(FRAMEHEADERFORMAT, len(data))
+			self.sslSocket.sendall(header + data)
+
+
+	# Internal function that returns a new message id.
+	def _getNewMessageId(self):
+		with self.sendLock:
+			self.lastMessageId = (self.lastMessageId + 1) & 0xffffffff
+			return self.lastMessageId
+
+
+	# Sends data to the client. If pipelined transactions are used,
+	# the data is sent as response if the current thread handles a
+	# received request and otherwise as request whose response is
+	# returned by the next receive of the current thread.
+	def send(self, data):
+
+		if not self.useFraming:
+			self.sslSocket.sendall(data)
+
+		elif not self.usePipelining:
+			self._sendMessage(None, None, data)
+
+		else:
+			replyId = getattr(self.threadState, "replyId", None)
+			if replyId is not None:
+				self.threadState.replyId = None
+				self._sendMessage(MSGKIND_RESPONSE, replyId, data)
+
+			else:
+				messageId = self._getNewMessageId()
+				with self.recvCondition:
+					self.awaitedResponses[messageId] = None
+				self.threadState.awaitedId = messageId
+				self._sendMessage(MSGKIND_REQUEST, messageId, data)
+
+
+	# Sends a request to the client without waiting for its response
+	# (only possible if pipelined transactions are used). The given
+	# context can be fetched with the id of the response when it
+	# is received.
+	def sendRequest(self, data, context):
+
+		messageId = self._getNewMessageId()
+		with self.recvCondition:
+			self.pendingRequests[messageId] = context
+		try:
+			self._sendMessage(MSGKIND_REQUEST, messageId, data)
+		except:
+			with self.recvCondition:
+				self.pendingRequests.pop(messageId, None)
+			raise
+
+		return messageId
+
+
+	# Receives data from the client. If message framing is used,
+	# one complete message is returned (independent of the buffer size).
+	def recv(self, buffsize):
+
+		if not self.useFraming:
+			return self.sslSocket.recv(buffsize)
+
+		if not self.usePipelining:
+			return self._recvMessage(buffsize)[2]
+
+		awaitedId = getattr(self.threadState, "awaitedId", None)
+		self.threadState.awaitedId = None
+		self.threadState.replyId = None
+		self.threadState.responseId = None
+
+		try:
+			kind, messageId, data = self._recvPipelined(buffsize, awaitedId)
+		except:
+			if awaitedId is not None:
+				with self.recvCondition:
+					self.awaitedResponses.pop(awaitedId, None)
+			raise
+
+		if kind == MSGKIND_REQUEST:
+			self.threadState.replyId = messageId
+		elif kind == MSGKIND_RESPONSE and awaitedId is None:
+			self.threadState.responseId = messageId
+
+		return data
+
+
+	# Returns the id of the response the last receive of the current
+	# thread returned (None if it was no response to a request sent
+	# with sendRequest()).
+	def getResponseId(self):
+		return getattr(self.threadState, "responseId", None)
+
+
+	# Returns and removes the context of the request with the given id.
+	def popRequestContext(self, messageId):
+		with self.recvCondition:
+			return self.pendingRequests.pop(messageId, None)
+
+
+	# Internal function that checks if a complete message is in the
+	# receive buffer.
+	def _hasBufferedMessage(self):
+
+		if not self.useFraming:
+			return len(self.recvBuffer) != 0
+
+		if self.usePipelining:
+			headerSize = struct.calcsize(PIPELINEDHEADERFORMAT)
+		else:
+			headerSize = struct.calcsize(FRAMEHEADERFORMAT)
+
+		if len(self.recvBuffer) < headerSize:
+			return False
+
+		messageSize = struct.unpack_from("!I", self.recvBuffer)[0]
+		return len(self.recvBuffer) >= headerSize + messageSize
+
+
+	# Returns a value unequal to 0 if data can be received without
+	# waiting for the connection (an incomplete message in the
+	# receive buffer is not counted).
+	def pending(self):
+		with self.recvCondition:
+			receivedCount = len(self.receivedMessages)
+		if self._hasBufferedMessage():
+			receivedCount += 1
+		return receivedCount + self.sslSocket.pending()
+
+
+	def settimeout(self, timeout):
+		self.sslSocket.settimeout(timeout)
+
 
 # this class handles the communication with the incoming client connection
 class ClientCommunication:
 
 	def __init__(self, sslSocket, clientAddress, clientPort, globalData):
-		self.sslSocket = sslSocket
+		# Socket that is used to send/receive messages
+		# (wraps the ssl socket and handles the message framing).
+		self.sslSocket = MessageSocket(sslSocket)
 		self.clientAddress = clientAddress
 		self.clientPort = clientPort
 
@@ -39,12 +357,17 @@ class ClientCommunication:
 		self.userBackend = self.globalData.userBackend
 		self.sensorAlertExecuter = self.globalData.sensorAlertExecuter
 		self.managerUpdateExecuter = self.globalData.managerUpdateExecuter
+		self.managerStatusSnapshot = self.globalData.managerStatusSnapshot
+		self.sensorHistory = self.globalData.sensorHistory
 		self.alertLevels = self.globalData.alertLevels
 		self.asyncOptionExecuters = self.globalData.asyncOptionExecuters
 		self.asyncOptionExecutersLock \
 			= self.globalData.asyncOptionExecutersLock
 		self.connectionWatchdog = self.globalData.connectionWatchdog
 		self.serverSessions = self.globalData.serverSessions
+		self.registrationFingerprints \
+			= self.globalData.registrationFingerprints
+		self.metrics = self.globalData.metrics
 
 		# Time the last message was received by the server. Since the 
 		# connection counts as a message, set it to the current time
@@ -108,6 +431,17 @@ class ClientCommunication:
 		self.logger = self.globalData.logger
 		self.loggerFileHandler = None
 
+		# Sender that sends queued messages to the client (is only used if
+		# the client is of type "manager" or "alert").
+		self.clientSender = None
+
+		# Flag that indicates if the manager client supports delta status
+		# updates (is negotiated during the authentication) and the
+		# versions of the status update that were last sent to and
+		# acknowledged by the client.
+		self.useStatusDelta = False
+		self.statusVersionSent = None
+		self.statusVersionAcked = None
 
 
 	# internal function that acquires the lock
@@ -822,6 +1156,10 @@ class ClientCommunication:
 		# mark node as not connected
 		self.storage.markNodeAsNotConnected(self.nodeId, logger=self.logger)
 
+		# stop sender of the client
+		if self.clientSender:
+			self.clientSender.exit()
+
 		# set flag that the initialization process of
 		# the client is finished as false
 		self.clientInitialized = False
@@ -836,6 +1174,13 @@ class ClientCommunication:
 	def _initiateTransaction(self, messageType, messageSize,
 		acquireLock=False):
 
+		# Pipelined transactions are identified by the message ids
+		# and do not need an RTS/CTS handshake.
+		if self.sslSocket.usePipelining:
+			if acquireLock:
+				self._acquireLock()
+			return True
+
 		# try to get the exclusive state to be allowed to initiate a
 		# transaction with the client
 		while True:
@@ -898,6 +1243,7 @@ class ClientCommunication:
 					"size": messageSize,
 					"message": messageType,
 					"payload": payload}
+				rtsTime = time.time()
 				self.sslSocket.send(json.dumps(message))
 
 			except Exception as e:
@@ -961,6 +1307,9 @@ class ClientCommunication:
 					+ "succeeded (%s:%d)."
 					% (self.clientAddress, self.clientPort))
 
+				self.metrics.observe("alertr_transaction_rtt_seconds",
+					time.time() - rtsTime, (("message", messageType),))
+
 				# set transaction initiation flag as false so other
 				# threads can try to initiate a transaction with the client
 				self.transactionInitiation = False
@@ -1076,18 +1425,24 @@ class ClientCommunication:
 
 
 	# Internal function that builds the alert system state message.
-	def _buildAlertSystemStateMessage(self):
-
-		# Get a list from database of
-		# list[0] = list(option objects)
-		# list[1] = list(node objects)
-		# list[2] = list(sensor objects)
-		# list[3] = list(manager objects)
-		# list[4] = list(alert objects)
-		# or None
-		alertSystemInformation = self.storage.getAlertSystemInformation(
+	def _buildAlertSystemStateMessage(self, allowDelta=False):
+
+		# Only send the changes since the last status update if the
+		# client has acknowledged it (otherwise the client could not
+		# detect a missed update).
+		baseVersion = None
+		if (allowDelta
+			and self.useStatusDelta
+			and self.statusVersionAcked is not None
+			and self.statusVersionAcked == self.statusVersionSent):
+			baseVersion = self.statusVersionAcked
+
+		# The status message is built from a snapshot that is shared
+		# by all manager sessions.
+		messageType, version, alertSystemStateMessage = \
+			self.managerStatusSnapshot.getStatusMessage(baseVersion,
 			logger=self.logger)
-		if alertSystemInformation is None:
+		if alertSystemStateMessage is None:
 			self.logger.error("[%s]: Getting alert system "
 				% self.fileName
 				+ "information from database failed (%s:%d)."
@@ -1103,100 +1458,52 @@ class ClientCommunication:
 			except Exception as e:
 				pass
 
-			return None
-		optionList = alertSystemInformation[0]
-		nodesList = alertSystemInformation[1]
-		sensorList = alertSystemInformation[2]
-		managerList = alertSystemInformation[3]
-		alertList = alertSystemInformation[4]
-
-		# Generating options list.
-		options = list()
-		for optionObj in optionList:
-			tempDict = {"type": optionObj.type,
-				"value": optionObj.value}
-			options.append(tempDict)
-
-		# Generating nodes list.
-		nodes = list()
-		for nodeObj in nodesList:
-			tempDict = {"nodeId": nodeObj.id,
-				"hostname": nodeObj.hostname,
-				"username": nodeObj.username,
-				"nodeType": nodeObj.nodeType,
-				"instance": nodeObj.instance,
-				"version": nodeObj.version,
-				"rev": nodeObj.rev}
-			if nodeObj.connected:
-				tempDict["connected"] = 1
-			else:
-				tempDict["connected"] = 0
-			if nodeObj.persistent:
-				tempDict["persistent"] = 1
-			else:
-				tempDict["persistent"] = 0
-			nodes.append(tempDict)
-
-		# Generating sensors list.
-		sensors = list()
-		for sensorObj in sensorList:
-			tempDict = {"sensorId": sensorObj.sensorId,
-				"nodeId": sensorObj.nodeId,
-				"remoteSensorId": sensorObj.remoteSensorId,
-				"description": sensorObj.description,
-				"state": sensorObj.state,
-				"lastStateUpdated": sensorObj.lastStateUpdated,
-				"alertDelay": sensorObj.alertDelay,
-				"alertLevels": sensorObj.alertLevels,
-				"dataType": sensorObj.dataType,
-				"data": sensorObj.data}
-
-			sensors.append(tempDict)
-
-		# Generating managers list.
-		managers = list()
-		for managerObj in managerList:
-			tempDict = {"managerId": managerObj.managerId,
-				"nodeId": managerObj.nodeId,
-				"description": managerObj.description}
-			managers.append(tempDict)
-
-		# Generating alerts list.
-		alerts = list()
-		for alertObj in alertList:
-			tempDict = {"alertId": alertObj.alertId,
-				"nodeId": alertObj.nodeId,
-				"remoteAlertId": alertObj.remoteAlertId,
-				"description": alertObj.description,
-				"alertLevels": alertObj.alertLevels}
-			alerts.append(tempDict)
-
-		# Generating alertLevels list.
-		alertLevels = list()
-		for i in range(len(self.alertLevels)):
-			tempDict = {"alertLevel": self.alertLevels[i].level,
-				"name": self.alertLevels[i].name,
-				"triggerAlways": (1 if self.alertLevels[i].triggerAlways
-				else 0),
-				"rulesActivated": self.alertLevels[i].rulesActivated}
-			alertLevels.append(tempDict)
-
-		self.logger.debug("[%s]: Sending status message (%s:%d)."
+			return None, None
+
+		self.statusVersionSent = version
+
+		self.logger.debug("[%s]: Sending %s message for version %d (%s:%d)."
+			% (self.fileName, messageType, version,
+			self.clientAddress, self.clientPort))
+
+		return messageType, alertSystemStateMessage
+
+
+	# Internal function that handles the version of the status update
+	# that is acknowledged by the manager client in its response.
+	# Returns True if the client requested a full status update
+	# (because it was not able to apply the delta status update).
+	def _handleStatusResponse(self, message):
+
+		if not self.useStatusDelta:
+			return False
+
+		try:
+			result = str(message["payload"]["result"]).upper()
+			if result == "OK":
+				self.statusVersionAcked = int(message["payload"]["version"])
+				return False
+
+		except Exception as e:
+			self.logger.exception("[%s]: Status version of response "
+				% self.fileName
+				+ "invalid (%s:%d)."
+				% (self.clientAddress, self.clientPort))
+			result = None
+
+		# The next status update has to be a full one.
+		self.statusVersionAcked = None
+
+		if result != "RESYNC":
+			return False
+
+		self.logger.info("[%s]: Client requested full status update (%s:%d)."
 			% (self.fileName, self.clientAddress, self.clientPort))
 
-		payload = {"type": "request",
-			"options": options,
-			"nodes": nodes,
-			"sensors": sensors,
-			"managers": managers,
-			"alerts": alerts,
-			"alertLevels": alertLevels}
-		utcTimestamp = int(time.time())
-		message = {"serverTime": utcTimestamp,
-			"message": "status",
-			"payload": payload}
+		if self.clientSender is not None:
+			self.clientSender.queueManagerUpdate()
 
-		return json.dumps(message)
+		return True
 
 
 	# Internal function to initialize communication with the client
@@ -1478,12 +1785,46 @@ class ClientCommunication:
 
 			return False, 0
 
+		# Check if the client supports length-prefixed message framing
+		# (older clients do not send this option).
+		useFraming = False
+		try:
+			if "framing" in message["payload"].keys():
+				useFraming = (str(message["payload"]["framing"]).upper()
+					== "LENGTH")
+		except Exception as e:
+			pass
+
+		# Check if the client supports pipelined transactions
+		# (only used together with message framing).
+		usePipelining = False
+		try:
+			if useFraming and "transactions" in message["payload"].keys():
+				usePipelining = (str(message["payload"]["transactions"]).upper()
+					== "PIPELINED")
+		except Exception as e:
+			pass
+
+		# Check if the client supports delta status updates
+		# (only sent by manager clients).
+		try:
+			if "statusUpdates" in message["payload"].keys():
+				self.useStatusDelta = (
+					str(message["payload"]["statusUpdates"]).upper()
+					== "DELTA")
+		except Exception as e:
+			pass
+
 		# send authentication response
 		try:
 			payload = {"type": "response",
 				"result": "ok",
 				"version": self.serverVersion,
 				"rev" : self.serverRev}
+			if useFraming:
+				payload["framing"] = "length"
+			if usePipelining:
+				payload["transactions"] = "pipelined"
 			utcTimestamp = int(time.time())
 			message = {"serverTime": utcTimestamp,
 				"message": "initialization",
@@ -1496,9 +1837,47 @@ class ClientCommunication:
 				+ "failed (%s:%d)." % (self.clientAddress, self.clientPort))
 			return False, 0
 
+		# All following messages are framed if the client supports it.
+		if useFraming:
+			self.logger.debug("[%s]: Using message framing (%s:%d)."
+				% (self.fileName, self.clientAddress, self.clientPort))
+			self.sslSocket.useFraming = True
+
+		if usePipelining:
+			self.logger.debug("[%s]: Using pipelined transactions (%s:%d)."
+				% (self.fileName, self.clientAddress, self.clientPort))
+			self.sslSocket.usePipelining = True
+
 		return True, messageSize
 
 
+	# Internal function that computes the fingerprint of the registration
+	# of the client (state and data of the sensors are not part of it
+	# because the registration does not update them in the database).
+	#
+	# return fingerprint or None
+	def _getRegistrationFingerprint(self, payload):
+
+		try:
+			registration = dict(payload)
+			if "sensors" in registration:
+				registration["sensors"] = [dict((key, value)
+					for key, value in sensorDict.items()
+					if key != "state" and key != "data")
+					for sensorDict in registration["sensors"]]
+
+			return hashlib.sha256(json.dumps([self.clientVersion,
+				self.clientRev, registration], sort_keys=True)).hexdigest()
+
+		except Exception as e:
+			self.logger.exception("[%s]: Not able to compute fingerprint "
+				% self.fileName
+				+ "of registration (%s:%d)."
+				% (self.clientAddress, self.clientPort))
+
+		return None
+
+
 	# Internal function to register the client (add it to the database
 	# or check if it is known).
 	def _registerClient(self, messageSize):
@@ -1670,10 +2049,36 @@ class ClientCommunication:
 				% (self.fileName, self.hostname, self.nodeType,
 					self.clientAddress, self.clientPort))
 
+		# Check if the registration is identical to the last successful
+		# registration of this username. If it is, the node, sensors,
+		# alerts and manager in the database are already up to date
+		# and do not have to be compared with the registration
+		# (the fingerprint is removed and only stored again if the
+		# registration succeeds).
+		fingerprint = self._getRegistrationFingerprint(message["payload"])
+		knownRegistration = self.registrationFingerprints.pop(self.username,
+			None)
+		if knownRegistration is not None:
+			self.metrics.increaseCounter("alertr_node_reconnects_total")
+		registrationUnchanged = False
+		if (fingerprint is not None
+			and knownRegistration is not None
+			and knownRegistration[0] == fingerprint
+			and self.storage.getNodeId(self.username,
+			logger=self.logger) == knownRegistration[1]):
+
+			self.logger.debug("[%s]: Registration unchanged. Skipping "
+				% self.fileName
+				+ "database update (%s:%d)."
+				% (self.clientAddress, self.clientPort))
+
+			registrationUnchanged = True
+
 		# add node to database
-		if not self.storage.addNode(self.username, self.hostname,
+		if (not registrationUnchanged
+			and not self.storage.addNode(self.username, self.hostname,
 			self.nodeType, self.instance, self.clientVersion, self.clientRev,
-			self.persistent, logger=self.logger):
+			self.persistent, logger=self.logger)):
 			self.logger.error("[%s]: Unable to add node to database."
 				% self.fileName)
 
@@ -1831,8 +2236,9 @@ class ClientCommunication:
 				self.sensors.append(tempSensor)
 
 			# add sensors to database
-			if not self.storage.addSensors(self.username, sensors,
-				logger=self.logger):
+			if (not registrationUnchanged
+				and not self.storage.addSensors(self.username, sensors,
+				logger=self.logger)):
 				self.logger.error("[%s]: Unable to add "
 					% self.fileName
 					+ "sensors to database (%s:%d)."
@@ -1850,6 +2256,13 @@ class ClientCommunication:
 
 				return False
 
+			# Sensor ids of the rules have to be resolved again
+			# because sensors could have been added or removed.
+			# Timeouts of added sensors have to be scheduled.
+			if not registrationUnchanged:
+				self.sensorAlertExecuter.invalidateRuleSensorIds()
+				self.connectionWatchdog.invalidateSensorTimeouts()
+
 			# Update alert levels the client handles
 			# (sensor clients handle only alert levels the sensors trigger).
 			for sensorDict in sensors:
@@ -1978,8 +2391,9 @@ class ClientCommunication:
 					self.clientAddress, self.clientPort))
 
 			# add alerts to database
-			if not self.storage.addAlerts(self.username, alerts,
-				logger=self.logger):
+			if (not registrationUnchanged
+				and not self.storage.addAlerts(self.username, alerts,
+				logger=self.logger)):
 				self.logger.error("[%s]: Unable to add " % self.fileName
 					+ "alerts to database (%s:%d)."
 					% (self.clientAddress, self.clientPort))
@@ -2057,8 +2471,9 @@ class ClientCommunication:
 					% (self.fileName, self.clientAddress, self.clientPort))
 
 			# add manager to database
-			if not self.storage.addManager(self.username, manager,
-				logger=self.logger):
+			if (not registrationUnchanged
+				and not self.storage.addManager(self.username, manager,
+				logger=self.logger)):
 				self.logger.error("[%s]: Unable to add " % self.fileName
 					+ "manager to database (%s:%d)."
 					% (self.clientAddress, self.clientPort))
@@ -2113,6 +2528,11 @@ class ClientCommunication:
 				+ "failed (%s:%d)." % (self.clientAddress, self.clientPort))
 			return False
 
+		# Store fingerprint of the successful registration.
+		if fingerprint is not None:
+			self.registrationFingerprints[self.username] = (fingerprint,
+				self.nodeId)
+
 		return True
 
 
@@ -2334,6 +2754,7 @@ class ClientCommunication:
 		# Extract sensor data.
 		# Generate a list of tuples with (remoteSensorId, sensorData).
 		dataList = list()
+		dataSensors = list()
 		try:
 			for i in range(self.sensorCount):
 				remoteSensorId = sensors[i]["clientSensorId"]
@@ -2379,6 +2800,7 @@ class ClientCommunication:
 					sensor.data = sensors[i]["data"]
 
 				dataList.append( (remoteSensorId, sensor.data) )
+				dataSensors.append(sensor)
 
 		except Exception as e:
 			self.logger.exception("[%s]: Received sensor data "
@@ -2423,6 +2845,12 @@ class ClientCommunication:
 
 				return False
 
+			# Add the received data to the history of the sensors.
+			if self.sensorHistory is not None:
+				for sensor in dataSensors:
+					self.sensorHistory.addSensorData(sensor.sensorId,
+						sensor.dataType, sensor.data)
+
 		# send status response
 		try:
 			payload = {"type": "response", "result": "ok"}
@@ -2600,76 +3028,48 @@ class ClientCommunication:
 			+ "and state %d."
 			% state)
 
-		# Update state of the sensor if sensor alert updates the state.
+		# Update state, data and time of the sensor and store the sensor
+		# alert in the journal (if activated) in one transaction.
 		if changeState:
 			sensor.state = state
-
-			if not self.storage.updateSensorState(self.nodeId,
-				[ (remoteSensorId, state) ], logger=self.logger):
-
-				self.logger.error("[%s]: Not able to update sensor state "
-					% self.fileName
-					+ "(%s:%d)."
-					% (self.clientAddress, self.clientPort))
-
-				# send error message back
-				try:
-					utcTimestamp = int(time.time())
-					message = {"serverTime": utcTimestamp,
-						"message": incomingMessage["message"],
-						"error": "not able to update sensor state in database"}
-					self.sslSocket.send(json.dumps(message))
-				except Exception as e:
-					pass
-
-				return False
-
-		# Update data of the sensor if sensor alert carries latest
-		# sensor data.
 		if hasLatestData:
 			sensor.data = sensorData
 
-			if not self.storage.updateSensorData(self.nodeId,
-				[ (remoteSensorId, sensorData) ], logger=self.logger):
-
-				self.logger.error("[%s]: Not able to update sensor data "
-					% self.fileName
-					+ "(%s:%d)."
-					% (self.clientAddress, self.clientPort))
-
-				# send error message back
-				try:
-					utcTimestamp = int(time.time())
-					message = {"serverTime": utcTimestamp,
-						"message": incomingMessage["message"],
-						"error": "not able to update sensor data in database"}
-					self.sslSocket.send(json.dumps(message))
-				except Exception as e:
-					pass
-
-				return False
-
-		if not self.storage.updateSensorTime(sensor.sensorId,
-			logger=self.logger):
-			self.logger.error("[%s]: Not able to update sensor time (%s:%d)."
-				% (self.fileName, self.clientAddress, self.clientPort))
+		storeSensorAlert = self.sensorAlertExecuter.sensorAlertJournal
+		sensorAlertId = self.storage.ingestSensorAlert(self.nodeId,
+			sensor.sensorId, state, dataJson, changeState, hasLatestData,
+			sensorDataType, sensorData, storeSensorAlert, logger=self.logger)
+		if sensorAlertId is None:
+			self.logger.error("[%s]: Not able to store sensor alert "
+				% self.fileName
+				+ "(%s:%d)."
+				% (self.clientAddress, self.clientPort))
 
 			# send error message back
 			try:
 				utcTimestamp = int(time.time())
 				message = {"serverTime": utcTimestamp,
 					"message": incomingMessage["message"],
-					"error": "not able to update sensor time in database"}
+					"error": "not able to store sensor alert in database"}
 				self.sslSocket.send(json.dumps(message))
 			except Exception as e:
 				pass
 
 			return False
 
-		# add sensor alert to database
-		if not self.storage.addSensorAlert(self.nodeId, sensor.sensorId,
-			state, dataJson, changeState, hasLatestData, sensorDataType,
-			sensorData, logger=self.logger):
+		if not storeSensorAlert:
+			sensorAlertId = None
+
+		# Add the received data to the history of the sensor.
+		if hasLatestData and self.sensorHistory is not None:
+			self.sensorHistory.addSensorData(sensor.sensorId, sensorDataType,
+				sensorData)
+
+		# hand sensor alert over to the sensor alert executer
+		if not self.sensorAlertExecuter.addSensorAlert(self.nodeId,
+			sensor.sensorId, state, dataJson, changeState, hasLatestData,
+			sensorDataType, sensorData, sensorAlertId=sensorAlertId,
+			logger=self.logger):
 			self.logger.error("[%s]: Not able to add sensor alert (%s:%d)."
 				% (self.fileName, self.clientAddress, self.clientPort))
 
@@ -2678,16 +3078,13 @@ class ClientCommunication:
 				utcTimestamp = int(time.time())
 				message = {"serverTime": utcTimestamp,
 					"message": incomingMessage["message"],
-					"error": "not able to add sensor alert to database"}
+					"error": "not able to add sensor alert"}
 				self.sslSocket.send(json.dumps(message))
 			except Exception as e:
 				pass
 
 			return False
 
-		# wake up sensor alert executer
-		self.sensorAlertExecuter.sensorAlertEvent.set()
-
 		# send sensor alert response
 		try:
 			payload = {"type": "response", "result": "ok"}
@@ -2835,11 +3232,9 @@ class ClientCommunication:
 				+ "and state %d and data %.3f (%s:%d)."
 				% (state, sensorData, self.clientAddress, self.clientPort))
 
-		# update sensor state
-		stateTuple = (remoteSensorId, state)
-		stateList = [stateTuple]
-		if not self.storage.updateSensorState(self.nodeId, stateList,
-			logger=self.logger):
+		# Update state, data and time of the sensor in one transaction.
+		if not self.storage.ingestStateChange(self.nodeId, sensor.sensorId,
+			state, sensorData, logger=self.logger):
 			self.logger.error("[%s]: Not able to change sensor state (%s:%d)."
 				% (self.fileName, self.clientAddress, self.clientPort))
 
@@ -2855,49 +3250,10 @@ class ClientCommunication:
 
 			return False
 
-		# Update sensor data if it holds data.
-		if sensorDataType != SensorDataType.NONE:
-			dataTuple = (remoteSensorId, sensorData)
-			dataList = [dataTuple]
-
-			if not self.storage.updateSensorData(self.nodeId, dataList,
-				logger=self.logger):
-				self.logger.error("[%s]: Not able to change sensor data "
-					% self.fileName
-					+ "(%s:%d)."
-					% (self.clientAddress, self.clientPort))
-
-				# send error message back
-				try:
-					utcTimestamp = int(time.time())
-					message = {"serverTime": utcTimestamp,
-						"message": incomingMessage["message"],
-						"error": "not able to change sensor data in database"}
-					self.sslSocket.send(json.dumps(message))
-				except Exception as e:
-					pass
-
-				return False
-
-		# get sensorId from database => append to state change queue
-		# => wake up manager update executer
-		sensorId = self.storage.getSensorId(self.nodeId, remoteSensorId,
-			logger=self.logger)
-		if sensorId is None:
-			self.logger.error("[%s]: Not able to get sensorId (%s:%d)."
-				% (self.fileName, self.clientAddress, self.clientPort))
-
-			# send error message back
-			try:
-				utcTimestamp = int(time.time())
-				message = {"serverTime": utcTimestamp,
-					"message": incomingMessage["message"],
-					"error": "not able to get sensor id from database"}
-				self.sslSocket.send(json.dumps(message))
-			except Exception as e:
-				pass
-
-			return False
+		# Add the received data to the history of the sensor.
+		if self.sensorHistory is not None:
+			self.sensorHistory.addSensorData(sensor.sensorId, sensorDataType,
+				sensorData)
 
 		# send state change response
 		try:
@@ -2923,12 +3279,15 @@ class ClientCommunication:
 		self.managerUpdateExecuter.queueStateChange.append(managerStateTuple)
 		self.managerUpdateExecuter.managerUpdateEvent.set()
 
+		self.metrics.increaseCounter("alertr_state_changes_received_total")
+
 		return True
 
 
 	# internal function to send the current state of the alert system
 	# to a manager
-	def _sendManagerAllInformation(self, alertSystemStateMessage):
+	def _sendManagerAllInformation(self, alertSystemStateMessage,
+		messageType="status"):
 
 		# Sending status message to client.
 		try:
@@ -2956,16 +3315,17 @@ class ClientCommunication:
 				return False
 
 			# check if the received message type is the correct one
-			if str(message["message"]).upper() != "STATUS":
-				self.logger.error("[%s]: status message expected (%s:%d)."
-					% (self.fileName, self.clientAddress, self.clientPort))
+			if str(message["message"]).upper() != messageType.upper():
+				self.logger.error("[%s]: %s message expected (%s:%d)."
+					% (self.fileName, messageType,
+					self.clientAddress, self.clientPort))
 
 				# send error message back
 				try:
 					utcTimestamp = int(time.time())
 					message = {"serverTime": utcTimestamp,
 						"message": message["message"],
-						"error": "status message expected"}
+						"error": "%s message expected" % messageType}
 					self.sslSocket.send(json.dumps(message))
 				except Exception as e:
 					pass
@@ -2989,6 +3349,11 @@ class ClientCommunication:
 
 				return False
 
+			# check if the client requested a full status update
+			if self._handleStatusResponse(message):
+				self.lastRecv = int(time.time())
+				return True
+
 			# check if status message was correctly received
 			if str(message["payload"]["result"]).upper() != "OK":
 				self.logger.error("[%s]: Result not ok: '%s' (%s:%d)."
@@ -3176,28 +3541,115 @@ class ClientCommunication:
 		return True
 
 
-	# function that sends a state change to a manager client
-	def sendManagerStateChange(self, sensorId, state, dataType, data):
+	# Internal function that sends a request to the client without
+	# waiting for its response (used for pipelined transactions, the
+	# response is handled by the thread receiving from the client).
+	def _sendPipelinedRequest(self, messageType, requestMessage):
 
-		stateChangeMessage = self._buildStateChangeMessage(sensorId,
-			state, dataType, data)
+		try:
+			self.logger.debug("[%s]: Sending pipelined %s message (%s:%d)."
+				% (self.fileName, messageType,
+				self.clientAddress, self.clientPort))
+			self.sslSocket.sendRequest(requestMessage,
+				(messageType, time.time()))
 
-		# initiate transaction with client and acquire lock
-		if not self._initiateTransaction("statechange",
-			len(stateChangeMessage), acquireLock=True):
+		except Exception as e:
+			self.logger.exception("[%s]: Sending pipelined " % self.fileName
+				+ "%s message failed (%s:%d)."
+				% (messageType, self.clientAddress, self.clientPort))
 			return False
 
-		returnValue = self._sendManagerStateChange(stateChangeMessage)
+		return True
 
-		self._releaseLock()
-		return returnValue
 
+	# Internal function that checks the response to a pipelined request.
+	# Returns False if the connection to the client should be closed.
+	def _handlePipelinedResponse(self, messageType, data):
 
-	# function that sends a sensor alert of to a alert client
-	def sendAlertSensorAlertsOff(self):
+		if messageType is None:
+			self.logger.error("[%s]: Received response to unknown "
+				% self.fileName
+				+ "request (%s:%d)."
+				% (self.clientAddress, self.clientPort))
+			return False
+
+		try:
+			message = json.loads(data)
+			# check if an error was received
+			if "error" in message.keys():
+				self.logger.error("[%s]: Error received: '%s' (%s:%d)."
+					% (self.fileName, message["error"],
+					self.clientAddress, self.clientPort))
+				return False
+
+			# check if the received message type is the correct one
+			if str(message["message"]).upper() != messageType.upper():
+				self.logger.error("[%s]: %s message expected (%s:%d)."
+					% (self.fileName, messageType,
+					self.clientAddress, self.clientPort))
+				return False
+
+			# check if the received type is the correct one
+			if str(message["payload"]["type"]).upper() != "RESPONSE":
+				self.logger.error("[%s]: response expected (%s:%d)."
+					% (self.fileName, self.clientAddress, self.clientPort))
+				return False
+
+			# check if the client requested a full status update
+			if (messageType in ["status", "statusdelta"]
+				and self._handleStatusResponse(message)):
+				self.lastRecv = int(time.time())
+				return True
+
+			# check if the message was correctly received
+			if str(message["payload"]["result"]).upper() != "OK":
+				self.logger.error("[%s]: Result of %s not ok: '%s' (%s:%d)."
+					% (self.fileName, messageType,
+					message["payload"]["result"],
+					self.clientAddress, self.clientPort))
+
+		except Exception as e:
+			self.logger.exception("[%s]: Receiving %s " % (self.fileName,
+				messageType)
+				+ "response failed (%s:%d)."
+				% (self.clientAddress, self.clientPort))
+			return False
+
+		self.lastRecv = int(time.time())
+
+		return True
+
+
+	# function that sends a state change to a manager client
+	def sendManagerStateChange(self, sensorId, state, dataType, data):
+
+		stateChangeMessage = self._buildStateChangeMessage(sensorId,
+			state, dataType, data)
+
+		if self.sslSocket.usePipelining:
+			return self._sendPipelinedRequest("statechange",
+				stateChangeMessage)
+
+		# initiate transaction with client and acquire lock
+		if not self._initiateTransaction("statechange",
+			len(stateChangeMessage), acquireLock=True):
+			return False
+
+		returnValue = self._sendManagerStateChange(stateChangeMessage)
+
+		self._releaseLock()
+		return returnValue
+
+
+	# function that sends a sensor alert of to a alert client
+	def sendAlertSensorAlertsOff(self):
 
 		sensorAlertsOffMessage = self._buildSensorAlertsOffMessage()
 
+		if self.sslSocket.usePipelining:
+			return self._sendPipelinedRequest("sensoralertsoff",
+				sensorAlertsOffMessage)
+
 		# initiate transaction with client and acquire lock
 		if not self._initiateTransaction("sensoralertsoff",
 			len(sensorAlertsOffMessage), acquireLock=True):
@@ -3209,19 +3661,27 @@ class ClientCommunication:
 		return returnValue
 
 
-	# function that sends a full information update to a manager client
+	# function that sends an information update to a manager client
+	# (only the changes since the last acknowledged update if the client
+	# supports it, otherwise the full information)
 	def sendManagerUpdate(self):
 
-		alertSystemStateMessage = self._buildAlertSystemStateMessage()
+		messageType, alertSystemStateMessage = \
+			self._buildAlertSystemStateMessage(allowDelta=True)
 		if not alertSystemStateMessage:
 			return False
 
+		if self.sslSocket.usePipelining:
+			return self._sendPipelinedRequest(messageType,
+				alertSystemStateMessage)
+
 		# initiate transaction with client and acquire lock
-		if not self._initiateTransaction("status",
+		if not self._initiateTransaction(messageType,
 			len(alertSystemStateMessage), acquireLock=True):
 			return False
 
-		returnValue = self._sendManagerAllInformation(alertSystemStateMessage)
+		returnValue = self._sendManagerAllInformation(alertSystemStateMessage,
+			messageType)
 
 		self._releaseLock()
 		return returnValue
@@ -3232,6 +3692,10 @@ class ClientCommunication:
 
 		sensorAlertMessage = self._buildSensorAlertMessage(sensorAlert)
 
+		if self.sslSocket.usePipelining:
+			return self._sendPipelinedRequest("sensoralert",
+				sensorAlertMessage)
+
 		# initiate transaction with client and acquire lock
 		if not self._initiateTransaction("sensoralert",
 			len(sensorAlertMessage), acquireLock=True):
@@ -3325,11 +3789,10 @@ class ClientCommunication:
 		return True
 
 
-	# this function handles the communication with the client
-	# and receives the commands
-	def handleCommunication(self):
-
-		self._acquireLock()
+	# Internal function that sets up the communication with the client
+	# (authentication, registration, initial state). The connection lock
+	# has to be held by the caller and is released if the setup fails.
+	def _setupCommunication(self):
 
 		# set timeout of the socket to configured seconds
 		self.sslSocket.settimeout(self.serverReceiveTimeout)
@@ -3343,7 +3806,7 @@ class ClientCommunication:
 				% (self.clientAddress, self.clientPort))
 
 			self._releaseLock()
-			return
+			return False
 
 		# Now that the communication is initialized, we can switch to our
 		# own logger instance for the client.
@@ -3368,14 +3831,14 @@ class ClientCommunication:
 					% self.nodeId)
 				self._releaseLock()
 				self._finalizeLogger()
-				return
+				return False
 			if self.sensorCount == 0:
 				self.logger.error("[%s]: Getting sensor count failed (%s:%d)."
 						% (self.fileName, self.clientAddress, self.clientPort))
 
 				self._releaseLock()
 				self._finalizeLogger()
-				return
+				return False
 
 		# mark node as connected in the database
 		if not self.storage.markNodeAsConnected(self.nodeId,
@@ -3387,13 +3850,13 @@ class ClientCommunication:
 
 			self._releaseLock()
 			self._finalizeLogger()
-			return
+			return False
 
 		# check if the type of the node is manager
 		# => send all current node information to the manager
 		if self.nodeType == "manager":
 
-			alertSystemStateMessage = self._buildAlertSystemStateMessage()
+			_, alertSystemStateMessage = self._buildAlertSystemStateMessage()
 			if not alertSystemStateMessage:
 				self.logger.error("[%s]: Not able to build "
 					% self.fileName
@@ -3404,7 +3867,7 @@ class ClientCommunication:
 				self._cleanUpSessionForClosing()
 				self._releaseLock()
 				self._finalizeLogger()
-				return
+				return False
 
 			if (not self._initiateTransaction("status",
 				len(alertSystemStateMessage), acquireLock=False)):
@@ -3417,7 +3880,7 @@ class ClientCommunication:
 				self._cleanUpSessionForClosing()
 				self._releaseLock()
 				self._finalizeLogger()
-				return
+				return False
 
 			if (not self._sendManagerAllInformation(alertSystemStateMessage)):
 				self.logger.error("[%s]: Not able send status "
@@ -3429,7 +3892,7 @@ class ClientCommunication:
 				self._cleanUpSessionForClosing()
 				self._releaseLock()
 				self._finalizeLogger()
-				return
+				return False
 
 		# if node is no manager
 		# => send full status update to all manager clients
@@ -3438,6 +3901,14 @@ class ClientCommunication:
 			self.managerUpdateExecuter.forceStatusUpdate = True
 			self.managerUpdateExecuter.managerUpdateEvent.set()
 
+		# Start the sender that sends queued messages to the client.
+		if self.nodeType == "manager" or self.nodeType == "alert":
+			self.clientSender = ClientSender(self.globalData, self)
+			# set thread to daemon
+			# => threads terminates when main thread terminates
+			self.clientSender.daemon = True
+			self.clientSender.start()
+
 		# Set flag that the initialization process of the client is finished.
 		self.clientInitialized = True
 
@@ -3447,327 +3918,401 @@ class ClientCommunication:
 		# because it could changed its configuration since the last time seen.
 		self.connectionWatchdog.removeNodeTimeout(self.nodeId)
 
-		# handle commands
-		while True:
+		return True
 
-			messageSize = 0
 
-			try:
-				# set timeout of the socket to 0.5 seconds
-				self.sslSocket.settimeout(0.5)
+	# Internal function that closes the session with the client
+	# (the connection lock has to be held by the caller).
+	def _terminateCommunication(self):
 
-				data = self.sslSocket.recv(BUFSIZE)
-				if not data:
+		# clean up session before exiting
+		self._cleanUpSessionForClosing()
+		self._releaseLock()
+		self._finalizeLogger()
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
 
-				# change timeout of the socket back to configured seconds
-				self.sslSocket.settimeout(self.serverReceiveTimeout)
+	# Internal function that handles a transaction initiated by the client.
+	# The given data is the first data received for this transaction.
+	# Returns False if the connection to the client has to be closed.
+	def _handleTransaction(self, data):
 
-				data = data.strip()
-				message = json.loads(data)
-				# check if an error was received
-				if "error" in message.keys():
-					self.logger.error("[%s]: Error received: '%s' (%s:%d)."
-						% (self.fileName, message["error"],
-						self.clientAddress, self.clientPort))
+		messageSize = 0
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
+		# Check if a response to a pipelined request was received.
+		if self.sslSocket.usePipelining:
+			responseId = self.sslSocket.getResponseId()
+			if responseId is not None:
+				messageType = None
+				context = self.sslSocket.popRequestContext(responseId)
+				if context is not None:
+					messageType, requestTime = context
+					self.metrics.observe("alertr_transaction_rtt_seconds",
+						time.time() - requestTime,
+						(("message", messageType),))
+				return self._handlePipelinedResponse(messageType, data)
 
-				# check if RTS was received
-				# => acknowledge it
-				if str(message["payload"]["type"]).upper() == "rts".upper():
-					receivedTransactionId = int(message["payload"]["id"])
-					messageSize = int(message["size"])
+		try:
+			data = data.strip()
+			message = json.loads(data)
+			# check if an error was received
+			if "error" in message.keys():
+				self.logger.error("[%s]: Error received: '%s' (%s:%d)."
+					% (self.fileName, message["error"],
+					self.clientAddress, self.clientPort))
 
-					# received RTS (request to send) message
-					self.logger.debug("[%s]: Received RTS %d message (%s:%d)."
-						% (self.fileName, receivedTransactionId,
-						self.clientAddress, self.clientPort))
+				return False
 
-					self.logger.debug("[%s]: Sending CTS %d message (%s:%d)."
-						% (self.fileName, receivedTransactionId,
-						self.clientAddress, self.clientPort))
+			# check if RTS was received
+			# => acknowledge it
+			if str(message["payload"]["type"]).upper() == "rts".upper():
+				receivedTransactionId = int(message["payload"]["id"])
+				messageSize = int(message["size"])
 
-					# send CTS (clear to send) message
-					payload = {"type": "cts",
-						"id": receivedTransactionId}
-					utcTimestamp = int(time.time())
-					message = {"serverTime": utcTimestamp,
-						"message": str(message["message"]),
-						"payload": payload}
-					self.sslSocket.send(json.dumps(message))
+				# received RTS (request to send) message
+				self.logger.debug("[%s]: Received RTS %d message (%s:%d)."
+					% (self.fileName, receivedTransactionId,
+					self.clientAddress, self.clientPort))
 
-					# After initiating transaction receive actual command.
-					data = ""
-					lastSize = 0
-					while len(data) < messageSize:
-						data += self.sslSocket.recv(BUFSIZE)
-
-						# Check if the size of the received data has changed.
-						# If not we detected a possible dead lock.
-						if lastSize != len(data):
-							lastSize = len(data)
-						else:
-							self.logger.error("[%s]: Possible dead lock "
-								% self.fileName
-								+ "detected while receiving data. Closing "
-								+ "connection to client (%s:%d)."
-								% (self.clientAddress, self.clientPort))
+				self.logger.debug("[%s]: Sending CTS %d message (%s:%d)."
+					% (self.fileName, receivedTransactionId,
+					self.clientAddress, self.clientPort))
 
-							# clean up session before exiting
-							self._cleanUpSessionForClosing()
-							self._releaseLock()
-							self._finalizeLogger()
-							return
+				# send CTS (clear to send) message
+				payload = {"type": "cts",
+					"id": receivedTransactionId}
+				utcTimestamp = int(time.time())
+				message = {"serverTime": utcTimestamp,
+					"message": str(message["message"]),
+					"payload": payload}
+				self.sslSocket.send(json.dumps(message))
 
-				# if no RTS was received
-				# => client does not stick to protocol
-				# => terminate session
-				else:
+				# After initiating transaction receive actual command.
+				data = ""
+				lastSize = 0
+				while len(data) < messageSize:
+					data += self.sslSocket.recv(BUFSIZE)
+
+					# Check if the size of the received data has changed.
+					# If not we detected a possible dead lock.
+					if lastSize != len(data):
+						lastSize = len(data)
+					else:
+						self.logger.error("[%s]: Possible dead lock "
+							% self.fileName
+							+ "detected while receiving data. Closing "
+							+ "connection to client (%s:%d)."
+							% (self.clientAddress, self.clientPort))
 
-					self.logger.error("[%s]: Did not receive " % self.fileName
-						+ "RTS. Client sent: '%s' (%s:%d)."
-						% (data, self.clientAddress, self.clientPort))
+						return False
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
+			# if no RTS was received and no pipelined transactions are used
+			# => client does not stick to protocol
+			# => terminate session
+			elif not self.sslSocket.usePipelining:
 
-			except ssl.SSLError as e:
+				self.logger.error("[%s]: Did not receive " % self.fileName
+					+ "RTS. Client sent: '%s' (%s:%d)."
+					% (data, self.clientAddress, self.clientPort))
 
-				# catch receive timeouts
-				err = e.args[0]
-				if err == "The read operation timed out":
+				return False
 
-					# change timeout of the socket back to configured seconds
-					# before releasing the lock
-					self.sslSocket.settimeout(self.serverReceiveTimeout)
+		except Exception as e:
+			self.logger.exception("[%s]: Receiving failed " % self.fileName
+				+ "(%s:%d)." % (self.clientAddress, self.clientPort))
 
-					# release lock and acquire to let other threads send
-					# data to the client
-					# (wait 0.5 seconds in between, because semaphore
-					# are released in random order => other threads could be
-					# unlucky and not be chosen => this has happened when
-					# loglevel was not debug => hdd I/O has slowed this process
-					# down)
-					self._releaseLock()
-					time.sleep(0.5)
-					self._acquireLock()
+			return False
 
-					# continue receiving
-					continue
+		# extract message type
+		try:
+			message = json.loads(data)
+			# check if an error was received
+			if "error" in message.keys():
+				self.logger.error("[%s]: Error received: '%s' (%s:%d)."
+					% (self.fileName, message["error"],
+					self.clientAddress, self.clientPort))
 
-				self.logger.exception("[%s]: Receiving failed " % self.fileName
-					+ "(%s:%d)." % (self.clientAddress, self.clientPort))
+				return False
 
-				# clean up session before exiting
-				self._cleanUpSessionForClosing()
-				self._releaseLock()
-				self._finalizeLogger()
-				return
+			# check if the received type is the correct one
+			if str(message["payload"]["type"]).upper() != "REQUEST":
+				self.logger.error("[%s]: request expected (%s:%d)."
+					% (self.fileName, self.clientAddress, self.clientPort))
 
-			except Exception as e:
-				self.logger.exception("[%s]: Receiving failed " % self.fileName
-					+ "(%s:%d)." % (self.clientAddress, self.clientPort))
+				# send error message back
+				try:
+					utcTimestamp = int(time.time())
+					message = {"serverTime": utcTimestamp,
+						"message": message["message"],
+						"error": "request expected"}
+					self.sslSocket.send(json.dumps(message))
+				except Exception as e:
+					pass
 
-				# clean up session before exiting
-				self._cleanUpSessionForClosing()
-				self._releaseLock()
-				self._finalizeLogger()
-				return
+				return False
 
-			# extract message type
-			try:
-				message = json.loads(data)
-				# check if an error was received
-				if "error" in message.keys():
-					self.logger.error("[%s]: Error received: '%s' (%s:%d)."
-						% (self.fileName, message["error"],
-						self.clientAddress, self.clientPort))
+			# extract the command/message type of the message
+			command = str(message["message"]).upper()
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
+		except Exception as e:
 
-				# check if the received type is the correct one
-				if str(message["payload"]["type"]).upper() != "REQUEST":
-					self.logger.error("[%s]: request expected (%s:%d)."
-						% (self.fileName, self.clientAddress, self.clientPort))
+			self.logger.exception("[%s]: Received data " % self.fileName
+				+ "not valid: '%s' (%s:%d)." % (data, self.clientAddress,
+				self.clientPort))
 
-					# send error message back
-					try:
-						utcTimestamp = int(time.time())
-						message = {"serverTime": utcTimestamp,
-							"message": message["message"],
-							"error": "request expected"}
-						self.sslSocket.send(json.dumps(message))
-					except Exception as e:
-						pass
+			return False
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
+		# check if PING was received => send PONG back
+		if command == "PING":
 
-				# extract the command/message type of the message
-				command = str(message["message"]).upper()
+			self.logger.debug("[%s]: Received ping request (%s:%d)."
+				% (self.fileName, self.clientAddress, self.clientPort))
+			self.logger.debug("[%s]: Sending ping response (%s:%d)."
+				% (self.fileName, self.clientAddress, self.clientPort))
 
+			try:
+				payload = {"type": "response", "result": "ok"}
+				utcTimestamp = int(time.time())
+				message = {"serverTime": utcTimestamp,
+					"message": "ping", "payload": payload}
+				self.sslSocket.send(json.dumps(message))
 			except Exception as e:
+				self.logger.exception("[%s]: Sending ping " % self.fileName
+					+ "response to client failed (%s:%d)."
+					% (self.clientAddress, self.clientPort))
 
-				self.logger.exception("[%s]: Received data " % self.fileName
-					+ "not valid: '%s' (%s:%d)." % (data, self.clientAddress,
-					self.clientPort))
-
-				# clean up session before exiting
-				self._cleanUpSessionForClosing()
-				self._releaseLock()
-				self._finalizeLogger()
-				return
-
-			# check if PING was received => send PONG back
-			if command == "PING":
-
-				self.logger.debug("[%s]: Received ping request (%s:%d)."
-					% (self.fileName, self.clientAddress, self.clientPort))
-				self.logger.debug("[%s]: Sending ping response (%s:%d)."
-					% (self.fileName, self.clientAddress, self.clientPort))
+				return False
 
-				try:
-					payload = {"type": "response", "result": "ok"}
-					utcTimestamp = int(time.time())
-					message = {"serverTime": utcTimestamp,
-						"message": "ping", "payload": payload}
-					self.sslSocket.send(json.dumps(message))
-				except Exception as e:
-					self.logger.exception("[%s]: Sending ping " % self.fileName
-						+ "response to client failed (%s:%d)."
-						% (self.clientAddress, self.clientPort))
+		# check if SENSORALERT was received
+		# => add to database and wake up alertExecuter
+		elif (command == "SENSORALERT"
+			and self.nodeType == "sensor"):
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
+			self.logger.debug("[%s]: Received sensor alert "
+				% self.fileName
+				+ "message (%s:%d)."
+				% (self.clientAddress, self.clientPort))
 
-			# check if SENSORALERT was received
-			# => add to database and wake up alertExecuter
-			elif (command == "SENSORALERT"
-				and self.nodeType == "sensor"):
+			if not self._sensorAlertHandler(message):
 
-				self.logger.debug("[%s]: Received sensor alert "
+				self.logger.error("[%s]: Handling sensor alert "
 					% self.fileName
-					+ "message (%s:%d)."
+					+ "failed (%s:%d)."
 					% (self.clientAddress, self.clientPort))
 
-				if not self._sensorAlertHandler(message):
+				return False
 
-					self.logger.error("[%s]: Handling sensor alert "
-						% self.fileName
-						+ "failed (%s:%d)."
-						% (self.clientAddress, self.clientPort))
+		# check if STATECHANGE was received
+		# => change state of sensor in database
+		elif (command == "STATECHANGE"
+			and self.nodeType == "sensor"):
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
+			self.logger.debug("[%s]: Received state change "
+				% self.fileName
+				+ "message (%s:%d)."
+				% (self.clientAddress, self.clientPort))
 
-			# check if STATECHANGE was received
-			# => change state of sensor in database
-			elif (command == "STATECHANGE"
-				and self.nodeType == "sensor"):
+			if not self._stateChangeHandler(message):
 
-				self.logger.debug("[%s]: Received state change "
-					% self.fileName
-					+ "message (%s:%d)."
+				self.logger.error("[%s]: Handling sensor " % self.fileName
+					+ "state change failed (%s:%d)."
 					% (self.clientAddress, self.clientPort))
 
-				if not self._stateChangeHandler(message):
+				return False
 
-					self.logger.error("[%s]: Handling sensor " % self.fileName
-						+ "state change failed (%s:%d)."
-						% (self.clientAddress, self.clientPort))
+		# check if STATUS was received
+		# => add new state to the database
+		elif (command == "STATUS"
+			and self.nodeType == "sensor"):
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
+			self.logger.debug("[%s]: Received status message (%s:%d)."
+				% (self.fileName, self.clientAddress, self.clientPort))
 
-			# check if STATUS was received
-			# => add new state to the database
-			elif (command == "STATUS"
-				and self.nodeType == "sensor"):
+			if not self._statusHandler(message):
 
-				self.logger.debug("[%s]: Received status message (%s:%d)."
+				self.logger.error("[%s]: Handling status failed (%s:%d)."
 					% (self.fileName, self.clientAddress, self.clientPort))
 
-				if not self._statusHandler(message):
+				return False
 
-					self.logger.error("[%s]: Handling status failed (%s:%d)."
-						% (self.fileName, self.clientAddress, self.clientPort))
+		# check if OPTION was received (for manager only)
+		# => change option in the database
+		elif (command == "OPTION"
+			and self.nodeType == "manager"):
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
-					return
+			self.logger.debug("[%s]: Received option message (%s:%d)."
+				% (self.fileName, self.clientAddress, self.clientPort))
 
-			# check if OPTION was received (for manager only)
-			# => change option in the database
-			elif (command == "OPTION"
-				and self.nodeType == "manager"):
+			if not self._optionHandler(message):
 
-				self.logger.debug("[%s]: Received option message (%s:%d)."
+				self.logger.error("[%s]: Handling option failed (%s:%d)."
 					% (self.fileName, self.clientAddress, self.clientPort))
 
-				if not self._optionHandler(message):
+				return False
 
-					self.logger.error("[%s]: Handling option failed (%s:%d)."
-						% (self.fileName, self.clientAddress, self.clientPort))
+		# command is unknown => close connection
+		else:
+			self.logger.error("[%s]: Received unknown " % self.fileName
+				+ "command. Client sent: '%s' (%s:%d)."
+				% (data, self.clientAddress, self.clientPort))
 
-					# clean up session before exiting
-					self._cleanUpSessionForClosing()
-					self._releaseLock()
-					self._finalizeLogger()
+			try:
+				utcTimestamp = int(time.time())
+				message = {"serverTime": utcTimestamp,
+					"message": message["message"],
+					"error": "unknown command/message type"}
+				self.sslSocket.send(json.dumps(message))
+			except Exception as e:
+				pass
+
+			return False
+
+		self.metrics.increaseCounter("alertr_messages_received_total",
+			(("type", command.lower()),))
+
+		self.lastRecv = int(time.time())
+
+		return True
+
+
+	# this function handles the communication with the client
+	# and receives the commands
+	def handleCommunication(self):
+
+		self._acquireLock()
+
+		if not self._setupCommunication():
+			return
+
+		# handle commands
+		while True:
+
+			try:
+				# set timeout of the socket to 0.5 seconds
+				self.sslSocket.settimeout(0.5)
+
+				data = self.sslSocket.recv(BUFSIZE)
+				if not data:
+					self._terminateCommunication()
 					return
 
-			# command is unknown => close connection
-			else:
-				self.logger.error("[%s]: Received unknown " % self.fileName
-					+ "command. Client sent: '%s' (%s:%d)."
-					% (data, self.clientAddress, self.clientPort))
+				# change timeout of the socket back to configured seconds
+				self.sslSocket.settimeout(self.serverReceiveTimeout)
 
-				try:
-					utcTimestamp = int(time.time())
-					message = {"serverTime": utcTimestamp,
-						"message": message["message"],
-						"error": "unknown command/message type"}
-					self.sslSocket.send(json.dumps(message))
-				except Exception as e:
-					pass
+			except ssl.SSLError as e:
 
-				# clean up session before exiting
-				self._cleanUpSessionForClosing()
-				self._releaseLock()
-				self._finalizeLogger()
+				# catch receive timeouts
+				err = e.args[0]
+				if err == "The read operation timed out":
+
+					# change timeout of the socket back to configured seconds
+					# before releasing the lock
+					self.sslSocket.settimeout(self.serverReceiveTimeout)
+
+					# Pipelined requests are sent without the lock
+					# => no need to let other threads in.
+					if self.sslSocket.usePipelining:
+						continue
+
+					# release lock and acquire to let other threads send
+					# data to the client
+					# (wait 0.5 seconds in between, because semaphore
+					# are released in random order => other threads could be
+					# unlucky and not be chosen => this has happened when
+					# loglevel was not debug => hdd I/O has slowed this process
+					# down)
+					self._releaseLock()
+					time.sleep(0.5)
+					self._acquireLock()
+
+					# continue receiving
+					continue
+
+				self.logger.exception("[%s]: Receiving failed " % self.fileName
+					+ "(%s:%d)." % (self.clientAddress, self.clientPort))
+
+				self._terminateCommunication()
+				return
+
+			except Exception as e:
+				self.logger.exception("[%s]: Receiving failed " % self.fileName
+					+ "(%s:%d)." % (self.clientAddress, self.clientPort))
+
+				self._terminateCommunication()
 				return
 
-			self.lastRecv = int(time.time())
+			if not self._handleTransaction(data):
+				self._terminateCommunication()
+				return
+
+
+	# Sets up the communication with the client without entering the
+	# receiving loop (used by the event loop engine which watches the
+	# connection itself). Returns False if the setup failed.
+	def initializeCommunication(self):
+
+		self._acquireLock()
+
+		if not self._setupCommunication():
+			return False
+
+		# Let other threads send data to the client while it is idle.
+		self._releaseLock()
+
+		return True
+
+
+	# Handles the data sent by the client (used by the event loop engine
+	# when the connection becomes readable). Returns False if the
+	# connection to the client was closed.
+	def handleIncomingData(self):
+
+		self._acquireLock()
+
+		try:
+			# Do not block if another thread holding the lock has
+			# already consumed the data (i.e. a CTS message).
+			self.sslSocket.settimeout(0.0)
+
+			data = self.sslSocket.recv(BUFSIZE)
+
+			# change timeout of the socket back to configured seconds
+			self.sslSocket.settimeout(self.serverReceiveTimeout)
+
+			if not data:
+				self._terminateCommunication()
+				return False
+
+		except ssl.SSLError as e:
+
+			# change timeout of the socket back to configured seconds
+			self.sslSocket.settimeout(self.serverReceiveTimeout)
+
+			# Nothing to read (yet) => wait for the next event.
+			if e.args[0] == ssl.SSL_ERROR_WANT_READ:
+				self._releaseLock()
+				return True
+
+			self.logger.exception("[%s]: Receiving failed " % self.fileName
+				+ "(%s:%d)." % (self.clientAddress, self.clientPort))
+
+			self._terminateCommunication()
+			return False
+
+		except Exception as e:
+			self.logger.exception("[%s]: Receiving failed " % self.fileName
+				+ "(%s:%d)." % (self.clientAddress, self.clientPort))
+
+			self._terminateCommunication()
+			return False
+
+		if not self._handleTransaction(data):
+			self._terminateCommunication()
+			return False
+
+		self._releaseLock()
+
+		return True
+
 
 
 # this class is used for the threaded tcp server and extends the constructor
@@ -3831,22 +4376,50 @@ class ServerSession(SocketServer.BaseRequestHandler):
 			clientAddress, server)
 
 
-	def handle(self):
+	# Internal function that returns the SSL context that is shared by all
+	# server sessions (it is created by the first session). The context
+	# holds the cache of the TLS/SSL sessions (session ids and tickets),
+	# therefore a reconnecting client can resume its TLS/SSL session
+	# instead of doing a full handshake.
+	def _getSslContext(self):
 
-		self.logger.info("[%s]: Client connected (%s:%d)."
-			% (self.fileName, self.clientAddress, self.clientPort))
+		with self.globalData.serverSslContextLock:
 
-		# Set SSL context.
-		self.sslContext = ssl.SSLContext(self.sslProtocol)
-		self.sslContext.load_cert_chain(certfile=self.serverCertFile,
-			keyfile=self.serverKeyFile)
-		self.sslContext.set_ciphers(self.sslCiphers)
-		self.sslContext.options = self.sslOptions
+			if self.globalData.serverSslContext is None:
+
+				sslContext = ssl.SSLContext(self.sslProtocol)
+				sslContext.load_cert_chain(certfile=self.serverCertFile,
+					keyfile=self.serverKeyFile)
+				sslContext.set_ciphers(self.sslCiphers)
+				sslContext.options = self.sslOptions
+
+				# If activated, require a client certificate.
+				if self.useClientCertificates:
+					sslContext.verify_mode = ssl.CERT_REQUIRED
+					sslContext.load_verify_locations(
+						cafile=self.clientCAFile)
+
+				self.globalData.serverSslContext = sslContext
 
-		# If activated, require a client certificate.
-		if self.useClientCertificates:
-			self.sslContext.verify_mode = ssl.CERT_REQUIRED
-			self.sslContext.load_verify_locations(cafile=self.clientCAFile)
+			return self.globalData.serverSslContext
+
+
+	# Returns the number of resumed and full TLS/SSL handshakes of all
+	# server sessions.
+	#
+	# return tuple (resumed, full)
+	def getSslHandshakeCounts(self):
+		sessionStats = self.sslContext.session_stats()
+		return (sessionStats["hits"],
+			sessionStats["accept_good"] - sessionStats["hits"])
+
+
+	# Internal function that initializes the TLS/SSL connection with the
+	# client. Returns False if it failed.
+	def _initializeSsl(self):
+
+		# Set SSL context.
+		self.sslContext = self._getSslContext()
 
 		# try to initiate ssl with client
 		try:
@@ -3866,12 +4439,18 @@ class ServerSession(SocketServer.BaseRequestHandler):
 			except:
 				pass
 
-			return
+			return False
 
-		# give incoming connection to client communication handler
-		self.clientComm = ClientCommunication(self.sslSocket,
-			self.clientAddress, self.clientPort, self.globalData)
-		self.clientComm.handleCommunication()
+		resumed, full = self.getSslHandshakeCounts()
+		self.logger.debug("[%s]: SSL handshakes resumed: %d, full: %d."
+			% (self.fileName, resumed, full))
+
+		return True
+
+
+	# Internal function that closes the connection to the client after
+	# the client communication has finished.
+	def _finishSession(self):
 
 		# close ssl connection gracefully
 		try:
@@ -3888,6 +4467,7 @@ class ServerSession(SocketServer.BaseRequestHandler):
 			self.serverSessions.remove(self)
 		except:
 			pass
+		self.connectionWatchdog.removeSessionTimeout(self)
 
 		self.logger.info("[%s]: Client disconnected (%s:%d)."
 			% (self.fileName, self.clientAddress, self.clientPort))
@@ -3899,6 +4479,23 @@ class ServerSession(SocketServer.BaseRequestHandler):
 			self.connectionWatchdog.addNodePreTimeout(self.clientComm.nodeId)
 
 
+	def handle(self):
+
+		self.logger.info("[%s]: Client connected (%s:%d)."
+			% (self.fileName, self.clientAddress, self.clientPort))
+
+		if not self._initializeSsl():
+			return
+
+		# give incoming connection to client communication handler
+		self.clientComm = ClientCommunication(self.sslSocket,
+			self.clientAddress, self.clientPort, self.globalData)
+		self.connectionWatchdog.addSessionTimeout(self)
+		self.clientComm.handleCommunication()
+
+		self._finishSession()
+
+
 	def closeConnection(self):
 		self.logger.info("[%s]: Closing connection to client (%s:%d)."
 			% (self.fileName, self.clientAddress, self.clientPort))
@@ -3921,9 +4518,312 @@ class ServerSession(SocketServer.BaseRequestHandler):
 		self.logger = logger
 
 
-# this class is used to send messages to the client
-# in an asynchronous way to avoid blockings
-class AsynchronousSender(threading.Thread):
+# this class is used for the event loop tcp server which watches all
+# client connections in one thread and hands readable connections over to
+# a small pool of worker threads (instead of using one thread per client)
+class EventLoopTCPServer(SocketServer.TCPServer):
+
+	def __init__(self, globalData, serverAddress, RequestHandlerClass):
+
+		# file nme of this file (used for logging)
+		self.fileName = os.path.basename(__file__)
+
+		# get reference to global data object
+		self.globalData = globalData
+		self.logger = self.globalData.logger
+
+		# Number of worker threads that handle the client connections.
+		self.serverWorkers = self.globalData.serverWorkers
+
+		# Queue of tasks that are processed by the worker threads.
+		self.taskQueue = Queue.Queue()
+
+		# Number of threads that set up the new client connections and
+		# the queue of new client connections they process.
+		self.serverSetupWorkers = self.globalData.serverSetupWorkers
+		self.setupQueue = Queue.Queue()
+
+		# Sessions that are watched by the event loop
+		# (key: file descriptor of the connection).
+		self.watchedSessions = dict()
+
+		# Sessions that were handed back by the worker threads and
+		# have to be watched again by the event loop.
+		self.pendingSessions = list()
+		self.pendingSessionsLock = threading.Lock()
+
+		# Pipe that is used to wake up the event loop.
+		self.wakeupReadFd = None
+		self.wakeupWriteFd = None
+
+		self.poller = None
+
+		SocketServer.TCPServer.__init__(self, serverAddress,
+			RequestHandlerClass)
+
+
+	# Internal function that accepts all waiting client connections.
+	def _acceptConnections(self):
+
+		while True:
+
+			try:
+				request, clientAddress = self.socket.accept()
+
+			except socket.error as e:
+				if e.args[0] in (errno.EAGAIN, errno.EWOULDBLOCK):
+					return
+
+				self.logger.exception("[%s]: Accepting client connection "
+					% self.fileName
+					+ "failed.")
+				return
+
+			# The session is set up by a setup thread
+			# (TLS/SSL handshake, authentication and registration).
+			self.setupQueue.put(lambda request=request,
+				clientAddress=clientAddress: self.RequestHandlerClass(
+				request, clientAddress, self))
+
+
+	# Internal function that adds all sessions handed back by the
+	# worker threads to the event loop.
+	def _watchPendingSessions(self):
+
+		with self.pendingSessionsLock:
+			pendingSessions = self.pendingSessions
+			self.pendingSessions = list()
+
+		for session in pendingSessions:
+			self.watchedSessions[session.fileDescriptor] = session
+			self.poller.register(session.fileDescriptor,
+				select.POLLIN | select.POLLPRI)
+
+
+	# Hands a session over to the event loop which watches the
+	# connection until it becomes readable.
+	def watchSession(self, session):
+
+		with self.pendingSessionsLock:
+			self.pendingSessions.append(session)
+
+		# Wake up event loop.
+		try:
+			os.write(self.wakeupWriteFd, "1")
+		except OSError as e:
+			# Pipe is full => event loop is already woken up.
+			if e.args[0] not in (errno.EAGAIN, errno.EWOULDBLOCK):
+				raise
+
+
+	def serve_forever(self):
+
+		self.wakeupReadFd, self.wakeupWriteFd = os.pipe()
+		for fd in (self.wakeupReadFd, self.wakeupWriteFd):
+			flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+			fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+
+		# Start worker threads.
+		for i in range(self.serverWorkers):
+			worker = EventLoopWorker(self.globalData, self.taskQueue)
+			# set thread to daemon
+			# => threads terminates when main thread terminates
+			worker.daemon = True
+			worker.start()
+
+		# Start setup threads.
+		for i in range(self.serverSetupWorkers):
+			worker = EventLoopWorker(self.globalData, self.setupQueue)
+			# set thread to daemon
+			# => threads terminates when main thread terminates
+			worker.daemon = True
+			worker.start()
+
+		self.socket.setblocking(0)
+
+		self.poller = select.poll()
+		self.poller.register(self.socket.fileno(), select.POLLIN)
+		self.poller.register(self.wakeupReadFd, select.POLLIN)
+
+		while True:
+
+			try:
+				events = self.poller.poll()
+			except select.error as e:
+				if e.args[0] == errno.EINTR:
+					continue
+				raise
+
+			for fd, event in events:
+
+				if fd == self.socket.fileno():
+					self._acceptConnections()
+
+				elif fd == self.wakeupReadFd:
+					try:
+						os.read(self.wakeupReadFd, BUFSIZE)
+					except OSError:
+						pass
+					self._watchPendingSessions()
+
+				else:
+					# Stop watching the connection until the worker
+					# thread has handled the incoming data.
+					self.poller.unregister(fd)
+					session = self.watchedSessions.pop(fd, None)
+					if session is None:
+						continue
+
+					self.taskQueue.put(session.handleReadable)
+
+
+# this class is used by the event loop tcp server to handle the
+# client connections
+class EventLoopWorker(threading.Thread):
+
+	def __init__(self, globalData, taskQueue):
+		threading.Thread.__init__(self)
+
+		# file nme of this file (used for logging)
+		self.fileName = os.path.basename(__file__)
+
+		# get global configured data
+		self.globalData = globalData
+		self.logger = self.globalData.logger
+
+		self.taskQueue = taskQueue
+
+
+	def run(self):
+
+		while True:
+
+			task = self.taskQueue.get()
+
+			try:
+				task()
+			except Exception as e:
+				self.logger.exception("[%s]: Handling client connection "
+					% self.fileName
+					+ "failed.")
+
+
+# this class is used for incoming client connections
+# of the event loop tcp server
+class EventLoopServerSession(ServerSession):
+
+	def __init__(self, request, clientAddress, server):
+
+		# File descriptor of the connection that is watched by the
+		# event loop.
+		self.fileDescriptor = None
+
+		ServerSession.__init__(self, request, clientAddress, server)
+
+
+	def handle(self):
+
+		self.logger.info("[%s]: Client connected (%s:%d)."
+			% (self.fileName, self.clientAddress, self.clientPort))
+
+		# Do not let a client block a setup thread for long during the
+		# TLS/SSL handshake.
+		self.request.settimeout(self.globalData.serverSetupTimeout)
+
+		if not self._initializeSsl():
+			try:
+				self.request.close()
+			except:
+				pass
+			return
+
+		# give incoming connection to client communication handler
+		self.clientComm = ClientCommunication(self.sslSocket,
+			self.clientAddress, self.clientPort, self.globalData)
+		self.connectionWatchdog.addSessionTimeout(self)
+
+		# Use the setup timeout also for the registration.
+		self.clientComm.serverReceiveTimeout = \
+			self.globalData.serverSetupTimeout
+		if not self.clientComm.initializeCommunication():
+			self._finishSession()
+			return
+		self.clientComm.serverReceiveTimeout = \
+			self.globalData.serverReceiveTimeout
+		self.clientComm.sslSocket.settimeout(
+			self.globalData.serverReceiveTimeout)
+
+		self.fileDescriptor = self.sslSocket.fileno()
+		self.server.watchSession(self)
+
+
+	# Handles the incoming data of the client when the connection
+	# becomes readable.
+	def handleReadable(self):
+
+		while True:
+
+			if not self.clientComm.handleIncomingData():
+				self._finishSession()
+				return
+
+			# Process data that is already buffered by the TLS/SSL layer
+			# or the message framing (it does not make the connection
+			# readable again).
+			try:
+				if self.clientComm.sslSocket.pending() == 0:
+					break
+			except Exception as e:
+				break
+
+		self.server.watchSession(self)
+
+
+	# Internal function that closes the connection to the client after
+	# the client communication has finished.
+	def _finishSession(self):
+
+		ServerSession._finishSession(self)
+
+		# The connection is not closed by the tcp server in contrast to
+		# the threaded tcp server.
+		try:
+			self.request.close()
+		except:
+			pass
+
+
+	def closeConnection(self):
+		self.logger.info("[%s]: Closing connection to client (%s:%d)."
+			% (self.fileName, self.clientAddress, self.clientPort))
+
+		# Only shut down the connection. The event loop notices the
+		# closed connection and lets a worker thread clean up the
+		# session (closing the socket here could lead to a reused file
+		# descriptor that is still watched by the event loop).
+		try:
+			self.sslSocket.shutdown(socket.SHUT_RDWR)
+		except:
+			pass
+		try:
+			self.serverSessions.remove(self)
+		except:
+			pass
+
+
+# this class is used to send messages to the client in an asynchronous
+# way to avoid blockings (each client has one sender that works off a
+# bounded queue of outgoing messages)
+class ClientSender(threading.Thread):
+
+	# Priorities of the outgoing messages (lowest value is sent first).
+	# Sensor alerts and sensor alerts off messages share one priority
+	# (and queue) to be sent in the order they were queued (otherwise
+	# a sensor alerts off message could switch off a newer sensor alert).
+	PRIORITY_SENSOR_ALERT = 0
+	PRIORITY_SENSOR_ALERTS_OFF = 0
+	PRIORITY_MANAGER_UPDATE = 1
+	PRIORITY_MANAGER_STATE_CHANGE = 2
 
 	def __init__(self, globalData, clientComm):
 		threading.Thread.__init__(self)
@@ -3938,32 +4838,105 @@ class AsynchronousSender(threading.Thread):
 		# the communication instance to the client
 		self.clientComm = clientComm
 
-		# this option is used when the thread should
-		# send a manager update
-		self.sendManagerUpdate = False
+		# Maximum number of messages that are queued for the client.
+		self.maxQueueSize = self.globalData.clientSendQueueSize
+
+		# One queue for each priority. A queue element is a tuple of
+		# the form (messageType, arguments).
+		self.queues = list()
+		for i in range(self.PRIORITY_MANAGER_STATE_CHANGE + 1):
+			self.queues.append(collections.deque())
+		# (uses a re-entrant lock)
+		self.queueCondition = threading.Condition()
+
+		self.exitFlag = False
+
+
+	# Internal function that returns the number of queued messages.
+	# (the queue condition has to be held by the caller)
+	def _getQueueSize(self):
+		return sum(map(lambda x: len(x), self.queues))
+
+
+	# Returns the number of queued messages.
+	def getQueueSize(self):
+		with self.queueCondition:
+			return self._getQueueSize()
+
+
+	# Internal function that handles a full queue. Queued state changes
+	# are replaced by one status update (which contains them). If no
+	# state changes are queued, the oldest sensor alert is dropped to make
+	# room for a new sensor alert.
+	# (the queue condition has to be held by the caller)
+	# return True if the new message should be queued, False if not
+	def _handleFullQueue(self, priority, messageType):
+
+		stateChanges = self.queues[self.PRIORITY_MANAGER_STATE_CHANGE]
+		if len(stateChanges) != 0:
+			self.logger.warning("[%s]: Send queue full. " % self.fileName
+				+ "Replacing %d state changes with status update (%s:%d)."
+				% (len(stateChanges), self.clientComm.clientAddress,
+				self.clientComm.clientPort))
+
+			stateChanges.clear()
+			if len(self.queues[self.PRIORITY_MANAGER_UPDATE]) == 0:
+				self.queues[self.PRIORITY_MANAGER_UPDATE].append(
+					("managerUpdate", None))
+
+			# A new state change is also contained in the status update.
+			return priority != self.PRIORITY_MANAGER_STATE_CHANGE
+
+		# Drop the oldest sensor alert (sensor alerts off messages
+		# in the same queue are kept).
+		sensorAlerts = self.queues[self.PRIORITY_SENSOR_ALERT]
+		if (priority == self.PRIORITY_SENSOR_ALERT
+			and messageType == "sensorAlert"):
+			for i in range(len(sensorAlerts)):
+				if sensorAlerts[i][0] == "sensorAlert":
+					del sensorAlerts[i]
+					self.logger.error("[%s]: Send queue full. "
+						% self.fileName
+						+ "Dropping oldest sensor alert (%s:%d)."
+						% (self.clientComm.clientAddress,
+						self.clientComm.clientPort))
+					return True
 
-		# this options are used when the thread should
-		# send a sensor alert to the client
-		self.sendSensorAlert = False
-		self.sensorAlert = None
+		self.logger.error("[%s]: Send queue full. " % self.fileName
+			+ "Dropping new '%s' message (%s:%d)."
+			% (messageType, self.clientComm.clientAddress,
+			self.clientComm.clientPort))
+		return False
 
-		# this options are used when the thread should
-		# send a state change to a manager client
-		self.sendManagerStateChange = False
-		self.sendManagerStateChangeSensorId = None
-		self.sendManagerStateChangeState = None
-		self.sendManagerStateChangeDataType = None
-		self.sendManagerStateChangeData = None
 
-		# this option is used when the thread should
-		# send a sensor alert off to the client
-		self.sendAlertSensorAlertsOff = False
+	# Internal function that adds a message to the queue.
+	# return True or False
+	def _queueMessage(self, priority, messageType, arguments):
 
+		with self.queueCondition:
 
-	def run(self):
+			if self.exitFlag:
+				return False
+
+			# Status updates and sensor alerts off messages are only
+			# queued once and therefore do not count against the limit.
+			if ((messageType == "sensorAlert"
+				or priority == self.PRIORITY_MANAGER_STATE_CHANGE)
+				and self._getQueueSize() >= self.maxQueueSize
+				and not self._handleFullQueue(priority, messageType)):
+				return False
+
+			self.queues[priority].append((messageType, arguments))
+			self.queueCondition.notify()
+
+		return True
+
+
+	# Internal function that sends the given message to the client.
+	def _sendMessage(self, messageType, arguments):
 
 		# check if a status update to a manager should be send
-		if self.sendManagerUpdate:
+		if messageType == "managerUpdate":
 			if self.clientComm.nodeType != "manager":
 				self.logger.error("[%s]: Sending status " % self.fileName
 					+ "update to manager failed. Client is not a "
@@ -3982,7 +4955,7 @@ class AsynchronousSender(threading.Thread):
 				return
 
 		# check if a sensor alert to a manager/alert should be send
-		elif self.sendSensorAlert:
+		elif messageType == "sensorAlert":
 			if (self.clientComm.nodeType != "manager"
 				and self.clientComm.nodeType != "alert"):
 				self.logger.error("[%s]: Sending sensor "
@@ -3993,14 +4966,14 @@ class AsynchronousSender(threading.Thread):
 					self.clientComm.clientPort))
 				return
 
-			if not self.clientComm.sendSensorAlert(self.sensorAlert):
+			if not self.clientComm.sendSensorAlert(arguments):
 				self.logger.error("[%s]: Sending sensor " % self.fileName
 					+ "alert to manager/alert failed (%s:%d)."
 					% (self.clientComm.clientAddress,
 					self.clientComm.clientPort))
 
 		# check if a state change to a manager should be send
-		elif self.sendManagerStateChange:
+		elif messageType == "managerStateChange":
 			if self.clientComm.nodeType != "manager":
 				self.logger.error("[%s]: Sending state " % self.fileName
 					+ "change to manager failed. Client is not a "
@@ -4010,11 +4983,9 @@ class AsynchronousSender(threading.Thread):
 				return
 
 			# sending state change to manager
-			if not self.clientComm.sendManagerStateChange(
-				self.sendManagerStateChangeSensorId,
-				self.sendManagerStateChangeState,
-				self.sendManagerStateChangeDataType,
-				self.sendManagerStateChangeData):
+			sensorId, state, dataType, data = arguments
+			if not self.clientComm.sendManagerStateChange(sensorId, state,
+				dataType, data):
 				self.logger.error("[%s]: Sending state " % self.fileName
 					+ "change to manager failed (%s:%d)."
 					% (self.clientComm.clientAddress,
@@ -4022,7 +4993,7 @@ class AsynchronousSender(threading.Thread):
 				return
 
 		# check if a sensor alert off to an alert client should be send
-		elif self.sendAlertSensorAlertsOff:
+		elif messageType == "alertSensorAlertsOff":
 			if self.clientComm.nodeType != "alert":
 				self.logger.error("[%s]: Sending sensor " % self.fileName
 					+ "alert off to alert failed. Client is not a "
@@ -4040,6 +5011,74 @@ class AsynchronousSender(threading.Thread):
 				return
 
 
+	# Queues a sensor alert for the client.
+	def queueSensorAlert(self, sensorAlert):
+		return self._queueMessage(self.PRIORITY_SENSOR_ALERT,
+			"sensorAlert", sensorAlert)
+
+
+	# Queues a sensor alerts off message for the client.
+	def queueAlertSensorAlertsOff(self):
+		with self.queueCondition:
+			# Only one sensor alerts off message is needed as long as no
+			# sensor alert was queued after it.
+			queue = self.queues[self.PRIORITY_SENSOR_ALERTS_OFF]
+			if len(queue) != 0 and queue[-1][0] == "alertSensorAlertsOff":
+				return True
+			return self._queueMessage(self.PRIORITY_SENSOR_ALERTS_OFF,
+				"alertSensorAlertsOff", None)
+
+
+	# Queues a status update for the client.
+	def queueManagerUpdate(self):
+		with self.queueCondition:
+			# Queued state changes are contained in the status update
+			# (it is built when it is sent).
+			self.queues[self.PRIORITY_MANAGER_STATE_CHANGE].clear()
+
+			# Only one status update is needed.
+			if len(self.queues[self.PRIORITY_MANAGER_UPDATE]) != 0:
+				return True
+			return self._queueMessage(self.PRIORITY_MANAGER_UPDATE,
+				"managerUpdate", None)
+
+
+	# Queues a state change for the client.
+	def queueManagerStateChange(self, sensorId, state, dataType, data):
+		return self._queueMessage(self.PRIORITY_MANAGER_STATE_CHANGE,
+			"managerStateChange", (sensorId, state, dataType, data))
+
+
+	def run(self):
+
+		while True:
+
+			with self.queueCondition:
+
+				while not self.exitFlag and self._getQueueSize() == 0:
+					self.queueCondition.wait()
+
+				if self.exitFlag:
+					return
+
+				# Get the oldest message with the highest priority.
+				for queue in self.queues:
+					if len(queue) != 0:
+						messageType, arguments = queue.popleft()
+						break
+
+			self._sendMessage(messageType, arguments)
+
+
+	# sets the exit flag to shut down the thread
+	def exit(self):
+		with self.queueCondition:
+			self.exitFlag = True
+			for queue in self.queues:
+				queue.clear()
+			self.queueCondition.notify()
+
+
 # this class is used to change an option
 # in an asynchronous way to avoid blockings
 class AsynchronousOptionExecuter(threading.Thread):
@@ -4118,18 +5157,12 @@ class AsynchronousOptionExecuter(threading.Thread):
 					continue
 
 				# sending sensor alerts off to alert client
-				# via a thread to not block this one
-				sensorAlertsOffProcess = AsynchronousSender(
-					self.globalData, serverSession.clientComm)
-				# set thread to daemon
-				# => threads terminates when main thread terminates
-				sensorAlertsOffProcess.daemon = True
-				sensorAlertsOffProcess.sendAlertSensorAlertsOff = True
+				# via its sender to not block this one
 				self.logger.debug("[%s]: Sending sensor " % self.fileName
 					+ "alerts off to alert client (%s:%d)."
 					% (serverSession.clientComm.clientAddress,
 					serverSession.clientComm.clientPort))
-				sensorAlertsOffProcess.start()
+				serverSession.clientComm.clientSender.queueAlertSensorAlertsOff()
 
 		# Check if the alert system was acitvated/deactivated
 		# => generate sensor alert if internal sensor is activated.
@@ -4142,7 +5175,7 @@ class AsynchronousOptionExecuter(threading.Thread):
 					break
 
 			# Change sensor state and
-			# add sensor alert to database for processing
+			# add sensor alert for processing
 			# if internal sensor is active.
 			if alertSystemActiveSensor:
 				
@@ -4161,7 +5194,7 @@ class AsynchronousOptionExecuter(threading.Thread):
 						% self.fileName
 						+ "for internal alert system active sensor.")
 
-				if self.storage.addSensorAlert(
+				if self.sensorAlertExecuter.addSensorAlert(
 					alertSystemActiveSensor.nodeId, # nodeId
 					alertSystemActiveSensor.sensorId, # sensorId
 					state, # state
@@ -15,6 +15,7 @@ import socket
 import struct
 import hashlib
 import json
+import copy
 from localObjects import Node, Alert, Manager, Sensor, SensorAlert, \
 	SensorData, SensorDataType, Option
 
@@ -74,7 +75,7 @@ class _Storage():
 	# adds a sensor alert to the database when the id of a node is given,
 	# the id of the sensor that is used internally by the node and the state
 	#
-	# return True or False
+	# return sensorAlertId or None
 	def addSensorAlert(self, nodeId, sensorId, state, dataJson, changeState,
 		hasLatestData, dataType, sensorData, logger=None):
 		raise NotImplemented("Function not implemented yet.")
@@ -248,6 +249,14 @@ class _Storage():
 		raise NotImplemented("Function not implemented yet.")
 
 
+	# Gets the version of the alert system information (it is increased
+	# each time options, nodes, sensors, managers or alerts change).
+	#
+	# return version number
+	def getStatusVersion(self, logger=None):
+		raise NotImplemented("Function not implemented yet.")
+
+
 	# gets the state of a sensor given by id
 	#
 	# return sensor state or None
@@ -327,6 +336,35 @@ class _Storage():
 		raise NotImplemented("Function not implemented yet.")
 
 
+	# Stores a received sensor alert in one transaction: updates the state
+	# (if changeState is set), the data (if hasLatestData is set) and the
+	# time of the sensor and adds the sensor alert to the database
+	# (if storeSensorAlert is set).
+	#
+	# return sensorAlertId (True if the sensor alert is not stored) or None
+	def ingestSensorAlert(self, nodeId, sensorId, state, dataJson,
+		changeState, hasLatestData, dataType, sensorData, storeSensorAlert,
+		logger=None):
+		raise NotImplemented("Function not implemented yet.")
+
+
+	# Stores a received state change in one transaction: updates the state,
+	# the data (if the sensor holds data) and the time of the sensor.
+	#
+	# return True or False
+	def ingestStateChange(self, nodeId, sensorId, state, sensorData,
+		logger=None):
+		raise NotImplemented("Function not implemented yet.")
+
+
+	# Invalidates the data the storage backend holds in memory
+	# (if it does so).
+	#
+	# no return value
+	def invalidateCache(self, logger=None):
+		pass
+
+
 	# closes db for usage
 	#
 	# no return value
@@ -334,6 +372,32 @@ class _Storage():
 		raise NotImplemented("Function not implemented yet.")
 
 
+# Cursor of the sqlite storage backend. While a thread reads, its statements
+# are executed on the read only connection of the thread, otherwise on the
+# connection of the writer.
+class _SqliteCursor:
+
+	def __init__(self, writeCursor):
+		self.writeCursor = writeCursor
+		self.local = threading.local()
+
+
+	def __getattr__(self, name):
+		if getattr(self.local, "reading", False):
+			return getattr(self.local.readCursor, name)
+		return getattr(self.writeCursor, name)
+
+
+# Batch of changes of the sqlite storage backend that are committed
+# together by the group commit.
+class _GroupCommitBatch:
+
+	def __init__(self):
+		self.count = 0
+		self.committed = threading.Event()
+		self.exception = None
+
+
 # class for using sqlite as storage backend
 class Sqlite(_Storage):
 
@@ -358,6 +422,33 @@ class Sqlite(_Storage):
 		# sqlite is not thread safe => use lock
 		self.dbLock = threading.Semaphore(1)
 
+		# Version of the alert system information in the database
+		# (is increased on each change).
+		self.statusVersion = 0
+
+		# Settings and state of the group commit (the changes of all threads
+		# are committed together in one transaction by one thread after
+		# the batch window or as soon as the batch is full).
+		self.groupCommit = False
+		self.groupCommitWindow = \
+			float(self.globalData.storageGroupCommitWindow) / 1000.0
+		self.groupCommitMaxBatch = self.globalData.storageGroupCommitMaxBatch
+		self.groupCommitBatch = _GroupCommitBatch()
+		self.groupCommitTransaction = False
+		self.groupCommitEvent = threading.Event()
+		self.groupCommitFullEvent = threading.Event()
+		self.groupCommitLocal = threading.local()
+
+		# Pool of read only connections (the database is in WAL mode and
+		# each reading thread takes a connection from the pool and reads
+		# on it in parallel to the writer). The pool is bounded by the
+		# pool size and all created connections are kept to close them.
+		self.readConnections = list()
+		self.readConnectionPool = list()
+		self.readConnectionsLock = threading.Lock()
+		self.readConnectionSemaphore = threading.BoundedSemaphore(
+			self.globalData.storageBackendSqliteReadPoolSize)
+
 		# check if database exists
 		# if not create one
 		if os.path.exists(self.storagePath) == False:
@@ -367,16 +458,37 @@ class Sqlite(_Storage):
 
 			self.conn = sqlite3.connect(self.storagePath,
 				check_same_thread=False)
-			self.cursor = self.conn.cursor()
+			self.cursor = _SqliteCursor(self.conn.cursor())
 			self.createStorage()
 		else:
 			self.conn = sqlite3.connect(self.storagePath,
 				check_same_thread=False)
-			self.cursor = self.conn.cursor()
+			self.cursor = _SqliteCursor(self.conn.cursor())
 
 			# check if the versions are compatible
 			self.checkVersionAndClearConflict()
 
+		# Use write-ahead logging to let readers work in parallel
+		# to the writer.
+		self.cursor.execute("PRAGMA journal_mode=WAL")
+		journalMode = self.cursor.fetchall()[0][0]
+		if str(journalMode).upper() != "WAL":
+			self.logger.warning("[%s]: Not able to use WAL mode for "
+				% self.fileName
+				+ "database (journal mode '%s')." % journalMode)
+
+		# Start group commit (the database is created and checked
+		# with single commits). Transactions are handled manually
+		# to give each caller its own savepoint.
+		if self.globalData.storageGroupCommit:
+			self.conn.isolation_level = None
+			self.groupCommit = True
+
+			self.groupCommitThread = threading.Thread(
+				target=self._groupCommitter)
+			self.groupCommitThread.daemon = True
+			self.groupCommitThread.start()
+
 
 	# internal function that checks if the username is known
 	def _usernameInDb(self, username):
@@ -737,6 +849,18 @@ class Sqlite(_Storage):
 		logger.debug("[%s]: Acquire lock." % self.fileName)
 		self.dbLock.acquire()
 
+		# Each caller works in its own savepoint of the group transaction
+		# (a failing caller only discards its own changes).
+		if self.groupCommit:
+			try:
+				if not self.groupCommitTransaction:
+					self.cursor.execute("BEGIN")
+					self.groupCommitTransaction = True
+				self.cursor.execute("SAVEPOINT storage")
+			except Exception as e:
+				logger.exception("[%s]: Not able to create savepoint."
+					% self.fileName)
+
 
 	# internal function that releases the lock
 	def _releaseLock(self, logger=None):
@@ -745,9 +869,210 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
+		batch = None
+		if self.groupCommit:
+
+			# Discard all changes of the caller that were not committed
+			# and end the transaction if no changes wait for the
+			# group commit.
+			try:
+				self.cursor.execute("ROLLBACK TO storage")
+				self.cursor.execute("RELEASE storage")
+				if not self.groupCommitEvent.is_set():
+					self.cursor.execute("COMMIT")
+					self.groupCommitTransaction = False
+			except Exception as e:
+				logger.exception("[%s]: Not able to release savepoint."
+					% self.fileName)
+
+			batch = getattr(self.groupCommitLocal, "batch", None)
+			self.groupCommitLocal.batch = None
+
 		logger.debug("[%s]: Release lock." % self.fileName)
 		self.dbLock.release()
 
+		# Wait until the changes of the caller are committed
+		# by the group commit.
+		if batch is not None:
+			batch.committed.wait()
+			if batch.exception is not None:
+				raise batch.exception
+
+
+	# Internal function that commits the changes of the caller. If group
+	# commit is activated, the changes are committed together with the
+	# changes of other threads after the lock is released.
+	def _commit(self, logger=None):
+
+		if not self.groupCommit:
+			self.conn.commit()
+			return
+
+		self.cursor.execute("RELEASE storage")
+		self.cursor.execute("SAVEPOINT storage")
+
+		batch = self.groupCommitBatch
+		if getattr(self.groupCommitLocal, "batch", None) is not batch:
+			self.groupCommitLocal.batch = batch
+			batch.count += 1
+
+		# Wake up the group commit thread and let it commit immediately
+		# if the batch is full.
+		self.groupCommitEvent.set()
+		if batch.count >= self.groupCommitMaxBatch:
+			self.groupCommitFullEvent.set()
+
+
+	# Internal function that discards the changes of the caller that
+	# are not committed yet.
+	def _rollback(self, logger=None):
+
+		if not self.groupCommit:
+			self.conn.rollback()
+			return
+
+		self.cursor.execute("ROLLBACK TO storage")
+
+
+	# Internal function that lets the current thread read on a read only
+	# connection of the pool (created if no idle connection exists) in one
+	# transaction (reads do not wait for the writer or other readers,
+	# the pool bounds them).
+	def _acquireReadLock(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		# A thread that already reads keeps its connection.
+		readDepth = getattr(self.cursor.local, "readDepth", 0)
+		self.cursor.local.readDepth = readDepth + 1
+		if readDepth != 0:
+			return
+
+		# Wait until a connection of the pool is available.
+		self.readConnectionSemaphore.acquire()
+
+		try:
+			conn = None
+			with self.readConnectionsLock:
+				if self.readConnectionPool:
+					conn = self.readConnectionPool.pop()
+
+			if conn is None:
+
+				import sqlite3
+
+				logger.debug("[%s]: Open read only connection."
+					% self.fileName)
+
+				conn = sqlite3.connect(self.storagePath,
+					check_same_thread=False)
+				conn.isolation_level = None
+				conn.execute("PRAGMA query_only = ON")
+
+				with self.readConnectionsLock:
+					self.readConnections.append(conn)
+
+			self.cursor.local.readConn = conn
+			self.cursor.local.readCursor = conn.cursor()
+
+			# Read a consistent snapshot of the database.
+			self.cursor.local.readCursor.execute("BEGIN")
+
+		except Exception as e:
+			self.cursor.local.readDepth = 0
+			self.readConnectionSemaphore.release()
+			raise
+
+		self.cursor.local.reading = True
+
+
+	# Internal function that ends the read of the current thread and
+	# gives its connection back to the pool.
+	def _releaseReadLock(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self.cursor.local.readDepth -= 1
+		if self.cursor.local.readDepth != 0:
+			return
+
+		self.cursor.local.reading = False
+		conn = self.cursor.local.readConn
+		cursor = self.cursor.local.readCursor
+		self.cursor.local.readConn = None
+		self.cursor.local.readCursor = None
+
+		try:
+			cursor.execute("COMMIT")
+			cursor.close()
+			with self.readConnectionsLock:
+				self.readConnectionPool.append(conn)
+		except Exception as e:
+			logger.exception("[%s]: Not able to end read transaction."
+				% self.fileName)
+			with self.readConnectionsLock:
+				self.readConnections.remove(conn)
+			try:
+				conn.close()
+			except Exception as e:
+				pass
+
+		self.readConnectionSemaphore.release()
+
+
+	# Internal function that is executed by the group commit thread.
+	# It waits for changes, gives other threads the batch window to add
+	# their changes (or until the batch is full) and commits all of them
+	# in one transaction.
+	def _groupCommitter(self):
+
+		while True:
+
+			self.groupCommitEvent.wait()
+			self.groupCommitFullEvent.wait(self.groupCommitWindow)
+
+			self.dbLock.acquire()
+
+			# Stop if the database was closed.
+			if not self.groupCommit:
+				self.dbLock.release()
+				break
+
+			batch = self.groupCommitBatch
+			self.groupCommitBatch = _GroupCommitBatch()
+			self.groupCommitEvent.clear()
+			self.groupCommitFullEvent.clear()
+
+			try:
+				if self.groupCommitTransaction:
+					self.cursor.execute("COMMIT")
+			except Exception as e:
+				self.logger.exception("[%s]: Not able to commit changes "
+					% self.fileName
+					+ "of %d callers." % batch.count)
+
+				batch.exception = e
+				try:
+					self.cursor.execute("ROLLBACK")
+				except Exception as e:
+					pass
+
+			self.groupCommitTransaction = False
+
+			self.dbLock.release()
+
+			self.globalData.metrics.increaseCounter(
+				"alertr_storage_group_commits_total")
+			self.globalData.metrics.increaseCounter(
+				"alertr_storage_group_commit_callers_total",
+				value=batch.count)
+
+			batch.committed.set()
+
 
 	# internal function that creates the database
 	# (should only be called if the database does not exist)
@@ -874,10 +1199,66 @@ class Sqlite(_Storage):
 			+ "description TEXT NOT NULL, "
 			+ "FOREIGN KEY(nodeId) REFERENCES nodes(id))")
 
+		# Bring the new database to the current schema version.
+		self._migrateStorage()
+
 		# commit all changes
 		self.conn.commit()
 
 
+	# Internal function that migrates the schema of the database to the
+	# current schema version without deleting its data (the schema version
+	# is stored in the internals table, databases without it have
+	# schema version 0).
+	#
+	# no return value but raise exception if it fails
+	def _migrateStorage(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self.cursor.execute("SELECT value FROM internals "
+			+ "WHERE type = ?",
+			("schemaVersion", ))
+		result = self.cursor.fetchall()
+		if len(result) == 0:
+			schemaVersion = 0
+			self.cursor.execute("INSERT INTO internals ("
+				+ "type, "
+				+ "value) VALUES (?, ?)", ("schemaVersion", schemaVersion))
+		else:
+			schemaVersion = int(result[0][0])
+
+		# Schema version 1: indexes for the columns sensors, alerts and
+		# sensor alerts are looked up by (nodes are looked up by the
+		# unique username which is already indexed).
+		if schemaVersion < 1:
+			logger.info("[%s]: Migrating database to schema version 1."
+				% self.fileName)
+
+			self.cursor.execute("CREATE INDEX IF NOT EXISTS "
+				+ "sensorsNodeIdRemoteSensorId "
+				+ "ON sensors (nodeId, remoteSensorId)")
+			self.cursor.execute("CREATE INDEX IF NOT EXISTS "
+				+ "sensorsLastStateUpdated "
+				+ "ON sensors (lastStateUpdated)")
+			self.cursor.execute("CREATE INDEX IF NOT EXISTS "
+				+ "alertsNodeIdRemoteAlertId "
+				+ "ON alerts (nodeId, remoteAlertId)")
+			self.cursor.execute("CREATE INDEX IF NOT EXISTS "
+				+ "sensorAlertsNodeId "
+				+ "ON sensorAlerts (nodeId)")
+			self.cursor.execute("CREATE INDEX IF NOT EXISTS "
+				+ "sensorAlertsSensorId "
+				+ "ON sensorAlerts (sensorId)")
+			schemaVersion = 1
+
+		self.cursor.execute("UPDATE internals SET "
+			+ "value = ? "
+			+ "WHERE type = ?", (schemaVersion, "schemaVersion"))
+
+
 	# Internal function that deletes the database
 	# (should only be called if parts of the database do exist)
 	#
@@ -934,7 +1315,7 @@ class Sqlite(_Storage):
 					(alertIdResult[0], ))
 
 			# Commit all changes.
-			self.conn.commit()
+			self._commit(logger)
 
 		except Exception as e:
 			logger.exception("[%s]: Not able to "
@@ -963,7 +1344,7 @@ class Sqlite(_Storage):
 				(nodeId, ))
 
 			# Commit all changes.
-			self.conn.commit()
+			self._commit(logger)
 
 		except Exception as e:
 			logger.exception("[%s]: Not able to "
@@ -1031,7 +1412,7 @@ class Sqlite(_Storage):
 					(sensorIdResult[0], ))
 
 			# Commit all changes.
-			self.conn.commit()
+			self._commit(logger)
 
 		except Exception as e:
 			logger.exception("[%s]: Not able to "
@@ -1075,7 +1456,7 @@ class Sqlite(_Storage):
 			return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
 
 		return True
 
@@ -1235,6 +1616,117 @@ class Sqlite(_Storage):
 		return True
 
 
+	# Internal function that updates the state (if changeState is set),
+	# the data (if hasLatestData is set) and the time of a sensor without
+	# committing the changes.
+	#
+	# Returns true if everything worked fine.
+	def _updateSensor(self, nodeId, sensorId, state, changeState,
+		hasLatestData, data, logger=None):
+
+		try:
+			# Check if the sensor does exist in the database and get its
+			# data type.
+			self.cursor.execute("SELECT dataType FROM sensors "
+				+ "WHERE id = ? "
+				+ "AND nodeId = ?", (sensorId, nodeId))
+			result = self.cursor.fetchall()
+			if len(result) != 1:
+				logger.error("[%s]: Sensor does not exist in "
+					% self.fileName
+					+ "database.")
+
+				return False
+
+			dataType = result[0][0]
+
+			utcTimestamp = int(time.time())
+			if changeState:
+				self.cursor.execute("UPDATE sensors SET "
+					+ "state = ?, "
+					+ "lastStateUpdated = ? "
+					+ "WHERE id = ?",
+					(state, utcTimestamp, sensorId))
+			else:
+				self.cursor.execute("UPDATE sensors SET "
+					+ "lastStateUpdated = ? "
+					+ "WHERE id = ?",
+					(utcTimestamp, sensorId))
+
+			if hasLatestData:
+				if dataType == SensorDataType.INT:
+					self.cursor.execute("UPDATE sensorsDataInt SET "
+						+ "data = ? "
+						+ "WHERE sensorId = ?",
+						(data,
+						sensorId))
+
+				elif dataType == SensorDataType.FLOAT:
+					self.cursor.execute("UPDATE sensorsDataFloat SET "
+						+ "data = ? "
+						+ "WHERE sensorId = ?",
+						(data,
+						sensorId))
+
+		except Exception as e:
+			logger.exception("[%s]: Not able to update sensor."
+				% self.fileName)
+
+			return False
+
+		return True
+
+
+	# Internal function that adds a sensor alert and its data to the
+	# database without committing the changes.
+	#
+	# Returns sensorAlertId or None.
+	def _insertSensorAlert(self, nodeId, sensorId, state, dataJson,
+		changeState, hasLatestData, dataType, sensorData, logger=None):
+
+		try:
+			if changeState:
+				dbChangeState = 1
+			else:
+				dbChangeState = 0
+			if hasLatestData:
+				dbHasLatestData = 1
+			else:
+				dbHasLatestData = 0
+			utcTimestamp = int(time.time())
+			self.cursor.execute("INSERT INTO sensorAlerts ("
+				+ "nodeId, "
+				+ "sensorId, "
+				+ "state, "
+				+ "timeReceived, "
+				+ "dataJson, "
+				+ "changeState, "
+				+ "hasLatestData, "
+				+ "dataType) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+				(nodeId, sensorId, state, utcTimestamp, dataJson,
+				dbChangeState, dbHasLatestData, dataType))
+
+			# Get sensorAlertId of current added sensor alert.
+			sensorAlertId = self.cursor.lastrowid
+
+			if not self._insertSensorAlertData(sensorAlertId,
+				dataType, sensorData, logger):
+
+				logger.error("[%s]: Not able to add data for newly "
+					% self.fileName
+					+ "added sensor alert.")
+
+				return None
+
+		except Exception as e:
+			logger.exception("[%s]: Not able to add sensor alert."
+				% self.fileName)
+
+			return None
+
+		return sensorAlertId
+
+
 	# checks the version of the server and the version in the database
 	# and clears every compatibility issue
 	#
@@ -1276,7 +1768,14 @@ class Sqlite(_Storage):
 			self._createStorage(uniqueID)
 
 			# commit all changes
-			self.conn.commit()
+			self._commit(logger)
+			self.statusVersion += 1
+
+		# Migrate the schema of a compatible database to the current
+		# schema version (keeps its data).
+		else:
+			self._migrateStorage(logger)
+			self._commit(logger)
 
 		self._releaseLock(logger)
 
@@ -1557,7 +2056,8 @@ class Sqlite(_Storage):
 					return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -1945,7 +2445,8 @@ class Sqlite(_Storage):
 				return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -2215,7 +2716,8 @@ class Sqlite(_Storage):
 				return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -2323,7 +2825,8 @@ class Sqlite(_Storage):
 					return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -2340,7 +2843,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		nodeId = None
 		try:
@@ -2349,7 +2852,7 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get node id."
 				% self.fileName)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return nodeId
 
@@ -2363,7 +2866,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		nodeIds = list()
 		try:
@@ -2377,7 +2880,7 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get node ids."
 				% self.fileName)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return nodeIds
 
@@ -2391,7 +2894,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# get all sensors on this nodes
 		sensorCount = None
@@ -2404,7 +2907,7 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get sensor count."
 				% self.fileName)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return sensorCount
 
@@ -2419,7 +2922,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		surveyData = None
 		try:
@@ -2433,7 +2936,7 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get survey data."
 				% self.fileName)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return surveyData
 
@@ -2447,11 +2950,11 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		uniqueID = self._getUniqueID()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return uniqueID
 
@@ -2503,7 +3006,8 @@ class Sqlite(_Storage):
 				return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -2573,7 +3077,8 @@ class Sqlite(_Storage):
 				return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -2609,18 +3114,23 @@ class Sqlite(_Storage):
 			return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
 		return True
 
 
-	# gets the sensor id of a sensor when the id of a node is given
-	# and the remote sensor id that is used by the node internally
+	# Stores a received sensor alert in one transaction: updates the state
+	# (if changeState is set), the data (if hasLatestData is set) and the
+	# time of the sensor and adds the sensor alert to the database
+	# (if storeSensorAlert is set).
 	#
-	# return sensorId or None
-	def getSensorId(self, nodeId, remoteSensorId, logger=None):
+	# return sensorAlertId (True if the sensor alert is not stored) or None
+	def ingestSensorAlert(self, nodeId, sensorId, state, dataJson,
+		changeState, hasLatestData, dataType, sensorData, storeSensorAlert,
+		logger=None):
 
 		# Set logger instance to use.
 		if not logger:
@@ -2628,23 +3138,97 @@ class Sqlite(_Storage):
 
 		self._acquireLock(logger)
 
-		try:
-			sensorId = self._getSensorId(nodeId, remoteSensorId)
-		except Exception as e:
-			logger.exception("[%s]: Not able to get sensorId from "
-				% self.fileName
-				+ "database.")
+		if not self._updateSensor(nodeId, sensorId, state, changeState,
+			hasLatestData, sensorData, logger):
+
+			self._rollback(logger)
 
 			self._releaseLock(logger)
 
 			return None
 
-		self._releaseLock(logger)
+		sensorAlertId = True
+		if storeSensorAlert:
+			sensorAlertId = self._insertSensorAlert(nodeId, sensorId, state,
+				dataJson, changeState, hasLatestData, dataType, sensorData,
+				logger)
+			if sensorAlertId is None:
 
-		return sensorId
+				self._rollback(logger)
 
+				self._releaseLock(logger)
 
-	# gets the alert id of an alert when the id of a node is given
+				return None
+
+		# commit all changes at once
+		self._commit(logger)
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return sensorAlertId
+
+
+	# Stores a received state change in one transaction: updates the state,
+	# the data (if the sensor holds data) and the time of the sensor.
+	#
+	# return True or False
+	def ingestStateChange(self, nodeId, sensorId, state, sensorData,
+		logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if not self._updateSensor(nodeId, sensorId, state, True, True,
+			sensorData, logger):
+
+			self._rollback(logger)
+
+			self._releaseLock(logger)
+
+			return False
+
+		# commit all changes at once
+		self._commit(logger)
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# gets the sensor id of a sensor when the id of a node is given
+	# and the remote sensor id that is used by the node internally
+	#
+	# return sensorId or None
+	def getSensorId(self, nodeId, remoteSensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireReadLock(logger)
+
+		try:
+			sensorId = self._getSensorId(nodeId, remoteSensorId)
+		except Exception as e:
+			logger.exception("[%s]: Not able to get sensorId from "
+				% self.fileName
+				+ "database.")
+
+			self._releaseReadLock(logger)
+
+			return None
+
+		self._releaseReadLock(logger)
+
+		return sensorId
+
+
+	# gets the alert id of an alert when the id of a node is given
 	# and the remote alert id that is used by the node internally
 	#
 	# return alertId or None
@@ -2654,7 +3238,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		try:
 			alertId = self._getAlertId(nodeId, remoteAlertId)
@@ -2663,11 +3247,11 @@ class Sqlite(_Storage):
 				% self.fileName
 				+ "database.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return alertId
 
@@ -2682,11 +3266,11 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		result = self._getSensorAlertLevels(sensorId, logger)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of alertLevel
 		return result
@@ -2702,11 +3286,11 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		result = self._getAlertAlertLevels(alertId, logger)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of alertLevels
 		return result
@@ -2715,7 +3299,7 @@ class Sqlite(_Storage):
 	# adds a sensor alert to the database when the id of a node is given,
 	# the id of the sensor that is used internally by the node and the state
 	#
-	# return True or False
+	# return sensorAlertId or None
 	def addSensorAlert(self, nodeId, sensorId, state, dataJson, changeState,
 		hasLatestData, dataType, sensorData, logger=None):
 
@@ -2726,56 +3310,21 @@ class Sqlite(_Storage):
 		self._acquireLock(logger)
 
 		# add sensor alert to database
-		try:
-			if changeState:
-				dbChangeState = 1
-			else:
-				dbChangeState = 0
-			if hasLatestData:
-				dbHasLatestData = 1
-			else:
-				dbHasLatestData = 0
-			utcTimestamp = int(time.time())
-			self.cursor.execute("INSERT INTO sensorAlerts ("
-				+ "nodeId, "
-				+ "sensorId, "
-				+ "state, "
-				+ "timeReceived, "
-				+ "dataJson, "
-				+ "changeState, "
-				+ "hasLatestData, "
-				+ "dataType) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-				(nodeId, sensorId, state, utcTimestamp, dataJson,
-				dbChangeState, dbHasLatestData, dataType))
-
-			# Get sensorAlertId of current added sensor alert.
-			sensorAlertId = self.cursor.lastrowid
-
-			if not self._insertSensorAlertData(sensorAlertId,
-				dataType, sensorData, logger):
-
-				logger.error("[%s]: Not able to add data for newly "
-					% self.fileName
-					+ "added sensor alert.")
-
-				self._releaseLock(logger)
-
-				return False
-
-		except Exception as e:
-			logger.exception("[%s]: Not able to add sensor alert."
-				% self.fileName)
+		sensorAlertId = self._insertSensorAlert(nodeId, sensorId, state,
+			dataJson, changeState, hasLatestData, dataType, sensorData,
+			logger)
+		if sensorAlertId is None:
 
 			self._releaseLock(logger)
 
-			return False
+			return None
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
 
 		self._releaseLock(logger)
 
-		return True
+		return sensorAlertId
 
 
 	# gets all sensor alerts in the database
@@ -2788,7 +3337,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		returnList = list()
 		try:
@@ -2849,7 +3398,7 @@ class Sqlite(_Storage):
 						+ "sensor alert with id %d."
 						% sensorAlert.sensorAlertId)
 
-					self._releaseLock(logger)
+					self._releaseReadLock(logger)
 
 					return None
 
@@ -2870,7 +3419,7 @@ class Sqlite(_Storage):
 						logger.error("[%s]: Sensor alert data was not found."
 							% self.fileName)
 
-						self._releaseLock(logger)
+						self._releaseReadLock(logger)
 
 						return None
 					sensorAlert.sensorData = subResult[0][0]
@@ -2886,7 +3435,7 @@ class Sqlite(_Storage):
 						logger.error("[%s]: Sensor alert data was not found."
 							% self.fileName)
 
-						self._releaseLock(logger)
+						self._releaseReadLock(logger)
 
 						return None
 					sensorAlert.sensorData = subResult[0][0]
@@ -2896,7 +3445,7 @@ class Sqlite(_Storage):
 						% self.fileName
 						+ "Data type in database unknown.")
 
-					self._releaseLock(logger)
+					self._releaseReadLock(logger)
 
 					return None
 
@@ -2906,11 +3455,11 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get sensor alerts."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a list of sensorAlert objects
 		return returnList
@@ -3006,7 +3555,8 @@ class Sqlite(_Storage):
 			return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -3022,7 +3572,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		try:
 			self.cursor.execute("SELECT value FROM options WHERE type = ?",
@@ -3034,11 +3584,11 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to check " % self.fileName
 				+ "if alert system is active.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return False
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		if alertSystemActive == 1:
 			return True
@@ -3056,7 +3606,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		try:
 			self.cursor.execute("SELECT alertLevel "
@@ -3068,12 +3618,12 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get " % self.fileName
 				+ "all alert levels for alert clients.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			# return None if action failed
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list alertLevels as integer
 		return map(lambda x: x[0], result)
@@ -3089,7 +3639,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		try:
 			self.cursor.execute("SELECT alertLevel "
@@ -3101,12 +3651,12 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get " % self.fileName
 				+ "all alert levels for sensors.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			# return None if action failed
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list alertLevels as integer
 		return map(lambda x: x[0], result)
@@ -3122,7 +3672,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# get all connected node ids from database
 		try:
@@ -3136,12 +3686,12 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get " % self.fileName
 				+ "all connected node ids.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			# return None if action failed
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of nodeIds
 		return map(lambda x: x[0], result)
@@ -3158,7 +3708,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# get all persistent node ids from database
 		try:
@@ -3172,12 +3722,12 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get " % self.fileName
 				+ "all persistent node ids.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			# return None if action failed
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of nodeIds
 		return map(lambda x: x[0], result)
@@ -3207,7 +3757,8 @@ class Sqlite(_Storage):
 			return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -3238,7 +3789,8 @@ class Sqlite(_Storage):
 			return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -3256,7 +3808,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		sensorList = list()
 		try:
@@ -3278,11 +3830,11 @@ class Sqlite(_Storage):
 				+ "sensors from database which update was older than %d."
 				% oldestTimeUpdated)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of sensor objects
 		return sensorList
@@ -3297,11 +3849,11 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		result = self._getAlertById(alertId, logger)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return an alert object or None
 		return result
@@ -3316,11 +3868,11 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		result = self._getManagerById(managerId, logger)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a manager object or None
 		return result
@@ -3335,11 +3887,11 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		result = self._getNodeById(nodeId, logger)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a node object or None
 		return result
@@ -3354,11 +3906,11 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		result = self._getSensorById(sensorId, logger)
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a sensor object or None
 		return result
@@ -3373,7 +3925,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		nodes = list()
 		try:
@@ -3390,11 +3942,11 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get " % self.fileName
 				+ "nodes from database.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# list(node objects)
 		return nodes
@@ -3415,7 +3967,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		try:
 
@@ -3439,37 +3991,115 @@ class Sqlite(_Storage):
 				nodeObj = self._convertNodeTupleToObj(resultTuple)
 				nodeList.append(nodeObj)
 
-			# Get all sensors.
+			# Get the alert levels of all sensors
+			# (grouped by sensor id).
+			sensorsAlertLevels = dict()
+			self.cursor.execute("SELECT sensorId, "
+				+ "alertLevel "
+				+ "FROM sensorsAlertLevels")
+			results = self.cursor.fetchall()
+			for resultTuple in results:
+				if resultTuple[0] not in sensorsAlertLevels:
+					sensorsAlertLevels[resultTuple[0]] = list()
+				sensorsAlertLevels[resultTuple[0]].append(resultTuple[1])
+
+			# Get all sensors together with their data
+			# (one query instead of several queries per sensor).
 			sensorList = list()
-			self.cursor.execute("SELECT id FROM sensors")
+			self.cursor.execute("SELECT sensors.id, "
+				+ "sensors.nodeId, "
+				+ "sensors.remoteSensorId, "
+				+ "sensors.description, "
+				+ "sensors.state, "
+				+ "sensors.lastStateUpdated, "
+				+ "sensors.alertDelay, "
+				+ "sensors.dataType, "
+				+ "sensorsDataInt.data, "
+				+ "sensorsDataFloat.data "
+				+ "FROM sensors "
+				+ "LEFT OUTER JOIN sensorsDataInt "
+				+ "ON sensors.id = sensorsDataInt.sensorId "
+				+ "LEFT OUTER JOIN sensorsDataFloat "
+				+ "ON sensors.id = sensorsDataFloat.sensorId "
+				+ "ORDER BY sensors.id")
 			results = self.cursor.fetchall()
 			for resultTuple in results:
-				sensorObj = self._getSensorById(resultTuple[0], logger)
-				if sensorObj is None:
-					raise ValueError("Can not retrieve sensor with id %d."
-						% resultTuple[0])
+				sensorObj = Sensor()
+				sensorObj.sensorId = resultTuple[0]
+				sensorObj.nodeId = resultTuple[1]
+				sensorObj.remoteSensorId = resultTuple[2]
+				sensorObj.description = resultTuple[3]
+				sensorObj.state = resultTuple[4]
+				sensorObj.lastStateUpdated = resultTuple[5]
+				sensorObj.alertDelay = resultTuple[6]
+				sensorObj.dataType = resultTuple[7]
+				sensorObj.alertLevels = sensorsAlertLevels.get(
+					sensorObj.sensorId, list())
+
+				# Extract sensor data.
+				if sensorObj.dataType == SensorDataType.NONE:
+					sensorObj.data = None
+				elif sensorObj.dataType == SensorDataType.INT:
+					sensorObj.data = resultTuple[8]
+				elif sensorObj.dataType == SensorDataType.FLOAT:
+					sensorObj.data = resultTuple[9]
+				else:
+					raise ValueError("Data type of sensor with id %d "
+						% sensorObj.sensorId
+						+ "unknown.")
+
+				if (sensorObj.dataType != SensorDataType.NONE
+					and sensorObj.data is None):
+					raise ValueError("Sensor data for sensor with id %d "
+						% sensorObj.sensorId
+						+ "was not found.")
+
 				sensorList.append(sensorObj)
 
 			# Get all managers.
 			managerList = list()
-			self.cursor.execute("SELECT id FROM managers")
+			self.cursor.execute("SELECT id, "
+				+ "nodeId, "
+				+ "description "
+				+ "FROM managers "
+				+ "ORDER BY id")
 			results = self.cursor.fetchall()
 			for resultTuple in results:
-				managerObj = self._getManagerById(resultTuple[0], logger)
-				if managerObj is None:
-					raise ValueError("Can not retrieve manager with id %d."
-						% resultTuple[0])
+				managerObj = Manager()
+				managerObj.managerId = resultTuple[0]
+				managerObj.nodeId = resultTuple[1]
+				managerObj.description = resultTuple[2]
 				managerList.append(managerObj)
 
+			# Get the alert levels of all alerts
+			# (grouped by alert id).
+			alertsAlertLevels = dict()
+			self.cursor.execute("SELECT alertId, "
+				+ "alertLevel "
+				+ "FROM alertsAlertLevels")
+			results = self.cursor.fetchall()
+			for resultTuple in results:
+				if resultTuple[0] not in alertsAlertLevels:
+					alertsAlertLevels[resultTuple[0]] = list()
+				alertsAlertLevels[resultTuple[0]].append(resultTuple[1])
+
 			# Get all alerts.
 			alertList = list()
-			self.cursor.execute("SELECT id FROM alerts")
+			self.cursor.execute("SELECT id, "
+				+ "nodeId, "
+				+ "remoteAlertId, "
+				+ "description "
+				+ "FROM alerts "
+				+ "ORDER BY id")
 			results = self.cursor.fetchall()
 			for resultTuple in results:
-				alertObj = self._getAlertById(resultTuple[0], logger)
-				if alertObj is None:
-					raise ValueError("Can not retrieve alert with id %d."
-						% resultTuple[0])
+				alertObj = Alert()
+				alertObj.alertId = resultTuple[0]
+				alertObj.nodeId = resultTuple[1]
+				alertObj.remoteAlertId = resultTuple[2]
+				alertObj.description = resultTuple[3]
+				alertObj.alertLevels = alertsAlertLevels.get(
+					alertObj.alertId, list())
 				alertList.append(alertObj)
 
 			# Generate a list with system information.
@@ -3485,11 +4115,11 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get " % self.fileName
 				+ "complete system information from database.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a list of
 		# list[0] = list(option objects)
@@ -3500,6 +4130,14 @@ class Sqlite(_Storage):
 		return alertSystemInformation
 
 
+	# Gets the version of the alert system information (it is increased
+	# each time options, nodes, sensors, managers or alerts change).
+	#
+	# return version number
+	def getStatusVersion(self, logger=None):
+		return self.statusVersion
+
+
 	# change a option in the database
 	#
 	# return True or False
@@ -3540,7 +4178,8 @@ class Sqlite(_Storage):
 			return False
 
 		# commit all changes
-		self.conn.commit()
+		self._commit(logger)
+		self.statusVersion += 1
 
 		self._releaseLock(logger)
 
@@ -3556,7 +4195,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		try:
 			# get sensor state from database
@@ -3568,7 +4207,7 @@ class Sqlite(_Storage):
 				logger.error("[%s]: Sensor was not found."
 					% self.fileName)
 
-				self._releaseLock(logger)
+				self._releaseReadLock(logger)
 
 				return None
 
@@ -3579,11 +4218,11 @@ class Sqlite(_Storage):
 			logger.exception("[%s]: Not able to get " % self.fileName
 				+ "sensor state from database.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return state
 
@@ -3597,7 +4236,7 @@ class Sqlite(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		try:
 			# Get data type from database.
@@ -3609,7 +4248,7 @@ class Sqlite(_Storage):
 				logger.error("[%s]: Sensor was not found."
 					% self.fileName)
 
-				self._releaseLock(logger)
+				self._releaseReadLock(logger)
 
 				return None
 
@@ -3621,7 +4260,7 @@ class Sqlite(_Storage):
 				% self.fileName
 				+ "sensor data type from database.")
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -3642,7 +4281,7 @@ class Sqlite(_Storage):
 					logger.error("[%s]: Sensor data was not found."
 						% self.fileName)
 
-					self._releaseLock(logger)
+					self._releaseReadLock(logger)
 
 					return None
 
@@ -3655,7 +4294,7 @@ class Sqlite(_Storage):
 					% self.fileName
 					+ "sensor data from database.")
 
-				self._releaseLock(logger)
+				self._releaseReadLock(logger)
 
 				return None
 
@@ -3670,7 +4309,7 @@ class Sqlite(_Storage):
 					logger.error("[%s]: Sensor data was not found."
 						% self.fileName)
 
-					self._releaseLock(logger)
+					self._releaseReadLock(logger)
 
 					return None
 
@@ -3682,11 +4321,11 @@ class Sqlite(_Storage):
 					% self.fileName
 					+ "sensor data from database.")
 
-				self._releaseLock(logger)
+				self._releaseReadLock(logger)
 
 				return None
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a sensor data object or None
 		return data
@@ -3703,11 +4342,47 @@ class Sqlite(_Storage):
 
 		self._acquireLock(logger)
 
+		# Commit the changes that wait for the group commit
+		# and stop it.
+		groupCommitThread = None
+		if self.groupCommit:
+			self.cursor.execute("RELEASE storage")
+			if self.groupCommitTransaction:
+				self.cursor.execute("COMMIT")
+			self.groupCommit = False
+			self.groupCommitTransaction = False
+			self.groupCommitLocal.batch = None
+			self.groupCommitBatch.committed.set()
+			self.groupCommitEvent.set()
+			self.groupCommitFullEvent.set()
+			groupCommitThread = self.groupCommitThread
+
 		self.cursor.close()
 		self.conn.close()
 
+		with self.readConnectionsLock:
+			for conn in self.readConnections:
+				conn.close()
+			self.readConnections = list()
+			self.readConnectionPool = list()
+
 		self._releaseLock(logger)
 
+		if groupCommitThread is not None:
+			groupCommitThread.join()
+
+
+# Connection (or cursor) of the mysql storage backend that the current
+# thread took from the connection pool.
+class _MysqlPooledObject:
+
+	def __init__(self):
+		self.local = threading.local()
+
+
+	def __getattr__(self, name):
+		return getattr(self.local.obj, name)
+
 
 # class for using mysql as storage backend
 class Mysql(_Storage):
@@ -3733,11 +4408,25 @@ class Mysql(_Storage):
 		self.username = username
 		self.password = password
 
-		# mysql lock
+		# mysql lock (only used by writes, reads run in parallel
+		# on their own connections)
 		self.dbLock = threading.Semaphore(1)
 
-		self.conn = None
-		self.cursor = None
+		# Version of the alert system information in the database
+		# (is increased on each change).
+		self.statusVersion = 0
+
+		# Pool of connections to the mysql server (bounded by the pool
+		# size). Each thread uses the connection it took from the pool
+		# via self.conn and self.cursor.
+		self.connectionPool = list()
+		self.connectionPoolLock = threading.Lock()
+		self.connectionPoolSemaphore = threading.BoundedSemaphore(
+			self.globalData.storageBackendMysqlPoolSize)
+		self.connectionPingInterval = \
+			self.globalData.storageBackendMysqlPingInterval
+		self.conn = _MysqlPooledObject()
+		self.cursor = _MysqlPooledObject()
 
 		# connect to the database
 		self._openConnection()
@@ -3818,18 +4507,51 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
+		# Wait until a connection of the pool is available.
+		self.connectionPoolSemaphore.acquire()
+
+		try:
+			conn = None
+			with self.connectionPoolLock:
+				if self.connectionPool:
+					conn, lastUsed = self.connectionPool.pop()
+
+			# Check if an idle connection is still alive
+			# (the mysql server closes idle connections).
+			if (conn is not None
+				and (time.time() - lastUsed) >= self.connectionPingInterval):
+				try:
+					conn.ping()
+				except Exception as e:
+					logger.debug("[%s]: Pooled connection to the MySQL "
+						% self.fileName
+						+ "server is not alive anymore.")
+					self._discardConnection(conn)
+					conn = None
+
+			if conn is None:
+				conn = self._connect(logger)
+
+		except Exception as e:
+			self.connectionPoolSemaphore.release()
+			raise
+
+		self.conn.local.obj = conn
+		self.cursor.local.obj = conn.cursor()
+
+
+	# internal function that connects to the mysql server
+	def _connect(self, logger):
+
 		# import the needed package
 		import MySQLdb
 
 		currentTry = 0
 		while True:
 			try:
-				self.conn = MySQLdb.connect(host=self.host, port=self.port,
+				return MySQLdb.connect(host=self.host, port=self.port,
 					user=self.username,	passwd=self.password, db=self.database)
 
-				self.cursor = self.conn.cursor()
-				break
-
 			except Exception as e:
 
 				# Re-throw the exception if we reached our retry limit.
@@ -3845,12 +4567,44 @@ class Mysql(_Storage):
 				time.sleep(5)
 
 
-	# internal function that closes the connection to the mysql server
+	# internal function that closes a connection that is not usable anymore
+	def _discardConnection(self, conn):
+		try:
+			conn.close()
+		except Exception as e:
+			pass
+
+
+	# internal function that gives the connection to the mysql server
+	# back to the pool (changes that are not committed are discarded)
 	def _closeConnection(self):
-		self.cursor.close()
-		self.conn.close()
-		self.cursor = None
-		self.conn = None
+
+		conn = self.conn.local.obj
+		cursor = self.cursor.local.obj
+		self.conn.local.obj = None
+		self.cursor.local.obj = None
+
+		try:
+			cursor.close()
+			conn.rollback()
+			with self.connectionPoolLock:
+				self.connectionPool.append((conn, time.time()))
+		except Exception as e:
+			self._discardConnection(conn)
+
+		self.connectionPoolSemaphore.release()
+
+
+	# Internal function that lets the current thread read on its own
+	# connection (reads do not wait for the writer or other readers,
+	# the connection pool bounds them).
+	def _acquireReadLock(self, logger=None):
+		pass
+
+
+	# Internal function that ends the read of the current thread.
+	def _releaseReadLock(self, logger=None):
+		pass
 
 
 	# internal function that checks if the username is known
@@ -4349,10 +5103,70 @@ class Mysql(_Storage):
 			+ "description VARCHAR(255) NOT NULL, "
 			+ "FOREIGN KEY(nodeId) REFERENCES nodes(id))")
 
+		# Bring the new database to the current schema version.
+		self._migrateStorage()
+
 		# commit all changes
 		self.conn.commit()
 
 
+	# Internal function that creates an index on the given columns of a
+	# table if it does not exist yet.
+	def _createIndex(self, indexName, tableName, columns):
+
+		self.cursor.execute("SHOW INDEX FROM " + tableName + " "
+			+ "WHERE Key_name = %s", (indexName, ))
+		result = self.cursor.fetchall()
+		if len(result) == 0:
+			self.cursor.execute("CREATE INDEX " + indexName + " "
+				+ "ON " + tableName + " (" + columns + ")")
+
+
+	# Internal function that migrates the schema of the database to the
+	# current schema version without deleting its data (the schema version
+	# is stored in the internals table, databases without it have
+	# schema version 0).
+	#
+	# no return value but raise exception if it fails
+	def _migrateStorage(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self.cursor.execute("SELECT value FROM internals "
+			+ "WHERE type = %s",
+			("schemaVersion", ))
+		result = self.cursor.fetchall()
+		if len(result) == 0:
+			schemaVersion = 0
+			self.cursor.execute("INSERT INTO internals ("
+				+ "type, "
+				+ "value) VALUES (%s, %s)", ("schemaVersion", schemaVersion))
+		else:
+			schemaVersion = int(result[0][0])
+
+		# Schema version 1: indexes for the columns sensors, alerts and
+		# sensor alerts are looked up by (nodes are looked up by the
+		# unique username and sensor alerts by their foreign keys
+		# which are already indexed).
+		if schemaVersion < 1:
+			logger.info("[%s]: Migrating database to schema version 1."
+				% self.fileName)
+
+			self._createIndex("sensorsNodeIdRemoteSensorId", "sensors",
+				"nodeId, remoteSensorId")
+			self._createIndex("sensorsLastStateUpdated", "sensors",
+				"lastStateUpdated")
+			self._createIndex("alertsNodeIdRemoteAlertId", "alerts",
+				"nodeId, remoteAlertId")
+			schemaVersion = 1
+
+		self.cursor.execute("UPDATE internals SET "
+			+ "value = %s "
+			+ "WHERE type = %s", (schemaVersion, "schemaVersion"))
+
+
 	# Internal function that deletes the database
 	# (should only be called if parts of the database do exist)
 	#
@@ -4710,15 +5524,126 @@ class Mysql(_Storage):
 		return True
 
 
-	# checks the version of the server and the version in the database
-	# and clears every compatibility issue
+	# Internal function that updates the state (if changeState is set),
+	# the data (if hasLatestData is set) and the time of a sensor without
+	# committing the changes.
 	#
-	# no return value but raise exception if it fails
-	def checkVersionAndClearConflict(self, logger=None):
-
-		# Set logger instance to use.
-		if not logger:
-			logger = self.logger
+	# Returns true if everything worked fine.
+	def _updateSensor(self, nodeId, sensorId, state, changeState,
+		hasLatestData, data, logger=None):
+
+		try:
+			# Check if the sensor does exist in the database and get its
+			# data type.
+			self.cursor.execute("SELECT dataType FROM sensors "
+				+ "WHERE id = %s "
+				+ "AND nodeId = %s", (sensorId, nodeId))
+			result = self.cursor.fetchall()
+			if len(result) != 1:
+				logger.error("[%s]: Sensor does not exist in "
+					% self.fileName
+					+ "database.")
+
+				return False
+
+			dataType = result[0][0]
+
+			utcTimestamp = int(time.time())
+			if changeState:
+				self.cursor.execute("UPDATE sensors SET "
+					+ "state = %s, "
+					+ "lastStateUpdated = %s "
+					+ "WHERE id = %s",
+					(state, utcTimestamp, sensorId))
+			else:
+				self.cursor.execute("UPDATE sensors SET "
+					+ "lastStateUpdated = %s "
+					+ "WHERE id = %s",
+					(utcTimestamp, sensorId))
+
+			if hasLatestData:
+				if dataType == SensorDataType.INT:
+					self.cursor.execute("UPDATE sensorsDataInt SET "
+						+ "data = %s "
+						+ "WHERE sensorId = %s",
+						(data,
+						sensorId))
+
+				elif dataType == SensorDataType.FLOAT:
+					self.cursor.execute("UPDATE sensorsDataFloat SET "
+						+ "data = %s "
+						+ "WHERE sensorId = %s",
+						(data,
+						sensorId))
+
+		except Exception as e:
+			logger.exception("[%s]: Not able to update sensor."
+				% self.fileName)
+
+			return False
+
+		return True
+
+
+	# Internal function that adds a sensor alert and its data to the
+	# database without committing the changes.
+	#
+	# Returns sensorAlertId or None.
+	def _insertSensorAlert(self, nodeId, sensorId, state, dataJson,
+		changeState, hasLatestData, dataType, sensorData, logger=None):
+
+		try:
+			if changeState:
+				dbChangeState = 1
+			else:
+				dbChangeState = 0
+			if hasLatestData:
+				dbHasLatestData = 1
+			else:
+				dbHasLatestData = 0
+			utcTimestamp = int(time.time())
+			self.cursor.execute("INSERT INTO sensorAlerts ("
+				+ "nodeId, "
+				+ "sensorId, "
+				+ "state, "
+				+ "timeReceived, "
+				+ "dataJson, "
+				+ "changeState, "
+				+ "hasLatestData, "
+				+ "dataType) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+				(nodeId, sensorId, state, utcTimestamp, dataJson,
+				dbChangeState, dbHasLatestData, dataType))
+
+			# Get sensorAlertId of current added sensor alert.
+			sensorAlertId = self.cursor.lastrowid
+
+			if not self._insertSensorAlertData(sensorAlertId,
+				dataType, sensorData, logger):
+
+				logger.error("[%s]: Not able to add data for newly "
+					% self.fileName
+					+ "added sensor alert.")
+
+				return None
+
+		except Exception as e:
+			logger.exception("[%s]: Not able to add sensor alert."
+				% self.fileName)
+
+			return None
+
+		return sensorAlertId
+
+
+	# checks the version of the server and the version in the database
+	# and clears every compatibility issue
+	#
+	# no return value but raise exception if it fails
+	def checkVersionAndClearConflict(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
 
 		self._acquireLock(logger)
 
@@ -4755,6 +5680,13 @@ class Mysql(_Storage):
 
 			# commit all changes
 			self.conn.commit()
+			self.statusVersion += 1
+
+		# Migrate the schema of a compatible database to the current
+		# schema version (keeps its data).
+		else:
+			self._migrateStorage(logger)
+			self.conn.commit()
 
 		# close connection to the database
 		self._closeConnection()
@@ -4924,6 +5856,9 @@ class Mysql(_Storage):
 					logger.exception("[%s]: Not able to " % self.fileName
 						+ "update instance of node.")
 
+					# close connection to the database
+					self._closeConnection()
+
 					self._releaseLock(logger)
 
 					return False
@@ -4945,6 +5880,9 @@ class Mysql(_Storage):
 					logger.exception("[%s]: Not able to " % self.fileName
 						+ "update version of node.")
 
+					# close connection to the database
+					self._closeConnection()
+
 					self._releaseLock(logger)
 
 					return False
@@ -4966,6 +5904,9 @@ class Mysql(_Storage):
 					logger.exception("[%s]: Not able to " % self.fileName
 						+ "update revision of node.")
 
+					# close connection to the database
+					self._closeConnection()
+
 					self._releaseLock(logger)
 
 					return False
@@ -4987,6 +5928,9 @@ class Mysql(_Storage):
 					logger.exception("[%s]: Not able to " % self.fileName
 						+ "update persistent flag of node.")
 
+					# close connection to the database
+					self._closeConnection()
+
 					self._releaseLock(logger)
 
 					return False
@@ -5087,6 +6031,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -5530,6 +6475,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -5845,6 +6791,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -5979,6 +6926,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -5998,7 +6946,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6007,7 +6955,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6021,7 +6969,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return nodeId
 
@@ -6035,7 +6983,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6044,7 +6992,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6062,7 +7010,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return nodeIds
 
@@ -6075,7 +7023,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6084,7 +7032,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6103,7 +7051,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return sensorCount
 
@@ -6118,7 +7066,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6127,7 +7075,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6146,7 +7094,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return list(surveyData)
 
@@ -6161,7 +7109,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6170,7 +7118,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6179,7 +7127,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return uniqueID
 
@@ -6250,6 +7198,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -6340,6 +7289,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -6392,6 +7342,122 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
+
+		# close connection to the database
+		self._closeConnection()
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# Stores a received sensor alert in one transaction: updates the state
+	# (if changeState is set), the data (if hasLatestData is set) and the
+	# time of the sensor and adds the sensor alert to the database
+	# (if storeSensorAlert is set).
+	#
+	# return sensorAlertId (True if the sensor alert is not stored) or None
+	def ingestSensorAlert(self, nodeId, sensorId, state, dataJson,
+		changeState, hasLatestData, dataType, sensorData, storeSensorAlert,
+		logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# connect to the database
+		try:
+			self._openConnection(logger)
+		except Exception as e:
+			logger.exception("[%s]: Not able to connect to database."
+				% self.fileName)
+
+			self._releaseLock(logger)
+
+			return None
+
+		if not self._updateSensor(nodeId, sensorId, state, changeState,
+			hasLatestData, sensorData, logger):
+
+			self.conn.rollback()
+
+			# close connection to the database
+			self._closeConnection()
+
+			self._releaseLock(logger)
+
+			return None
+
+		sensorAlertId = True
+		if storeSensorAlert:
+			sensorAlertId = self._insertSensorAlert(nodeId, sensorId, state,
+				dataJson, changeState, hasLatestData, dataType, sensorData,
+				logger)
+			if sensorAlertId is None:
+
+				self.conn.rollback()
+
+				# close connection to the database
+				self._closeConnection()
+
+				self._releaseLock(logger)
+
+				return None
+
+		# commit all changes at once
+		self.conn.commit()
+		self.statusVersion += 1
+
+		# close connection to the database
+		self._closeConnection()
+
+		self._releaseLock(logger)
+
+		return sensorAlertId
+
+
+	# Stores a received state change in one transaction: updates the state,
+	# the data (if the sensor holds data) and the time of the sensor.
+	#
+	# return True or False
+	def ingestStateChange(self, nodeId, sensorId, state, sensorData,
+		logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# connect to the database
+		try:
+			self._openConnection(logger)
+		except Exception as e:
+			logger.exception("[%s]: Not able to connect to database."
+				% self.fileName)
+
+			self._releaseLock(logger)
+
+			return False
+
+		if not self._updateSensor(nodeId, sensorId, state, True, True,
+			sensorData, logger):
+
+			self.conn.rollback()
+
+			# close connection to the database
+			self._closeConnection()
+
+			self._releaseLock(logger)
+
+			return False
+
+		# commit all changes at once
+		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -6411,7 +7477,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6420,7 +7486,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6434,14 +7500,14 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return sensorId
 
@@ -6456,7 +7522,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6465,7 +7531,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6479,14 +7545,14 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return alertId
 
@@ -6501,7 +7567,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6510,7 +7576,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6519,7 +7585,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of alertLevel
 		return result
@@ -6535,7 +7601,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6544,7 +7610,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6553,7 +7619,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of alertLevels
 		return map(lambda x: x[0], result)
@@ -6562,7 +7628,7 @@ class Mysql(_Storage):
 	# adds a sensor alert to the database when the id of a node is given,
 	# the id of the sensor that is used internally by the node and the state
 	#
-	# return True or False
+	# return sensorAlertId or None
 	def addSensorAlert(self, nodeId, sensorId, state, dataJson, changeState,
 		hasLatestData, dataType, sensorData, logger=None):
 
@@ -6581,58 +7647,20 @@ class Mysql(_Storage):
 
 			self._releaseLock(logger)
 
-			return False
+			return None
 
 		# add sensor alert to database
-		try:
-			if changeState:
-				dbChangeState = 1
-			else:
-				dbChangeState = 0
-			if hasLatestData:
-				dbHasLatestData = 1
-			else:
-				dbHasLatestData = 0
-			utcTimestamp = int(time.time())
-			self.cursor.execute("INSERT INTO sensorAlerts ("
-				+ "nodeId, "
-				+ "sensorId, "
-				+ "state, "
-				+ "timeReceived, "
-				+ "dataJson, "
-				+ "changeState, "
-				+ "hasLatestData, "
-				+ "dataType) VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
-				(nodeId, sensorId, state, utcTimestamp, dataJson,
-				dbChangeState, dbHasLatestData, dataType))
+		sensorAlertId = self._insertSensorAlert(nodeId, sensorId, state,
+			dataJson, changeState, hasLatestData, dataType, sensorData,
+			logger)
+		if sensorAlertId is None:
 
-			# Get sensorAlertId of current added sensor alert.
-			sensorAlertId = self.cursor.lastrowid
+			# close connection to the database
+			self._closeConnection()
 
-			if not self._insertSensorAlertData(sensorAlertId,
-				dataType, sensorData, logger):
+			self._releaseLock(logger)
 
-				logger.error("[%s]: Not able to add data for newly "
-					% self.fileName
-					+ "added sensor alert.")
-
-				# close connection to the database
-				self._closeConnection()
-
-				self._releaseLock(logger)
-
-				return False
-
-		except Exception as e:
-			logger.exception("[%s]: Not able to add sensor alert."
-				% self.fileName)
-
-			# close connection to the database
-			self._closeConnection()
-
-			self._releaseLock(logger)
-
-			return False
+			return None
 
 		# commit all changes
 		self.conn.commit()
@@ -6642,7 +7670,7 @@ class Mysql(_Storage):
 
 		self._releaseLock(logger)
 
-		return True
+		return sensorAlertId
 
 
 	# gets all sensor alerts in the database
@@ -6657,7 +7685,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6666,7 +7694,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -6732,7 +7760,7 @@ class Mysql(_Storage):
 					# close connection to the database
 					self._closeConnection()
 
-					self._releaseLock(logger)
+					self._releaseReadLock(logger)
 
 					return None
 
@@ -6756,7 +7784,7 @@ class Mysql(_Storage):
 						# close connection to the database
 						self._closeConnection()
 
-						self._releaseLock(logger)
+						self._releaseReadLock(logger)
 
 						return None
 					sensorAlert.sensorData = subResult[0][0]
@@ -6775,7 +7803,7 @@ class Mysql(_Storage):
 						# close connection to the database
 						self._closeConnection()
 
-						self._releaseLock(logger)
+						self._releaseReadLock(logger)
 
 						return None
 					sensorAlert.sensorData = subResult[0][0]
@@ -6788,7 +7816,7 @@ class Mysql(_Storage):
 					# close connection to the database
 					self._closeConnection()
 
-					self._releaseLock(logger)
+					self._releaseReadLock(logger)
 
 					return None
 
@@ -6801,14 +7829,14 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a list of sensorAlert objects
 		return returnList
@@ -6951,6 +7979,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -6969,7 +7998,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -6978,7 +8007,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return False
 
@@ -6995,14 +8024,14 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return False
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		if alertSystemActive == 1:
 			return True
@@ -7020,7 +8049,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7029,7 +8058,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7046,7 +8075,7 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			# return None if action failed
 			return None
@@ -7054,7 +8083,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list alertLevels as integer
 		return map(lambda x: x[0], result)
@@ -7070,7 +8099,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7079,7 +8108,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7096,7 +8125,7 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			# return None if action failed
 			return None
@@ -7104,7 +8133,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list alertLevels as integer
 		return map(lambda x: x[0], result)
@@ -7120,7 +8149,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7129,7 +8158,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7148,7 +8177,7 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			# return None if action failed
 			return None
@@ -7156,7 +8185,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of nodeIds
 		return map(lambda x: x[0], result)
@@ -7173,7 +8202,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7182,7 +8211,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7201,7 +8230,7 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			# return None if action failed
 			return None
@@ -7209,7 +8238,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of nodeIds
 		return map(lambda x: x[0], result)
@@ -7254,6 +8283,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -7302,6 +8332,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -7322,7 +8353,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7331,7 +8362,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7358,14 +8389,14 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return list of sensor objects
 		return sensorList
@@ -7380,7 +8411,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7389,7 +8420,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7398,7 +8429,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return an alert object or None
 		return result
@@ -7413,7 +8444,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7422,7 +8453,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7431,7 +8462,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a manager object or None
 		return result
@@ -7446,7 +8477,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7455,7 +8486,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7464,7 +8495,7 @@ class Mysql(_Storage):
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a node object or None
 		return result
@@ -7479,7 +8510,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7488,13 +8519,16 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
 		result = self._getSensorById(sensorId, logger)
 
-		self._releaseLock(logger)
+		# close connection to the database
+		self._closeConnection()
+
+		self._releaseReadLock(logger)
 
 		# return a sensor object or None
 		return result
@@ -7509,7 +8543,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# Connect to the database.
 		try:
@@ -7518,7 +8552,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7540,14 +8574,14 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# list(node objects)
 		return nodes
@@ -7568,7 +8602,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7577,7 +8611,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7603,37 +8637,115 @@ class Mysql(_Storage):
 				nodeObj = self._convertNodeTupleToObj(resultTuple)
 				nodeList.append(nodeObj)
 
-			# Get all sensors.
+			# Get the alert levels of all sensors
+			# (grouped by sensor id).
+			sensorsAlertLevels = dict()
+			self.cursor.execute("SELECT sensorId, "
+				+ "alertLevel "
+				+ "FROM sensorsAlertLevels")
+			results = self.cursor.fetchall()
+			for resultTuple in results:
+				if resultTuple[0] not in sensorsAlertLevels:
+					sensorsAlertLevels[resultTuple[0]] = list()
+				sensorsAlertLevels[resultTuple[0]].append(resultTuple[1])
+
+			# Get all sensors together with their data
+			# (one query instead of several queries per sensor).
 			sensorList = list()
-			self.cursor.execute("SELECT id FROM sensors")
+			self.cursor.execute("SELECT sensors.id, "
+				+ "sensors.nodeId, "
+				+ "sensors.remoteSensorId, "
+				+ "sensors.description, "
+				+ "sensors.state, "
+				+ "sensors.lastStateUpdated, "
+				+ "sensors.alertDelay, "
+				+ "sensors.dataType, "
+				+ "sensorsDataInt.data, "
+				+ "sensorsDataFloat.data "
+				+ "FROM sensors "
+				+ "LEFT OUTER JOIN sensorsDataInt "
+				+ "ON sensors.id = sensorsDataInt.sensorId "
+				+ "LEFT OUTER JOIN sensorsDataFloat "
+				+ "ON sensors.id = sensorsDataFloat.sensorId "
+				+ "ORDER BY sensors.id")
 			results = self.cursor.fetchall()
 			for resultTuple in results:
-				sensorObj = self._getSensorById(resultTuple[0], logger)
-				if sensorObj is None:
-					raise ValueError("Can not retrieve sensor with id %d."
-						% resultTuple[0])
+				sensorObj = Sensor()
+				sensorObj.sensorId = resultTuple[0]
+				sensorObj.nodeId = resultTuple[1]
+				sensorObj.remoteSensorId = resultTuple[2]
+				sensorObj.description = resultTuple[3]
+				sensorObj.state = resultTuple[4]
+				sensorObj.lastStateUpdated = resultTuple[5]
+				sensorObj.alertDelay = resultTuple[6]
+				sensorObj.dataType = resultTuple[7]
+				sensorObj.alertLevels = sensorsAlertLevels.get(
+					sensorObj.sensorId, list())
+
+				# Extract sensor data.
+				if sensorObj.dataType == SensorDataType.NONE:
+					sensorObj.data = None
+				elif sensorObj.dataType == SensorDataType.INT:
+					sensorObj.data = resultTuple[8]
+				elif sensorObj.dataType == SensorDataType.FLOAT:
+					sensorObj.data = resultTuple[9]
+				else:
+					raise ValueError("Data type of sensor with id %d "
+						% sensorObj.sensorId
+						+ "unknown.")
+
+				if (sensorObj.dataType != SensorDataType.NONE
+					and sensorObj.data is None):
+					raise ValueError("Sensor data for sensor with id %d "
+						% sensorObj.sensorId
+						+ "was not found.")
+
 				sensorList.append(sensorObj)
 
 			# Get all managers.
 			managerList = list()
-			self.cursor.execute("SELECT id FROM managers")
+			self.cursor.execute("SELECT id, "
+				+ "nodeId, "
+				+ "description "
+				+ "FROM managers "
+				+ "ORDER BY id")
 			results = self.cursor.fetchall()
 			for resultTuple in results:
-				managerObj = self._getManagerById(resultTuple[0], logger)
-				if managerObj is None:
-					raise ValueError("Can not retrieve manager with id %d."
-						% resultTuple[0])
+				managerObj = Manager()
+				managerObj.managerId = resultTuple[0]
+				managerObj.nodeId = resultTuple[1]
+				managerObj.description = resultTuple[2]
 				managerList.append(managerObj)
 
+			# Get the alert levels of all alerts
+			# (grouped by alert id).
+			alertsAlertLevels = dict()
+			self.cursor.execute("SELECT alertId, "
+				+ "alertLevel "
+				+ "FROM alertsAlertLevels")
+			results = self.cursor.fetchall()
+			for resultTuple in results:
+				if resultTuple[0] not in alertsAlertLevels:
+					alertsAlertLevels[resultTuple[0]] = list()
+				alertsAlertLevels[resultTuple[0]].append(resultTuple[1])
+
 			# Get all alerts.
 			alertList = list()
-			self.cursor.execute("SELECT id FROM alerts")
+			self.cursor.execute("SELECT id, "
+				+ "nodeId, "
+				+ "remoteAlertId, "
+				+ "description "
+				+ "FROM alerts "
+				+ "ORDER BY id")
 			results = self.cursor.fetchall()
 			for resultTuple in results:
-				alertObj = self._getAlertById(resultTuple[0], logger)
-				if alertObj is None:
-					raise ValueError("Can not retrieve alert with id %d."
-						% resultTuple[0])
+				alertObj = Alert()
+				alertObj.alertId = resultTuple[0]
+				alertObj.nodeId = resultTuple[1]
+				alertObj.remoteAlertId = resultTuple[2]
+				alertObj.description = resultTuple[3]
+				alertObj.alertLevels = alertsAlertLevels.get(
+					alertObj.alertId, list())
 				alertList.append(alertObj)
 
 			# Generate a list with system information.
@@ -7652,14 +8764,14 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a list of
 		# list[0] = list(option objects)
@@ -7671,6 +8783,14 @@ class Mysql(_Storage):
 		return alertSystemInformation
 
 
+	# Gets the version of the alert system information (it is increased
+	# each time options, nodes, sensors, managers or alerts change).
+	#
+	# return version number
+	def getStatusVersion(self, logger=None):
+		return self.statusVersion
+
+
 	# change a option in the database
 	#
 	# return True or False
@@ -7729,6 +8849,7 @@ class Mysql(_Storage):
 
 		# commit all changes
 		self.conn.commit()
+		self.statusVersion += 1
 
 		# close connection to the database
 		self._closeConnection()
@@ -7747,7 +8868,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7756,7 +8877,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7773,7 +8894,7 @@ class Mysql(_Storage):
 				# close connection to the database
 				self._closeConnection()
 
-				self._releaseLock(logger)
+				self._releaseReadLock(logger)
 
 				return None
 
@@ -7788,14 +8909,14 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		return state
 
@@ -7809,7 +8930,7 @@ class Mysql(_Storage):
 		if not logger:
 			logger = self.logger
 
-		self._acquireLock(logger)
+		self._acquireReadLock(logger)
 
 		# connect to the database
 		try:
@@ -7818,7 +8939,7 @@ class Mysql(_Storage):
 			logger.exception("[%s]: Not able to connect to database."
 				% self.fileName)
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7835,7 +8956,7 @@ class Mysql(_Storage):
 				# close connection to the database
 				self._closeConnection()
 
-				self._releaseLock(logger)
+				self._releaseReadLock(logger)
 
 				return None
 
@@ -7850,7 +8971,7 @@ class Mysql(_Storage):
 			# close connection to the database
 			self._closeConnection()
 
-			self._releaseLock(logger)
+			self._releaseReadLock(logger)
 
 			return None
 
@@ -7874,7 +8995,7 @@ class Mysql(_Storage):
 					# close connection to the database
 					self._closeConnection()
 
-					self._releaseLock(logger)
+					self._releaseReadLock(logger)
 
 					return None
 
@@ -7889,7 +9010,7 @@ class Mysql(_Storage):
 				# close connection to the database
 				self._closeConnection()
 
-				self._releaseLock(logger)
+				self._releaseReadLock(logger)
 
 				return None
 
@@ -7907,7 +9028,7 @@ class Mysql(_Storage):
 					# close connection to the database
 					self._closeConnection()
 
-					self._releaseLock(logger)
+					self._releaseReadLock(logger)
 
 					return None
 
@@ -7922,14 +9043,14 @@ class Mysql(_Storage):
 				# close connection to the database
 				self._closeConnection()
 
-				self._releaseLock(logger)
+				self._releaseReadLock(logger)
 
 				return None
 
 		# close connection to the database
 		self._closeConnection()
 
-		self._releaseLock(logger)
+		self._releaseReadLock(logger)
 
 		# return a sensor data object or None
 		return data
@@ -7939,4 +9060,3083 @@ class Mysql(_Storage):
 	#
 	# no return value
 	def close(self, logger=None):
-		pass
\ No newline at end of file
+
+		with self.connectionPoolLock:
+			for conn, lastUsed in self.connectionPool:
+				self._discardConnection(conn)
+			self.connectionPool = list()
+
+
+# Storage backend that holds all tables in memory (indexed by their ids and
+# the columns that are used for lookups). Each committed transaction is
+# appended as one line to a journal file and the journal is compacted into
+# a snapshot file from time to time. On a restart the snapshot is loaded
+# and the journal is replayed on top of it.
+class Memory(_Storage):
+
+	# Tables of the storage backend (rows of the internals and options
+	# tables are indexed by their type, rows of all other tables by
+	# their id).
+	tables = ["internals", "options", "nodes", "sensors", "alerts",
+		"managers", "sensorAlerts"]
+
+	def __init__(self, storagePath, globalData):
+
+		self.globalData = globalData
+		self.logger = self.globalData.logger
+
+		# version of server
+		self.version = self.globalData.version
+		self.rev = self.globalData.rev
+
+		# file nme of this file (used for logging)
+		self.fileName = os.path.basename(__file__)
+
+		# path to the snapshot file and the journal file (and the journal
+		# that is compacted into a new snapshot at the moment)
+		self.storagePath = storagePath
+		self.journalPath = storagePath + ".journal"
+		self.oldJournalPath = storagePath + ".journal.old"
+
+		# Number of transactions in the journal after which the journal
+		# is compacted into a new snapshot (by the journal thread).
+		self.compactLimit = self.globalData.storageBackendMemoryCompactLimit
+
+		# When the journal is synced to the disk ("commit": each commit
+		# syncs the journal, "batch": commits wait for a sync outside of
+		# the lock that is shared by all waiting commits, "interval": the
+		# journal thread syncs the journal after the sync interval).
+		self.journalSync = self.globalData.storageBackendMemoryJournalSync
+		self.journalSyncInterval = float(
+			self.globalData.storageBackendMemoryJournalSyncInterval) / 1000.0
+
+		# the tables are not thread safe => use lock
+		self.dbLock = threading.Semaphore(1)
+
+		# Version of the alert system information in the database
+		# (is increased on each change).
+		self.statusVersion = 0
+
+		# Changes of the current transaction as journal entries
+		# (table, key, row) and the previous rows to undo them.
+		self.pendingEntries = list()
+		self.undoEntries = list()
+
+		# Open journal file and number of transactions in it.
+		self.journal = None
+		self.journalTransactions = 0
+
+		# Number of transactions written to and synced of the journal
+		# (the journal sync lock protects the syncing and replacing of
+		# the journal file) and the number of written transactions the
+		# current thread has to wait for until they are synced.
+		self.journalWrittenCount = 0
+		self.journalSyncedCount = 0
+		self.journalSyncLock = threading.Lock()
+		self.journalLocal = threading.local()
+
+		# State of the thread that compacts the journal and syncs it
+		# if the sync interval is used.
+		self.compactRequested = False
+		self.journalEvent = threading.Event()
+		self.journalExitFlag = False
+		self.journalThread = None
+
+		self._clearTables()
+
+		# check if database exists
+		# if not create one
+		if (os.path.exists(self.storagePath) == False
+			and os.path.exists(self.journalPath) == False):
+
+			self.logger.info("[%s]: No database found. Creating '%s'."
+			% (self.fileName, self.storagePath))
+
+			self.createStorage()
+		else:
+			self._loadStorage()
+
+			# Write the recovered state as new snapshot (also removes
+			# a partly written transaction at the end of the journal).
+			self._compact()
+
+			# check if the versions are compatible
+			self.checkVersionAndClearConflict()
+
+		self.journalThread = threading.Thread(target=self._journalWorker)
+		self.journalThread.daemon = True
+		self.journalThread.start()
+
+
+	# Internal function that removes all rows and indexes of the tables.
+	def _clearTables(self):
+
+		# Rows of the tables and the next id of each table.
+		self.data = dict()
+		self.nextIds = dict()
+		for table in self.tables:
+			self.data[table] = dict()
+			if table != "internals" and table != "options":
+				self.nextIds[table] = 1
+
+		# Indexes of the rows
+		# (key: username, value: node id;
+		# key: tuple of (nodeId, remoteSensorId), value: sensor id;
+		# key: tuple of (nodeId, remoteAlertId), value: alert id;
+		# key: nodeId, value: manager id;
+		# key: nodeId, value: set of sensor ids/alert ids).
+		self.nodeIdsByUsername = dict()
+		self.sensorIdsByRemoteId = dict()
+		self.alertIdsByRemoteId = dict()
+		self.managerIdsByNodeId = dict()
+		self.sensorIdsByNodeId = dict()
+		self.alertIdsByNodeId = dict()
+
+
+	# Internal function that adds a row to the indexes of its table.
+	def _indexRow(self, table, key, row):
+
+		if table == "nodes":
+			self.nodeIdsByUsername[row["username"]] = key
+
+		elif table == "sensors":
+			self.sensorIdsByRemoteId[(row["nodeId"],
+				row["remoteSensorId"])] = key
+			self.sensorIdsByNodeId.setdefault(row["nodeId"], set()).add(key)
+
+		elif table == "alerts":
+			self.alertIdsByRemoteId[(row["nodeId"],
+				row["remoteAlertId"])] = key
+			self.alertIdsByNodeId.setdefault(row["nodeId"], set()).add(key)
+
+		elif table == "managers":
+			self.managerIdsByNodeId[row["nodeId"]] = key
+
+
+	# Internal function that removes a row from the indexes of its table.
+	def _unindexRow(self, table, key, row):
+
+		if table == "nodes":
+			self.nodeIdsByUsername.pop(row["username"], None)
+
+		elif table == "sensors":
+			self.sensorIdsByRemoteId.pop((row["nodeId"],
+				row["remoteSensorId"]), None)
+			sensorIds = self.sensorIdsByNodeId.get(row["nodeId"], set())
+			sensorIds.discard(key)
+			if not sensorIds:
+				self.sensorIdsByNodeId.pop(row["nodeId"], None)
+
+		elif table == "alerts":
+			self.alertIdsByRemoteId.pop((row["nodeId"],
+				row["remoteAlertId"]), None)
+			alertIds = self.alertIdsByNodeId.get(row["nodeId"], set())
+			alertIds.discard(key)
+			if not alertIds:
+				self.alertIdsByNodeId.pop(row["nodeId"], None)
+
+		elif table == "managers":
+			self.managerIdsByNodeId.pop(row["nodeId"], None)
+
+
+	# Internal function that sets a row of a table (a row of None deletes
+	# it) and updates the indexes without journaling the change.
+	#
+	# returns the previous row or None
+	def _applyEntry(self, table, key, row):
+
+		rows = self.data[table]
+		oldRow = rows.get(key)
+		if oldRow is not None:
+			self._unindexRow(table, key, oldRow)
+
+		if row is None:
+			rows.pop(key, None)
+		else:
+			rows[key] = row
+			self._indexRow(table, key, row)
+
+			if table in self.nextIds and key >= self.nextIds[table]:
+				self.nextIds[table] = key + 1
+
+		return oldRow
+
+
+	# Internal function that sets a row of a table (a row of None deletes
+	# it) as part of the current transaction. Rows are never changed in
+	# place, a changed row is always set as a new row.
+	def _setRow(self, table, key, row):
+		oldRow = self._applyEntry(table, key, row)
+		self.undoEntries.append((table, key, oldRow))
+		self.pendingEntries.append([table, key, row])
+
+
+	# Internal function that sets the given values of a row of a table
+	# as part of the current transaction.
+	def _updateRow(self, table, key, values):
+		row = dict(self.data[table][key])
+		row.update(values)
+		self._setRow(table, key, row)
+
+
+	# Internal function that adds a row to a table as part of the
+	# current transaction.
+	#
+	# returns the id of the row
+	def _insertRow(self, table, row):
+		key = self.nextIds[table]
+		self._setRow(table, key, row)
+		return key
+
+
+	# Internal function that loads the snapshot and replays the journal.
+	#
+	# no return value but raise exception if it fails
+	def _loadStorage(self):
+
+		if os.path.exists(self.storagePath):
+			with open(self.storagePath, "rb") as fp:
+				snapshot = json.load(fp)
+
+			for table in self.tables:
+				for key, row in snapshot["tables"][table]:
+					self._applyEntry(table, key, row)
+			for table, nextId in snapshot["nextIds"].iteritems():
+				self.nextIds[table] = max(self.nextIds[table], nextId)
+
+		# Replay all committed transactions of the journal that was
+		# compacted when the server stopped and of the current journal.
+		# Since each entry sets a complete row, replaying the old journal
+		# on top of a snapshot that already contains it is harmless.
+		self._replayJournal(self.oldJournalPath)
+		self._replayJournal(self.journalPath)
+
+
+	# Internal function that replays all committed transactions of the
+	# given journal (each line is one transaction).
+	#
+	# no return value but raise exception if it fails
+	def _replayJournal(self, journalPath):
+
+		if not os.path.exists(journalPath):
+			return
+
+		with open(journalPath, "rb") as fp:
+			for line in fp:
+				try:
+					entries = json.loads(line)
+				except Exception as e:
+					self.logger.warning("[%s]: Ignoring partly written "
+						% self.fileName
+						+ "transaction at the end of the journal.")
+					break
+
+				for table, key, row in entries:
+					self._applyEntry(table, key, row)
+
+
+	# Internal function that writes the given tables into a new snapshot
+	# (replaces the old snapshot atomically).
+	#
+	# no return value but raise exception if it fails
+	def _writeSnapshot(self, tables, nextIds):
+
+		snapshot = dict()
+		snapshot["nextIds"] = nextIds
+		snapshot["tables"] = tables
+
+		tempPath = self.storagePath + ".tmp"
+		with open(tempPath, "wb") as fp:
+			json.dump(snapshot, fp)
+			fp.flush()
+			os.fsync(fp.fileno())
+		os.rename(tempPath, self.storagePath)
+
+
+	# Internal function that writes all tables into a new snapshot and
+	# starts an empty journal (the lock has to be held).
+	#
+	# no return value but raise exception if it fails
+	def _compact(self):
+
+		tables = dict()
+		for table in self.tables:
+			tables[table] = self.data[table].items()
+
+		# The journals are only replayed on top of the snapshot and can
+		# still be replayed if the server stops before they are removed.
+		self._writeSnapshot(tables, self.nextIds)
+
+		with self.journalSyncLock:
+			if self.journal is not None:
+				self.journal.close()
+			self.journal = open(self.journalPath, "wb")
+			self.journalTransactions = 0
+			self.journalSyncedCount = self.journalWrittenCount
+
+		if os.path.exists(self.oldJournalPath):
+			os.remove(self.oldJournalPath)
+
+		# The changes are part of the snapshot.
+		self.pendingEntries = list()
+		self.undoEntries = list()
+
+
+	# Internal function that compacts the journal without blocking the
+	# writers while the snapshot is written. The tables are copied and the
+	# journal is replaced by an empty one while the lock is held (rows
+	# are never changed in place, so copying the tables is cheap).
+	#
+	# no return value but raise exception if it fails
+	def _compactInBackground(self, logger):
+
+		self._acquireLock(logger)
+		try:
+			tables = dict()
+			for table in self.tables:
+				tables[table] = self.data[table].items()
+			nextIds = dict(self.nextIds)
+
+			with self.journalSyncLock:
+
+				# Transactions that wait for a sync are only in the
+				# replaced journal.
+				self.journal.flush()
+				if self.journalSyncedCount < self.journalWrittenCount:
+					os.fsync(self.journal.fileno())
+					self.journalSyncedCount = self.journalWrittenCount
+				self.journal.close()
+
+				# Keep the journal of a failed compaction (it is
+				# not part of any snapshot yet).
+				if os.path.exists(self.oldJournalPath):
+					with open(self.journalPath, "rb") as src:
+						with open(self.oldJournalPath, "ab") as dst:
+							dst.write(src.read())
+							dst.flush()
+							os.fsync(dst.fileno())
+					os.remove(self.journalPath)
+				else:
+					os.rename(self.journalPath, self.oldJournalPath)
+
+				self.journal = open(self.journalPath, "wb")
+				self.journalTransactions = 0
+
+		finally:
+			self._releaseLock(logger)
+
+		self._writeSnapshot(tables, nextIds)
+		os.remove(self.oldJournalPath)
+
+
+	# Internal function that syncs the journal to the disk until at least
+	# the given number of written transactions is synced (transactions
+	# that were written in the meantime are synced together).
+	def _syncJournal(self, writtenCount, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.journalSyncLock:
+			if self.journalSyncedCount >= writtenCount:
+				return
+
+			writtenCount = self.journalWrittenCount
+			try:
+				os.fsync(self.journal.fileno())
+			except Exception as e:
+				logger.exception("[%s]: Not able to sync journal."
+					% self.fileName)
+				return
+
+			self.journalSyncedCount = writtenCount
+
+
+	# Internal function that is executed by the journal thread. It
+	# compacts the journal if it has grown too large and syncs the
+	# journal after the sync interval (if it is used).
+	def _journalWorker(self):
+
+		while True:
+
+			if self.journalSync == "interval":
+				self.journalEvent.wait(self.journalSyncInterval)
+			else:
+				self.journalEvent.wait()
+			self.journalEvent.clear()
+
+			if self.journalExitFlag:
+				return
+
+			if self.journalSync == "interval":
+				self._syncJournal(self.journalWrittenCount)
+
+			if self.compactRequested:
+				self.logger.debug("[%s]: Compacting journal."
+					% self.fileName)
+				try:
+					self._compactInBackground(self.logger)
+				except Exception as e:
+					self.logger.exception("[%s]: Not able to compact "
+						% self.fileName
+						+ "journal.")
+				self.compactRequested = False
+
+
+	# internal function that generates a unique id for this server instance
+	def _generateUniqueId(self):
+
+		# generate unique id for this installation
+		utcTimestamp = int(time.time())
+		uniqueString = socket.gethostname() \
+			+ struct.pack("d", utcTimestamp) \
+			+ os.urandom(200)
+		sha256 = hashlib.sha256()
+		sha256.update(uniqueString)
+		uniqueID = sha256.hexdigest()
+
+		return uniqueID
+
+
+	# Internal function that converts a row of the nodes table
+	# to an node object.
+	#
+	# returns a node object
+	def _convertNodeRowToObj(self, nodeId, row):
+		node = Node()
+		node.id = nodeId
+		node.hostname = row["hostname"]
+		node.username = row["username"]
+		node.nodeType = row["nodeType"]
+		node.instance = row["instance"]
+		node.connected = (row["connected"] == 1)
+		node.version = row["version"]
+		node.rev = row["rev"]
+		node.persistent = (row["persistent"] == 1)
+		return node
+
+
+	# Internal function that converts a row of the sensors table
+	# to a sensor object.
+	#
+	# returns a sensor object
+	def _convertSensorRowToObj(self, sensorId, row):
+		sensor = Sensor()
+		sensor.sensorId = sensorId
+		sensor.nodeId = row["nodeId"]
+		sensor.remoteSensorId = row["remoteSensorId"]
+		sensor.description = row["description"]
+		sensor.state = row["state"]
+		sensor.lastStateUpdated = row["lastStateUpdated"]
+		sensor.alertDelay = row["alertDelay"]
+		sensor.dataType = row["dataType"]
+		sensor.alertLevels = list(row["alertLevels"])
+		sensor.data = row["data"]
+		return sensor
+
+
+	# Internal function that converts a row of the alerts table
+	# to an alert object.
+	#
+	# returns an alert object
+	def _convertAlertRowToObj(self, alertId, row):
+		alert = Alert()
+		alert.alertId = alertId
+		alert.nodeId = row["nodeId"]
+		alert.remoteAlertId = row["remoteAlertId"]
+		alert.description = row["description"]
+		alert.alertLevels = list(row["alertLevels"])
+		return alert
+
+
+	# Internal function that converts a row of the managers table
+	# to a manager object.
+	#
+	# returns a manager object
+	def _convertManagerRowToObj(self, managerId, row):
+		manager = Manager()
+		manager.managerId = managerId
+		manager.nodeId = row["nodeId"]
+		manager.description = row["description"]
+		return manager
+
+
+	# internal function that gets the id of a node when a username is given
+	def _getNodeId(self, username):
+
+		if username not in self.nodeIdsByUsername:
+			raise ValueError("Node id was not found.")
+
+		return self.nodeIdsByUsername[username]
+
+
+	# internal function that gets the sensor id of a sensor when the id
+	# of a node is given and the remote sensor id that is used
+	# by the node internally
+	#
+	# return sensorId or raised Exception
+	def _getSensorId(self, nodeId, remoteSensorId):
+
+		if (nodeId, remoteSensorId) not in self.sensorIdsByRemoteId:
+			raise ValueError("Sensor does not exist in database.")
+
+		return self.sensorIdsByRemoteId[(nodeId, remoteSensorId)]
+
+
+	# internal function that gets the alert id of an alert when the id
+	# of a node is given and the remote alert id that is used
+	# by the node internally
+	#
+	# return alertId or raised Exception
+	def _getAlertId(self, nodeId, remoteAlertId):
+
+		if (nodeId, remoteAlertId) not in self.alertIdsByRemoteId:
+			raise ValueError("Alert does not exist in database.")
+
+		return self.alertIdsByRemoteId[(nodeId, remoteAlertId)]
+
+
+	# internal function that gets the unique id from the database
+	#
+	# return unique id
+	# or None
+	def _getUniqueID(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		# if unique id already cached => return it
+		if not self.globalData.uniqueID is None:
+			return self.globalData.uniqueID
+
+		try:
+			self.globalData.uniqueID = \
+				self.data["internals"]["uniqueID"]["value"]
+		except Exception as e:
+			logger.exception("[%s]: Not able to get the unique id."
+				% self.fileName)
+
+		return self.globalData.uniqueID
+
+
+	# internal function that acquires the lock
+	def _acquireLock(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		logger.debug("[%s]: Acquire lock." % self.fileName)
+		self.dbLock.acquire()
+
+
+	# internal function that releases the lock
+	def _releaseLock(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		# Discard all changes of the caller that were not committed.
+		if self.undoEntries:
+			self._rollback(logger)
+
+		logger.debug("[%s]: Release lock." % self.fileName)
+		self.dbLock.release()
+
+		# Wait until the committed changes are synced to the disk
+		# (if commits are synced in batches).
+		waitForCount = getattr(self.journalLocal, "waitForCount", None)
+		if waitForCount is not None:
+			self.journalLocal.waitForCount = None
+			self._syncJournal(waitForCount, logger)
+
+
+	# Internal function that appends the changes of the current
+	# transaction to the journal (and lets the journal thread compact
+	# the journal if it has grown too large).
+	def _commit(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		if not self.pendingEntries:
+			return
+
+		# Discard the changes if they can not be written to the journal
+		# (the tables always hold the state the journal restores).
+		try:
+			self.journal.write(json.dumps(self.pendingEntries) + "\n")
+			self.journal.flush()
+			if self.journalSync == "commit":
+				with self.journalSyncLock:
+					os.fsync(self.journal.fileno())
+		except Exception as e:
+			logger.exception("[%s]: Not able to write journal."
+				% self.fileName)
+			self._rollback(logger)
+			return
+
+		self.pendingEntries = list()
+		self.undoEntries = list()
+		self.journalTransactions += 1
+		self.journalWrittenCount += 1
+		if self.journalSync == "commit":
+			self.journalSyncedCount = self.journalWrittenCount
+		elif self.journalSync == "batch":
+			self.journalLocal.waitForCount = self.journalWrittenCount
+
+		if (self.journalTransactions >= self.compactLimit
+			and not self.compactRequested):
+			self.compactRequested = True
+			self.journalEvent.set()
+
+
+	# Internal function that discards the changes of the current
+	# transaction that are not committed yet.
+	def _rollback(self, logger=None):
+
+		while self.undoEntries:
+			table, key, oldRow = self.undoEntries.pop()
+			self._applyEntry(table, key, oldRow)
+
+		self.pendingEntries = list()
+
+
+	# Internal function that creates the rows every database has
+	# (they are written with the next snapshot).
+	def _createStorage(self, uniqueID):
+
+		# insert version of server
+		self._setRow("internals", "version", {"value": self.version})
+
+		# insert unique id
+		self._setRow("internals", "uniqueID", {"value": uniqueID})
+
+		# insert option to activate/deactivate alert system
+		# (0 = deactivated, 1 = activated)
+		self._setRow("options", "alertSystemActive", {"value": 0.0})
+
+
+	# Internal function that deletes all manager data corresponding
+	# to the given node id.
+	def _deleteManagerForNodeId(self, nodeId):
+
+		if nodeId in self.managerIdsByNodeId:
+			self._setRow("managers", self.managerIdsByNodeId[nodeId], None)
+
+
+	# Internal function that deletes all alert data corresponding
+	# to the given node id.
+	def _deleteAlertsForNodeId(self, nodeId):
+
+		for alertId in list(self.alertIdsByNodeId.get(nodeId, set())):
+			self._setRow("alerts", alertId, None)
+
+
+	# Internal function that deletes all sensor data (and the sensor
+	# alerts of the sensors) corresponding to the given node id.
+	def _deleteSensorsForNodeId(self, nodeId):
+
+		sensorIds = self.sensorIdsByNodeId.get(nodeId, set())
+		for sensorAlertId, row in self.data["sensorAlerts"].items():
+			if row["sensorId"] in sensorIds:
+				self._setRow("sensorAlerts", sensorAlertId, None)
+
+		for sensorId in list(sensorIds):
+			self._setRow("sensors", sensorId, None)
+
+
+	# Internal function that updates the state (if changeState is set),
+	# the data (if hasLatestData is set) and the time of a sensor without
+	# committing the changes.
+	#
+	# Returns true if everything worked fine.
+	def _updateSensor(self, nodeId, sensorId, state, changeState,
+		hasLatestData, data, logger=None):
+
+		row = self.data["sensors"].get(sensorId)
+		if row is None or row["nodeId"] != nodeId:
+			logger.error("[%s]: Sensor does not exist in "
+				% self.fileName
+				+ "database.")
+			return False
+
+		values = {"lastStateUpdated": int(time.time())}
+		if changeState:
+			values["state"] = state
+		if (hasLatestData
+			and (row["dataType"] == SensorDataType.INT
+			or row["dataType"] == SensorDataType.FLOAT)):
+			values["data"] = data
+
+		self._updateRow("sensors", sensorId, values)
+
+		return True
+
+
+	# Internal function that adds a sensor alert and its data to the
+	# database without committing the changes.
+	#
+	# Returns sensorAlertId or None.
+	def _insertSensorAlert(self, nodeId, sensorId, state, dataJson,
+		changeState, hasLatestData, dataType, sensorData, logger=None):
+
+		if dataType == SensorDataType.NONE:
+			sensorData = None
+		elif (dataType != SensorDataType.INT
+			and dataType != SensorDataType.FLOAT):
+			logger.error("[%s]: Data type not known. Not able to "
+				% self.fileName
+				+ "add sensorAlert.")
+			return None
+
+		if changeState:
+			dbChangeState = 1
+		else:
+			dbChangeState = 0
+		if hasLatestData:
+			dbHasLatestData = 1
+		else:
+			dbHasLatestData = 0
+
+		return self._insertRow("sensorAlerts", {"nodeId": nodeId,
+			"sensorId": sensorId,
+			"state": state,
+			"timeReceived": int(time.time()),
+			"dataJson": dataJson,
+			"changeState": dbChangeState,
+			"hasLatestData": dbHasLatestData,
+			"dataType": dataType,
+			"data": sensorData})
+
+
+	# checks the version of the server and the version in the database
+	# and clears every compatibility issue
+	#
+	# no return value but raise exception if it fails
+	def checkVersionAndClearConflict(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# get version from the current database
+		dbVersion = float(self.data["internals"]["version"]["value"])
+
+		# if the versions are not compatible
+		# => delete old database
+		if dbVersion != self.version:
+
+			logger.info("[%s]: Server version "
+				% self.fileName
+				+ "'%.3f' not compatible "
+				% self.version
+				+ "with database version '%.3f'. "
+				% dbVersion
+				+ "Updating database.")
+
+			# get old uniqueId to keep it
+			uniqueID = self._getUniqueID()
+			if uniqueID is None:
+				uniqueID = self._generateUniqueId()
+
+			# create new database
+			self._clearTables()
+			self._createStorage(uniqueID)
+			self._compact()
+
+			self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+
+	# creates the database (should only be called if the database
+	# does not exist)
+	#
+	# no return value but raise exception if it fails
+	def createStorage(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		uniqueID = self._generateUniqueId()
+		self._createStorage(uniqueID)
+		self._compact()
+
+		self._releaseLock(logger)
+
+
+	# adds a node if it does not exist or changes the registered
+	# values if it does exist
+	#
+	# return True or False
+	def addNode(self, username, hostname, nodeType, instance, version, rev,
+		persistent, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# check if a node with the same username already exists
+		# => if not add node
+		if username not in self.nodeIdsByUsername:
+
+			logger.info("[%s]: Node with username '%s' does not exist "
+				% (self.fileName, username)
+				+ "in database. Adding it.")
+
+			# NOTE: connection state is changed later on
+			# in the registration process
+			self._insertRow("nodes", {"hostname": hostname,
+				"username": username,
+				"nodeType": nodeType,
+				"instance": instance,
+				"connected": 0,
+				"version": version,
+				"rev": rev,
+				"persistent": persistent})
+
+		# if a node with this username exists
+		# => check if everything is the same
+		else:
+
+			logger.info("[%s]: Node with username '%s' already exists "
+				% (self.fileName, username)
+				+ "in database.")
+
+			nodeId = self._getNodeId(username)
+			row = self.data["nodes"][nodeId]
+
+			# change hostname if it had changed
+			if row["hostname"] != hostname:
+
+				logger.info("[%s]: Hostname of node has changed "
+					% self.fileName
+					+ "from '%s' to '%s'. Updating database."
+					% (row["hostname"], hostname))
+
+				self._updateRow("nodes", nodeId, {"hostname": hostname})
+
+			# change instance if it had changed
+			if row["instance"] != instance:
+
+				logger.info("[%s]: Instance of node has changed "
+					% self.fileName
+					+ "from '%s' to '%s'. Updating database."
+					% (row["instance"], instance))
+
+				self._updateRow("nodes", nodeId, {"instance": instance})
+
+			# change version if it had changed
+			if row["version"] != version:
+
+				logger.info("[%s]: Version of node has changed "
+					% self.fileName
+					+ "from '%.3f' to '%.3f'. Updating database."
+					% (row["version"], version))
+
+				self._updateRow("nodes", nodeId, {"version": version})
+
+			# change revision if it had changed
+			if row["rev"] != rev:
+
+				logger.info("[%s]: Revision of node has changed "
+					% self.fileName
+					+ "from '%d' to '%d'. Updating database."
+					% (row["rev"], rev))
+
+				self._updateRow("nodes", nodeId, {"rev": rev})
+
+			# change persistent if it had changed
+			if row["persistent"] != persistent:
+
+				logger.info("[%s]: Persistent flag of node has changed "
+					% self.fileName
+					+ "from '%d' to '%d'. Updating database."
+					% (row["persistent"], persistent))
+
+				self._updateRow("nodes", nodeId, {"persistent": persistent})
+
+			# if node type has changed
+			# => delete sensors/alerts/manager information of old node
+			# and change node type
+			if row["nodeType"] != nodeType:
+
+				logger.info("[%s]: Type of node has changed "
+					% self.fileName
+					+ "from '%s' to '%s'. Updating database."
+					% (row["nodeType"], nodeType))
+
+				# if old node had type "sensor" or "server"
+				# => delete all sensors
+				if (row["nodeType"] == "sensor"
+					or row["nodeType"] == "server"):
+					self._deleteSensorsForNodeId(nodeId)
+
+				# if old node had type "alert"
+				# => delete all alerts
+				elif row["nodeType"] == "alert":
+					self._deleteAlertsForNodeId(nodeId)
+
+				# if old node had type "manager"
+				# => delete all manager information
+				elif row["nodeType"] == "manager":
+					self._deleteManagerForNodeId(nodeId)
+
+				# node type in database not known
+				else:
+
+					logger.error("[%s]: Unknown node type "
+						% self.fileName
+						+ "when deleting old sensors/alerts/manager "
+						+ "information.")
+
+					self._releaseLock(logger)
+
+					return False
+
+				# update node type
+				self._updateRow("nodes", nodeId, {"nodeType": nodeType})
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# adds/updates the data that is given by the node for the sensors
+	# to the database
+	#
+	# return True or False
+	def addSensors(self, username, sensors, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# get the id of the node
+		try:
+			nodeId = self._getNodeId(username)
+		except Exception as e:
+			logger.exception("[%s]: Not able to get node id."
+				% self.fileName)
+
+			self._releaseLock(logger)
+
+			return False
+
+		# add/update all sensors
+		remoteSensorIds = set()
+		for sensor in sensors:
+
+			remoteSensorId = int(sensor["clientSensorId"])
+			remoteSensorIds.add(remoteSensorId)
+
+			# Extract sensor data (field does not exist
+			# if data type is "none").
+			if sensor["dataType"] == SensorDataType.NONE:
+				sensorData = None
+			elif (sensor["dataType"] == SensorDataType.INT
+				or sensor["dataType"] == SensorDataType.FLOAT):
+				sensorData = sensor["data"]
+			else:
+				logger.error("[%s]: Data type not known. Not able to "
+					% self.fileName
+					+ "add sensor.")
+
+				self._releaseLock(logger)
+
+				return False
+
+			# if the sensor does not exist
+			# => add it
+			if (nodeId, remoteSensorId) not in self.sensorIdsByRemoteId:
+
+				logger.info("[%s]: Sensor with client id '%d' does not "
+					% (self.fileName, remoteSensorId)
+					+ "exist in database. Adding it.")
+
+				self._insertRow("sensors", {"nodeId": nodeId,
+					"remoteSensorId": remoteSensorId,
+					"description": sensor["description"],
+					"state": sensor["state"],
+					"lastStateUpdated": int(time.time()),
+					"alertDelay": sensor["alertDelay"],
+					"dataType": sensor["dataType"],
+					"data": sensorData,
+					"alertLevels": sorted(set(sensor["alertLevels"]))})
+
+			# if the sensor does already exist
+			# => check if everything is the same
+			else:
+
+				logger.info("[%s]: Sensor with client id '%d' already "
+					% (self.fileName, remoteSensorId)
+					+ "exists in database.")
+
+				sensorId = self._getSensorId(nodeId, remoteSensorId)
+				row = self.data["sensors"][sensorId]
+
+				# change description if it had changed
+				if row["description"] != str(sensor["description"]):
+
+					logger.info("[%s]: Description of sensor has changed "
+						% self.fileName
+						+ "from '%s' to '%s'. Updating database."
+						% (row["description"], str(sensor["description"])))
+
+					self._updateRow("sensors", sensorId,
+						{"description": str(sensor["description"])})
+
+				# change alert delay if it had changed
+				if row["alertDelay"] != int(sensor["alertDelay"]):
+
+					logger.info("[%s]: Alert delay of sensor has changed "
+						% self.fileName
+						+ "from '%d' to '%d'. Updating database."
+						% (row["alertDelay"], int(sensor["alertDelay"])))
+
+					self._updateRow("sensors", sensorId,
+						{"alertDelay": int(sensor["alertDelay"])})
+
+				# Change data type if it had changed (and replace
+				# old data).
+				if row["dataType"] != sensor["dataType"]:
+
+					logger.info("[%s]: Data type of sensor has changed "
+						% self.fileName
+						+ "from '%d' to '%d'. Updating database."
+						% (row["dataType"], sensor["dataType"]))
+
+					self._updateRow("sensors", sensorId,
+						{"dataType": int(sensor["dataType"]),
+						"data": sensorData})
+
+				# add alert levels that do not exist in the database
+				# and delete alert levels that do not exist anymore
+				# for the sensor
+				for alertLevel in sensor["alertLevels"]:
+					if alertLevel not in row["alertLevels"]:
+						logger.info("[%s]: Alert level '%d' of sensor does "
+							% (self.fileName, alertLevel)
+							+ "not exist in database. Adding it.")
+
+				for dbAlertLevel in row["alertLevels"]:
+					if dbAlertLevel not in sensor["alertLevels"]:
+						logger.info("[%s]: Alert level '%d' in database does "
+							% (self.fileName, dbAlertLevel)
+							+ "not exist anymore for sensor. Deleting it.")
+
+				alertLevels = sorted(set(sensor["alertLevels"]))
+				if alertLevels != row["alertLevels"]:
+					self._updateRow("sensors", sensorId,
+						{"alertLevels": alertLevels})
+
+		# check if the sensors from the database
+		# do still exist for the node
+		# => delete sensor if it does not
+		for sensorId in sorted(self.sensorIdsByNodeId.get(nodeId, set())):
+
+			row = self.data["sensors"][sensorId]
+			if row["remoteSensorId"] in remoteSensorIds:
+				continue
+
+			logger.info("[%s]: Sensor with client id '%d' in database "
+				% (self.fileName, row["remoteSensorId"])
+				+ "does not exist anymore for the node. Deleting it.")
+
+			self._setRow("sensors", sensorId, None)
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# adds/updates the data that is given by the node for the alerts
+	# to the database
+	#
+	# return True or False
+	def addAlerts(self, username, alerts, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# get the id of the node
+		try:
+			nodeId = self._getNodeId(username)
+		except Exception as e:
+			logger.exception("[%s]: Not able to get node id."
+				% self.fileName)
+
+			self._releaseLock(logger)
+
+			return False
+
+		# add/update all alerts
+		remoteAlertIds = set()
+		for alert in alerts:
+
+			remoteAlertId = int(alert["clientAlertId"])
+			remoteAlertIds.add(remoteAlertId)
+
+			# if the alert does not exist
+			# => add it
+			if (nodeId, remoteAlertId) not in self.alertIdsByRemoteId:
+
+				logger.info("[%s]: Alert with client id '%d' does not "
+					% (self.fileName, remoteAlertId)
+					+ "exist in database. Adding it.")
+
+				self._insertRow("alerts", {"nodeId": nodeId,
+					"remoteAlertId": remoteAlertId,
+					"description": str(alert["description"]),
+					"alertLevels": sorted(set(alert["alertLevels"]))})
+
+			# if the alert does already exist
+			# => check if everything is the same
+			else:
+
+				logger.info("[%s]: Alert with client id '%d' already "
+					% (self.fileName, remoteAlertId)
+					+ "exists in database.")
+
+				alertId = self._getAlertId(nodeId, remoteAlertId)
+				row = self.data["alerts"][alertId]
+
+				# change description if it had changed
+				if row["description"] != str(alert["description"]):
+
+					logger.info("[%s]: Description of alert has changed "
+						% self.fileName
+						+ "from '%s' to '%s'. Updating database."
+						% (row["description"], str(alert["description"])))
+
+					self._updateRow("alerts", alertId,
+						{"description": str(alert["description"])})
+
+				# add alert levels that do not exist in the database
+				# and delete alert levels that do not exist anymore
+				# for the alert
+				for alertLevel in alert["alertLevels"]:
+					if alertLevel not in row["alertLevels"]:
+						logger.info("[%s]: Alert level '%d' of alert does "
+							% (self.fileName, alertLevel)
+							+ "not exist in database. Adding it.")
+
+				for dbAlertLevel in row["alertLevels"]:
+					if dbAlertLevel not in alert["alertLevels"]:
+						logger.info("[%s]: Alert level '%d' in database does "
+							% (self.fileName, dbAlertLevel)
+							+ "not exist anymore for alert. Deleting it.")
+
+				alertLevels = sorted(set(alert["alertLevels"]))
+				if alertLevels != row["alertLevels"]:
+					self._updateRow("alerts", alertId,
+						{"alertLevels": alertLevels})
+
+		# check if the alerts from the database
+		# do still exist for the node
+		# => delete alert if it does not
+		for alertId in sorted(self.alertIdsByNodeId.get(nodeId, set())):
+
+			row = self.data["alerts"][alertId]
+			if row["remoteAlertId"] in remoteAlertIds:
+				continue
+
+			logger.info("[%s]: Alert with client id '%d' in database "
+				% (self.fileName, row["remoteAlertId"])
+				+ "does not exist anymore for the node. Deleting it.")
+
+			self._setRow("alerts", alertId, None)
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# adds/updates the data that is given by the node for
+	# the manager to the database
+	#
+	# return True or False
+	def addManager(self, username, manager, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# get the id of the node
+		try:
+			nodeId = self._getNodeId(username)
+		except Exception as e:
+			logger.exception("[%s]: Not able to get node id."
+				% self.fileName)
+
+			self._releaseLock(logger)
+
+			return False
+
+		# if the manager does not exist
+		# => add it
+		if nodeId not in self.managerIdsByNodeId:
+
+			logger.info("[%s]: Manager does not exist "
+				% self.fileName
+				+ "in database. Adding it.")
+
+			self._insertRow("managers", {"nodeId": nodeId,
+				"description": str(manager["description"])})
+
+		# if the manager does already exist
+		# => check if everything is the same
+		else:
+
+			logger.info("[%s]: Manager already exists "
+				% self.fileName
+				+ "in database.")
+
+			managerId = self.managerIdsByNodeId[nodeId]
+			row = self.data["managers"][managerId]
+
+			# change description if it had changed
+			if row["description"] != str(manager["description"]):
+
+				logger.info("[%s]: Description of manager has changed "
+					% self.fileName
+					+ "from '%s' to '%s'. Updating database."
+					% (row["description"], str(manager["description"])))
+
+				self._updateRow("managers", managerId,
+					{"description": str(manager["description"])})
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# gets the id of the node by a given username
+	# (usernames are unique to each node)
+	#
+	# return nodeId or None
+	def getNodeId(self, username, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		nodeId = None
+		try:
+			nodeId = self._getNodeId(username)
+		except Exception as e:
+			logger.exception("[%s]: Not able to get node id."
+				% self.fileName)
+
+		self._releaseLock(logger)
+
+		return nodeId
+
+
+	# Gets the ids of all nodes
+	#
+	# return list of nodeIds
+	def getNodeIds(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		nodeIds = sorted(self.data["nodes"].keys())
+
+		self._releaseLock(logger)
+
+		return nodeIds
+
+
+	# gets the count of the sensors of a node in the database
+	#
+	# return count of sensors or None
+	def getSensorCount(self, nodeId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		sensorCount = len(self.sensorIdsByNodeId.get(nodeId, set()))
+
+		self._releaseLock(logger)
+
+		return sensorCount
+
+
+	# gets all data needed for the survey
+	#
+	# return list of tuples of (instance, version, rev)
+	# or None
+	def getSurveyData(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		surveyData = list()
+		for nodeId in sorted(self.data["nodes"].keys()):
+			row = self.data["nodes"][nodeId]
+			surveyData.append((row["instance"], row["version"], row["rev"]))
+
+		self._releaseLock(logger)
+
+		return surveyData
+
+
+	# gets the unique id from the database
+	#
+	# return unique id
+	# or None
+	def getUniqueID(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		uniqueID = self._getUniqueID()
+
+		self._releaseLock(logger)
+
+		return uniqueID
+
+
+	# updates the states of the sensors of a node in the database
+	# (given in a tuple of (remoteSensorId, state))
+	#
+	# return True or False
+	def updateSensorState(self, nodeId, stateList, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# stateList is a list of tuples of (remoteSensorId, state)
+		utcTimestamp = int(time.time())
+		for stateTuple in stateList:
+
+			# check if the sensor does exist in the database
+			try:
+				sensorId = self._getSensorId(nodeId, stateTuple[0])
+			except Exception as e:
+				logger.error("[%s]: Sensor does not exist in "
+					% self.fileName
+					+ "database.")
+
+				self._releaseLock(logger)
+
+				return False
+
+			self._updateRow("sensors", sensorId, {"state": stateTuple[1],
+				"lastStateUpdated": utcTimestamp})
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# updates the data of the sensors of a node in the database
+	# (given in a tuple of (remoteSensorId, data))
+	#
+	# return True or False
+	def updateSensorData(self, nodeId, dataList, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# dataList is a list of tuples of (remoteSensorId, data)
+		for dataTuple in dataList:
+
+			# check if the sensor does exist in the database
+			try:
+				sensorId = self._getSensorId(nodeId, dataTuple[0])
+			except Exception as e:
+				logger.error("[%s]: Sensor does not exist in "
+					% self.fileName
+					+ "database.")
+
+				self._releaseLock(logger)
+
+				return False
+
+			dataType = self.data["sensors"][sensorId]["dataType"]
+
+			if dataType == SensorDataType.NONE:
+				logger.error("[%s]: Sensor with remote id %d holds "
+					% (self.fileName, dataTuple[0])
+					+ "no data. Ignoring it.")
+
+			elif (dataType == SensorDataType.INT
+				or dataType == SensorDataType.FLOAT):
+				self._updateRow("sensors", sensorId, {"data": dataTuple[1]})
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# Updates the time the sensor send an update given by sensorId.
+	#
+	# return True or False
+	def updateSensorTime(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if sensorId in self.data["sensors"]:
+			self._updateRow("sensors", sensorId,
+				{"lastStateUpdated": int(time.time())})
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# Stores a received sensor alert in one transaction: updates the state
+	# (if changeState is set), the data (if hasLatestData is set) and the
+	# time of the sensor and adds the sensor alert to the database
+	# (if storeSensorAlert is set).
+	#
+	# return sensorAlertId (True if the sensor alert is not stored) or None
+	def ingestSensorAlert(self, nodeId, sensorId, state, dataJson,
+		changeState, hasLatestData, dataType, sensorData, storeSensorAlert,
+		logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if not self._updateSensor(nodeId, sensorId, state, changeState,
+			hasLatestData, sensorData, logger):
+			self._rollback(logger)
+			self._releaseLock(logger)
+			return None
+
+		sensorAlertId = True
+		if storeSensorAlert:
+			sensorAlertId = self._insertSensorAlert(nodeId, sensorId, state,
+				dataJson, changeState, hasLatestData, dataType, sensorData,
+				logger)
+			if sensorAlertId is None:
+				self._rollback(logger)
+				self._releaseLock(logger)
+				return None
+
+		# commit all changes at once
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return sensorAlertId
+
+
+	# Stores a received state change in one transaction: updates the state,
+	# the data (if the sensor holds data) and the time of the sensor.
+	#
+	# return True or False
+	def ingestStateChange(self, nodeId, sensorId, state, sensorData,
+		logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if not self._updateSensor(nodeId, sensorId, state, True, True,
+			sensorData, logger):
+			self._rollback(logger)
+			self._releaseLock(logger)
+			return False
+
+		# commit all changes at once
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# gets the sensor id of a sensor when the id of a node is given
+	# and the remote sensor id that is used by the node internally
+	#
+	# return sensorId or None
+	def getSensorId(self, nodeId, remoteSensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		try:
+			sensorId = self._getSensorId(nodeId, remoteSensorId)
+		except Exception as e:
+			logger.exception("[%s]: Not able to get sensorId from "
+				% self.fileName
+				+ "database.")
+
+			self._releaseLock(logger)
+
+			return None
+
+		self._releaseLock(logger)
+
+		return sensorId
+
+
+	# gets the alert id of an alert when the id of a node is given
+	# and the remote alert id that is used by the node internally
+	#
+	# return alertId or None
+	def getAlertId(self, nodeId, remoteAlertId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		try:
+			alertId = self._getAlertId(nodeId, remoteAlertId)
+		except Exception as e:
+			logger.exception("[%s]: Not able to get alertId from "
+				% self.fileName
+				+ "database.")
+
+			self._releaseLock(logger)
+
+			return None
+
+		self._releaseLock(logger)
+
+		return alertId
+
+
+	# gets all alert levels for a specific sensor given by sensorId
+	#
+	# return list of alertLevel
+	# or None
+	def getSensorAlertLevels(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		result = list()
+		if sensorId in self.data["sensors"]:
+			result = list(self.data["sensors"][sensorId]["alertLevels"])
+
+		self._releaseLock(logger)
+
+		# return list of alertLevel
+		return result
+
+
+	# gets all alert levels for a specific alert given by alertId
+	#
+	# return list of alertLevels
+	# or None
+	def getAlertAlertLevels(self, alertId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		result = list()
+		if alertId in self.data["alerts"]:
+			result = list(self.data["alerts"][alertId]["alertLevels"])
+
+		self._releaseLock(logger)
+
+		# return list of alertLevels
+		return result
+
+
+	# adds a sensor alert to the database when the id of a node is given,
+	# the id of the sensor that is used internally by the node and the state
+	#
+	# return sensorAlertId or None
+	def addSensorAlert(self, nodeId, sensorId, state, dataJson, changeState,
+		hasLatestData, dataType, sensorData, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# add sensor alert to database
+		sensorAlertId = self._insertSensorAlert(nodeId, sensorId, state,
+			dataJson, changeState, hasLatestData, dataType, sensorData,
+			logger)
+		if sensorAlertId is None:
+			self._releaseLock(logger)
+			return None
+
+		# commit all changes
+		self._commit(logger)
+
+		self._releaseLock(logger)
+
+		return sensorAlertId
+
+
+	# gets all sensor alerts in the database
+	#
+	# return a list of sensorAlert objects
+	# or None
+	def getSensorAlerts(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		returnList = list()
+		for sensorAlertId in sorted(self.data["sensorAlerts"].keys()):
+			row = self.data["sensorAlerts"][sensorAlertId]
+
+			# Only sensor alerts of existing sensors are returned.
+			sensorRow = self.data["sensors"].get(row["sensorId"])
+			if sensorRow is None or sensorRow["nodeId"] != row["nodeId"]:
+				continue
+
+			sensorAlert = SensorAlert()
+			sensorAlert.sensorAlertId = sensorAlertId
+			sensorAlert.sensorId = row["sensorId"]
+			sensorAlert.nodeId = row["nodeId"]
+			sensorAlert.timeReceived = row["timeReceived"]
+			sensorAlert.alertDelay = sensorRow["alertDelay"]
+			sensorAlert.state = row["state"]
+			sensorAlert.description = sensorRow["description"]
+			sensorAlert.changeState = (row["changeState"] == 1)
+			sensorAlert.hasLatestData = (row["hasLatestData"] == 1)
+			sensorAlert.dataType = row["dataType"]
+			sensorAlert.sensorData = row["data"]
+			sensorAlert.alertLevels = list(sensorRow["alertLevels"])
+			sensorAlert.rulesActivated = False
+
+			# Set optional data for sensor alert.
+			sensorAlert.hasOptionalData = False
+			sensorAlert.optionalData = None
+			if row["dataJson"] != "":
+				try:
+					sensorAlert.optionalData = json.loads(row["dataJson"])
+					sensorAlert.hasOptionalData = True
+				except Exception as e:
+					self.logger.exception("[%s]: Optional data from "
+						% self.fileName
+						+ "database not a valid json string. "
+						+ "Ignoring data.")
+
+			returnList.append(sensorAlert)
+
+		self._releaseLock(logger)
+
+		# return a list of sensorAlert objects
+		return returnList
+
+
+	# Deletes a sensor alert given by its sensor alert id.
+	#
+	# return True or False
+	def deleteSensorAlert(self, sensorAlertId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if sensorAlertId in self.data["sensorAlerts"]:
+			self._setRow("sensorAlerts", sensorAlertId, None)
+
+		# commit all changes
+		self._commit(logger)
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# Deletes a node given by its node id.
+	#
+	# return True or False
+	def deleteNode(self, nodeId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		row = self.data["nodes"].get(nodeId)
+		if row is None:
+			logger.error("[%s]: Not able to get node with id %d."
+				% (self.fileName, nodeId))
+
+			self._releaseLock(logger)
+
+			return False
+
+		# Delete all corresponding alert entries from database.
+		if row["nodeType"] == "alert":
+			self._deleteAlertsForNodeId(nodeId)
+
+		# Delete all corresponding manager entries from database.
+		elif row["nodeType"] == "manager":
+			self._deleteManagerForNodeId(nodeId)
+
+		# Delete all corresponding sensor entries from database.
+		elif row["nodeType"] == "sensor":
+			self._deleteSensorsForNodeId(nodeId)
+
+		# Return if we do not know how to handle the node.
+		else:
+			logger.error("[%s]: Unknown node type '%s' for node "
+				% (self.fileName, row["nodeType"])
+				+ "with id %d."
+				% nodeId)
+
+			self._releaseLock(logger)
+
+			return False
+
+		# Delete node from database.
+		self._setRow("nodes", nodeId, None)
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# checks if the alert system is active or not
+	#
+	# return True or False
+	def isAlertSystemActive(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		alertSystemActive = \
+			self.data["options"]["alertSystemActive"]["value"]
+
+		self._releaseLock(logger)
+
+		return (alertSystemActive == 1)
+
+
+	# gets all alert levels for the alert clients from the database
+	#
+	# return list alertLevels as integer
+	# or None
+	def getAllAlertsAlertLevels(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		alertLevels = list()
+		for row in self.data["alerts"].itervalues():
+			alertLevels.extend(row["alertLevels"])
+
+		self._releaseLock(logger)
+
+		# return list alertLevels as integer
+		return alertLevels
+
+
+	# gets all alert levels for the sensors from the database
+	#
+	# return list alertLevels as integer
+	# or None
+	def getAllSensorsAlertLevels(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		alertLevels = list()
+		for row in self.data["sensors"].itervalues():
+			alertLevels.extend(row["alertLevels"])
+
+		self._releaseLock(logger)
+
+		# return list alertLevels as integer
+		return alertLevels
+
+
+	# gets all nodes from the database that are connected to the server
+	#
+	# return list of nodeIds
+	# or None
+	def getAllConnectedNodeIds(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		nodeIds = list()
+		for nodeId in sorted(self.data["nodes"].keys()):
+			if self.data["nodes"][nodeId]["connected"] == 1:
+				nodeIds.append(nodeId)
+
+		self._releaseLock(logger)
+
+		# return list of nodeIds
+		return nodeIds
+
+
+	# Gets all nodes from the database that are registered as persistent
+	# to the server.
+	#
+	# return list of nodeIds
+	# or None
+	def getAllPersistentNodeIds(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		nodeIds = list()
+		for nodeId in sorted(self.data["nodes"].keys()):
+			if self.data["nodes"][nodeId]["persistent"] == 1:
+				nodeIds.append(nodeId)
+
+		self._releaseLock(logger)
+
+		# return list of nodeIds
+		return nodeIds
+
+
+	# marks a node given by its id as NOT connected
+	#
+	# return True or False
+	def markNodeAsNotConnected(self, nodeId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if nodeId in self.data["nodes"]:
+			self._updateRow("nodes", nodeId, {"connected": 0})
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# marks a node given by its id as connected
+	#
+	# return True or False
+	def markNodeAsConnected(self, nodeId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if nodeId in self.data["nodes"]:
+			self._updateRow("nodes", nodeId, {"connected": 1})
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# gets the information of all sensors which last state updates
+	# are older than the given time
+	#
+	# return list of sensor objects
+	# or None
+	def getSensorsUpdatedOlderThan(self, oldestTimeUpdated, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		sensorList = list()
+		for sensorId in sorted(self.data["sensors"].keys()):
+			row = self.data["sensors"][sensorId]
+			if row["lastStateUpdated"] < oldestTimeUpdated:
+				sensorList.append(self._convertSensorRowToObj(sensorId,
+					row))
+
+		self._releaseLock(logger)
+
+		# return list of sensor objects
+		return sensorList
+
+
+	# gets the alert from the database when its id is given
+	#
+	# return an alert object or None
+	def getAlertById(self, alertId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		result = None
+		if alertId in self.data["alerts"]:
+			result = self._convertAlertRowToObj(alertId,
+				self.data["alerts"][alertId])
+
+		self._releaseLock(logger)
+
+		# return an alert object or None
+		return result
+
+
+	# gets the manager from the database when its id is given
+	#
+	# return a manager object or None
+	def getManagerById(self, managerId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		result = None
+		if managerId in self.data["managers"]:
+			result = self._convertManagerRowToObj(managerId,
+				self.data["managers"][managerId])
+
+		self._releaseLock(logger)
+
+		# return a manager object or None
+		return result
+
+
+	# gets the node from the database when its id is given
+	#
+	# return a node object or None
+	def getNodeById(self, nodeId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		result = None
+		if nodeId in self.data["nodes"]:
+			result = self._convertNodeRowToObj(nodeId,
+				self.data["nodes"][nodeId])
+
+		self._releaseLock(logger)
+
+		# return a node object or None
+		return result
+
+
+	# gets the sensor from the database when its id is given
+	#
+	# return a sensor object or None
+	def getSensorById(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		result = None
+		if sensorId in self.data["sensors"]:
+			result = self._convertSensorRowToObj(sensorId,
+				self.data["sensors"][sensorId])
+
+		self._releaseLock(logger)
+
+		# return a sensor object or None
+		return result
+
+
+	# Gets all nodes from the database.
+	#
+	# return a list of node objects or None
+	def getNodes(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		nodes = list()
+		for nodeId in sorted(self.data["nodes"].keys()):
+			nodes.append(self._convertNodeRowToObj(nodeId,
+				self.data["nodes"][nodeId]))
+
+		self._releaseLock(logger)
+
+		# list(node objects)
+		return nodes
+
+
+	# gets all information that the server has at the current moment
+	#
+	# return a list of
+	# list[0] = list(option objects)
+	# list[1] = list(node objects)
+	# list[2] = list(sensor objects)
+	# list[3] = list(manager objects)
+	# list[4] = list(alert objects)
+	# or None
+	def getAlertSystemInformation(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# Get all options.
+		optionList = list()
+		for optionType, row in self.data["options"].iteritems():
+			optionObj = Option()
+			optionObj.type = optionType
+			optionObj.value = row["value"]
+			optionList.append(optionObj)
+
+		# Get all nodes.
+		nodeList = list()
+		for nodeId in sorted(self.data["nodes"].keys()):
+			nodeList.append(self._convertNodeRowToObj(nodeId,
+				self.data["nodes"][nodeId]))
+
+		# Get all sensors.
+		sensorList = list()
+		for sensorId in sorted(self.data["sensors"].keys()):
+			sensorList.append(self._convertSensorRowToObj(sensorId,
+				self.data["sensors"][sensorId]))
+
+		# Get all managers.
+		managerList = list()
+		for managerId in sorted(self.data["managers"].keys()):
+			managerList.append(self._convertManagerRowToObj(managerId,
+				self.data["managers"][managerId]))
+
+		# Get all alerts.
+		alertList = list()
+		for alertId in sorted(self.data["alerts"].keys()):
+			alertList.append(self._convertAlertRowToObj(alertId,
+				self.data["alerts"][alertId]))
+
+		self._releaseLock(logger)
+
+		# Generate a list with system information.
+		alertSystemInformation = list()
+		alertSystemInformation.append(optionList)
+		alertSystemInformation.append(nodeList)
+		alertSystemInformation.append(sensorList)
+		alertSystemInformation.append(managerList)
+		alertSystemInformation.append(alertList)
+
+		# return a list of
+		# list[0] = list(option objects)
+		# list[1] = list(node objects)
+		# list[2] = list(sensor objects)
+		# list[3] = list(manager objects)
+		# list[4] = list(alert objects)
+		return alertSystemInformation
+
+
+	# Gets the version of the alert system information (it is increased
+	# each time options, nodes, sensors, managers or alerts change).
+	#
+	# return version number
+	def getStatusVersion(self, logger=None):
+		return self.statusVersion
+
+
+	# change a option in the database
+	#
+	# return True or False
+	def changeOption(self, optionType, optionValue, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		# check if option does exist
+		if optionType not in self.data["options"]:
+			logger.error("[%s]: Option was not found."
+				% self.fileName)
+
+			self._releaseLock(logger)
+
+			return False
+
+		self._setRow("options", optionType, {"value": float(optionValue)})
+
+		# commit all changes
+		self._commit(logger)
+
+		self.statusVersion += 1
+
+		self._releaseLock(logger)
+
+		return True
+
+
+	# gets the state of a sensor given by id
+	#
+	# return sensor state or None
+	def getSensorState(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if sensorId not in self.data["sensors"]:
+			logger.error("[%s]: Sensor was not found."
+				% self.fileName)
+
+			self._releaseLock(logger)
+
+			return None
+
+		state = self.data["sensors"][sensorId]["state"]
+
+		self._releaseLock(logger)
+
+		return state
+
+
+	# Gets the data of a sensor given by id.
+	#
+	# return a sensor data object or None
+	def getSensorData(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		self._acquireLock(logger)
+
+		if sensorId not in self.data["sensors"]:
+			logger.error("[%s]: Sensor was not found."
+				% self.fileName)
+
+			self._releaseLock(logger)
+
+			return None
+
+		row = self.data["sensors"][sensorId]
+
+		data = SensorData()
+		data.sensorId = sensorId
+		data.dataType = row["dataType"]
+		data.data = row["data"]
+
+		self._releaseLock(logger)
+
+		# return a sensor data object or None
+		return data
+
+
+	# closes db for usage
+	#
+	# no return value
+	def close(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		# Stop the journal thread (it needs the lock to compact).
+		if self.journalThread is not None:
+			self.journalExitFlag = True
+			self.journalEvent.set()
+			self.journalThread.join()
+			self.journalThread = None
+
+		self._acquireLock(logger)
+
+		# Write a snapshot to make the next start fast.
+		try:
+			self._compact()
+		except Exception as e:
+			logger.exception("[%s]: Not able to write snapshot."
+				% self.fileName)
+
+		self.journal.close()
+
+		self._releaseLock(logger)
+
+
+# This class wraps a storage backend and measures the time of each call
+# to it (the time is added to the metrics of the server).
+class TimedStorage:
+
+	def __init__(self, backend, metrics):
+		self.backend = backend
+		self.metrics = metrics
+
+
+	# Internal function that returns a function that calls the given
+	# function of the storage backend and measures its time.
+	def _getTimedFunction(self, name, function):
+		labels = (("method", name),)
+		def timedFunction(*args, **kwargs):
+			startTime = time.time()
+			try:
+				return function(*args, **kwargs)
+			finally:
+				self.metrics.observe("alertr_storage_call_seconds",
+					time.time() - startTime, labels)
+		return timedFunction
+
+
+	def __getattr__(self, name):
+		attribute = getattr(self.backend, name)
+		if name.startswith("_") or not callable(attribute):
+			return attribute
+
+		# Keep the wrapped function to not create it on each call.
+		timedFunction = self._getTimedFunction(name, attribute)
+		setattr(self, name, timedFunction)
+		return timedFunction
+
+
+# This class wraps a storage backend and holds the nodes, sensors, alerts,
+# managers (with their alert levels) and options in memory. Reads are
+# served from memory and writes are passed through to the storage backend
+# (and applied to the cached data afterwards).
+class CachedStorage(_Storage):
+
+	def __init__(self, backend, globalData):
+
+		# file nme of this file (used for logging)
+		self.fileName = os.path.basename(__file__)
+
+		self.globalData = globalData
+		self.logger = self.globalData.logger
+
+		# Storage backend that holds the persistent data.
+		self.backend = backend
+
+		# Lock that protects the cached data.
+		self.cacheLock = threading.Lock()
+
+		# Flag that indicates if the cached data is valid
+		# (it is reloaded from the storage backend if not).
+		self.cacheValid = False
+
+		# Writes that are executed by the storage backend at the moment
+		# (key: key of the written data, value: number of writes) and
+		# the keys that were written by more than one write at the
+		# same time (the order of these writes is not known).
+		self.pendingWrites = dict()
+		self.conflictingWrites = set()
+
+		# Cached data (indexed by the ids).
+		self.options = dict()
+		self.nodes = dict()
+		self.sensors = dict()
+		self.alerts = dict()
+		self.managers = dict()
+
+		# Indexes of the cached data
+		# (key: username, value: node id;
+		# key: tuple of (nodeId, remoteSensorId), value: sensor id;
+		# key: tuple of (nodeId, remoteAlertId), value: alert id).
+		self.nodeIdsByUsername = dict()
+		self.sensorIdsByRemoteId = dict()
+		self.alertIdsByRemoteId = dict()
+
+
+	# Internal function that returns a copy of a cached object
+	# (callers should not be able to change the cached data).
+	def _copyObj(self, obj):
+		newObj = copy.copy(obj)
+		if hasattr(obj, "alertLevels") and obj.alertLevels is not None:
+			newObj.alertLevels = list(obj.alertLevels)
+		return newObj
+
+
+	# Internal function that loads the data from the storage backend
+	# if the cached data is not valid. The cache lock has to be held.
+	#
+	# return True or False
+	def _loadCache(self, logger):
+
+		if self.cacheValid:
+			return True
+
+		logger.debug("[%s]: Loading storage cache." % self.fileName)
+
+		alertSystemInformation = self.backend.getAlertSystemInformation(
+			logger)
+		if alertSystemInformation is None:
+			logger.error("[%s]: Not able to load storage cache."
+				% self.fileName)
+			return False
+
+		self.options = dict()
+		for optionObj in alertSystemInformation[0]:
+			self.options[optionObj.type] = optionObj
+
+		self.nodes = dict()
+		self.nodeIdsByUsername = dict()
+		for nodeObj in alertSystemInformation[1]:
+			self.nodes[nodeObj.id] = nodeObj
+			self.nodeIdsByUsername[nodeObj.username] = nodeObj.id
+
+		self.sensors = dict()
+		self.sensorIdsByRemoteId = dict()
+		for sensorObj in alertSystemInformation[2]:
+			self.sensors[sensorObj.sensorId] = sensorObj
+			self.sensorIdsByRemoteId[(sensorObj.nodeId,
+				sensorObj.remoteSensorId)] = sensorObj.sensorId
+
+		self.managers = dict()
+		for managerObj in alertSystemInformation[3]:
+			self.managers[managerObj.managerId] = managerObj
+
+		self.alerts = dict()
+		self.alertIdsByRemoteId = dict()
+		for alertObj in alertSystemInformation[4]:
+			self.alerts[alertObj.alertId] = alertObj
+			self.alertIdsByRemoteId[(alertObj.nodeId,
+				alertObj.remoteAlertId)] = alertObj.alertId
+
+		self.cacheValid = True
+
+		return True
+
+
+	# Invalidates the cached data (it is reloaded from the storage
+	# backend on the next access).
+	#
+	# no return value
+	def invalidateCache(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		logger.debug("[%s]: Invalidating storage cache." % self.fileName)
+
+		with self.cacheLock:
+			self.cacheValid = False
+
+
+	# Internal function that executes a write of the storage backend
+	# without holding the cache lock and applies its result to the cached
+	# data afterwards (the apply function returns False if the cached
+	# data can not be updated). If other writes of the same key were
+	# executed at the same time, the cached data is reloaded instead
+	# (the order in which the storage backend executed them is not known).
+	#
+	# return result of the write function
+	def _write(self, writeKey, writeFunction, applyFunction):
+
+		with self.cacheLock:
+			writeCount = self.pendingWrites.get(writeKey, 0)
+			if writeCount > 0:
+				self.conflictingWrites.add(writeKey)
+			self.pendingWrites[writeKey] = writeCount + 1
+
+		try:
+			result = writeFunction()
+		except:
+			with self.cacheLock:
+				self._finishWrite(writeKey)
+				self.cacheValid = False
+			raise
+
+		with self.cacheLock:
+			if (not self._finishWrite(writeKey)
+				or not self.cacheValid
+				or not applyFunction(result)):
+				self.cacheValid = False
+
+		return result
+
+
+	# Internal function that marks a write of the given key as finished.
+	# The cache lock has to be held.
+	#
+	# return False if the write conflicted with other writes
+	def _finishWrite(self, writeKey):
+
+		conflict = writeKey in self.conflictingWrites
+
+		writeCount = self.pendingWrites[writeKey] - 1
+		if writeCount == 0:
+			del self.pendingWrites[writeKey]
+			self.conflictingWrites.discard(writeKey)
+		else:
+			self.pendingWrites[writeKey] = writeCount
+
+		return not conflict
+
+
+	def createStorage(self, logger=None):
+		self.backend.createStorage(logger)
+		self.invalidateCache(logger)
+
+
+	def checkVersionAndClearConflict(self, logger=None):
+		self.backend.checkVersionAndClearConflict(logger)
+		self.invalidateCache(logger)
+
+
+	def addNode(self, username, hostname, nodeType, instance, version, rev,
+		persistent, logger=None):
+		result = self.backend.addNode(username, hostname, nodeType,
+			instance, version, rev, persistent, logger)
+		with self.cacheLock:
+			self.cacheValid = False
+		return result
+
+
+	def addSensors(self, username, sensors, logger=None):
+		result = self.backend.addSensors(username, sensors, logger)
+		with self.cacheLock:
+			self.cacheValid = False
+		return result
+
+
+	def addAlerts(self, username, alerts, logger=None):
+		result = self.backend.addAlerts(username, alerts, logger)
+		with self.cacheLock:
+			self.cacheValid = False
+		return result
+
+
+	def addManager(self, username, manager, logger=None):
+		result = self.backend.addManager(username, manager, logger)
+		with self.cacheLock:
+			self.cacheValid = False
+		return result
+
+
+	def deleteNode(self, nodeId, logger=None):
+		result = self.backend.deleteNode(nodeId, logger)
+		with self.cacheLock:
+			self.cacheValid = False
+		return result
+
+
+	def addSensorAlert(self, nodeId, sensorId, state, dataJson, changeState,
+		hasLatestData, dataType, sensorData, logger=None):
+		return self.backend.addSensorAlert(nodeId, sensorId, state,
+			dataJson, changeState, hasLatestData, dataType, sensorData,
+			logger)
+
+
+	def getSensorAlerts(self, logger=None):
+		return self.backend.getSensorAlerts(logger)
+
+
+	def deleteSensorAlert(self, sensorAlertId, logger=None):
+		return self.backend.deleteSensorAlert(sensorAlertId, logger)
+
+
+	def getSurveyData(self, logger=None):
+		return self.backend.getSurveyData(logger)
+
+
+	def getUniqueID(self, logger=None):
+		return self.backend.getUniqueID(logger)
+
+
+	def getStatusVersion(self, logger=None):
+		return self.backend.getStatusVersion(logger)
+
+
+	def getNodeId(self, username, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if (self._loadCache(logger)
+				and username in self.nodeIdsByUsername):
+				return self.nodeIdsByUsername[username]
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getNodeId(username, logger)
+
+
+	def getNodeIds(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				return self.nodes.keys()
+
+		return self.backend.getNodeIds(logger)
+
+
+	def getSensorCount(self, nodeId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				sensorCount = 0
+				for sensorObj in self.sensors.values():
+					if sensorObj.nodeId == nodeId:
+						sensorCount += 1
+				return sensorCount
+
+		return self.backend.getSensorCount(nodeId, logger)
+
+
+	def getSensorId(self, nodeId, remoteSensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if (self._loadCache(logger)
+				and (nodeId, remoteSensorId) in self.sensorIdsByRemoteId):
+				return self.sensorIdsByRemoteId[(nodeId, remoteSensorId)]
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getSensorId(nodeId, remoteSensorId, logger)
+
+
+	def getAlertId(self, nodeId, remoteAlertId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if (self._loadCache(logger)
+				and (nodeId, remoteAlertId) in self.alertIdsByRemoteId):
+				return self.alertIdsByRemoteId[(nodeId, remoteAlertId)]
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getAlertId(nodeId, remoteAlertId, logger)
+
+
+	def getSensorAlertLevels(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger) and sensorId in self.sensors:
+				return list(self.sensors[sensorId].alertLevels)
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getSensorAlertLevels(sensorId, logger)
+
+
+	def getAlertAlertLevels(self, alertId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger) and alertId in self.alerts:
+				return list(self.alerts[alertId].alertLevels)
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getAlertAlertLevels(alertId, logger)
+
+
+	def getAllAlertsAlertLevels(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				alertLevels = list()
+				for alertObj in self.alerts.values():
+					alertLevels.extend(alertObj.alertLevels)
+				return alertLevels
+
+		return self.backend.getAllAlertsAlertLevels(logger)
+
+
+	def getAllSensorsAlertLevels(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				alertLevels = list()
+				for sensorObj in self.sensors.values():
+					alertLevels.extend(sensorObj.alertLevels)
+				return alertLevels
+
+		return self.backend.getAllSensorsAlertLevels(logger)
+
+
+	def getAllConnectedNodeIds(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				return [nodeObj.id for nodeObj in self.nodes.values()
+					if nodeObj.connected]
+
+		return self.backend.getAllConnectedNodeIds(logger)
+
+
+	def getAllPersistentNodeIds(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				return [nodeObj.id for nodeObj in self.nodes.values()
+					if nodeObj.persistent]
+
+		return self.backend.getAllPersistentNodeIds(logger)
+
+
+	def getSensorsUpdatedOlderThan(self, oldestTimeUpdated, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				sensorList = list()
+				for sensorId in sorted(self.sensors.keys()):
+					sensorObj = self.sensors[sensorId]
+					if sensorObj.lastStateUpdated < oldestTimeUpdated:
+						sensorList.append(self._copyObj(sensorObj))
+				return sensorList
+
+		return self.backend.getSensorsUpdatedOlderThan(oldestTimeUpdated,
+			logger)
+
+
+	def getAlertById(self, alertId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger) and alertId in self.alerts:
+				return self._copyObj(self.alerts[alertId])
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getAlertById(alertId, logger)
+
+
+	def getManagerById(self, managerId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger) and managerId in self.managers:
+				return self._copyObj(self.managers[managerId])
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getManagerById(managerId, logger)
+
+
+	def getNodeById(self, nodeId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger) and nodeId in self.nodes:
+				return self._copyObj(self.nodes[nodeId])
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getNodeById(nodeId, logger)
+
+
+	def getSensorById(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger) and sensorId in self.sensors:
+				return self._copyObj(self.sensors[sensorId])
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getSensorById(sensorId, logger)
+
+
+	def getNodes(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				return [self._copyObj(self.nodes[nodeId])
+					for nodeId in sorted(self.nodes.keys())]
+
+		return self.backend.getNodes(logger)
+
+
+	def getAlertSystemInformation(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger):
+				alertSystemInformation = list()
+				alertSystemInformation.append(
+					[self._copyObj(self.options[optionType])
+					for optionType in sorted(self.options.keys())])
+				alertSystemInformation.append(
+					[self._copyObj(self.nodes[nodeId])
+					for nodeId in sorted(self.nodes.keys())])
+				alertSystemInformation.append(
+					[self._copyObj(self.sensors[sensorId])
+					for sensorId in sorted(self.sensors.keys())])
+				alertSystemInformation.append(
+					[self._copyObj(self.managers[managerId])
+					for managerId in sorted(self.managers.keys())])
+				alertSystemInformation.append(
+					[self._copyObj(self.alerts[alertId])
+					for alertId in sorted(self.alerts.keys())])
+				return alertSystemInformation
+
+		return self.backend.getAlertSystemInformation(logger)
+
+
+	def getSensorState(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger) and sensorId in self.sensors:
+				return self.sensors[sensorId].state
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getSensorState(sensorId, logger)
+
+
+	def getSensorData(self, sensorId, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if self._loadCache(logger) and sensorId in self.sensors:
+				sensorObj = self.sensors[sensorId]
+				data = SensorData()
+				data.sensorId = sensorId
+				data.dataType = sensorObj.dataType
+				data.data = sensorObj.data
+				return data
+
+		# Let the storage backend handle unknown entries.
+		return self.backend.getSensorData(sensorId, logger)
+
+
+	def isAlertSystemActive(self, logger=None):
+
+		# Set logger instance to use.
+		if not logger:
+			logger = self.logger
+
+		with self.cacheLock:
+			if (self._loadCache(logger)
+				and "alertSystemActive" in self.options):
+				return self.options["alertSystemActive"].value == 1
+
+		return self.backend.isAlertSystemActive(logger)
+
+
+	def changeOption(self, optionType, optionValue, logger=None):
+
+		def applyResult(result):
+			if not result or optionType not in self.options:
+				return False
+			self.options[optionType].value = optionValue
+			return True
+
+		return self._write(("option", optionType),
+			lambda: self.backend.changeOption(optionType, optionValue,
+			logger), applyResult)
+
+
+	def markNodeAsNotConnected(self, nodeId, logger=None):
+
+		def applyResult(result):
+			if not result or nodeId not in self.nodes:
+				return False
+			self.nodes[nodeId].connected = False
+			return True
+
+		return self._write(("node", nodeId),
+			lambda: self.backend.markNodeAsNotConnected(nodeId, logger),
+			applyResult)
+
+
+	def markNodeAsConnected(self, nodeId, logger=None):
+
+		def applyResult(result):
+			if not result or nodeId not in self.nodes:
+				return False
+			self.nodes[nodeId].connected = True
+			return True
+
+		return self._write(("node", nodeId),
+			lambda: self.backend.markNodeAsConnected(nodeId, logger),
+			applyResult)
+
+
+	def updateSensorState(self, nodeId, stateList, logger=None):
+
+		def applyResult(result):
+			if not result:
+				return False
+
+			# NOTE: the storage backend sets the same time (if the second
+			# changes in between, the cached time differs by one second).
+			utcTimestamp = int(time.time())
+			for stateTuple in stateList:
+				sensorId = self.sensorIdsByRemoteId.get(
+					(nodeId, stateTuple[0]))
+				if sensorId is None:
+					return False
+				self.sensors[sensorId].state = stateTuple[1]
+				self.sensors[sensorId].lastStateUpdated = utcTimestamp
+			return True
+
+		return self._write(("sensors", nodeId),
+			lambda: self.backend.updateSensorState(nodeId, stateList,
+			logger), applyResult)
+
+
+	def updateSensorData(self, nodeId, dataList, logger=None):
+
+		def applyResult(result):
+			if not result:
+				return False
+
+			for dataTuple in dataList:
+				sensorId = self.sensorIdsByRemoteId.get(
+					(nodeId, dataTuple[0]))
+				if sensorId is None:
+					return False
+				if self.sensors[sensorId].dataType != SensorDataType.NONE:
+					self.sensors[sensorId].data = dataTuple[1]
+			return True
+
+		return self._write(("sensors", nodeId),
+			lambda: self.backend.updateSensorData(nodeId, dataList, logger),
+			applyResult)
+
+
+	def updateSensorTime(self, sensorId, logger=None):
+
+		def applyResult(result):
+			if not result or sensorId not in self.sensors:
+				return False
+			self.sensors[sensorId].lastStateUpdated = int(time.time())
+			return True
+
+		# The time is set to the current time by all writes
+		# (their order does not matter).
+		return self._write(("sensorTime", sensorId),
+			lambda: self.backend.updateSensorTime(sensorId, logger),
+			applyResult)
+
+
+	def ingestSensorAlert(self, nodeId, sensorId, state, dataJson,
+		changeState, hasLatestData, dataType, sensorData, storeSensorAlert,
+		logger=None):
+
+		def applyResult(result):
+			if result is None or sensorId not in self.sensors:
+				return False
+
+			sensor = self.sensors[sensorId]
+			if changeState:
+				sensor.state = state
+			if hasLatestData and sensor.dataType != SensorDataType.NONE:
+				sensor.data = sensorData
+			sensor.lastStateUpdated = int(time.time())
+			return True
+
+		return self._write(("sensors", nodeId),
+			lambda: self.backend.ingestSensorAlert(nodeId, sensorId, state,
+			dataJson, changeState, hasLatestData, dataType, sensorData,
+			storeSensorAlert, logger), applyResult)
+
+
+	def ingestStateChange(self, nodeId, sensorId, state, sensorData,
+		logger=None):
+
+		def applyResult(result):
+			if not result or sensorId not in self.sensors:
+				return False
+
+			sensor = self.sensors[sensorId]
+			sensor.state = state
+			if sensor.dataType != SensorDataType.NONE:
+				sensor.data = sensorData
+			sensor.lastStateUpdated = int(time.time())
+			return True
+
+		return self._write(("sensors", nodeId),
+			lambda: self.backend.ingestStateChange(nodeId, sensorId, state,
+			sensorData, logger), applyResult)
+
+
+	def close(self, logger=None):
+		self.backend.close(logger)
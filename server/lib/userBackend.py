@@ -13,6 +13,9 @@ import os
 import StringIO
 import bcrypt
 import threading
+import hmac
+import hashlib
+import time
 
 
 # Class that holds user data information.
@@ -110,6 +113,24 @@ class CSVBackend(_userBackend):
 
 		self.userDataLock = threading.BoundedSemaphore(1)
 
+		# Semaphore that bounds the number of bcrypt verifications that
+		# run at the same time (they run outside of the user data lock).
+		self.verifySemaphore = threading.BoundedSemaphore(
+			self.globalData.userBackendVerifyWorkers)
+
+		# Cache of successful verifications (key is the username,
+		# value is a tuple (pwhash, keyed hash of the password, expiry time)).
+		# The password itself is not stored, only a hash with a key that is
+		# randomly generated on each start.
+		self.verifyCache = dict()
+		self.verifyCacheKey = os.urandom(32)
+		self.verifyCacheTime = self.globalData.userBackendCacheTime
+
+		# Stores all user credentials as an object (the list keeps the
+		# order of the file, the dict is the index by username).
+		self.userCredentials = list()
+		self.userCredentialsByName = dict()
+
 		self.csvLocation = csvLocation
 
 		# CSV version in case we have to change it.
@@ -133,9 +154,10 @@ class CSVBackend(_userBackend):
 		self.userDataLock.release()
 
 
-	# Parses the data in csv version 0.
+	# Parses the data in csv version 0 into the given list and dict.
 	# Does not acquire or release the lock.
-	def _parseVersion0(self, csvData):
+	def _parseVersion0(self, csvData, userCredentials,
+		userCredentialsByName):
 		for row in csvData:
 			if row[0].find('#') != -1:
 				continue
@@ -148,8 +170,7 @@ class CSVBackend(_userBackend):
 			instance = row[3].replace(' ', '')
 
 			# Check if username has a duplicate.
-			if any(map(lambda x : x.username == username,
-				self.userCredentials)):
+			if username in userCredentialsByName:
 
 				self.logger.error("[%s]: Username '%s' already exists "
 					% (self.fileName, username)
@@ -159,12 +180,14 @@ class CSVBackend(_userBackend):
 
 			pwhash = bcrypt.hashpw(password, bcrypt.gensalt())
 			userData = UserData(username, pwhash, nodeType, instance)
-			self.userCredentials.append(userData)
+			userCredentials.append(userData)
+			userCredentialsByName[username] = userData
 
 
-	# Parses the data in csv version 1.
+	# Parses the data in csv version 1 into the given list and dict.
 	# Does not acquire or release the lock.
-	def _parseVersion1(self, csvData):
+	def _parseVersion1(self, csvData, userCredentials,
+		userCredentialsByName):
 		for row in csvData:
 			if row[0].find('#') != -1:
 				continue
@@ -177,8 +200,7 @@ class CSVBackend(_userBackend):
 			instance = row[3].replace(' ', '')
 
 			# Check if username has a duplicate.
-			if any(map(lambda x : x.username == username,
-				self.userCredentials)):
+			if username in userCredentialsByName:
 
 				self.logger.error("[%s]: Username '%s' already exists "
 					% (self.fileName, username)
@@ -187,7 +209,21 @@ class CSVBackend(_userBackend):
 				continue
 
 			userData = UserData(username, pwhash, nodeType, instance)
-			self.userCredentials.append(userData)
+			userCredentials.append(userData)
+			userCredentialsByName[username] = userData
+
+
+	# Internal function that computes the keyed hash of the credentials
+	# that is stored in the cache of successful verifications.
+	def _getVerifyCacheHash(self, username, password):
+		return hmac.new(self.verifyCacheKey, username + "\0" + password,
+			hashlib.sha256).digest()
+
+
+	# Internal function that clears the cache of successful verifications
+	# (has to be called when the user data changes).
+	def _clearVerifyCache(self):
+		self.verifyCache = dict()
 
 
 	# Extracts the version from the file.
@@ -206,29 +242,38 @@ class CSVBackend(_userBackend):
 
 
 	# This function checks if the user credentials are valid.
+	# The user data is looked up without the lock and bcrypt runs
+	# outside of it (the user data is only replaced as a whole).
 	#
 	# return True or False
 	def areUserCredentialsValid(self, username, password):
 
-		self._acquireLock()
+		userData = self.userCredentialsByName.get(username)
+		if userData is None:
+			return False
 
-		# Check all usernames if the given username exist
-		# and then if the password is the correct one.
-		for userData in self.userCredentials:
+		# Check if the credentials were verified shortly before.
+		pwhash = userData.pwhash
+		if self.verifyCacheTime > 0:
+			credentialsHash = self._getVerifyCacheHash(username, password)
+			cacheEntry = self.verifyCache.get(username)
+			if (cacheEntry is not None
+				and cacheEntry[0] == pwhash
+				and cacheEntry[2] > time.time()
+				and hmac.compare_digest(cacheEntry[1], credentialsHash)):
+				return True
 
-			if userData.username != username:
-				continue
+		self.verifySemaphore.acquire()
+		try:
+			valid = bcrypt.checkpw(password, pwhash)
+		finally:
+			self.verifySemaphore.release()
 
-			else:
-				if bcrypt.checkpw(password, userData.pwhash):
-					self._releaseLock()
-					return True
-				else:
-					self._releaseLock()
-					return False
+		if valid and self.verifyCacheTime > 0:
+			self.verifyCache[username] = (pwhash, credentialsHash,
+				time.time() + self.verifyCacheTime)
 
-		self._releaseLock()
-		return False
+		return valid
 
 
 	# This function checks if the node type and instance of the client
@@ -239,23 +284,15 @@ class CSVBackend(_userBackend):
 
 		self._acquireLock()
 
-		# check all usernames if the given username exists
+		# check if the given username exists
 		# and then check the given node type and instance
-		for userData in self.userCredentials:
-
-			if userData.username != username:
-				continue
+		userData = self.userCredentialsByName.get(username)
+		if (userData is not None
+			and userData.nodeType.upper() == nodeType.upper()
+			and userData.instance.upper() == instance.upper()):
 
-			else:
-				if (userData.nodeType.upper() == nodeType.upper()
-					and userData.instance.upper() == instance.upper()):
-
-					self._releaseLock()
-					return True
-
-				else:
-					self._releaseLock()
-					return False
+			self._releaseLock()
+			return True
 
 		self._releaseLock()
 		return False
@@ -268,12 +305,8 @@ class CSVBackend(_userBackend):
 
 		self._acquireLock()
 
-		# Check all usernames if the given username exists.
-		found = False
-		for userData in self.userCredentials:
-			if userData.username == username:
-				found = True
-				break
+		# Check if the given username exists.
+		found = username in self.userCredentialsByName
 
 		self._releaseLock()
 
@@ -288,8 +321,11 @@ class CSVBackend(_userBackend):
 
 		self._acquireLock()
 
-		# Stores all user credentials as an object.
-		self.userCredentials = list()
+		# Stores all user credentials as an object (the user data is
+		# replaced as a whole after parsing because it is read without
+		# the lock).
+		userCredentials = list()
+		userCredentialsByName = dict()
 
 		# Check users.csv file exists before parsing.
 		version = 0
@@ -306,9 +342,11 @@ class CSVBackend(_userBackend):
 
 			# Parse the csv file according to the version.
 			if version == 0:
-				self._parseVersion0(csvData)
+				self._parseVersion0(csvData, userCredentials,
+					userCredentialsByName)
 			elif version == 1:
-				self._parseVersion1(csvData)
+				self._parseVersion1(csvData, userCredentials,
+					userCredentialsByName)
 			else:
 				self.logger.error("[%s]: Do not know how to parse CSV file "
 					% self.fileName
@@ -319,6 +357,10 @@ class CSVBackend(_userBackend):
 			self.logger.error("[%s]: No CSV file found."
 				% self.fileName)
 
+		self.userCredentials = userCredentials
+		self.userCredentialsByName = userCredentialsByName
+		self._clearVerifyCache()
+
 		self._releaseLock()
 
 		# Write user data back if we have changed the csv file format.
@@ -363,6 +405,8 @@ class CSVBackend(_userBackend):
 		with open(self.csvLocation, 'wb') as csvFile:
 			csvFile.write(fileData)
 
+		self._clearVerifyCache()
+
 		self._releaseLock()
 
 
@@ -378,8 +422,7 @@ class CSVBackend(_userBackend):
 		self._acquireLock()
 
 		# Check if username has a duplicate.
-		if any(map(lambda x : x.username == username,
-			self.userCredentials)):
+		if username in self.userCredentialsByName:
 
 			self.logger.error("[%s]: Username '%s' already exists "
 				% (self.fileName, username)
@@ -391,6 +434,7 @@ class CSVBackend(_userBackend):
 		pwhash = bcrypt.hashpw(password, bcrypt.gensalt())
 		userData = UserData(username, pwhash, nodeType, instance)
 		self.userCredentials.append(userData)
+		self.userCredentialsByName[username] = userData
 
 		self._releaseLock()
 
@@ -408,11 +452,12 @@ class CSVBackend(_userBackend):
 
 		self._acquireLock()
 
-		for userData in self.userCredentials:
-			if userData.username == username:
-				self.userCredentials.remove(userData)
-				self._releaseLock()
-				return True
+		userData = self.userCredentialsByName.pop(username, None)
+		if userData is not None:
+			self.userCredentials.remove(userData)
+			self._clearVerifyCache()
+			self._releaseLock()
+			return True
 
 		self.logger.error("[%s]: Not able to find username '%s'."
 			% (self.fileName, username))
@@ -433,12 +478,13 @@ class CSVBackend(_userBackend):
 
 		self._acquireLock()
 
-		for userData in self.userCredentials:
-			if userData.username == username:
-				pwhash = bcrypt.hashpw(password, bcrypt.gensalt())
-				userData.pwhash = pwhash
-				self._releaseLock()
-				return True
+		userData = self.userCredentialsByName.get(username)
+		if userData is not None:
+			pwhash = bcrypt.hashpw(password, bcrypt.gensalt())
+			userData.pwhash = pwhash
+			self._clearVerifyCache()
+			self._releaseLock()
+			return True
 
 		self.logger.error("[%s]: Not able to find username '%s'."
 			% (self.fileName, username))
@@ -467,12 +513,12 @@ class CSVBackend(_userBackend):
 
 		self._acquireLock()
 
-		for userData in self.userCredentials:
-			if userData.username == username:
-				userData.nodeType = nodeType
-				userData.instance = instance
-				self._releaseLock()
-				return True
+		userData = self.userCredentialsByName.get(username)
+		if userData is not None:
+			userData.nodeType = nodeType
+			userData.instance = instance
+			self._releaseLock()
+			return True
 
 		self.logger.error("[%s]: Not able to find username '%s'."
 			% (self.fileName, username))
@@ -220,12 +220,12 @@ class VersionInformer(threading.Thread):
 								+ "change sensor state for internal "
 								+ "version informer sensor.")
 
-					# Add sensor alert to database for processing.
+					# Add sensor alert for processing.
 					message = "Update checking failed %d " \
 						%  updateFailCount \
 						+ "times in a row."
 					dataJson = json.dumps({"message": message})
-					if self.storage.addSensorAlert(
+					if self.sensorAlertExecuter.addSensorAlert(
 						self.versionInformerSensor.nodeId, # nodeId
 						self.versionInformerSensor.sensorId, # sensorId
 						self.versionInformerSensor.state, # state
@@ -433,8 +433,8 @@ class VersionInformer(threading.Thread):
 													"newVersion": newVersion,
 													"newRev": newRev})
 
-							# Add sensor alert to database for processing.
-							if self.storage.addSensorAlert(
+							# Add sensor alert for processing.
+							if self.sensorAlertExecuter.addSensorAlert(
 								self.versionInformerSensor.nodeId, # nodeId
 								self.versionInformerSensor.sensorId, # sensorId
 								self.versionInformerSensor.state, # state
@@ -483,8 +483,8 @@ class VersionInformer(threading.Thread):
 						+ "change sensor state for internal "
 						+ "version informer sensor.")
 
-				# Add sensor alert to database for processing.
-				if self.storage.addSensorAlert(
+				# Add sensor alert for processing.
+				if self.sensorAlertExecuter.addSensorAlert(
 					self.versionInformerSensor.nodeId, # nodeId
 					self.versionInformerSensor.sensorId, # sensorId
 					self.versionInformerSensor.state, # state
@@ -0,0 +1,108 @@
+#!/usr/bin/python2
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: http://blog.h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+from lib import GlobalData
+from lib import SensorHistory
+import logging
+import optparse
+import xml.etree.ElementTree
+import time
+import sys
+import os
+
+
+# Function creates a path location for the given user input.
+def makePath(inputLocation):
+	# Do nothing if the given location is an absolute path.
+	if inputLocation[0] == "/":
+		return inputLocation
+	# Replace ~ with the home directory.
+	elif inputLocation[0] == "~":
+		return os.environ["HOME"] + inputLocation[1:]
+	# Assume we have a given relative path.
+	return os.path.dirname(os.path.abspath(__file__)) + "/" + inputLocation
+
+
+if __name__ == '__main__':
+
+	# Parsing command line options.
+	parser = optparse.OptionParser()
+
+	parser.add_option("-s",
+		"--sensorId",
+		dest="sensorId",
+		action="store",
+		type="int",
+		help="Id of the sensor in the database of the server.",
+		default=None)
+	parser.add_option("-r",
+		"--resolution",
+		dest="resolution",
+		action="store",
+		type="int",
+		help="Resolution of the history in seconds (0 for the received "
+			+ "data, 60, 3600 or 86400). (Optional)",
+		default=3600)
+	parser.add_option("-H",
+		"--hours",
+		dest="hours",
+		action="store",
+		type="int",
+		help="Number of hours before now the history is shown for. "
+			+ "(Optional)",
+		default=24)
+
+	(options, args) = parser.parse_args()
+
+	if options.sensorId is None:
+		print("Use --help to get all available options.")
+		sys.exit(0)
+
+	# Generate object of the global needed data.
+	globalData = GlobalData()
+	logging.basicConfig(level=logging.WARNING)
+	globalData.logger = logging.getLogger("server")
+
+	fileName = os.path.basename(__file__)
+
+	# Parse the directory of the history of the sensor data.
+	try:
+		configRoot = xml.etree.ElementTree.parse(
+			globalData.configFile).getroot()
+
+		# Configs of older versions do not contain the settings of
+		# the history.
+		sensorHistoryItem = configRoot.find("storage").find("sensorHistory")
+		if (sensorHistoryItem is None
+			or str(sensorHistoryItem.attrib["activated"]).upper() != "TRUE"):
+			print("History of the sensor data is not activated.")
+			sys.exit(1)
+
+		globalData.sensorHistoryDirectory = makePath(str(
+			sensorHistoryItem.attrib["directory"]))
+
+	except Exception as e:
+		logging.exception("[%s]: Could not parse config." % fileName)
+		sys.exit(1)
+
+	# The history is only read (the thread that writes it is not started).
+	sensorHistory = SensorHistory(globalData)
+
+	endTime = int(time.time())
+	startTime = endTime - (options.hours * 3600)
+	dataList = sensorHistory.getSensorData(options.sensorId, startTime,
+		endTime, options.resolution)
+	if dataList is None:
+		sys.exit(1)
+
+	print("%-20s %16s %16s %16s" % ("time", "min", "max", "average"))
+	for timestamp, minValue, maxValue, average in dataList:
+		print("%-20s %16.3f %16.3f %16.3f"
+			% (time.strftime("%Y-%m-%d %H:%M:%S",
+			time.localtime(timestamp)), minValue, maxValue, average))
@@ -0,0 +1,374 @@
+#!/usr/bin/python2
+
+# written by sqall
+# twitter: https://twitter.com/sqall01
+# blog: http://blog.h4des.org
+# github: https://github.com/sqall01
+#
+# Licensed under the GNU Affero General Public License, version 3.
+
+from lib import Sqlite
+from lib import Memory
+from lib import CachedStorage
+from lib import TimedStorage
+from lib import GlobalData
+from lib import SensorDataType
+import logging
+import optparse
+import tempfile
+import shutil
+import threading
+import json
+import sys
+
+
+# Function that converts the given results into a form that can be
+# compared between the storage backends (objects are converted into
+# dictionaries without the attributes that contain the current time).
+def normalize(result):
+
+	if isinstance(result, (list, tuple)):
+		return map(normalize, result)
+
+	if hasattr(result, "__dict__"):
+		attributes = dict(vars(result))
+		for timeAttribute in ["lastStateUpdated", "timeReceived"]:
+			if timeAttribute in attributes:
+				del attributes[timeAttribute]
+		return normalize(attributes)
+
+	if isinstance(result, dict):
+		normalized = dict()
+		for key in result.keys():
+			normalized[key] = normalize(result[key])
+		return normalized
+
+	return json.loads(json.dumps(result))
+
+
+# Function that returns all data of the given storage backend that is
+# compared between the backends.
+def getState(storage):
+
+	# The order of the node ids is not defined.
+	nodeIds = sorted(storage.getNodeIds())
+
+	state = list()
+	state.append(nodeIds)
+	state.append(storage.getSurveyData())
+	state.append(storage.getNodes())
+	state.append(storage.getAlertSystemInformation())
+	state.append(storage.getSensorAlerts())
+	state.append(storage.isAlertSystemActive())
+	state.append(sorted(storage.getAllAlertsAlertLevels()))
+	state.append(sorted(storage.getAllSensorsAlertLevels()))
+	state.append(storage.getAllConnectedNodeIds())
+	state.append(storage.getAllPersistentNodeIds())
+	state.append(storage.getSensorsUpdatedOlderThan(2**31))
+
+	for nodeId in nodeIds:
+		state.append(storage.getSensorCount(nodeId))
+		for remoteId in range(4):
+			state.append(storage.getSensorId(nodeId, remoteId))
+			state.append(storage.getAlertId(nodeId, remoteId))
+
+	for objectId in range(1, 5):
+		state.append(storage.getSensorState(objectId))
+		state.append(storage.getSensorData(objectId))
+		state.append(storage.getSensorAlertLevels(objectId))
+		state.append(storage.getAlertAlertLevels(objectId))
+
+	return normalize(state)
+
+
+# Function that executes the operations that are compared between the
+# storage backends and returns their results.
+def runOperations(storage):
+
+	results = list()
+
+	# Add nodes, sensors, alerts and a manager.
+	results.append(storage.addNode("sensorNode", "host1", "sensor",
+		"instance", 0.5, 1, 1))
+	results.append(storage.addSensors("sensorNode", [
+		{"clientSensorId": 0, "description": "sensor none", "state": 0,
+			"alertDelay": 0, "alertLevels": [0, 1],
+			"dataType": SensorDataType.NONE},
+		{"clientSensorId": 1, "description": "sensor int", "state": 1,
+			"alertDelay": 5, "alertLevels": [2],
+			"dataType": SensorDataType.INT, "data": 7},
+		{"clientSensorId": 2, "description": "sensor float", "state": 0,
+			"alertDelay": 0, "alertLevels": [3],
+			"dataType": SensorDataType.FLOAT, "data": 1.5}]))
+	results.append(storage.addNode("alertNode", "host2", "alert",
+		"instance", 0.5, 1, 0))
+	results.append(storage.addAlerts("alertNode", [
+		{"clientAlertId": 0, "description": "alert", "alertLevels": [1, 2]}]))
+	results.append(storage.addNode("managerNode", "host3", "manager",
+		"instance", 0.5, 1, 0))
+	results.append(storage.addManager("managerNode",
+		{"description": "manager"}))
+	results.append(storage.markNodeAsConnected(1))
+	results.append(storage.markNodeAsConnected(3))
+	results.append(storage.markNodeAsNotConnected(3))
+
+	# Update sensors (also unknown sensors).
+	results.append(storage.updateSensorState(1, [(0, 1), (2, 1)]))
+	results.append(storage.updateSensorData(1, [(1, 11), (2, 2.5)]))
+	results.append(storage.updateSensorState(1, [(9, 1)]))
+	results.append(storage.updateSensorTime(1))
+	results.append(storage.changeOption("alertSystemActive", 1))
+	results.append(storage.changeOption("unknownOption", 1))
+
+	# Ingest sensor alerts and state changes (also of unknown sensors).
+	results.append(storage.ingestSensorAlert(1, 1, 0, "", True, True,
+		SensorDataType.INT, 9, True))
+	results.append(storage.ingestSensorAlert(1, 2, 1,
+		json.dumps({"message": "optional"}), False, False,
+		SensorDataType.FLOAT, 2.5, True))
+	results.append(storage.ingestSensorAlert(1, 0, 0, "", True, False,
+		SensorDataType.NONE, None, False))
+	results.append(storage.ingestSensorAlert(1, 9, 1, "", True, True,
+		SensorDataType.INT, 9, True))
+	results.append(storage.ingestStateChange(1, 2, 0, 3.5))
+	results.append(storage.ingestStateChange(1, 9, 0, None))
+
+	# Insert, get and delete sensor alerts.
+	results.append(storage.addSensorAlert(1, 0, 1, "", True, False,
+		SensorDataType.NONE, None))
+	results.append(storage.getSensorAlerts())
+	results.append(storage.deleteSensorAlert(1))
+	results.append(storage.getSensorAlerts())
+
+	# Update the already added nodes.
+	results.append(storage.addSensors("sensorNode", [
+		{"clientSensorId": 0, "description": "sensor none changed",
+			"state": 0, "alertDelay": 3, "alertLevels": [0, 4],
+			"dataType": SensorDataType.INT, "data": 4},
+		{"clientSensorId": 1, "description": "sensor int", "state": 1,
+			"alertDelay": 5, "alertLevels": [2],
+			"dataType": SensorDataType.INT, "data": 7}]))
+	results.append(storage.addAlerts("alertNode", [
+		{"clientAlertId": 0, "description": "alert changed",
+			"alertLevels": [2]},
+		{"clientAlertId": 1, "description": "alert new",
+			"alertLevels": [5]}]))
+	results.append(storage.addManager("managerNode",
+		{"description": "manager changed"}))
+	results.append(storage.addNode("sensorNode", "host4", "sensor",
+		"instance", 0.6, 2, 1))
+
+	return normalize(results)
+
+
+# Function that stops the memory storage backend like a crashed server
+# (the journal is not compacted into a snapshot).
+def stopMemory(storage):
+
+	storage.journalExitFlag = True
+	storage.journalEvent.set()
+	storage.journalThread.join()
+	storage.journalThread = None
+	storage.journal.close()
+
+
+# Function that creates the memory storage backend with the given
+# journal sync.
+def createMemory(globalData, directory, journalSync):
+	globalData.storageBackendMemoryJournalSync = journalSync
+	return Memory(directory + "/database_%s.json" % journalSync, globalData)
+
+
+# Function that writes from the given number of threads at the same time
+# through the storage stack the server uses (cached and timed sqlite
+# storage backend with group commit) and checks that the writes are
+# committed together and that each caller gets its own result.
+#
+# return True or False
+def checkGroupCommit(directory, writerCount, writeCount):
+
+	globalData = GlobalData()
+	globalData.logger = logging.getLogger("test")
+	globalData.storageGroupCommit = True
+
+	storage = CachedStorage(TimedStorage(Sqlite(directory
+		+ "/database_groupcommit.db", globalData), globalData.metrics),
+		globalData)
+
+	storage.addNode("sensorNode", "host", "sensor", "instance", 0.5, 1, 1)
+	sensors = list()
+	for i in range(writerCount):
+		sensors.append({"clientSensorId": i,
+			"description": "sensor %d" % i,
+			"state": 0,
+			"alertDelay": 0,
+			"alertLevels": [0],
+			"dataType": SensorDataType.INT,
+			"data": 0})
+	storage.addSensors("sensorNode", sensors)
+	sensorIds = [storage.getSensorId(1, i) for i in range(writerCount)]
+
+	# Results of the callers (tuples of (sensorAlertId, sensorId, data))
+	# and results of the writes of an unknown sensor.
+	writeResults = list()
+	failingResults = list()
+
+	def writeSensorAlerts(sensorId):
+		for i in range(writeCount):
+			sensorData = sensorId * 1000 + i
+			sensorAlertId = storage.ingestSensorAlert(1, sensorId, i % 2,
+				"", True, True, SensorDataType.INT, sensorData, True)
+			writeResults.append((sensorAlertId, sensorId, sensorData))
+			failingResults.append(storage.ingestStateChange(1, 999, 0,
+				None))
+
+	threads = list()
+	for sensorId in sensorIds:
+		thread = threading.Thread(target=writeSensorAlerts,
+			args=(sensorId,))
+		thread.start()
+		threads.append(thread)
+	for thread in threads:
+		thread.join()
+
+	success = True
+
+	metricsValues = globalData.metrics.values
+	commitCount = metricsValues.get(("alertr_storage_group_commits_total",
+		()), 0)
+	callerCount = metricsValues.get((
+		"alertr_storage_group_commit_callers_total", ()), 0)
+	print("     %d callers in %d group commits" % (callerCount, commitCount))
+	success &= check("group commits with more than one caller", [True],
+		[callerCount > commitCount])
+
+	storedResults = list()
+	for sensorAlert in storage.getSensorAlerts():
+		storedResults.append((sensorAlert.sensorAlertId,
+			sensorAlert.sensorId, sensorAlert.sensorData))
+	success &= check("own result for each caller", sorted(writeResults),
+		sorted(storedResults))
+	success &= check("failing writes in group commits",
+		[False] * len(failingResults), failingResults)
+
+	lastData = [sensorId * 1000 + writeCount - 1 for sensorId in sensorIds]
+	success &= check("cached data after group commits", lastData,
+		[storage.getSensorData(sensorId).data for sensorId in sensorIds])
+
+	storage.close()
+
+	return success
+
+
+# Function that compares the given results and prints the outcome.
+def check(description, expected, result):
+
+	if expected == result:
+		print("OK   %s" % description)
+		return True
+
+	print("FAIL %s" % description)
+	for i in range(max(len(expected), len(result))):
+		expectedElement = expected[i] if i < len(expected) else None
+		resultElement = result[i] if i < len(result) else None
+		if expectedElement != resultElement:
+			print("     element %d: expected %s, got %s"
+				% (i, expectedElement, resultElement))
+	return False
+
+
+if __name__ == '__main__':
+
+	# Parsing command line options.
+	parser = optparse.OptionParser()
+
+	parser.add_option("-j",
+		"--journalSync",
+		dest="journalSync",
+		action="store",
+		help="Comma separated list of the journal syncs of the memory "
+			+ "storage backend to test. (Optional)",
+		default="commit,batch,interval")
+	parser.add_option("-c",
+		"--compactLimit",
+		dest="compactLimit",
+		action="store",
+		type="int",
+		help="Number of transactions after which the journal of the "
+			+ "memory storage backend is compacted. (Optional)",
+		default=5)
+	parser.add_option("-w",
+		"--writers",
+		dest="writers",
+		action="store",
+		type="int",
+		help="Number of threads that write at the same time with "
+			+ "group commit. (Optional)",
+		default=20)
+
+	(options, args) = parser.parse_args()
+
+	# Generate object of the global needed data.
+	globalData = GlobalData()
+	logging.basicConfig(level=logging.CRITICAL)
+	globalData.logger = logging.getLogger("test")
+	globalData.storageBackendMemoryCompactLimit = options.compactLimit
+	globalData.storageBackendMemoryJournalSyncInterval = 10
+
+	success = True
+	directory = tempfile.mkdtemp()
+	try:
+		sqlite = Sqlite(directory + "/database.db", globalData)
+		expectedResults = runOperations(sqlite)
+		expectedState = getState(sqlite)
+
+		sqlite.addSensorAlert(1, 1, 1, "", False, True,
+			SensorDataType.INT, 12)
+		expectedStateAfterRestart = getState(sqlite)
+
+		sqlite.close()
+
+		for journalSync in options.journalSync.split(","):
+
+			print("Memory storage backend with journal sync '%s':"
+				% journalSync)
+
+			memory = createMemory(globalData, directory, journalSync)
+			success &= check("operations", expectedResults,
+				runOperations(memory))
+			success &= check("state", expectedState, getState(memory))
+			uniqueId = memory.getUniqueID()
+
+			# Restart from the snapshot and the journal.
+			stopMemory(memory)
+			memory = createMemory(globalData, directory, journalSync)
+			success &= check("restart from snapshot and journal",
+				expectedState, getState(memory))
+			success &= check("unique id after restart", [uniqueId],
+				[memory.getUniqueID()])
+
+			# Restart with a partly written last line of the journal.
+			memory.addSensorAlert(1, 1, 1, "", False, True,
+				SensorDataType.INT, 12)
+			stopMemory(memory)
+			with open(memory.journalPath, "ab") as fp:
+				fp.write("[[\"sensorAlerts\", 99, {\"nodeId\": ")
+			memory = createMemory(globalData, directory, journalSync)
+			success &= check("restart with truncated last journal line",
+				expectedStateAfterRestart, getState(memory))
+
+			# Restart after a clean shutdown.
+			memory.close()
+			memory = createMemory(globalData, directory, journalSync)
+			success &= check("restart after close",
+				expectedStateAfterRestart, getState(memory))
+			memory.close()
+
+		print("Cached sqlite storage backend with group commit:")
+		success &= checkGroupCommit(directory, options.writers, 25)
+
+	finally:
+		shutil.rmtree(directory)
+
+	if not success:
+		sys.exit(1)